@@ -4,6 +4,7 @@ import os
 
 # 고빈도 스캘핑을 위한 타겟 코인 목록
 from constants import SCALPING_TARGET_COINS
+from core.arrow_loader import open_mapped
 
 
 class AdvancedBacktester:
@@ -75,8 +76,7 @@ class AdvancedBacktester:
                 self.cache_dir, f"{ticker.replace('/', '_')}_1m.feather"
             )
             if os.path.exists(cache_path):
-                df = pd.read_feather(cache_path).set_index("timestamp")
-                df = df[(df.index >= self.start_date) & (df.index <= self.end_date)]
+                df = open_mapped(cache_path).frame(self.start_date, self.end_date, inclusive_end=True)
                 df["ticker"] = ticker
                 all_data.append(df)
 
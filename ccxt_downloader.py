@@ -2,8 +2,9 @@ import ccxt
 import pandas as pd
 from datetime import datetime, timedelta
 import os
-import time
 import argparse
+from core.rate_limiter import get_rate_limiter, PRIORITY_UNIVERSE
+from core.candle_store import CandleStore
 
 # 고빈도 스캘핑을 위한 타겟 코인 목록
 SCALPING_TARGET_COINS = ["BTC/KRW", "ETH/KRW", "XRP/KRW", "SOL/KRW", "DOGE/KRW"]
@@ -11,10 +12,12 @@ SCALPING_TARGET_COINS = ["BTC/KRW", "ETH/KRW", "XRP/KRW", "SOL/KRW", "DOGE/KRW"]
 class CCXTDataDownloader:
     def __init__(self, limit: int = 200):
         self.exchange = ccxt.upbit()
+        self.rate_limiter = get_rate_limiter() # 같은 프로세스의 다른 Upbit 요청과 한도를 공유
         self.data_dir = "data"
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
         self.limit = limit
+        self.store = CandleStore(os.path.join(self.data_dir, "candles")) # 월 파티션 추가 전용 캔들 저장소
 
     def download_ohlcv(
         self,
@@ -26,6 +29,7 @@ class CCXTDataDownloader:
         """
         Downloads OHLCV data for a given ticker and timeframe.
         If start_date_str and end_date_str are not provided, it tries to download all available data.
+        Returns only the newly appended candles (None if nothing new); read the full series with self.store.read().
         """
         if start_date_str is None:
             start_date_str = "2017-01-01" # Default to a very early date if not provided
@@ -36,41 +40,29 @@ class CCXTDataDownloader:
             f"Downloading {ticker} {timeframe} data from {start_date_str} to {end_date_str}..."
         )
 
-        filename = ticker.replace("/", "_") + f"_{timeframe}.feather" # Changed to feather for performance
-        filepath = os.path.join(self.data_dir, filename)
-
         since_timestamp = self.exchange.parse8601(start_date_str + "T00:00:00Z")
         timeframe_duration_ms = self.exchange.parse_timeframe(timeframe) * 1000
 
         all_ohlcv = []
 
-        # Load existing data if available
-        existing_df = pd.DataFrame()
-        if os.path.exists(filepath):
-            try:
-                existing_df = pd.read_feather(filepath)
-                existing_df["timestamp"] = pd.to_datetime(existing_df["timestamp"])
-                existing_df.set_index("timestamp", inplace=True)
-                if not existing_df.empty:
-                    since_timestamp = (
-                        int(existing_df.index[-1].timestamp() * 1000)
-                        + timeframe_duration_ms
-                    )
-                    print(
-                        f"  Existing data found. Last timestamp: {existing_df.index[-1]}. Resuming download..."
-                    )
-            except Exception as e:
-                print(
-                    f"  Error reading existing file({filepath}): {e}. Downloading from scratch."
-                )
+        # 저장소의 마지막 캔들 다음부터 이어 받기 (기존 feather가 있으면 먼저 저장소로 옮김)
+        self.store.migrate_legacy(ticker, timeframe, self.data_dir)
+        last_timestamp = self.store.last_timestamp(ticker, timeframe)
+        if last_timestamp is not None:
+            since_timestamp = max(since_timestamp, last_timestamp + timeframe_duration_ms)
+            print(
+                f"  Existing data found. Last timestamp: {pd.Timestamp(last_timestamp, unit='ms')}. Resuming download..."
+            )
 
         end_dt = datetime.strptime(end_date_str, "%Y-%m-%d")
 
         while since_timestamp < self.exchange.parse8601(end_date_str + "T00:00:00Z"):
             try:
+                self.rate_limiter.acquire_sync("candles", PRIORITY_UNIVERSE)
                 ohlcv = self.exchange.fetch_ohlcv(
                     ticker, timeframe, since=since_timestamp, limit=self.limit
                 )
+                self.rate_limiter.update_from_headers(self.exchange.last_response_headers)
                 if not ohlcv:
                     break
 
@@ -80,11 +72,10 @@ class CCXTDataDownloader:
                 print(
                     f"  Fetched {len(ohlcv)} data points for {ticker}. Last timestamp: {last_data_dt}"
                 )
-                time.sleep(0.5)  # Upbit API rate limit
 
             except ccxt.RateLimitExceeded:
-                print("  Rate limit exceeded. Waiting for 30 seconds...")
-                time.sleep(30)
+                print("  Rate limit exceeded. Backing off...")
+                self.rate_limiter.penalize("candles")
             except Exception as e:
                 print(f"  Error downloading {ticker} data: {e}")
                 break
@@ -99,19 +90,14 @@ class CCXTDataDownloader:
             new_df = new_df[~new_df.index.duplicated(keep="first")]
             new_df = new_df[new_df.index <= end_dt + timedelta(days=1, microseconds=-1)]
 
-            if not existing_df.empty:
-                df = pd.concat([existing_df, new_df])
-                df = df[~df.index.duplicated(keep="last")]
-                df.sort_index(inplace=True)
-                print("  Merged with existing data.")
-            else:
-                df = new_df
-
-            df.reset_index().to_feather(filepath) # Save as feather
+            # 새 캔들만 월 파티션 조각으로 추가 (기존 기록을 다시 쓰지 않음)
+            self.store.append(ticker, timeframe, new_df)
+            total = self.store.row_count(ticker, timeframe) # 전체 기록을 읽지 않고 조각 메타데이터로 계산
             print(
-                f"Successfully saved/updated {ticker} data to {filepath}. Total {len(df)} data points."
+                f"Successfully saved/updated {ticker} data to {self.store.series_dir(ticker, timeframe)}. "
+                f"Added {len(new_df)}, total {total} data points."
             )
-            return df
+            return new_df
         else:
             print(f"No new data downloaded for {ticker}.")
 
@@ -7,6 +7,7 @@ import argparse
 from market_regime_detector import precompute_all_indicators, get_market_regime, get_market_regime_dataframe
 from risk_manager import RiskManager, get_position_size_ratio
 from strategies.trend_follower import generate_v_recovery_signals
+from core.candle_store import load_candles
 
 
 class CommanderBacktester:
@@ -80,12 +81,11 @@ class CommanderBacktester:
         # 1. 데이터 로드
         btc_ticker = "BTC/KRW"
         data_dir = "data"
-        cache_path = os.path.join(data_dir, f"{btc_ticker.replace('/', '_')}_1m.feather")
-        if not os.path.exists(cache_path):
-            print(f"오류: {cache_path} 파일이 없습니다.")
+        df_btc_hourly = load_candles(btc_ticker, "1m", data_dir=data_dir) # 캔들 저장소 (없으면 기존 feather)
+        if df_btc_hourly is None:
+            print(f"오류: {btc_ticker} 1m 캔들 데이터가 없습니다 ({data_dir}/candles 또는 {data_dir}/BTC_KRW_1m.feather).")
             return
 
-        df_btc_hourly = pd.read_feather(cache_path).set_index("timestamp")
         print(f"[DEBUG] df_btc_hourly shape after loading: {df_btc_hourly.shape}")
 
         df_btc_daily = df_btc_hourly.resample("D").agg({
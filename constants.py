@@ -1,5 +1,8 @@
 SCALPING_TARGET_COINS = ["BTC/KRW", "ETH/KRW", "XRP/KRW", "SOL/KRW", "DOGE/KRW"]
+DL_TARGET_COINS = ["BTC/KRW", "ETH/KRW", "XRP/KRW", "SOL/KRW", "DOGE/KRW", "AVAX/KRW", "LINK/KRW"]
 MODEL_SAVE_PATH = "foundational_agent.zip"
 LOOKBACK_WINDOW = 65
 SENTINEL_MODEL_PATH = "data/v2_lightgbm_model.joblib"
 NTFY_TOPIC = "upbit-sentinel-v2-alerts"
+UNIVERSE_CACHE_TTL = 600  # 유니버스 랭킹 캐시 유효 시간(초)
+UNIVERSE_CACHE_PATH = "data/last_universe.json"
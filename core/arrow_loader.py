@@ -0,0 +1,279 @@
+"""
+Arrow IPC(feather v2) 파일을 메모리 맵으로 열어 시간 구간 단위로 읽는 로더입니다.
+
+pd.read_feather로 파일 전체를 새 DataFrame으로 읽고 불리언 마스크로 자르는 대신,
+파일을 메모리 맵으로 열고 정렬된 timestamp 열에서 이진 탐색(searchsorted)으로 구간 경계를 찾습니다.
+
+- arrays()/column(): 요청 구간의 numpy 열 뷰를 복사 없이 반환합니다 (읽기 전용, 페이지 캐시를 직접 가리킴).
+  같은 파일을 여는 여러 프로세스(파라미터 탐색, WFO 폴드)가 OS 페이지 캐시의 사본 하나를 공유합니다.
+- frame(): pandas가 필요한 기존 코드용. 요청 구간만 복사한 DataFrame(timestamp 인덱스)을 반환합니다.
+
+복사 없이 읽으려면 파일이 압축되지 않은 단일 레코드 배치여야 하고 null이 없어야 하며, 시간 열이 정렬되어 있어야 합니다.
+시간 열이 정렬되지 않은 파일은 열 때 정렬 순서(argsort)를 만들어 각 열을 그 순서로 복사해 읽습니다 (zero_copy=False).
+정수 구간 경계(start/end)는 캔들 저장소(core.candle_store)와 같이 epoch ms로 해석합니다.
+pandas의 to_feather 기본값은 lz4 압축이므로, 그런 파일은 열 때마다 해제/복사가 일어납니다 (zero_copy=False).
+convert 명령으로 timestamp 정렬 + 비압축 단일 배치로 다시 쓸 수 있습니다.
+
+사용 예:
+    python -m core.arrow_loader convert cache/*.feather
+    python -m core.arrow_loader info cache/BTC_KRW_1m.feather
+    python -m core.arrow_loader bench --rows 2000000
+"""
+import argparse
+import functools
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+
+
+class MappedFrame:
+    """
+    메모리 맵으로 연 Arrow IPC 파일 하나입니다. 열은 처음 요청될 때 numpy 배열로 변환해 보관합니다.
+
+    Args:
+        path (str): Arrow IPC 파일 (feather v2) 경로.
+        time_column (str): 시간 열 이름 (datetime64 또는 epoch ms 정수). 정렬되지 않았으면 열 때 정렬합니다.
+    """
+
+    def __init__(self, path: str, time_column: str = "timestamp"):
+        self.path = path
+        self.time_column = time_column
+        self._buffer = pa.memory_map(path, "r").read_buffer()
+        try:
+            reader = ipc.open_file(self._buffer)
+            self.table = reader.read_all()
+            single_batch = reader.num_record_batches <= 1
+        except pa.ArrowInvalid:
+            # feather v1 등 IPC 파일 형식이 아니면 일반 읽기 (복사)
+            self.table = feather.read_table(path)
+            single_batch = False
+        if time_column not in self.table.column_names:
+            raise ValueError(f"{path}에 시간 열 '{time_column}'이 없습니다.")
+        self._arrays = {}
+        self._order = None  # 시간 열이 정렬되지 않은 파일의 행 순서 (argsort)
+        self.zero_copy = single_batch and all(self._is_mapped(name) for name in self.table.column_names
+                                              if self._is_fixed_width(name))
+        self._times = self._time_keys()
+        if len(self._times) > 1 and np.any(self._times[1:] < self._times[:-1]):
+            self._order = np.argsort(self._times, kind="stable")
+            self._arrays.clear()  # 이미 변환한 시간 열도 정렬 순서로 다시 만듦
+            self._times = self._time_keys()
+            self.zero_copy = False
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def columns(self) -> list:
+        return self.table.column_names
+
+    def _is_fixed_width(self, name: str) -> bool:
+        field_type = self.table.schema.field(name).type
+        return pa.types.is_integer(field_type) or pa.types.is_floating(field_type) or pa.types.is_timestamp(field_type)
+
+    def _is_mapped(self, name: str) -> bool:
+        """열의 데이터 버퍼가 메모리 맵 범위 안에 있는지 (압축 해제본이면 힙에 있음)"""
+        chunks = self.table.column(name).chunks
+        if len(chunks) != 1 or chunks[0].null_count:
+            return False
+        data = chunks[0].buffers()[1]
+        start = self._buffer.address
+        return data is not None and start <= data.address < start + self._buffer.size
+
+    def _array(self, name: str) -> np.ndarray:
+        array = self._arrays.get(name)
+        if array is None:
+            column = self.table.column(name)
+            if column.num_chunks == 1 and not column.null_count and self._is_fixed_width(name):
+                array = column.chunk(0).to_numpy(zero_copy_only=True)
+            else:
+                array = column.to_numpy()
+            if self._order is not None:
+                array = array[self._order]
+            self._arrays[name] = array
+        return array
+
+    def _time_keys(self) -> np.ndarray:
+        times = self._array(self.time_column)
+        if np.issubdtype(times.dtype, np.datetime64):
+            self._time_unit = np.datetime_data(times.dtype)[0]
+            return times.view(np.int64)
+        self._time_unit = "ms"
+        return times
+
+    def _key(self, value) -> int:
+        if isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_)):
+            # 정수는 epoch ms (CandleStore._to_ms와 같은 규칙)
+            return int(np.datetime64(int(value), "ms").astype(f"datetime64[{self._time_unit}]").astype(np.int64))
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+        return int(np.datetime64(timestamp.to_datetime64(), self._time_unit).astype(np.int64))
+
+    def slice(self, start=None, end=None, inclusive_end: bool = False) -> slice:
+        """[start, end) 구간(inclusive_end면 [start, end])의 행 범위를 이진 탐색으로 찾습니다."""
+        lo = 0 if start is None else int(np.searchsorted(self._times, self._key(start), side="left"))
+        if end is None:
+            hi = len(self._times)
+        else:
+            hi = int(np.searchsorted(self._times, self._key(end), side="right" if inclusive_end else "left"))
+        return slice(lo, max(lo, hi))
+
+    def column(self, name: str, start=None, end=None, inclusive_end: bool = False) -> np.ndarray:
+        """요청 구간의 열 뷰 (zero_copy면 메모리 맵을 직접 가리키는 읽기 전용 배열)"""
+        return self._array(name)[self.slice(start, end, inclusive_end)]
+
+    def arrays(self, columns=None, start=None, end=None, inclusive_end: bool = False) -> dict:
+        """{열 이름: 구간 뷰}. 시간 열도 포함됩니다."""
+        rows = self.slice(start, end, inclusive_end)
+        names = self.columns if columns is None else [self.time_column] + [c for c in columns if c != self.time_column]
+        return {name: self._array(name)[rows] for name in names}
+
+    def frame(self, start=None, end=None, columns=None, inclusive_end: bool = False) -> pd.DataFrame:
+        """요청 구간만 복사한 DataFrame (timestamp 인덱스). 파일 전체를 읽지 않습니다."""
+        views = self.arrays(columns, start, end, inclusive_end)
+        index = views.pop(self.time_column)
+        if not np.issubdtype(index.dtype, np.datetime64):
+            index = index.astype("datetime64[ms]")
+        index = pd.DatetimeIndex(index.copy(), name=self.time_column)
+        return pd.DataFrame({name: view.copy() for name, view in views.items()}, index=index)
+
+
+@functools.lru_cache(maxsize=64)
+def _open_cached(path: str, mtime_ns: int, time_column: str) -> MappedFrame:
+    mapped = MappedFrame(path, time_column)
+    if not mapped.zero_copy:
+        print(f"  - [ARROW] {os.path.basename(path)}: 압축/다중 배치/시간 열 미정렬 파일이라 복사해서 읽습니다. "
+              f"'python -m core.arrow_loader convert {path}'로 변환하면 복사 없이 읽습니다.")
+    return mapped
+
+
+def open_mapped(path: str, time_column: str = "timestamp") -> MappedFrame:
+    """
+    같은 프로세스 안에서는 파일별로 한 번만 메모리 맵을 엽니다 (파일이 바뀌면 mtime으로 다시 염).
+    WFO 폴드처럼 같은 파일의 다른 구간을 반복해서 읽을 때 매번 파일을 다시 파싱하지 않습니다.
+    """
+    return _open_cached(os.path.abspath(path), os.stat(path).st_mtime_ns, time_column)
+
+
+def write_frame(path: str, df: pd.DataFrame, time_column: str = "timestamp") -> int:
+    """
+    DataFrame(시간 인덱스 또는 time_column 열)을 time_column 오름차순, 비압축 단일 배치 Arrow IPC로 씁니다
+    (임시 파일 + os.replace). float 열의 NaN은 null이 아니라 값으로 보존하므로 null 비트맵이 생기지 않습니다.
+    """
+    if time_column not in df.columns:
+        df = df.reset_index()
+    df = df.sort_values(time_column, kind="stable").reset_index(drop=True)
+    arrays, names = [], []
+    for name in df.columns:
+        values = df[name].to_numpy()
+        if values.dtype.kind in "fiuM":
+            arrays.append(pa.array(values, from_pandas=False))
+        else:
+            arrays.append(pa.array(df[name], from_pandas=True))
+        names.append(str(name))
+    table = pa.Table.from_arrays(arrays, names=names)
+
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with ipc.new_file(sink, table.schema, options=ipc.IpcWriteOptions(compression=None)) as writer:
+            writer.write_table(table, max_chunksize=max(1, table.num_rows))
+    os.replace(tmp_path, path)
+    return table.num_rows
+
+
+def convert(path: str, time_column: str = "timestamp") -> dict:
+    """feather 파일을 메모리 맵으로 복사 없이 읽을 수 있는 형식(write_frame)으로 다시 씁니다."""
+    before = os.path.getsize(path)
+    rows = write_frame(path, pd.read_feather(path), time_column)
+    _open_cached.cache_clear()
+    return {"rows": rows, "bytes_before": before, "bytes_after": os.path.getsize(path)}
+
+
+def _synthetic_features(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 50_000_000 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    df = pd.DataFrame({"timestamp": pd.date_range("2020-01-01", periods=rows, freq="1min")})
+    for name in ("open", "high", "low", "close", "volume", "RSI_14", "BBL_20", "BBM_20", "BBU_20",
+                 "MACD_12_26_9", "MACDH_12_26_9", "MACDS_12_26_9"):
+        df[name] = close * rng.uniform(0.99, 1.01, rows)
+    return df
+
+
+def benchmark(rows: int = 2_000_000, days: int = 30, repeats: int = 5):
+    """pd.read_feather + 마스크 방식과 메모리 맵 구간 읽기를 비교합니다 (합성 1분봉 특징 데이터)."""
+    df = _synthetic_features(rows)
+    start = df["timestamp"].iloc[rows // 2]
+    end = start + pd.Timedelta(days=days)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy_path = os.path.join(tmp_dir, "legacy.feather")
+        mapped_path = os.path.join(tmp_dir, "mapped.feather")
+        df.to_feather(legacy_path)
+        df.to_feather(mapped_path)
+        convert(mapped_path)
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            legacy = pd.read_feather(legacy_path).set_index("timestamp")
+            legacy = legacy[(legacy.index >= start) & (legacy.index < end)]
+        legacy_seconds = (time.perf_counter() - started) / repeats
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            _open_cached.cache_clear()
+            mapped = open_mapped(mapped_path)
+            views = mapped.arrays(start=start, end=end)
+        views_seconds = (time.perf_counter() - started) / repeats
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            frame = mapped.frame(start, end)
+        frame_seconds = (time.perf_counter() - started) / repeats
+
+        assert mapped.zero_copy and not views["close"].flags.writeable
+        assert np.array_equal(frame["close"].to_numpy(), legacy["close"].to_numpy())
+        assert frame.index.equals(legacy.index)
+        print(f"[BENCH] {rows}행 x {df.shape[1]}열 중 {days}일 구간 ({len(frame)}행) 읽기")
+        print(f"  - read_feather + 마스크 : {legacy_seconds * 1000:8.1f}ms "
+              f"(파일 {os.path.getsize(legacy_path) / 1e6:.1f}MB 전체 해제/복사)")
+        print(f"  - 메모리 맵 열 뷰(열기 포함): {views_seconds * 1000:8.2f}ms (복사 0바이트, 파일 {os.path.getsize(mapped_path) / 1e6:.1f}MB)")
+        print(f"  - 메모리 맵 구간 DataFrame: {frame_seconds * 1000:8.2f}ms (구간 {frame.memory_usage().sum() / 1e6:.1f}MB만 복사)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped Arrow IPC loader.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    convert_parser = subparsers.add_parser("convert", help="Rewrite feather files as sorted, uncompressed single-batch IPC.")
+    convert_parser.add_argument("paths", nargs="+")
+    convert_parser.add_argument("--time-column", default="timestamp")
+    info_parser = subparsers.add_parser("info", help="Show row count, time range and zero-copy status.")
+    info_parser.add_argument("paths", nargs="+")
+    info_parser.add_argument("--time-column", default="timestamp")
+    bench_parser = subparsers.add_parser("bench", help="Compare read_feather + mask with mapped range reads.")
+    bench_parser.add_argument("--rows", type=int, default=2_000_000)
+    bench_parser.add_argument("--days", type=int, default=30)
+    bench_parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        for path in args.paths:
+            stats = convert(path, args.time_column)
+            print(f"[ARROW] {path}: {stats['rows']}행, {stats['bytes_before'] / 1e6:.1f}MB -> {stats['bytes_after'] / 1e6:.1f}MB")
+    elif args.command == "info":
+        for path in args.paths:
+            mapped = MappedFrame(path, args.time_column)
+            times = mapped.column(args.time_column)
+            span = f"{times[0]} ~ {times[-1]}" if len(times) else "-"
+            print(f"[ARROW] {path}: {len(mapped)}행 x {len(mapped.columns)}열, {span}, zero_copy={mapped.zero_copy}")
+    else:
+        benchmark(args.rows, args.days, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
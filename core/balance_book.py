@@ -0,0 +1,134 @@
+import asyncio
+import logging
+
+from core.clock import SYSTEM_CLOCK
+from core.rate_limiter import PRIORITY_ORDER
+
+logger = logging.getLogger(__name__)
+
+
+class BalanceBook:
+    """
+    계좌 잔고(free/locked)의 로컬 사본입니다.
+
+    - ttl_seconds가 지나면 다음 조회 시 fetch_balance로 새로 고칩니다.
+    - 주문이 체결되면 apply_buy_fill/apply_sell_fill로 잔고를 낙관적으로 먼저 반영하고,
+      settle_delay 후 거래소와 다시 맞추도록 재조정을 예약합니다.
+    - start_reconciler()로 주기적인 백그라운드 재조정을 켤 수 있습니다.
+    따라서 핫 패스의 잔고 조회는 인증 REST 호출 대신 딕셔너리 조회가 됩니다.
+    """
+
+    def __init__(self, exchange, ttl_seconds: float = 30.0, reconcile_interval: float = 60.0, settle_delay: float = 2.0,
+                 request=None, clock=None):
+        self.exchange = exchange
+        self.clock = clock or SYSTEM_CLOCK  # core.clock 인터페이스 (재생 시 가속 시계)
+        self.request = request  # UpbitService.request (레이트 리미터 경유). 없으면 직접 호출
+        self.ttl_seconds = ttl_seconds
+        self.reconcile_interval = reconcile_interval
+        self.settle_delay = settle_delay
+        self.free = {}
+        self.locked = {}
+        self.updated_at = 0.0  # 마지막으로 거래소와 맞춘 시각
+        self._lock = asyncio.Lock()
+        self._reconciler = None
+        self._pending_reconcile = None
+
+    # --- Exchange sync ---
+
+    def is_fresh(self) -> bool:
+        return self.clock.time() - self.updated_at < self.ttl_seconds
+
+    async def refresh(self):
+        async with self._lock:
+            if self.request:
+                balances = await self.request('default', PRIORITY_ORDER, self.exchange.fetch_balance)
+            else:
+                balances = await self.exchange.fetch_balance()
+            drift = self._drift(balances.get('free', {}))
+            self.free = {currency: amount for currency, amount in balances.get('free', {}).items() if amount}
+            self.locked = {currency: amount for currency, amount in balances.get('used', {}).items() if amount}
+            self.updated_at = self.clock.time()
+        if drift:
+            logger.info(f"[BALANCE] 거래소 재조정으로 보정된 잔고: {drift}")
+
+    async def ensure_fresh(self):
+        if not self.is_fresh():
+            await self.refresh()
+
+    def _drift(self, exchange_free: dict) -> dict:
+        if not self.updated_at:
+            return {}
+        drift = {}
+        for currency in set(self.free) | set(exchange_free):
+            diff = (exchange_free.get(currency) or 0) - self.free.get(currency, 0)
+            if abs(diff) > 1e-12:
+                drift[currency] = diff
+        return drift
+
+    # --- Local reads ---
+
+    def get_free(self, currency: str) -> float:
+        return self.free.get(currency, 0)
+
+    def get_locked(self, currency: str) -> float:
+        return self.locked.get(currency, 0)
+
+    # --- Optimistic updates ---
+
+    def apply_buy_fill(self, symbol: str, cost: float, quantity: float):
+        base, quote = symbol.split('/')
+        self.free[quote] = max(self.free.get(quote, 0) - cost, 0)
+        self.free[base] = self.free.get(base, 0) + quantity
+        self.request_reconcile()
+
+    def apply_sell_fill(self, symbol: str, quantity: float, proceeds: float):
+        base, quote = symbol.split('/')
+        remaining = self.free.get(base, 0) - quantity
+        if remaining > 0:
+            self.free[base] = remaining
+        else:
+            self.free.pop(base, None)
+        self.free[quote] = self.free.get(quote, 0) + proceeds
+        self.request_reconcile()
+
+    def request_reconcile(self):
+        """settle_delay 후 거래소 잔고로 다시 맞추도록 예약합니다. 이미 예약되어 있으면 합칩니다."""
+        if self._pending_reconcile and not self._pending_reconcile.done():
+            return
+        try:
+            self._pending_reconcile = asyncio.get_running_loop().create_task(self._delayed_refresh())
+        except RuntimeError:
+            self.updated_at = 0.0  # 이벤트 루프 밖: 다음 조회 때 새로 고침
+
+    async def _delayed_refresh(self):
+        await self.clock.sleep(self.settle_delay)
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning(f"[WARN] 잔고 재조정 실패: {e}")
+            self.updated_at = 0.0
+
+    # --- Background reconciler ---
+
+    def start_reconciler(self):
+        if self._reconciler is None or self._reconciler.done():
+            self._reconciler = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        for task in (self._reconciler, self._pending_reconcile):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._reconciler = None
+        self._pending_reconcile = None
+
+    async def _reconcile_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"[WARN] 백그라운드 잔고 재조정 실패: {e}")
+            await self.clock.sleep(self.reconcile_interval)
@@ -0,0 +1,416 @@
+"""
+티커/타임프레임/월 단위로 나눈 추가 전용(append-only) 캔들 저장소입니다.
+
+{ticker}_{tf}.feather 하나를 매번 전부 읽고 합쳐 다시 쓰는 대신(전체 기록 크기에 비례),
+새로 받은 캔들만 해당 월 파티션에 새 조각(Arrow IPC 파일)으로 추가합니다.
+
+    data/candles/BTC_KRW_1m/2024-01/part-00000003.arrow
+
+- 추가: 월별로 나눠 조각 파일을 새로 씁니다 (임시 파일 + os.replace라 읽는 쪽이 쓰다 만 파일을 보지 않음).
+- 읽기: 요청 구간과 겹치는 월 파티션만 엽니다 (파티션 가지치기). 조각은 메모리 맵으로 읽고,
+  같은 타임스탬프가 여러 조각에 있으면 나중 조각(번호가 큰 것)이 이깁니다.
+- 압축(compaction): 한 파티션의 조각이 compact_threshold개를 넘으면 정렬/중복 제거한 조각 하나로 합칩니다.
+
+다운로더(AsyncOHLCVDownloader, CCXTDataDownloader)가 쓰고, DataPreprocessor와 백테스터가 load_candles()로 읽습니다.
+저장소에 없는 티커는 기존 data/{ticker}_{tf}.feather를 메모리 맵으로 읽습니다 (import 명령으로 옮길 수 있음).
+data/*.csv 캔들은 python -m core.csv_ingest로 검증해 옮깁니다 (manifest.json에 등록).
+
+사용 예:
+    python -m core.candle_store import data/*.feather
+    python -m core.candle_store info
+    python -m core.candle_store compact
+    python -m core.candle_store bench --rows 500000 --updates 50
+"""
+import argparse
+import glob
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from core.arrow_loader import open_mapped
+
+CANDLE_STORE_DIR = "data/candles"
+CANDLE_COLUMNS = ("open", "high", "low", "close", "volume")
+CANDLE_SCHEMA = pa.schema([("timestamp", pa.int64())] + [(name, pa.float64()) for name in CANDLE_COLUMNS])
+_PART_PATTERN = re.compile(r"part-(\d+)\.arrow$")
+
+
+def series_key(ticker: str, timeframe: str) -> str:
+    return f"{ticker.replace('/', '_')}_{timeframe}"
+
+
+def _to_ms(value) -> int | None:
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(pd.Timestamp(value).value // 1_000_000)
+
+
+def _month_start_ms(month: str) -> int:
+    return int(np.datetime64(month, "M").astype("datetime64[ms]").astype(np.int64))
+
+
+def _next_month_start_ms(month: str) -> int:
+    return int((np.datetime64(month, "M") + 1).astype("datetime64[ms]").astype(np.int64))
+
+
+def _columns_from(data) -> dict:
+    """DataFrame(타임스탬프 인덱스 또는 'timestamp' 컬럼), 구조화 배열, dict를 {컬럼: numpy 배열}로 바꿉니다."""
+    if isinstance(data, pd.DataFrame):
+        frame = data.reset_index() if "timestamp" not in data.columns else data
+        timestamps = frame["timestamp"]
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+        columns = {"timestamp": np.asarray(timestamps, dtype=np.int64)}
+        columns.update({name: frame[name].to_numpy(dtype=np.float64) for name in CANDLE_COLUMNS})
+        return columns
+    return {"timestamp": np.asarray(data["timestamp"], dtype=np.int64),
+            **{name: np.asarray(data[name], dtype=np.float64) for name in CANDLE_COLUMNS}}
+
+
+class CandleStore:
+    """
+    Args:
+        root (str): 저장소 루트 디렉터리.
+        compact_threshold (int): 한 월 파티션의 조각 수가 이 값 이상이 되면 추가 직후 자동으로 압축합니다.
+    """
+
+    def __init__(self, root: str = CANDLE_STORE_DIR, compact_threshold: int = 16):
+        self.root = root
+        self.compact_threshold = compact_threshold
+
+    # --- 경로 ---
+
+    def series_dir(self, ticker: str, timeframe: str) -> str:
+        return os.path.join(self.root, series_key(ticker, timeframe))
+
+    def has(self, ticker: str, timeframe: str) -> bool:
+        return bool(self.months(ticker, timeframe))
+
+    def series(self) -> list:
+        """저장된 (ticker, timeframe) 목록"""
+        if not os.path.isdir(self.root):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.root)):
+            base, quote, timeframe = (name.split("_") + ["", "", ""])[:3]
+            if timeframe and os.path.isdir(os.path.join(self.root, name)):
+                result.append((f"{base}/{quote}", timeframe))
+        return result
+
+    def months(self, ticker: str, timeframe: str) -> list:
+        path = self.series_dir(ticker, timeframe)
+        if not os.path.isdir(path):
+            return []
+        return sorted(name for name in os.listdir(path) if re.fullmatch(r"\d{4}-\d{2}", name))
+
+    def fragments(self, ticker: str, timeframe: str, month: str) -> list:
+        """월 파티션의 조각 경로 (번호 순 = 쓴 순서)"""
+        path = os.path.join(self.series_dir(ticker, timeframe), month)
+        parts = []
+        for name in os.listdir(path) if os.path.isdir(path) else ():
+            match = _PART_PATTERN.fullmatch(name)
+            if match:
+                parts.append((int(match.group(1)), os.path.join(path, name)))
+        return [part_path for _, part_path in sorted(parts)]
+
+    def _next_part_path(self, month_dir: str) -> str:
+        numbers = [int(m.group(1)) for m in map(_PART_PATTERN.fullmatch, os.listdir(month_dir)) if m]
+        return os.path.join(month_dir, f"part-{max(numbers, default=-1) + 1:08d}.arrow")
+
+    # --- 쓰기 ---
+
+    def append(self, ticker: str, timeframe: str, data) -> int:
+        """
+        캔들을 월 파티션별 새 조각으로 추가합니다. 기존 조각은 다시 쓰지 않습니다.
+
+        Args:
+            data: 'timestamp'(epoch ms 또는 datetime) + open/high/low/close/volume을 가진
+                DataFrame / 구조화 배열 / dict.
+
+        Returns:
+            int: 추가한 캔들 수.
+        """
+        columns = _columns_from(data)
+        timestamps = columns["timestamp"]
+        if len(timestamps) == 0:
+            return 0
+        order = np.argsort(timestamps, kind="stable")
+        columns = {name: values[order] for name, values in columns.items()}
+        months = columns["timestamp"].astype("datetime64[ms]").astype("datetime64[M]")
+        boundaries = np.flatnonzero(months[1:] != months[:-1]) + 1
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(months)]):
+            month = str(months[start])
+            month_dir = os.path.join(self.series_dir(ticker, timeframe), month)
+            os.makedirs(month_dir, exist_ok=True)
+            self._write_fragment(self._next_part_path(month_dir), {name: values[start:end] for name, values in columns.items()})
+            if len(self.fragments(ticker, timeframe, month)) >= self.compact_threshold:
+                self.compact_partition(ticker, timeframe, month)
+        return len(timestamps)
+
+    def _write_fragment(self, path: str, columns: dict):
+        table = pa.Table.from_arrays([pa.array(columns[name]) for name in CANDLE_SCHEMA.names], schema=CANDLE_SCHEMA)
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink, ipc.new_file(sink, CANDLE_SCHEMA) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def compact_partition(self, ticker: str, timeframe: str, month: str) -> int:
+        """월 파티션의 조각들을 정렬/중복 제거한 조각 하나로 합칩니다. 합친 뒤 캔들 수를 반환합니다."""
+        fragments = self.fragments(ticker, timeframe, month)
+        if len(fragments) <= 1:
+            return sum(len(self._read_fragment(path)["timestamp"]) for path in fragments)
+        columns = self._merge([self._read_fragment(path) for path in fragments])
+        month_dir = os.path.dirname(fragments[0])
+        self._write_fragment(self._next_part_path(month_dir), columns)
+        for path in fragments:  # 새 조각이 먼저 자리잡은 뒤 지우므로 중간에 죽어도 데이터가 사라지지 않음
+            os.remove(path)
+        return len(columns["timestamp"])
+
+    def compact(self, ticker: str | None = None, timeframe: str | None = None) -> dict:
+        """모든(또는 지정한) 시리즈의 파티션을 압축합니다. {series_key: 합친 파티션 수}"""
+        report = {}
+        for series_ticker, series_timeframe in self.series():
+            if (ticker and series_ticker != ticker) or (timeframe and series_timeframe != timeframe):
+                continue
+            compacted = 0
+            for month in self.months(series_ticker, series_timeframe):
+                if len(self.fragments(series_ticker, series_timeframe, month)) > 1:
+                    self.compact_partition(series_ticker, series_timeframe, month)
+                    compacted += 1
+            report[series_key(series_ticker, series_timeframe)] = compacted
+        return report
+
+    # --- 읽기 ---
+
+    @staticmethod
+    def _read_fragment(path: str) -> dict:
+        with pa.memory_map(path, "r") as source:
+            table = ipc.open_file(source).read_all()
+        return {name: table.column(name).to_numpy() for name in CANDLE_SCHEMA.names}
+
+    @staticmethod
+    def _merge(parts: list) -> dict:
+        """조각들을 타임스탬프 순으로 합치고, 같은 타임스탬프는 나중 조각 값을 남깁니다."""
+        if len(parts) == 1:
+            columns = parts[0]
+            if np.all(np.diff(columns["timestamp"]) > 0):
+                return columns
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in CANDLE_SCHEMA.names}
+        order = np.argsort(columns["timestamp"], kind="stable")
+        timestamps = columns["timestamp"][order]
+        keep = order[np.append(timestamps[1:] != timestamps[:-1], True)]
+        return {name: values[keep] for name, values in columns.items()}
+
+    def read_columns(self, ticker: str, timeframe: str, start=None, end=None) -> dict:
+        """
+        [start, end) 구간 캔들을 {컬럼: numpy 배열}로 읽습니다. timestamp는 epoch ms(int64).
+        start/end는 epoch ms, 문자열, datetime 모두 가능합니다.
+        """
+        start_ms, end_ms = _to_ms(start), _to_ms(end)
+        parts = []
+        for month in self.months(ticker, timeframe):
+            if end_ms is not None and _month_start_ms(month) >= end_ms:
+                break
+            if start_ms is not None and _next_month_start_ms(month) <= start_ms:
+                continue  # 파티션 가지치기: 구간과 겹치지 않는 월은 열지 않음
+            month_parts = [self._read_fragment(path) for path in self.fragments(ticker, timeframe, month)]
+            if month_parts:
+                parts.append(self._merge(month_parts))
+        if not parts:
+            return {name: np.zeros(0, dtype=np.int64 if name == "timestamp" else np.float64) for name in CANDLE_SCHEMA.names}
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in CANDLE_SCHEMA.names}
+        timestamps = columns["timestamp"]
+        lo = 0 if start_ms is None else np.searchsorted(timestamps, start_ms, side="left")
+        hi = len(timestamps) if end_ms is None else np.searchsorted(timestamps, end_ms, side="left")
+        return {name: values[lo:hi] for name, values in columns.items()}
+
+    def read(self, ticker: str, timeframe: str, start=None, end=None) -> pd.DataFrame:
+        """[start, end) 구간 캔들을 DatetimeIndex('timestamp') DataFrame으로 읽습니다."""
+        columns = self.read_columns(ticker, timeframe, start, end)
+        index = pd.DatetimeIndex(columns.pop("timestamp").astype("datetime64[ms]").astype("datetime64[ns]"), name="timestamp")
+        return pd.DataFrame(columns, index=index)
+
+    def row_count(self, ticker: str, timeframe: str) -> int:
+        """
+        저장된 캔들 수. 조각 파일의 배치 메타데이터(num_rows)만 합하므로 컬럼 데이터를 읽지 않습니다.
+        압축 전 조각끼리 타임스탬프가 겹치면 겹친 만큼 더 세어집니다.
+        """
+        total = 0
+        for month in self.months(ticker, timeframe):
+            for path in self.fragments(ticker, timeframe, month):
+                with pa.memory_map(path, "r") as source:
+                    reader = ipc.open_file(source)
+                    total += sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        return total
+
+    def last_timestamp(self, ticker: str, timeframe: str) -> int | None:
+        """마지막 캔들의 epoch ms (마지막 월 파티션만 읽음)"""
+        for month in reversed(self.months(ticker, timeframe)):
+            fragments = self.fragments(ticker, timeframe, month)
+            if fragments:
+                return int(max(self._read_fragment(path)["timestamp"].max(initial=-1) for path in fragments))
+        return None
+
+    def migrate_legacy(self, ticker: str, timeframe: str, data_dir: str = "data") -> bool:
+        """
+        저장소에 없는 시리즈의 기존 {data_dir}/{ticker}_{tf}.feather를 옮깁니다.
+        다운로더가 새 캔들을 추가하기 전에 호출해, 저장소가 생긴 뒤에도 예전 기록이 읽히도록 합니다.
+        """
+        path = _legacy_feather_path(ticker, timeframe, data_dir)
+        if self.has(ticker, timeframe) or not os.path.exists(path):
+            return False
+        df = pd.read_feather(path)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        count = self.import_frame(ticker, timeframe, df)
+        print(f"  - 기존 {path}를 캔들 저장소로 옮겼습니다 ({count}개).")
+        return True
+
+    def import_frame(self, ticker: str, timeframe: str, df: pd.DataFrame) -> int:
+        """기존 feather 등에서 읽은 DataFrame을 저장소로 옮기고 파티션을 압축합니다."""
+        count = self.append(ticker, timeframe, df)
+        self.compact(ticker, timeframe)
+        return count
+
+
+def _legacy_feather_path(ticker: str, timeframe: str, data_dir: str) -> str:
+    return os.path.join(data_dir, series_key(ticker, timeframe) + ".feather")
+
+
+def load_candles(ticker: str, timeframe: str, start=None, end=None, data_dir: str = "data",
+                 store: CandleStore | None = None) -> pd.DataFrame | None:
+    """
+    캔들 저장소에서 [start, end) 구간을 읽습니다. 저장소에 없으면 기존 {data_dir}/{ticker}_{tf}.feather를 읽습니다.
+    둘 다 없으면 None.
+    """
+    store = store or CandleStore(os.path.join(data_dir, "candles"))
+    if store.has(ticker, timeframe):
+        return store.read(ticker, timeframe, start, end)
+    path = _legacy_feather_path(ticker, timeframe, data_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        return open_mapped(path).frame(start, end)
+    except ValueError:  # 'timestamp' 열이 없는 파일 (인덱스로 저장된 경우 등)
+        pass
+    df = pd.read_feather(path)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df = df.set_index("timestamp").sort_index()
+    if start is not None:
+        df = df[df.index >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df.index < pd.Timestamp(end)]
+    return df
+
+
+def _import_feathers(paths: list, store: CandleStore):
+    for path in paths:
+        match = re.fullmatch(r"([A-Z0-9]+)_([A-Z]+)_(\w+)\.feather", os.path.basename(path))
+        if not match:
+            print(f"  - [SKIP] 파일 이름에서 티커/타임프레임을 알 수 없습니다: {path}")
+            continue
+        ticker, timeframe = f"{match.group(1)}/{match.group(2)}", match.group(3)
+        df = pd.read_feather(path)
+        if "timestamp" not in df.columns or any(name not in df.columns for name in CANDLE_COLUMNS):
+            print(f"  - [SKIP] OHLCV 캔들 파일이 아닙니다: {path}")
+            continue
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        count = store.import_frame(ticker, timeframe, df)
+        print(f"  - {path} -> {store.series_dir(ticker, timeframe)} ({count}개, 월 파티션 {len(store.months(ticker, timeframe))}개)")
+
+
+def _print_info(store: CandleStore):
+    print(f"[STORE] {store.root}")
+    for ticker, timeframe in store.series():
+        months = store.months(ticker, timeframe)
+        fragments = sum(len(store.fragments(ticker, timeframe, month)) for month in months)
+        size = sum(os.path.getsize(path) for path in glob.glob(os.path.join(store.series_dir(ticker, timeframe), "*", "*.arrow")))
+        last = store.last_timestamp(ticker, timeframe)
+        print(f"  - {ticker:<10} {timeframe:<4} 월 {len(months):3d}개 ({months[0]} ~ {months[-1]}), 조각 {fragments:4d}개, "
+              f"{size / 1024 / 1024:7.1f}MB, 마지막 캔들 {pd.Timestamp(last, unit='ms') if last is not None else '-'}")
+
+
+def benchmark(rows: int = 500_000, updates: int = 50, page: int = 200):
+    """feather 전체 재작성과 월 파티션 조각 추가의 증분 갱신 비용, 구간 읽기 비용을 비교합니다."""
+    import shutil
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    step = 60_000
+    timestamps = 1_700_000_000_000 // step * step + np.arange(rows + updates * page, dtype=np.int64) * step
+    close = 50_000_000 * np.cumprod(1 + rng.normal(0, 0.001, len(timestamps)))
+    frame = pd.DataFrame({"timestamp": pd.to_datetime(timestamps, unit="ms"), "open": close, "high": close * 1.001,
+                          "low": close * 0.999, "close": close, "volume": rng.random(len(timestamps))})
+    root = tempfile.mkdtemp()
+    try:
+        feather_path = os.path.join(root, "BTC_KRW_1m.feather")
+        frame.iloc[:rows].to_feather(feather_path)
+        started = time.perf_counter()
+        for i in range(updates):  # 기존 CCXTDataDownloader 방식: 읽기 + 합치기 + 중복 제거 + 전체 쓰기
+            existing = pd.read_feather(feather_path).set_index("timestamp")
+            new = frame.iloc[rows + i * page: rows + (i + 1) * page].set_index("timestamp")
+            merged = pd.concat([existing, new])
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            merged.reset_index().to_feather(feather_path)
+        feather_ms = (time.perf_counter() - started) / updates * 1000
+
+        store = CandleStore(os.path.join(root, "candles"))
+        store.import_frame("BTC/KRW", "1m", frame.iloc[:rows])
+        started = time.perf_counter()
+        for i in range(updates):
+            store.append("BTC/KRW", "1m", frame.iloc[rows + i * page: rows + (i + 1) * page])
+        store_ms = (time.perf_counter() - started) / updates * 1000
+
+        week_start = frame["timestamp"].iloc[rows // 2]
+        week_end = week_start + pd.Timedelta(days=7)
+        started = time.perf_counter()
+        df = pd.read_feather(feather_path).set_index("timestamp")
+        legacy_week = df[(df.index >= week_start) & (df.index < week_end)]
+        legacy_read_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        store_week = store.read("BTC/KRW", "1m", week_start, week_end)
+        store_read_ms = (time.perf_counter() - started) * 1000
+        assert np.allclose(legacy_week["close"].to_numpy(), store_week["close"].to_numpy()), "구간 읽기 결과가 다릅니다."
+        full = store.read("BTC/KRW", "1m")
+        assert len(full) == rows + updates * page and full.index.is_monotonic_increasing
+
+        print(f"[BENCH] 1분봉 {rows}개 기록에 {page}개씩 {updates}회 증분 갱신")
+        print(f"  - feather 전체 재작성 : {feather_ms:8.1f}ms/갱신 (기록 크기에 비례)")
+        print(f"  - 월 파티션 조각 추가 : {store_ms:8.1f}ms/갱신 (자동 압축 포함, 월 {len(store.months('BTC/KRW', '1m'))}개)")
+        print(f"  - 7일 구간 읽기: feather 전체 읽기 후 마스크 {legacy_read_ms:7.1f}ms | 파티션 가지치기 {store_read_ms:7.1f}ms "
+              f"({len(store_week)}행)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Month-partitioned append-only candle store.")
+    parser.add_argument("--root", type=str, default=CANDLE_STORE_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Move legacy {TICKER}_{QUOTE}_{tf}.feather files into the store.")
+    import_parser.add_argument("paths", nargs="+")
+    subparsers.add_parser("info", help="List stored series, partitions and fragments.")
+    compact_parser = subparsers.add_parser("compact", help="Merge fragments of every partition into one.")
+    compact_parser.add_argument("--ticker", type=str, default=None)
+    compact_parser.add_argument("--timeframe", type=str, default=None)
+    bench_parser = subparsers.add_parser("bench", help="Feather rewrite vs. partitioned append benchmark.")
+    bench_parser.add_argument("--rows", type=int, default=500_000)
+    bench_parser.add_argument("--updates", type=int, default=50)
+    args = parser.parse_args()
+
+    candle_store = CandleStore(args.root)
+    if args.command == "import":
+        _import_feathers(args.paths, candle_store)
+    elif args.command == "info":
+        _print_info(candle_store)
+    elif args.command == "compact":
+        for key, count in candle_store.compact(args.ticker, args.timeframe).items():
+            print(f"  - {key}: 파티션 {count}개 압축")
+    else:
+        benchmark(args.rows, args.updates)
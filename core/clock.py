@@ -0,0 +1,21 @@
+"""
+구성 요소가 공유하는 시계 인터페이스입니다.
+
+time.time / asyncio.sleep을 직접 부르는 대신 생성자로 받은 clock의 time() / sleep()을 사용하면,
+세션 재생(core.session_recorder)에서 프로세스 전역을 패치하지 않고 가속된 가상 시계를 주입할 수 있습니다.
+"""
+import asyncio
+import time
+
+
+class SystemClock:
+    """실제 시각과 실제 asyncio.sleep을 그대로 사용하는 기본 시계입니다."""
+
+    def time(self) -> float:
+        return time.time()
+
+    async def sleep(self, delay, result=None):
+        return await asyncio.sleep(delay, result)
+
+
+SYSTEM_CLOCK = SystemClock()
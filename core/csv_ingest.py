@@ -0,0 +1,250 @@
+"""
+data/*.csv 캔들 파일을 캔들 저장소(CandleStore)의 타입이 있는 열 형식으로 한 번만 옮기는 수집기입니다.
+
+CSV는 환경마다 텍스트를 다시 파싱해야 하지만, 저장소 조각은 int64 epoch ms 타임스탬프와
+float64 OHLCV의 비압축 Arrow IPC라 메모리 맵으로 바로 읽힙니다 (load_candles가 저장소를 먼저 찾음).
+
+검증 (문제가 있으면 보고하고, --strict면 해당 파일을 옮기지 않음):
+  - 파싱할 수 없는 타임스탬프 / 가격이 비어 있는 행
+  - 단조 증가 위반 (앞 행보다 이른 타임스탬프)
+  - 중복 타임스탬프 (값이 같은 중복 / 값이 다른 충돌 중복, 충돌 시 나중 행이 이김)
+  - 타임프레임 간격보다 큰 공백 (정보용)
+
+옮긴 파일은 {저장소}/manifest.json에 원본 SHA-256, 행 수, 기간, 검증 결과, 크기와 함께 등록됩니다.
+원본 해시가 같은 파일은 다시 옮기지 않습니다 (--force로 강제).
+
+사용 예:
+    python -m core.csv_ingest                 # data/*.csv
+    python -m core.csv_ingest data/BTC_KRW_1m.csv --strict
+    python -m core.csv_ingest --manifest      # 등록된 파일 목록
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from core.candle_store import CANDLE_COLUMNS, CANDLE_STORE_DIR, CandleStore, series_key
+
+MANIFEST_NAME = "manifest.json"
+_CSV_PATTERN = re.compile(r"([A-Z0-9]+)_([A-Z]+)_(\w+)\.csv")
+_TIMEFRAME_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000}
+
+
+def manifest_path(store: CandleStore) -> str:
+    return os.path.join(store.root, MANIFEST_NAME)
+
+
+def load_manifest(store: CandleStore) -> dict:
+    """{series_key: 등록 정보}. 없으면 빈 dict."""
+    path = manifest_path(store)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(store: CandleStore, manifest: dict):
+    path = manifest_path(store)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def timeframe_ms(timeframe: str) -> int | None:
+    match = re.fullmatch(r"(\d+)([mhd])", timeframe)
+    return int(match.group(1)) * _TIMEFRAME_MS[match.group(2)] if match else None
+
+
+def parse_csv(path: str) -> dict:
+    """CSV를 읽어 {'timestamp': int64 epoch ms, OHLCV: float64} 배열로 바꿉니다 (정렬/중복 처리 전)."""
+    df = pd.read_csv(path, dtype={name: np.float64 for name in CANDLE_COLUMNS})
+    missing = [name for name in ("timestamp",) + CANDLE_COLUMNS if name not in df.columns]
+    if missing:
+        raise ValueError(f"필수 컬럼이 없습니다: {missing}")
+    timestamps = pd.to_datetime(df["timestamp"], format="ISO8601", errors="coerce", utc=True).dt.tz_localize(None)
+    columns = {"timestamp": timestamps.to_numpy(dtype="datetime64[ms]").view(np.int64)}
+    columns.update({name: df[name].to_numpy() for name in CANDLE_COLUMNS})
+    columns["_invalid_time"] = timestamps.isna().to_numpy()
+    return columns
+
+
+def validate(columns: dict, step_ms: int | None = None) -> tuple:
+    """
+    파싱한 열을 검증하고, 유효한 행을 타임스탬프 순으로 정렬/중복 제거(나중 행 우선)한 열을 반환합니다.
+
+    Returns:
+        (정리된 열 dict, 검증 결과 dict)
+    """
+    invalid_time = columns["_invalid_time"]
+    missing_price = np.zeros(len(invalid_time), dtype=bool)
+    for name in ("open", "high", "low", "close"):
+        missing_price |= np.isnan(columns[name])
+    valid = ~(invalid_time | missing_price)
+    columns = {name: columns[name][valid] for name in ("timestamp",) + CANDLE_COLUMNS}
+    timestamps = columns["timestamp"]
+
+    out_of_order = int(np.count_nonzero(np.diff(timestamps) < 0))
+    order = np.argsort(timestamps, kind="stable")
+    ordered = {name: values[order] for name, values in columns.items()}
+    sorted_ts = ordered["timestamp"]
+    same_as_next = sorted_ts[1:] == sorted_ts[:-1]
+    duplicates = int(np.count_nonzero(same_as_next))
+    conflicting = 0
+    if duplicates:
+        differs = np.zeros(len(same_as_next), dtype=bool)
+        for name in CANDLE_COLUMNS:
+            values = ordered[name]
+            differs |= ~((values[1:] == values[:-1]) | (np.isnan(values[1:]) & np.isnan(values[:-1])))
+        conflicting = int(np.count_nonzero(same_as_next & differs))
+    keep = np.ones(len(sorted_ts), dtype=bool)
+    keep[:-1] = ~same_as_next  # 같은 타임스탬프 중 마지막 행
+    cleaned = {name: values[keep] for name, values in ordered.items()}
+
+    gaps = 0
+    if step_ms and len(cleaned["timestamp"]) > 1:
+        gaps = int(np.count_nonzero(np.diff(cleaned["timestamp"]) > step_ms))
+    report = {
+        "source_rows": int(len(invalid_time)),
+        "rows": int(len(cleaned["timestamp"])),
+        "invalid_timestamps": int(np.count_nonzero(invalid_time)),
+        "missing_prices": int(np.count_nonzero(missing_price & ~invalid_time)),
+        "out_of_order": out_of_order,
+        "duplicates": duplicates,
+        "conflicting_duplicates": conflicting,
+        "gaps": gaps,
+    }
+    report["clean"] = not (report["invalid_timestamps"] or report["missing_prices"] or out_of_order or duplicates)
+    return cleaned, report
+
+
+def _stored_bytes(store: CandleStore, ticker: str, timeframe: str) -> int:
+    return sum(os.path.getsize(path) for path in glob.glob(os.path.join(store.series_dir(ticker, timeframe), "*", "*.arrow")))
+
+
+def ingest_csv(path: str, store: CandleStore, manifest: dict, strict: bool = False, force: bool = False) -> dict | None:
+    """
+    CSV 하나를 저장소로 옮기고 manifest에 등록합니다 (manifest 저장은 호출하는 쪽에서).
+    건너뛰거나 실패하면 None, 옮기면 manifest 항목을 반환합니다.
+    """
+    match = _CSV_PATTERN.fullmatch(os.path.basename(path))
+    if not match:
+        print(f"  - [SKIP] 파일 이름에서 티커/타임프레임을 알 수 없습니다: {path}")
+        return None
+    ticker, timeframe = f"{match.group(1)}/{match.group(2)}", match.group(3)
+    key = series_key(ticker, timeframe)
+    source_sha256 = _sha256(path)
+    if not force and manifest.get(key, {}).get("source_sha256") == source_sha256 and store.has(ticker, timeframe):
+        print(f"  - [SKIP] {path}: 이미 수집된 원본입니다 (--force로 다시 수집).")
+        return None
+
+    started = time.perf_counter()
+    try:
+        columns = parse_csv(path)
+    except (ValueError, pd.errors.ParserError) as e:
+        print(f"  - [ERROR] {path}: CSV 파싱 실패 - {e}")
+        return None
+    parse_ms = (time.perf_counter() - started) * 1000
+    cleaned, report = validate(columns, timeframe_ms(timeframe))
+    if report["rows"] == 0:
+        print(f"  - [SKIP] {path}: 유효한 캔들이 없습니다.")
+        return None
+    if not report["clean"]:
+        issues = ", ".join(f"{name} {report[name]}" for name in
+                           ("invalid_timestamps", "missing_prices", "out_of_order", "duplicates", "conflicting_duplicates")
+                           if report[name])
+        print(f"  - [WARN] {path}: {issues}")
+        if strict:
+            print(f"  - [SKIP] {path}: --strict 모드라 옮기지 않습니다.")
+            return None
+
+    store.import_frame(ticker, timeframe, cleaned)
+    started = time.perf_counter()
+    stored = store.read_columns(ticker, timeframe)
+    read_ms = (time.perf_counter() - started) * 1000
+    entry = {
+        "ticker": ticker,
+        "timeframe": timeframe,
+        "source": path,
+        "source_sha256": source_sha256,
+        "source_bytes": os.path.getsize(path),
+        "stored_bytes": _stored_bytes(store, ticker, timeframe),
+        "first": str(pd.Timestamp(int(cleaned["timestamp"][0]), unit="ms")),
+        "last": str(pd.Timestamp(int(cleaned["timestamp"][-1]), unit="ms")),
+        "stored_rows": int(len(stored["timestamp"])),
+        "csv_parse_ms": round(parse_ms, 2),
+        "columnar_read_ms": round(read_ms, 2),
+        "ingested_at": datetime.now().isoformat(timespec="seconds"),
+        **report,
+    }
+    manifest[key] = entry
+    return entry
+
+
+def ingest(paths: list, store: CandleStore, strict: bool = False, force: bool = False) -> list:
+    """여러 CSV를 옮기고 manifest를 저장한 뒤, CSV 대비 파싱 시간/디스크 크기 보고서를 출력합니다."""
+    manifest = load_manifest(store)
+    entries = []
+    for path in paths:
+        entry = ingest_csv(path, store, manifest, strict, force)
+        if entry:
+            entries.append(entry)
+            save_manifest(store, manifest)  # 파일마다 저장 (중간에 멈춰도 옮긴 파일은 등록됨)
+    if not entries:
+        print("[INGEST] 새로 옮긴 CSV가 없습니다.")
+        return entries
+
+    print(f"[INGEST] {len(entries)}개 CSV -> {store.root} (manifest: {manifest_path(store)})")
+    print(f"  {'series':<14} {'rows':>8} {'CSV':>8} {'stored':>8} {'CSV parse':>10} {'read':>8} {'gaps':>5}")
+    for entry in entries:
+        print(f"  {series_key(entry['ticker'], entry['timeframe']):<14} {entry['rows']:8d} "
+              f"{entry['source_bytes'] / 1e6:7.2f}M {entry['stored_bytes'] / 1e6:7.2f}M "
+              f"{entry['csv_parse_ms']:8.1f}ms {entry['columnar_read_ms']:6.1f}ms {entry['gaps']:5d}")
+    csv_bytes = sum(entry["source_bytes"] for entry in entries)
+    stored_bytes = sum(entry["stored_bytes"] for entry in entries)
+    parse_ms = sum(entry["csv_parse_ms"] for entry in entries)
+    read_ms = sum(entry["columnar_read_ms"] for entry in entries)
+    print(f"  - 합계 {sum(entry['rows'] for entry in entries)}행: 디스크 {csv_bytes / 1e6:.2f}MB -> {stored_bytes / 1e6:.2f}MB "
+          f"({stored_bytes / csv_bytes:.0%}), 읽기 {parse_ms:.1f}ms -> {read_ms:.1f}ms ({parse_ms / max(read_ms, 1e-9):.1f}배)")
+    return entries
+
+
+def _print_manifest(store: CandleStore):
+    manifest = load_manifest(store)
+    print(f"[MANIFEST] {manifest_path(store)} ({len(manifest)}개)")
+    for key, entry in sorted(manifest.items()):
+        status = "OK" if entry.get("clean") else "정리됨"
+        print(f"  - {key:<14} {entry['rows']:8d}행 {entry['first']} ~ {entry['last']} | {status} | "
+              f"원본 {entry['source']} ({entry['source_sha256'][:12]})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest candle CSVs into the columnar candle store.")
+    parser.add_argument("paths", nargs="*", help="CSV files (default: data/*.csv).")
+    parser.add_argument("--root", type=str, default=CANDLE_STORE_DIR)
+    parser.add_argument("--strict", action="store_true", help="Skip files that fail validation instead of cleaning them.")
+    parser.add_argument("--force", action="store_true", help="Re-ingest files whose hash is already in the manifest.")
+    parser.add_argument("--manifest", action="store_true", help="Print the manifest and exit.")
+    args = parser.parse_args()
+
+    candle_store = CandleStore(args.root)
+    if args.manifest:
+        _print_manifest(candle_store)
+    else:
+        ingest(args.paths or sorted(glob.glob(os.path.join("data", "*.csv"))), candle_store, args.strict, args.force)
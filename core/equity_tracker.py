@@ -0,0 +1,244 @@
+"""
+포트폴리오 순자산(equity) 스트리밍 추적기입니다.
+
+pd.Series에 계속 추가하고 매 사이클 cummax()/낙폭 시계열을 다시 계산하는 대신,
+새 값 하나마다 고점/현재 낙폭/최대 낙폭/구간별(롤링) 낙폭/Sortino를 O(1)로 갱신합니다.
+기록은 미리 할당한 numpy 링 버퍼에 두고, chunk_size개가 쌓일 때마다 디스크 파일에 덧붙이므로
+수개월을 돌려도 메모리 사용량이 일정합니다.
+
+벤치마크 (pd.Series + cummax 방식과 비교):
+    python -m core.equity_tracker --points 20000
+"""
+import argparse
+import collections
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+EQUITY_HISTORY_DTYPE = np.dtype([("timestamp", "<f8"), ("equity", "<f8")])
+EQUITY_HISTORY_PATH = "data/equity_history.bin"
+DEFAULT_WINDOWS = (144, 1008)  # 10분 사이클 기준 1일, 7일
+
+
+class EquityRingBuffer:
+    """
+    (timestamp, equity) 기록을 고정 크기로 보관하는 numpy 링 버퍼입니다.
+    OHLCVRingBuffer와 같이 각 값을 i와 i + capacity 두 위치에 기록해 최근 N개 구간이 항상 연속된 메모리입니다.
+    flush_path가 있으면 아직 저장하지 않은 기록이 chunk_size개가 될 때마다 파일 끝에 이진 형식으로 덧붙입니다.
+    """
+
+    def __init__(self, capacity: int = 4096, chunk_size: int = 1024, flush_path: str | None = None):
+        if not 0 < chunk_size <= capacity:
+            raise ValueError("chunk_size는 1 이상 capacity 이하여야 합니다.")
+        self.capacity = capacity
+        self.chunk_size = chunk_size
+        self.flush_path = flush_path
+        self._records = np.zeros(capacity * 2, dtype=EQUITY_HISTORY_DTYPE)
+        self._next = 0
+        self._size = 0
+        self._unflushed = 0
+        self.flushed_count = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, equity: float):
+        for offset in (self._next, self._next + self.capacity):
+            self._records[offset] = (timestamp, equity)
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self._unflushed += 1
+        if self._unflushed >= self.chunk_size:
+            self.flush()
+
+    def records(self, limit: int | None = None) -> np.ndarray:
+        """최근 limit개 기록의 (읽기 전용) 뷰"""
+        n = self._size if limit is None else min(limit, self._size)
+        end = self._next + self.capacity
+        return self._records[end - n:end]
+
+    def flush(self):
+        """아직 저장하지 않은 기록을 flush_path에 덧붙입니다."""
+        if not self.flush_path or self._unflushed == 0:
+            self._unflushed = 0
+            return
+        os.makedirs(os.path.dirname(self.flush_path) or ".", exist_ok=True)
+        with open(self.flush_path, "ab") as f:
+            self.records(self._unflushed).tofile(f)
+        self.flushed_count += self._unflushed
+        self._unflushed = 0
+
+
+def load_equity_history(path: str = EQUITY_HISTORY_PATH) -> pd.Series:
+    """EquityRingBuffer가 디스크에 저장한 전체 기록을 pd.Series(타임스탬프 인덱스)로 읽습니다."""
+    if not os.path.exists(path):
+        return pd.Series(dtype=float)
+    records = np.fromfile(path, dtype=EQUITY_HISTORY_DTYPE)
+    return pd.Series(records["equity"], index=pd.to_datetime(records["timestamp"], unit="s"), name="equity")
+
+
+class _RollingPeak:
+    """최근 window개 값의 최댓값 (단조 감소 deque, 분할 상환 O(1))"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._deque = collections.deque()  # (seq, value), value 단조 감소
+
+    def update(self, seq: int, value: float) -> float:
+        while self._deque and self._deque[-1][1] <= value:
+            self._deque.pop()
+        self._deque.append((seq, value))
+        if self._deque[0][0] <= seq - self.window:
+            self._deque.popleft()
+        return self._deque[0][1]
+
+
+class StreamingEquityTracker:
+    """
+    순자산을 하나씩 받아 위험 지표를 O(1)로 갱신합니다.
+
+    - peak / drawdown / max_drawdown: 전체 기간 고점, 현재 낙폭, 최대 낙폭 (모두 0 이하 비율)
+    - rolling_drawdowns: {window: 최근 window개 중 고점 대비 현재 낙폭}
+    - sortino: 기간 수익률의 평균 / 하방 편차 (목표 수익률 0). periods_per_year가 있으면 연율화
+    - history(): 링 버퍼에 남은 최근 기록 (전체 기록은 load_equity_history(history_path))
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS, capacity: int = 4096, chunk_size: int = 1024,
+                 history_path: str | None = None, periods_per_year: float | None = None):
+        self.buffer = EquityRingBuffer(capacity, chunk_size, history_path)
+        self.history_path = history_path
+        self.periods_per_year = periods_per_year
+        self._rolling = {window: _RollingPeak(window) for window in windows}
+        self.rolling_drawdowns = {window: 0.0 for window in windows}
+        self.count = 0
+        self.current = None
+        self.peak = None
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self._return_count = 0
+        self._return_sum = 0.0
+        self._downside_sq_sum = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def update(self, equity: float, timestamp: float | None = None) -> float:
+        """
+        새 순자산 값을 반영하고 현재 낙폭을 반환합니다.
+
+        Args:
+            equity (float): 순자산 (KRW).
+            timestamp (float | None): epoch 초. 없으면 현재 시각.
+        """
+        equity = float(equity)
+        if self.current is not None and self.current > 0:
+            period_return = equity / self.current - 1
+            self._return_count += 1
+            self._return_sum += period_return
+            if period_return < 0:
+                self._downside_sq_sum += period_return * period_return
+
+        self.current = equity
+        self.peak = equity if self.peak is None else max(self.peak, equity)
+        self.drawdown = equity / self.peak - 1 if self.peak > 0 else 0.0
+        self.max_drawdown = min(self.max_drawdown, self.drawdown)
+        for window, rolling in self._rolling.items():
+            rolling_peak = rolling.update(self.count, equity)
+            self.rolling_drawdowns[window] = equity / rolling_peak - 1 if rolling_peak > 0 else 0.0
+
+        self.buffer.append(time.time() if timestamp is None else timestamp, equity)
+        self.count += 1
+        return self.drawdown
+
+    def restore(self, points, peak: float | None = None, max_drawdown: float | None = None):
+        """
+        재시작 시 저장된 (timestamp, equity) 기록을 다시 반영해 고점/낙폭/Sortino를 복원합니다.
+        이미 저장된 기록이므로 history_path에 다시 쓰지 않습니다.
+
+        Args:
+            peak / max_drawdown: 저장된 전체 기간 고점과 최대 낙폭 (StateStore.load()['tracker']).
+                points가 최근 기록만 담고 있어도 고점/최대 낙폭이 그 구간으로 줄어들지 않게 합니다.
+        """
+        flush_path, self.buffer.flush_path = self.buffer.flush_path, None
+        try:
+            for timestamp, equity in points:
+                self.update(equity, timestamp)
+        finally:
+            self.buffer.flush_path = flush_path
+            self.buffer._unflushed = 0
+        if peak is not None and (self.peak is None or peak > self.peak):
+            self.peak = peak
+            if self.current is not None:
+                self.drawdown = self.current / peak - 1 if peak > 0 else 0.0
+                self.max_drawdown = min(self.max_drawdown, self.drawdown)
+        if max_drawdown is not None:
+            self.max_drawdown = min(self.max_drawdown, max_drawdown)
+
+    @property
+    def sortino(self) -> float:
+        if self._return_count < 2:
+            return float("nan")
+        mean = self._return_sum / self._return_count
+        downside = math.sqrt(self._downside_sq_sum / self._return_count)
+        if downside == 0:
+            return float("inf") if mean > 0 else 0.0
+        ratio = mean / downside
+        return ratio * math.sqrt(self.periods_per_year) if self.periods_per_year else ratio
+
+    def history(self, limit: int | None = None) -> pd.Series:
+        records = self.buffer.records(limit)
+        return pd.Series(records["equity"].copy(), index=pd.to_datetime(records["timestamp"], unit="s"), name="equity")
+
+    def summary(self) -> dict:
+        return {
+            "equity": self.current,
+            "peak": self.peak,
+            "drawdown": self.drawdown,
+            "max_drawdown": self.max_drawdown,
+            "rolling_drawdowns": dict(self.rolling_drawdowns),
+            "sortino": self.sortino,
+        }
+
+    def flush(self):
+        self.buffer.flush()
+
+
+def benchmark(points: int = 20000, check_every: int = 1):
+    """pd.Series 추가 + cummax 재계산 방식과 스트리밍 추적기의 누적 처리 시간과 결과를 비교합니다."""
+    rng = np.random.default_rng(0)
+    equity = 1_000_000 * np.cumprod(1 + rng.normal(0, 0.004, points))
+    timestamps = 1.7e9 + np.arange(points) * 600.0
+
+    started = time.perf_counter()
+    series = pd.Series(dtype=float)
+    for i in range(points):
+        series[pd.Timestamp(timestamps[i], unit="s")] = equity[i]
+        if i % check_every == 0 and len(series) >= 2:
+            peak = series.cummax()
+            pandas_mdd = ((series - peak) / peak).min()
+    pandas_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    tracker = StreamingEquityTracker(capacity=4096, chunk_size=1024)
+    for i in range(points):
+        tracker.update(equity[i], timestamps[i])
+    streaming_seconds = time.perf_counter() - started
+
+    print(f"[BENCH] {points}개 순자산 갱신")
+    print(f"  - pd.Series + cummax  : {pandas_seconds:8.3f}s (최대 낙폭 {pandas_mdd:.4%})")
+    print(f"  - StreamingEquityTracker: {streaming_seconds:8.3f}s (최대 낙폭 {tracker.max_drawdown:.4%}), "
+          f"{streaming_seconds / points * 1e6:.1f}µs/갱신, 버퍼 {tracker.buffer._records.nbytes / 1024:.0f}KB 고정")
+    assert abs(pandas_mdd - tracker.max_drawdown) < 1e-12, "최대 낙폭이 일치하지 않습니다."
+    print(f"  - Sortino(연율화 전): {tracker.sortino:.4f}, 롤링 낙폭: "
+          + ", ".join(f"{w}개 {dd:.2%}" for w, dd in tracker.rolling_drawdowns.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming drawdown tracker vs. pandas cummax benchmark.")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--check-every", type=int, default=1, help="Recompute pandas drawdown every N points.")
+    args = parser.parse_args()
+    benchmark(args.points, args.check_every)
@@ -1,37 +1,121 @@
 import ccxt.async_support as ccxt
 import asyncio
-import pandas as pd
 import logging
+import time
 import traceback
 
+from core.clock import SYSTEM_CLOCK
+from core.ohlcv_cache import OHLCVCache
+from core.balance_book import BalanceBook
+from core.rate_limiter import (
+    get_rate_limiter, PRIORITY_ORDER, PRIORITY_STOP_LOSS, PRIORITY_UNIVERSE,
+)
+from core.market_feed import UpbitMarketFeed, DEFAULT_CHANNELS, UPBIT_WS_URL
+from core.liquidation import ParallelLiquidator, confirm_order
+
 logger = logging.getLogger(__name__)
 
+
+class PriceSnapshot:
+    """
+    한 번의 일괄 시세 조회로 얻은 현재가 묶음입니다.
+    한 사이클 안에서 자산 평가, 손절매 확인, 주문 실행이 같은 가격을 공유하도록 합니다.
+    """
+
+    def __init__(self, prices: dict, timestamp: float, clock=None):
+        self.prices = prices  # {'BTC/KRW': 150000000.0, ...}
+        self.timestamp = timestamp  # 조회 시각 (epoch seconds)
+        self.clock = clock or SYSTEM_CLOCK
+
+    def get(self, symbol: str, default=None):
+        return self.prices.get(symbol, default)
+
+    def age(self) -> float:
+        """스냅샷이 만들어진 뒤 경과한 시간(초)을 반환합니다."""
+        return self.clock.time() - self.timestamp
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.prices
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+
 class UpbitService:
-    def __init__(self, access_key: str, secret_key: str):
+    def __init__(self, access_key: str, secret_key: str, clock=None, rate_limiter=None):
         self.exchange = ccxt.upbit({
             'apiKey': access_key,
             'secret': secret_key,
-            'enableRateLimit': True,
+            'enableRateLimit': False, # 프로세스 공유 UpbitRateLimiter가 한도를 관리
         })
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.rate_limiter.attach(self.exchange) # 응답마다 그 응답의 Remaining-Req 헤더로 해당 그룹 버킷을 보정
+        self.clock = clock or SYSTEM_CLOCK # 잔고 TTL, 캔들 위치, 스냅샷 시각 기준 (재생 시 가속 시계, core.clock)
+        self.balance_book = BalanceBook(self.exchange, request=self.request, clock=self.clock) # TTL + 주문 기반 갱신되는 로컬 잔고
+        self.ohlcv_cache = OHLCVCache(self.exchange, request=self.request, clock=self.clock) # (심볼, 타임프레임)별 증분 캔들 링 버퍼
+        self.market_feed = None # start_market_feed() 호출 시 활성화되는 WebSocket 시세 피드
+        self.feed_max_age = 5.0 # 피드 시세를 REST 대신 사용할 수 있는 최대 경과 시간(초)
+        self.recorder = None # 설정되면 모든 거래소 응답을 녹화 (core.session_recorder.SessionRecorder)
+        self.fill_timeout = 5.0 # 주문 제출 후 체결(최종 상태)을 확인하는 최대 시간(초)
+        self.fill_poll_interval = 0.2 # 체결 확인(fetch_order) 간격(초)
         print("Upbit exchange connected successfully.")
 
+    async def request(self, group: str, priority: int, method, *args, **kwargs):
+        """
+        공유 레이트 리미터를 거쳐 ccxt 메서드를 호출합니다. 429를 받으면 해당 그룹을 잠시 멈춥니다.
+        Remaining-Req 헤더 보정은 응답이 도착할 때 UpbitRateLimiter.attach로 연결한 훅이 합니다.
+
+        Args:
+            group (str): Upbit 요청 그룹 ('order', 'default', 'ticker', 'candles', 'market', ...).
+            priority (int): core.rate_limiter의 PRIORITY_* 레인.
+        """
+        await self.rate_limiter.acquire(group, priority)
+        started = time.perf_counter()
+        try:
+            result = await method(*args, **kwargs)
+        except Exception as e:
+            if isinstance(e, (ccxt.RateLimitExceeded, ccxt.DDoSProtection)):
+                self.rate_limiter.penalize(group)
+            if self.recorder:
+                self.recorder.record(method.__name__, args, kwargs, error=e, duration=time.perf_counter() - started)
+            raise
+        if self.recorder:
+            self.recorder.record(method.__name__, args, kwargs, result, duration=time.perf_counter() - started)
+        return result
+
     async def connect(self):
         try:
-            await self.exchange.load_markets()
+            await self.request('market', PRIORITY_UNIVERSE, self.exchange.load_markets)
             print("✅ Upbit 주문 실행 엔진 활성화.")
         except Exception as e:
             logger.fatal(f"[FATAL] Upbit 연결 실패: {e}", exc_info=True)
             await self.close()
             raise
 
+    async def start_market_feed(self, symbols, channels=DEFAULT_CHANNELS, url: str = UPBIT_WS_URL):
+        """
+        WebSocket 시세 피드를 시작합니다. 이미 실행 중이면 구독 심볼만 추가합니다.
+        피드가 활성화되면 get_current_price/get_current_prices는 신선한 로컬 시세를 먼저 사용합니다.
+        """
+        if self.market_feed is None:
+            self.market_feed = UpbitMarketFeed(symbols, channels=channels, url=url)
+            await self.market_feed.start()
+        else:
+            await self.market_feed.subscribe(symbols)
+        return self.market_feed
+
     async def close(self):
+        await self.balance_book.stop()
+        if self.market_feed:
+            await self.market_feed.stop()
+            self.market_feed = None
         if self.exchange:
             await self.exchange.close()
 
     async def get_balance(self, currency: str):
         try:
-            balances = await self.exchange.fetch_balance()
-            return balances.get(currency, {}).get('free', 0)
+            await self.balance_book.ensure_fresh()
+            return self.balance_book.get_free(currency)
         except Exception as e:
             logger.error(f"[ERROR] 잔고 조회 실패: {e}")
             print(traceback.format_exc())
@@ -39,10 +123,10 @@ class UpbitService:
 
     async def get_all_balances(self):
         try:
-            balances = await self.exchange.fetch_balance()
+            await self.balance_book.ensure_fresh()
             return {
-                ticker: {'balance': info} 
-                for ticker, info in balances['free'].items() if info > 0
+                ticker: {'balance': info}
+                for ticker, info in self.balance_book.free.items() if info > 0
             }
         except Exception as e:
             logger.error(f"[ERROR] 전체 잔고 조회 실패: {e}")
@@ -50,8 +134,12 @@ class UpbitService:
             return None
 
     async def get_current_price(self, ticker: str):
+        if self.market_feed:
+            feed_price = self.market_feed.get_price(ticker, max_age=self.feed_max_age)
+            if feed_price is not None:
+                return feed_price
         try:
-            ticker_data = await self.exchange.fetch_ticker(ticker)
+            ticker_data = await self.request('ticker', PRIORITY_STOP_LOSS, self.exchange.fetch_ticker, ticker)
             if ticker_data: # Check if ticker_data is not None
                 return ticker_data['last']
             else:
@@ -61,38 +149,133 @@ class UpbitService:
             logger.warning(f"[WARN] {ticker} 현재가 조회 실패: {e}")
             return None
 
+    async def get_current_prices(self, symbols) -> PriceSnapshot | None:
+        """
+        여러 마켓의 현재가를 단 한 번의 fetch_tickers 요청으로 조회합니다.
+        시세 피드가 켜져 있으면 신선한 피드 시세를 쓰고, 나머지 마켓만 REST로 조회합니다.
+
+        Args:
+            symbols: 조회할 마켓 목록 (예: ['BTC/KRW', 'ETH/KRW']).
+
+        Returns:
+            PriceSnapshot | None: 가격 맵과 조회 시각을 담은 스냅샷. 요청 자체가 실패하면 None.
+        """
+        symbols = list(dict.fromkeys(symbols))  # 순서를 유지하며 중복 제거
+        prices = {}
+        if self.market_feed:
+            for symbol in symbols:
+                feed_price = self.market_feed.get_price(symbol, max_age=self.feed_max_age)
+                if feed_price is not None:
+                    prices[symbol] = feed_price
+        to_fetch = [symbol for symbol in symbols if symbol not in prices]
+        if not to_fetch:
+            return PriceSnapshot(prices, self.clock.time(), self.clock)
+        try:
+            tickers = await self.request('ticker', PRIORITY_STOP_LOSS, self.exchange.fetch_tickers, to_fetch)
+        except Exception as e:
+            logger.warning(f"[WARN] 일괄 현재가 조회 실패 ({len(to_fetch)}개 마켓): {e}")
+            return None
+
+        prices.update({
+            symbol: ticker_data['last']
+            for symbol, ticker_data in (tickers or {}).items()
+            if ticker_data and ticker_data.get('last') is not None
+        })
+        missing = [symbol for symbol in symbols if symbol not in prices]
+        if missing:
+            logger.warning(f"[WARN] 일괄 현재가 조회에서 누락된 마켓: {missing}")
+        return PriceSnapshot(prices, self.clock.time(), self.clock)
+
+    async def get_orderbook(self, ticker: str):
+        """호가창을 UpbitMarketFeed.get_orderbook과 같은 형식({'bids': [(가격, 수량)], 'asks': [...], 'timestamp'})으로 반환합니다."""
+        try:
+            book = await self.request('orderbook', PRIORITY_ORDER, self.exchange.fetch_order_book, ticker)
+            return {
+                'bids': [(price, size) for price, size, *_ in book['bids']],
+                'asks': [(price, size) for price, size, *_ in book['asks']],
+                'timestamp': book.get('timestamp'),
+            }
+        except Exception as e:
+            logger.warning(f"[WARN] {ticker} 호가 조회 실패: {e}")
+            return None
+
     async def get_ohlcv(self, ticker: str, timeframe='1h', limit=300): # Changed limit to 300
         try:
-            ohlcv = await self.exchange.fetch_ohlcv(ticker, timeframe=timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            return df
+            buffer = await self.ohlcv_cache.get(ticker, timeframe, limit)
+            return buffer.to_dataframe(limit)
+        except Exception as e:
+            logger.warning(f"[WARN] {ticker} OHLCV 데이터 가져오기 실패: {e}")
+            return None
+
+    async def get_ohlcv_buffer(self, ticker: str, timeframe='1h', limit=300):
+        """
+        증분 갱신된 OHLCVRingBuffer를 반환합니다. DataFrame을 만들지 않고
+        buffer.column('close', limit) 같은 zero-copy numpy 뷰로 읽을 때 사용합니다.
+        """
+        try:
+            return await self.ohlcv_cache.get(ticker, timeframe, limit)
         except Exception as e:
             logger.warning(f"[WARN] {ticker} OHLCV 데이터 가져오기 실패: {e}")
             return None
 
+    async def _confirm_order(self, ticker, order):
+        """제출된 주문이 최종 상태가 될 때까지 확인합니다 (core.liquidation.confirm_order). 확인하지 못하면 None."""
+        async def fetch_order(order_id, symbol):
+            return await self.request('default', PRIORITY_ORDER, self.exchange.fetch_order, order_id, symbol)
+        try:
+            return await confirm_order(fetch_order, order, ticker, self.fill_timeout, self.fill_poll_interval)
+        except Exception as e:
+            print(f"  - [ERROR] {ticker} 주문 {order.get('id')} 체결 조회 실패: {e}")
+            return None
+
     async def create_market_buy_order(self, ticker, amount_krw):
+        """
+        시장가 매수 주문을 내고 체결을 확인합니다. BalanceBook에는 확인된 체결 수량/금액만 반영합니다.
+
+        Returns:
+            dict | None: 제출 실패 시 None. 체결을 확인하지 못하면 제출 응답(status가 최종 상태가 아님)을 그대로 반환.
+        """
         print(f"  - [EXEC] {ticker} 시장가 매수 주문 (금액: {amount_krw:.0f} KRW)")
         try:
-            order = await self.exchange.create_market_buy_order_with_cost(ticker, amount_krw)
-            print(f"  - [SUCCESS] 매수 주문 성공, ID: {order.get('id')}")
-            return order
+            order = await self.request('order', PRIORITY_ORDER, self.exchange.create_market_buy_order_with_cost, ticker, amount_krw)
         except Exception as e:
             print(f"  - [ERROR] 매수 주문 실패: {e}")
             return None
+        print(f"  - [SUCCESS] 매수 주문 접수, ID: {order.get('id')}")
+        confirmed = await self._confirm_order(ticker, order)
+        if confirmed is None:
+            print(f"  - [WARN] {ticker} 매수 주문 {order.get('id')} 체결 확인 시간 초과. 잔고 재조정으로 확인합니다.")
+            self.balance_book.request_reconcile()
+            return order
+        if confirmed.get('filled'):
+            self.balance_book.apply_buy_fill(ticker, confirmed.get('cost') or 0, confirmed['filled'])
+        return confirmed
 
     async def create_market_sell_order(self, ticker, amount_coin):
+        """
+        시장가 매도 주문을 내고 체결을 확인합니다. BalanceBook에는 확인된 체결 수량/금액만 반영합니다.
+
+        Returns:
+            dict | None: 제출 실패 시 None. 체결을 확인하지 못하면 제출 응답(status가 최종 상태가 아님)을 그대로 반환.
+        """
         print(f"  - [EXEC] {ticker} 시장가 매도 주문 (수량: {amount_coin})")
         try:
-            order = await self.exchange.create_market_sell_order(ticker, amount_coin)
-            print(f"  - [SUCCESS] 매도 주문 성공, ID: {order.get('id')}")
-            return order
+            order = await self.request('order', PRIORITY_ORDER, self.exchange.create_market_sell_order, ticker, amount_coin)
         except Exception as e:
             print(f"  - [ERROR] 매도 주문 실패: {e}")
             return None
+        print(f"  - [SUCCESS] 매도 주문 접수, ID: {order.get('id')}")
+        confirmed = await self._confirm_order(ticker, order)
+        if confirmed is None:
+            print(f"  - [WARN] {ticker} 매도 주문 {order.get('id')} 체결 확인 시간 초과. 잔고 재조정으로 확인합니다.")
+            self.balance_book.request_reconcile()
+            return order
+        if confirmed.get('filled'):
+            self.balance_book.apply_sell_fill(ticker, confirmed['filled'], confirmed.get('cost') or 0)
+        return confirmed
 
     async def liquidate_all_positions(self, holdings):
+        """모든 매도를 주문 한도 안에서 동시에 제출하고, 재시도/체결 확인 후 청산 보고서를 반환합니다."""
         print("🚨 [RCT] 서킷 브레이커 발동! 모든 포지션 청산 시작...")
-        for ticker, amount in holdings.items():
-            await self.create_market_sell_order(ticker, amount)
+        liquidator = ParallelLiquidator(self.exchange, request=self.request, balance_book=self.balance_book)
+        return await liquidator.liquidate(holdings)
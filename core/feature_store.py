@@ -0,0 +1,267 @@
+"""
+티커별 증분 특징(feature) 저장소입니다. preprocessed_data.pkl(전체 티커 DataFrame dict 피클)을 대체합니다.
+
+매번 모든 티커의 지표를 처음부터 다시 계산해 피클 하나로 쓰는 대신, 티커별로 계산 결과를
+비압축 Arrow IPC 조각으로 쌓고 manifest.json에 다음을 기록합니다.
+
+  - definition_hash: 특징 정의(지표 계산 코드, 컬럼 목록 등)의 해시. 바뀌면 전체 재계산
+  - source_hash: 마지막으로 반영한 원본 캔들 구간(source_first ~ source_last)의 내용 해시.
+    그 구간의 캔들이 바뀌었으면(수정/재다운로드) 전체 재계산
+  - source_last 이후의 새 캔들만 있으면 지표 예열(warmup_bars)만큼 앞에서부터 다시 계산해 새 행만 조각으로 추가
+  - 둘 다 같고 새 캔들도 없으면 아무것도 계산하지 않음
+
+    data/features/BTC_KRW_1m/part-00000002.arrow
+    data/features/manifest.json
+
+읽기는 조각별 메모리 맵(core.arrow_loader)이라 필요한 구간/열만 읽습니다.
+manifest에 등록된 조각만 읽으므로, 조각을 쓴 뒤 manifest 저장 전에 멈춰도 중복 행이 생기지 않습니다.
+
+사용 예:
+    python -m core.feature_store build            # DataPreprocessor.materialize()
+    python -m core.feature_store build --force
+    python -m core.feature_store info
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from core.arrow_loader import open_mapped, write_frame
+from core.candle_store import CANDLE_COLUMNS, series_key
+
+FEATURE_STORE_DIR = "data/features"
+MANIFEST_NAME = "manifest.json"
+WARMUP_BARS = 1000  # EMA_50/ADX_14(Wilder) 등 재귀 지표가 전체 기록으로 계산한 값과 수렴하는 데 충분한 길이
+_PART_PATTERN = re.compile(r"part-(\d+)\.arrow$")
+
+
+def source_hash(candles: pd.DataFrame, end=None) -> str:
+    """캔들(타임스탬프 인덱스 + OHLCV)의 내용 해시. end가 있으면 end까지(포함)만."""
+    if end is not None:
+        candles = candles.iloc[:candles.index.searchsorted(pd.Timestamp(end), side="right")]
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(candles.index.as_unit("ns").asi8).tobytes())
+    for name in CANDLE_COLUMNS:
+        digest.update(np.ascontiguousarray(candles[name].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+class FeatureStore:
+    """
+    Args:
+        root (str): 저장소 루트 디렉터리.
+        timeframe (str): 원본 캔들 타임프레임 (시리즈 이름의 일부, 예: BTC_KRW_1m).
+        compact_threshold (int): 티커의 조각 수가 이 값 이상이 되면 하나로 합칩니다.
+    """
+
+    def __init__(self, root: str = FEATURE_STORE_DIR, timeframe: str = "1m", compact_threshold: int = 16):
+        self.root = root
+        self.timeframe = timeframe
+        self.compact_threshold = compact_threshold
+        self.manifest = self._load_manifest()
+
+    # --- manifest ---
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def _load_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def entry(self, ticker: str) -> dict | None:
+        return self.manifest.get(series_key(ticker, self.timeframe))
+
+    def tickers(self) -> list:
+        return sorted(entry["ticker"] for entry in self.manifest.values() if entry.get("timeframe") == self.timeframe)
+
+    # --- 조각 ---
+
+    def series_dir(self, ticker: str) -> str:
+        return os.path.join(self.root, series_key(ticker, self.timeframe))
+
+    def _part_paths(self, ticker: str, entry: dict | None = None) -> list:
+        entry = entry or self.entry(ticker) or {}
+        return [os.path.join(self.series_dir(ticker), part["name"]) for part in entry.get("parts", [])]
+
+    def _write_part(self, ticker: str, df: pd.DataFrame) -> dict:
+        series_dir = self.series_dir(ticker)
+        os.makedirs(series_dir, exist_ok=True)
+        numbers = [int(m.group(1)) for m in map(_PART_PATTERN.fullmatch, os.listdir(series_dir)) if m]
+        name = f"part-{max(numbers, default=-1) + 1:08d}.arrow"
+        write_frame(os.path.join(series_dir, name), df)
+        return {"name": name, "rows": len(df), "first": str(df.index[0]), "last": str(df.index[-1])}
+
+    def _remove_unlisted_parts(self, ticker: str):
+        """manifest에 없는 조각(교체된 조각, manifest 저장 전에 멈춘 조각)을 지웁니다."""
+        series_dir = self.series_dir(ticker)
+        listed = {part["name"] for part in (self.entry(ticker) or {}).get("parts", [])}
+        for name in os.listdir(series_dir) if os.path.isdir(series_dir) else ():
+            if _PART_PATTERN.fullmatch(name) and name not in listed:
+                os.remove(os.path.join(series_dir, name))
+
+    # --- 쓰기 ---
+
+    def materialize(self, ticker: str, candles: pd.DataFrame, compute, definition_hash: str,
+                    warmup_bars: int = WARMUP_BARS, force: bool = False) -> str:
+        """
+        ticker의 특징을 원본 캔들과 맞춥니다.
+
+        Args:
+            candles: 타임스탬프 인덱스 + OHLCV, 오름차순.
+            compute: compute(candles, regime_map) -> (특징 DataFrame 또는 None, regime_map).
+                regime_map은 시장 체제 이름 -> 정수 코드이며 이어서 계산할 때 기존 코드를 유지하기 위해 넘깁니다.
+            definition_hash: 특징 정의의 해시.
+
+        Returns:
+            'unchanged' | 'incremental' | 'full' | 'skipped'
+        """
+        key = series_key(ticker, self.timeframe)
+        entry = self.manifest.get(key)
+        if candles is None or candles.empty:
+            return "skipped"
+        source_last = candles.index[-1]
+        full_hash = source_hash(candles)
+
+        rebuild = (force or entry is None or not entry.get("parts")
+                   or entry["definition_hash"] != definition_hash
+                   or pd.Timestamp(entry["source_first"]) != candles.index[0]
+                   or source_last < pd.Timestamp(entry["source_last"]))
+        if not rebuild and source_last == pd.Timestamp(entry["source_last"]):
+            rebuild = entry["source_hash"] != full_hash
+            if not rebuild:
+                return "unchanged"
+        if not rebuild:
+            rebuild = entry["source_hash"] != source_hash(candles, entry["source_last"])
+
+        if rebuild:
+            features, regime_map = compute(candles, {})
+            if features is None or features.empty:
+                return "skipped"
+            parts = [self._write_part(ticker, features)]
+            status = "full"
+        else:
+            previous_last = pd.Timestamp(entry["source_last"])
+            position = candles.index.searchsorted(previous_last, side="right")
+            tail = candles.iloc[max(0, position - warmup_bars):]
+            features, regime_map = compute(tail, dict(entry["regime_map"]))
+            parts = list(entry["parts"])
+            if features is not None:
+                features = features[features.index > previous_last]
+                if not features.empty:
+                    parts.append(self._write_part(ticker, features))
+            status = "incremental"
+
+        self.manifest[key] = {
+            "ticker": ticker,
+            "timeframe": self.timeframe,
+            "definition_hash": definition_hash,
+            "source_hash": full_hash,
+            "source_first": str(candles.index[0]),
+            "source_last": str(source_last),
+            "source_rows": len(candles),
+            "regime_map": regime_map,
+            "parts": parts,
+            "rows": sum(part["rows"] for part in parts),
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self._save_manifest()
+        self._remove_unlisted_parts(ticker)
+        if len(parts) >= self.compact_threshold:
+            self.compact(ticker)
+        return status
+
+    def compact(self, ticker: str):
+        """티커의 조각들을 하나로 합칩니다 (새 조각을 manifest에 올린 뒤 예전 조각을 지움)."""
+        key = series_key(ticker, self.timeframe)
+        entry = self.manifest.get(key)
+        if not entry or len(entry["parts"]) <= 1:
+            return
+        merged = self.read(ticker)
+        entry["parts"] = [self._write_part(ticker, merged)]
+        self._save_manifest()
+        self._remove_unlisted_parts(ticker)
+
+    # --- 읽기 ---
+
+    def read(self, ticker: str, start=None, end=None, columns=None, inclusive_end: bool = False) -> pd.DataFrame | None:
+        """
+        [start, end) 구간의 특징을 DataFrame(timestamp 인덱스)으로 읽습니다. columns를 주면 그 열만 읽습니다.
+        구간과 겹치지 않는 조각은 열지 않습니다. 저장된 특징이나 구간 안의 행이 없으면 None.
+        """
+        entry = self.entry(ticker)
+        if not entry:
+            return None
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        frames = []
+        for part in entry["parts"]:
+            if start is not None and pd.Timestamp(part["last"]) < start:
+                continue
+            if end is not None and (pd.Timestamp(part["first"]) > end or (not inclusive_end and pd.Timestamp(part["first"]) == end)):
+                continue
+            path = os.path.join(self.series_dir(ticker), part["name"])
+            frames.append(open_mapped(path).frame(start, end, columns, inclusive_end))
+        if not frames:
+            return None
+        return frames[0] if len(frames) == 1 else pd.concat(frames)
+
+    def column(self, ticker: str, name: str, start=None, end=None) -> np.ndarray:
+        """한 열의 [start, end) 구간. 조각이 하나면 메모리 맵을 직접 가리키는 읽기 전용 뷰입니다."""
+        views = [open_mapped(path).column(name, start, end) for path in self._part_paths(ticker)]
+        if not views:
+            raise KeyError(f"{ticker} {self.timeframe} 특징이 없습니다.")
+        return views[0] if len(views) == 1 else np.concatenate(views)
+
+    def load_all(self, tickers=None, start=None, end=None, columns=None, inclusive_end: bool = False) -> dict:
+        """{ticker: DataFrame} (기존 preprocessed_data.pkl과 같은 모양). 구간에 데이터가 없는 티커는 빠집니다."""
+        data = {}
+        for ticker in self.tickers() if tickers is None else tickers:
+            df = self.read(ticker, start, end, columns, inclusive_end)
+            if df is not None and not df.empty:
+                data[ticker] = df
+        return data
+
+
+def _print_info(store: FeatureStore):
+    print(f"[FEATURES] {store.root} ({store.timeframe})")
+    for ticker in store.tickers():
+        entry = store.entry(ticker)
+        size = sum(os.path.getsize(path) for path in store._part_paths(ticker, entry) if os.path.exists(path))
+        print(f"  - {ticker:<10} {entry['rows']:8d}행, 조각 {len(entry['parts'])}개, {size / 1e6:6.1f}MB | "
+              f"원본 ~ {entry['source_last']} | 정의 {entry['definition_hash'][:12]} | 갱신 {entry['updated_at']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental, content-hashed feature store.")
+    parser.add_argument("--root", type=str, default=FEATURE_STORE_DIR)
+    parser.add_argument("--timeframe", type=str, default="1m")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Materialize features for the target coins (skips unchanged tickers).")
+    build_parser.add_argument("--tickers", nargs="+", default=None)
+    build_parser.add_argument("--force", action="store_true", help="Recompute every ticker from scratch.")
+    subparsers.add_parser("info", help="List materialized tickers.")
+    args = parser.parse_args()
+
+    feature_store = FeatureStore(args.root, args.timeframe)
+    if args.command == "build":
+        from preprocessor import DataPreprocessor
+
+        DataPreprocessor(args.tickers, args.timeframe, feature_store).materialize(force=args.force)
+    else:
+        _print_info(feature_store)
@@ -0,0 +1,232 @@
+"""
+거래 사이클 단계별 지연 시간 계측기입니다.
+
+LiveTrader의 각 단계(데이터 조회, 지표 계산, 시장 체제 진단, 정책 추론, 감성 분석, 포지션 크기 산정,
+주문 집행)를 span()으로 감싸 단계별 히스토그램(고정 로그 간격 버킷)에 누적하고,
+p50/p95/p99를 버킷 보간으로 추정합니다. span 하나의 비용은 perf_counter 두 번과 bisect 한 번입니다.
+
+내보내기:
+  - Prometheus 텍스트 파일 (node_exporter textfile collector 형식): write_prometheus(path)
+  - 이벤트 루프 안의 HTTP 엔드포인트: GET /metrics (Prometheus 텍스트), GET /metrics.json (JSON 요약)
+    METRICS_PORT=9108 python live_trader.py  ->  curl http://127.0.0.1:9108/metrics.json
+
+span 오버헤드 벤치마크:
+    python -m core.latency_metrics --spans 200000
+"""
+import argparse
+import bisect
+import json
+import math
+import os
+import time
+
+from aiohttp import web
+
+# 100µs ~ 약 130초, 1.5배 간격 (버킷 안에서 선형 보간하므로 분위수 오차는 버킷 폭 이내)
+DEFAULT_BUCKETS = tuple(float(f"{1e-4 * 1.5 ** i:.6g}") for i in range(36))
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+METRICS_PROM_PATH = "data/latency_metrics.prom"
+METRIC_NAME = "upbit_bot_stage_latency_seconds"
+
+
+class LatencyHistogram:
+    """누적 버킷 히스토그램. counts[i]는 bounds[i-1] < 값 <= bounds[i]인 관측 수 (마지막 칸은 +Inf)."""
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """버킷 안에서 선형 보간한 q 분위수(초). 관측이 없으면 nan."""
+        if self.count == 0:
+            return float("nan")
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(lower + (upper - lower) * (rank - cumulative) / bucket_count, self.max)
+            cumulative += bucket_count
+        return self.max
+
+
+class _Span:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: LatencyHistogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class LatencyMetrics:
+    """
+    단계 이름별 LatencyHistogram 모음입니다.
+
+    사용 예:
+        with metrics.span('inference'):
+            actions = policy_inference.predict(requests)
+
+    async 코드 안에서도 await를 감싸 쓸 수 있습니다 (동시에 여러 span이 열려 있어도 각자 시작 시각을 가짐).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, quantiles=DEFAULT_QUANTILES):
+        self.buckets = buckets
+        self.quantiles = quantiles
+        self.histograms = {}
+        self.started_at = time.time()
+        self._runner = None
+        self.port = None
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram(self.buckets)
+        return histogram
+
+    def span(self, stage: str) -> _Span:
+        return _Span(self.histogram(stage))
+
+    def observe(self, stage: str, seconds: float):
+        self.histogram(stage).observe(seconds)
+
+    def summary(self) -> dict:
+        """{stage: {'count', 'total_s', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'}} (누적 시간 많은 순)"""
+        summary = {}
+        for stage, histogram in sorted(self.histograms.items(), key=lambda item: item[1].sum, reverse=True):
+            stats = {
+                "count": histogram.count,
+                "total_s": histogram.sum,
+                "mean_ms": histogram.sum / histogram.count * 1000 if histogram.count else float("nan"),
+            }
+            for q in self.quantiles:
+                stats[f"p{q * 100:g}_ms"] = histogram.quantile(q) * 1000
+            stats["max_ms"] = histogram.max * 1000
+            summary[stage] = stats
+        return summary
+
+    def report(self, cycle_stage: str = "cycle"):
+        """단계별 분위수와, cycle_stage 누적 시간 대비 각 단계의 비중을 출력합니다."""
+        summary = self.summary()
+        if not summary:
+            return
+        budget = summary.get(cycle_stage, {}).get("total_s") or 0.0
+        print("[LATENCY] 단계별 지연 (누적 시간 순)")
+        for stage, stats in summary.items():
+            share = f"{stats['total_s'] / budget:6.1%}" if budget and stage != cycle_stage else "     -"
+            quantiles = " ".join(f"p{q * 100:g} {stats[f'p{q * 100:g}_ms']:8.1f}ms" for q in self.quantiles)
+            print(f"  - {stage:<14} {stats['count']:6d}회 | {quantiles} | 최대 {stats['max_ms']:8.1f}ms | 사이클 비중 {share}")
+
+    def to_prometheus(self) -> str:
+        lines = [
+            f"# HELP {METRIC_NAME} Trading cycle stage latency.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for stage, histogram in self.histograms.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {histogram.sum:.9g}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {histogram.count}')
+        lines.append(f"# HELP {METRIC_NAME}_quantile Bucket-interpolated stage latency quantiles.")
+        lines.append(f"# TYPE {METRIC_NAME}_quantile gauge")
+        for stage, histogram in self.histograms.items():
+            for q in self.quantiles:
+                value = histogram.quantile(q)
+                if not math.isnan(value):
+                    lines.append(f'{METRIC_NAME}_quantile{{stage="{stage}",quantile="{q:g}"}} {value:.9g}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str = METRICS_PROM_PATH):
+        """Prometheus 텍스트 파일을 원자적으로 교체합니다 (수집기가 쓰다 만 파일을 읽지 않도록)."""
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"  - [WARN] 지연 지표 파일 저장 실패: {e}")
+
+    def to_json(self) -> dict:
+        return {"started_at": self.started_at, "updated_at": time.time(), "stages": self.summary()}
+
+    async def start_server(self, host: str = "127.0.0.1", port: int = 9108):
+        """현재 이벤트 루프에서 /metrics (Prometheus 텍스트), /metrics.json 을 제공합니다."""
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_prometheus)
+        app.router.add_get("/metrics.json", self._handle_json)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1] if port == 0 else port
+        print(f"✅ 지연 지표 엔드포인트 시작: http://{host}:{self.port}/metrics.json")
+
+    async def stop_server(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_prometheus(self, request):
+        return web.Response(text=self.to_prometheus(), content_type="text/plain", charset="utf-8")
+
+    async def _handle_json(self, request):
+        # nan(관측 없음)은 JSON 표준이 아니므로 null로
+        text = json.dumps(self.to_json(), ensure_ascii=False).replace("NaN", "null")
+        return web.Response(text=text, content_type="application/json")
+
+
+def benchmark(spans: int = 200000):
+    """빈 span과 observe()의 호출당 비용, 분위수 추정 정확도를 측정합니다."""
+    import random
+
+    metrics = LatencyMetrics()
+    rng = random.Random(0)
+    samples = [rng.lognormvariate(math.log(0.02), 1.0) for _ in range(spans)]
+
+    started = time.perf_counter()
+    for _ in range(spans):
+        with metrics.span("empty"):
+            pass
+    span_ns = (time.perf_counter() - started) / spans * 1e9
+
+    started = time.perf_counter()
+    for seconds in samples:
+        metrics.observe("lognormal", seconds)
+    observe_ns = (time.perf_counter() - started) / spans * 1e9
+
+    print(f"[BENCH] span {spans}회: {span_ns:.0f}ns/span, observe {observe_ns:.0f}ns/회")
+    ordered = sorted(samples)
+    histogram = metrics.histograms["lognormal"]
+    for q in DEFAULT_QUANTILES:
+        exact = ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        estimate = histogram.quantile(q)
+        print(f"  - p{q * 100:g}: 추정 {estimate * 1000:8.2f}ms | 정확값 {exact * 1000:8.2f}ms | 오차 {estimate / exact - 1:+.1%}")
+    print(f"  - Prometheus 텍스트 {len(metrics.to_prometheus())} bytes (단계 {len(metrics.histograms)}개)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency span overhead and quantile accuracy benchmark.")
+    parser.add_argument("--spans", type=int, default=200000)
+    args = parser.parse_args()
+    benchmark(args.spans)
@@ -0,0 +1,253 @@
+"""
+MDD 서킷 브레이커용 병렬 청산기입니다.
+
+모든 매도 주문을 동시에 제출하고 ('order' 그룹 토큰 버킷이 허용하는 속도 안에서),
+실패한 주문은 지수 백오프로 재시도하며, fetch_order로 체결을 확인해 남은 수량만 다시 매도합니다.
+주문별 / 전체 청산 완료 시간(time-to-flat)을 보고합니다.
+
+벤치마크 (지연을 주입한 로컬 모의 거래소, 순차 vs 병렬):
+    python -m core.liquidation --coins 10 --latency 0.15 --failure-rate 0.2
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import ccxt.async_support as ccxt
+
+from core.rate_limiter import UpbitRateLimiter, PRIORITY_ORDER
+
+RETRYABLE_ERRORS = (ccxt.NetworkError, ccxt.ExchangeNotAvailable, ccxt.RateLimitExceeded, ccxt.DDoSProtection)
+FINAL_ORDER_STATUSES = ("closed", "canceled", "cancelled", "expired", "rejected")
+
+
+async def confirm_order(fetch_order, order: dict, symbol: str, timeout: float = 5.0, poll_interval: float = 0.2):
+    """
+    주문이 최종 상태가 될 때까지 fetch_order(order_id, symbol)로 확인합니다.
+    제출 응답(Upbit는 status='open', filled=0)만으로는 체결 수량/금액을 알 수 없기 때문입니다.
+
+    Returns:
+        dict | None: 최종 상태의 주문. timeout초 안에 확인하지 못하면 None.
+    """
+    deadline = time.perf_counter() + timeout
+    while order.get('status') not in FINAL_ORDER_STATUSES:
+        if time.perf_counter() >= deadline:
+            return None
+        await asyncio.sleep(poll_interval)
+        try:
+            order = await fetch_order(order.get('id'), symbol)
+        except RETRYABLE_ERRORS:
+            continue
+    return order
+
+
+class LiquidationLeg:
+    """한 마켓의 청산 진행 상황"""
+
+    def __init__(self, symbol: str, quantity: float):
+        self.symbol = symbol
+        self.quantity = quantity
+        self.filled = 0.0
+        self.proceeds = 0.0
+        self.attempts = 0
+        self.order_ids = []
+        self.status = "pending"  # pending -> flat | failed | unconfirmed
+        self.error = None
+        self.time_to_flat = None  # 청산 시작부터 체결 확인까지 (초)
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.quantity - self.filled)
+
+    def to_dict(self) -> dict:
+        return {
+            "symbol": self.symbol, "quantity": self.quantity, "filled": self.filled, "proceeds": self.proceeds,
+            "attempts": self.attempts, "order_ids": self.order_ids, "status": self.status,
+            "error": self.error, "time_to_flat": self.time_to_flat,
+        }
+
+
+class ParallelLiquidator:
+    """
+    Args:
+        exchange: ccxt 비동기 거래소 (create_market_sell_order, fetch_order).
+        request: UpbitService.request (레이트 리미터 경유). 없으면 거래소를 직접 호출.
+        balance_book: 체결을 반영할 BalanceBook (선택).
+        max_attempts (int): 주문당 최대 제출 횟수.
+        base_backoff / max_backoff (float): 재시도 대기 시간(초) = min(max, base * 2^(시도-1)).
+        fill_timeout (float): 제출 후 체결 확인을 기다리는 최대 시간(초).
+        fill_poll_interval (float): 체결 확인(fetch_order) 간격(초).
+    """
+
+    def __init__(self, exchange, request=None, balance_book=None, max_attempts: int = 4,
+                 base_backoff: float = 0.25, max_backoff: float = 2.0,
+                 fill_timeout: float = 5.0, fill_poll_interval: float = 0.2):
+        self.exchange = exchange
+        self.request = request
+        self.balance_book = balance_book
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.fill_timeout = fill_timeout
+        self.fill_poll_interval = fill_poll_interval
+
+    async def _call(self, group: str, method, *args):
+        if self.request is not None:
+            return await self.request(group, PRIORITY_ORDER, method, *args)
+        return await method(*args)
+
+    async def liquidate(self, holdings: dict) -> dict:
+        """
+        Args:
+            holdings (dict): {symbol: 매도 수량}
+
+        Returns:
+            dict: {'flat': 모든 주문 체결 확인 여부, 'time_to_flat': 전체 소요 시간(초), 'legs': [주문별 결과]}
+        """
+        legs = [LiquidationLeg(symbol, quantity) for symbol, quantity in holdings.items() if quantity > 0]
+        started = time.perf_counter()
+        print(f"🚨 [LIQUIDATE] {len(legs)}개 포지션 병렬 청산 시작")
+        results = await asyncio.gather(*(self._liquidate_leg(leg, started) for leg in legs), return_exceptions=True)
+        for leg, result in zip(legs, results):
+            if isinstance(result, Exception):
+                # 예상하지 못한 오류도 보고서 전체가 아니라 그 주문만 미확인으로 남김
+                leg.status, leg.error = "unconfirmed", f"{type(result).__name__}: {result}"
+        total = time.perf_counter() - started
+        flat = all(leg.status == "flat" for leg in legs)
+
+        for leg in legs:
+            elapsed = f"{leg.time_to_flat * 1000:7.0f}ms" if leg.time_to_flat is not None else "      - "
+            print(f"  - [LIQUIDATE] {leg.symbol:<10} {leg.status:<11} 체결 {leg.filled:g}/{leg.quantity:g} "
+                  f"| 시도 {leg.attempts}회 | time-to-flat {elapsed}" + (f" | {leg.error}" if leg.error else ""))
+        print(f"🚨 [LIQUIDATE] 청산 {'완료' if flat else '미완료'}: 전체 time-to-flat {total * 1000:.0f}ms")
+        if self.balance_book is not None:
+            self.balance_book.request_reconcile()
+        return {"flat": flat, "time_to_flat": total, "legs": [leg.to_dict() for leg in legs]}
+
+    async def _liquidate_leg(self, leg: LiquidationLeg, started: float):
+        while leg.remaining > 0 and leg.attempts < self.max_attempts:
+            leg.attempts += 1
+            try:
+                order = await self._call('order', self.exchange.create_market_sell_order, leg.symbol, leg.remaining)
+            except RETRYABLE_ERRORS as e:
+                leg.error = f"{type(e).__name__}: {e}"
+                await self._backoff(leg)
+                continue
+            except ccxt.InsufficientFunds as e:
+                # 응답을 못 받은 이전 제출이 실제로는 체결됐을 수 있음 -> 잔고 재조정으로 확인
+                leg.status = "unconfirmed" if leg.attempts > 1 else "failed"
+                leg.error = f"{type(e).__name__}: {e}"
+                return
+            except Exception as e:  # 잘못된 주문 등은 재시도해도 같은 결과
+                leg.status, leg.error = "failed", f"{type(e).__name__}: {e}"
+                return
+
+            leg.order_ids.append(order.get('id'))
+            try:
+                order = await self._confirm_fill(leg, order)
+            except Exception as e:  # OrderNotFound, AuthenticationError 등: 체결 여부를 알 수 없음
+                leg.status, leg.error = "unconfirmed", f"{type(e).__name__}: {e}"
+                return
+            if order is None:
+                # 체결 여부를 모르는 상태에서 다시 내면 이중 매도가 될 수 있으므로 멈추고 잔고 재조정에 맡김
+                leg.status, leg.error = "unconfirmed", "체결 확인 시간 초과"
+                return
+            filled = order.get('filled') or 0.0
+            leg.filled += filled
+            leg.proceeds += order.get('cost') or 0.0
+            if self.balance_book is not None and filled:
+                self.balance_book.apply_sell_fill(leg.symbol, filled, order.get('cost') or 0.0)
+            if leg.remaining > 0:
+                leg.error = f"부분 체결 ({leg.filled:g}/{leg.quantity:g})"
+                await self._backoff(leg)
+
+        if leg.remaining <= 0:
+            leg.status, leg.error = "flat", None
+            leg.time_to_flat = time.perf_counter() - started
+        else:
+            leg.status = "failed"
+
+    async def _confirm_fill(self, leg: LiquidationLeg, order: dict):
+        """주문이 최종 상태가 될 때까지 fetch_order로 확인합니다. 시간 안에 확인하지 못하면 None."""
+        async def fetch_order(order_id, symbol):
+            return await self._call('default', self.exchange.fetch_order, order_id, symbol)
+        return await confirm_order(fetch_order, order, leg.symbol, self.fill_timeout, self.fill_poll_interval)
+
+    async def _backoff(self, leg: LiquidationLeg):
+        if leg.attempts < self.max_attempts:
+            await asyncio.sleep(min(self.max_backoff, self.base_backoff * 2 ** (leg.attempts - 1)))
+
+
+class MockExchange:
+    """
+    지연과 실패를 주입하는 모의 거래소입니다. 시장가 매도는 'open' 상태로 접수되고,
+    fill_delay초 뒤 fetch_order에서 'closed'(전량 체결)로 보입니다.
+    """
+
+    def __init__(self, latency: float = 0.15, failure_rate: float = 0.0, fill_delay: float = 0.1, seed: int = 1):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fill_delay = fill_delay
+        self.orders = {}
+        self.request_count = 0
+        self._rng = random.Random(seed)
+
+    async def create_market_sell_order(self, symbol, amount):
+        self.request_count += 1
+        await asyncio.sleep(self.latency)
+        if self._rng.random() < self.failure_rate:
+            raise ccxt.NetworkError("mock: connection reset")
+        order_id = str(len(self.orders) + 1)
+        self.orders[order_id] = {"id": order_id, "symbol": symbol, "amount": amount, "created": time.perf_counter()}
+        return {"id": order_id, "symbol": symbol, "status": "open", "filled": 0.0, "cost": 0.0}
+
+    async def fetch_order(self, order_id, symbol=None):
+        self.request_count += 1
+        await asyncio.sleep(self.latency)
+        order = self.orders[order_id]
+        done = time.perf_counter() - order["created"] >= self.fill_delay
+        return {"id": order_id, "symbol": order["symbol"], "status": "closed" if done else "open",
+                "filled": order["amount"] if done else 0.0, "cost": order["amount"] * 1000.0 if done else 0.0}
+
+
+async def _sequential_liquidation(exchange, request, holdings: dict) -> float:
+    """기존 방식: 주문을 하나씩 await (체결 확인 없음)"""
+    started = time.perf_counter()
+    for symbol, quantity in holdings.items():
+        try:
+            await request('order', PRIORITY_ORDER, exchange.create_market_sell_order, symbol, quantity)
+        except Exception as e:
+            print(f"  - [ERROR] 매도 주문 실패: {e}")
+    return time.perf_counter() - started
+
+
+async def _benchmark(coins: int, latency: float, failure_rate: float):
+    holdings = {f"C{i}/KRW": 1.0 + i for i in range(coins)}
+
+    def make_request(limiter):
+        async def request(group, priority, method, *args):
+            await limiter.acquire(group, priority)
+            return await method(*args)
+        return request
+
+    exchange = MockExchange(latency, failure_rate)
+    sequential = await _sequential_liquidation(exchange, make_request(UpbitRateLimiter()), holdings)
+    sequential_failed = coins - len(exchange.orders)
+
+    exchange = MockExchange(latency, failure_rate)
+    liquidator = ParallelLiquidator(exchange, request=make_request(UpbitRateLimiter()), fill_poll_interval=0.05)
+    report = await liquidator.liquidate(holdings)
+
+    print(f"\n[BENCH] {coins}개 코인, 요청 지연 {latency * 1000:.0f}ms, 실패율 {failure_rate:.0%}, 주문 한도 8회/초")
+    print(f"  - 순차 청산 (기존): {sequential * 1000:7.0f}ms, 미체결 {sequential_failed}개 (재시도/체결 확인 없음)")
+    print(f"  - 병렬 청산       : {report['time_to_flat'] * 1000:7.0f}ms (체결 확인 포함), "
+          f"청산 {'완료' if report['flat'] else '미완료'}, 요청 {exchange.request_count}회")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sequential vs. parallel liquidation against a mock exchange.")
+    parser.add_argument("--coins", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.15, help="Injected per-request latency (seconds).")
+    parser.add_argument("--failure-rate", type=float, default=0.2, help="Probability that a sell submission fails.")
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.coins, args.latency, args.failure_rate))
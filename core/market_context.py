@@ -0,0 +1,104 @@
+import asyncio
+
+from core.clock import SYSTEM_CLOCK
+from market_regime_detector import get_market_regime_dataframe
+
+REFERENCE_SYMBOL = "BTC/KRW"
+
+
+class MarketContext:
+    """
+    한 거래 사이클 동안 공유되는 읽기 전용 시장 정보입니다.
+    기준 자산(BTC/KRW) 1시간봉, 시장 체제 시계열, 거래 유니버스, 현재가 스냅샷을 담습니다.
+    소비자(LiveTrader, scanner, 전략)는 이 객체를 수정하지 않고 읽기만 해야 합니다.
+    """
+
+    def __init__(self, cycle_id: int, reference_df, regime_series, universe, price_snapshot=None, clock=None):
+        self.cycle_id = cycle_id
+        self.reference_df = reference_df  # 지표가 포함된 BTC/KRW 1h 프레임
+        self.regime_series = regime_series  # 'Bullish' / 'Bearish' / 'Sideways'
+        self.universe = tuple(universe)
+        self.price_snapshot = price_snapshot
+        self.clock = clock or SYSTEM_CLOCK
+        self.created_at = self.clock.time()
+
+    @property
+    def current_regime(self) -> str:
+        return self.regime_series.iloc[-1]
+
+    def get_price(self, symbol: str):
+        if self.price_snapshot is None:
+            return None
+        return self.price_snapshot.get(symbol)
+
+    def age(self) -> float:
+        return self.clock.time() - self.created_at
+
+
+class MarketContextProvider:
+    """
+    MarketContext를 사이클당 한 번만 만들고 메모이즈합니다.
+    같은 cycle_id로 다시 요청하면(동시에 요청하더라도) 기준 자산 조회와 체제 계산 없이 같은 객체를 돌려줍니다.
+    cycle_id 없이 요청하는 소비자는 ttl_seconds 이내의 최신 컨텍스트를 공유합니다.
+    """
+
+    def __init__(self, upbit_service, reference_symbol: str = REFERENCE_SYMBOL,
+                 timeframe: str = "1h", limit: int = 300, ttl_seconds: float = 600, clock=None):
+        self.upbit_service = upbit_service
+        self.clock = clock or getattr(upbit_service, "clock", SYSTEM_CLOCK)
+        self.reference_symbol = reference_symbol
+        self.timeframe = timeframe
+        self.limit = limit
+        self.ttl_seconds = ttl_seconds
+        self.latest = None
+        self._lock = asyncio.Lock()
+
+    def _is_current(self, cycle_id) -> bool:
+        if self.latest is None:
+            return False
+        if cycle_id is None:
+            return self.latest.age() < self.ttl_seconds
+        return self.latest.cycle_id == cycle_id
+
+    async def get(self, cycle_id: int | None = None, universe=(), price_snapshot=None) -> MarketContext | None:
+        """
+        해당 사이클의 MarketContext를 반환합니다. 없으면 한 번만 생성합니다.
+
+        Returns:
+            MarketContext | None: 기준 자산 데이터를 가져오지 못했거나 체제 계산이 불가능하면 None.
+        """
+        if self._is_current(cycle_id):
+            return self.latest
+        async with self._lock:
+            if self._is_current(cycle_id):  # 대기 중 다른 소비자가 이미 생성한 경우
+                return self.latest
+            if cycle_id is None:
+                cycle_id = self.latest.cycle_id + 1 if self.latest else 0
+            context = await self._build(cycle_id, universe, price_snapshot)
+            if context is not None:
+                self.latest = context
+            return context
+
+    async def _build(self, cycle_id, universe, price_snapshot):
+        reference_df = await self.upbit_service.get_ohlcv(self.reference_symbol, self.timeframe, self.limit)
+        if reference_df is None:
+            print(f"  - [CONTEXT] {self.reference_symbol} 데이터를 가져오지 못했습니다.")
+            return None
+        regime_df = get_market_regime_dataframe(reference_df)
+        if regime_df.empty:
+            print("  - [CONTEXT] 시장 진단 데이터 부족")
+            return None
+        return MarketContext(cycle_id, regime_df, regime_df["market_regime"], universe, price_snapshot, self.clock)
+
+
+async def get_fresh_price(upbit_service, symbol: str, market_context: MarketContext | None = None, max_age: float = 5.0):
+    """
+    컨텍스트 스냅샷의 가격이 max_age초 이내로 신선하면 그대로 사용하고,
+    아니면 UpbitService(실시간 피드 → REST 순)로 현재가를 조회합니다.
+    """
+    if market_context is not None and market_context.price_snapshot is not None:
+        if market_context.price_snapshot.age() <= max_age:
+            price = market_context.get_price(symbol)
+            if price is not None:
+                return price
+    return await upbit_service.get_current_price(symbol)
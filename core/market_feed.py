@@ -0,0 +1,248 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import deque
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+UPBIT_WS_URL = "wss://api.upbit.com/websocket/v1"
+DEFAULT_CHANNELS = ("ticker", "trade", "orderbook")
+
+
+def to_upbit_code(symbol: str) -> str:
+    """'BTC/KRW' -> 'KRW-BTC'"""
+    base, quote = symbol.split("/")
+    return f"{quote}-{base}"
+
+
+def from_upbit_code(code: str) -> str:
+    """'KRW-BTC' -> 'BTC/KRW'"""
+    quote, base = code.split("-")
+    return f"{base}/{quote}"
+
+
+class UpbitMarketFeed:
+    """
+    Upbit WebSocket 시세 구독 레이어입니다.
+    ticker/trade/orderbook 채널을 구독하여 최신 시세 테이블과 심볼별 체결 스트림을 메모리에 유지하고,
+    연결이 끊기면 지수 백오프로 재접속한 뒤 기존 구독을 그대로 복원합니다.
+    폴링 루프는 HTTP 요청 대신 get_price()/get_orderbook()으로 로컬 상태를 즉시 읽을 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        symbols=(),
+        channels=DEFAULT_CHANNELS,
+        url: str = UPBIT_WS_URL,
+        trade_history: int = 1000,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+    ):
+        self.url = url
+        self.channels = tuple(channels)
+        self.symbols = set(symbols)
+        self.trade_history = trade_history
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.quotes = {}  # {'BTC/KRW': {'price', 'volume_24h', 'timestamp', 'received_at'}}
+        self.trades = {}  # {'BTC/KRW': deque([{'price', 'volume', 'side', 'timestamp'}, ...])}
+        self.orderbooks = {}  # {'BTC/KRW': {'bids': [(p, s)], 'asks': [(p, s)], 'timestamp'}}
+        self.reconnect_count = 0
+        self.price_listeners = []  # callback(symbol, price): 체결가가 갱신될 때마다 즉시 호출 (예: StopMonitor)
+
+        self._ws = None
+        self._session = None
+        self._task = None
+        self._connected = asyncio.Event()
+        self._stopping = False
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        if self._task and not self._task.done():
+            return
+        self._stopping = False
+        self._session = aiohttp.ClientSession()
+        self._task = asyncio.create_task(self._run())
+        print(f"✅ 실시간 시세 피드 시작: {sorted(self.symbols)} / 채널: {list(self.channels)}")
+
+    async def stop(self):
+        self._stopping = True
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session:
+            await self._session.close()
+            self._session = None
+        self._connected.clear()
+
+    async def wait_connected(self, timeout: float = 10.0) -> bool:
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected.is_set()
+
+    async def subscribe(self, symbols):
+        """구독 심볼을 추가합니다. 연결되어 있으면 즉시 전체 구독 메시지를 다시 보냅니다."""
+        new_symbols = set(symbols) - self.symbols
+        if not new_symbols:
+            return
+        self.symbols |= new_symbols
+        if self._ws is not None and not self._ws.closed:
+            await self._send_subscription()
+
+    def add_price_listener(self, callback):
+        """체결가가 갱신될 때마다 callback(symbol, price)를 이벤트 루프에서 바로 호출합니다."""
+        if callback not in self.price_listeners:
+            self.price_listeners.append(callback)
+
+    def remove_price_listener(self, callback):
+        if callback in self.price_listeners:
+            self.price_listeners.remove(callback)
+
+    # --- Local state readers ---
+
+    def get_price(self, symbol: str, max_age: float | None = None):
+        """
+        최신 체결가를 반환합니다.
+
+        Args:
+            symbol (str): 마켓 심볼 (예: 'BTC/KRW').
+            max_age (float | None): 허용하는 최대 시세 경과 시간(초). 이보다 오래되면 None.
+        """
+        quote = self.quotes.get(symbol)
+        if quote is None:
+            return None
+        if max_age is not None and time.time() - quote["received_at"] > max_age:
+            return None
+        return quote["price"]
+
+    def get_quote(self, symbol: str):
+        return self.quotes.get(symbol)
+
+    def get_trades(self, symbol: str) -> list:
+        return list(self.trades.get(symbol, ()))
+
+    def get_orderbook(self, symbol: str):
+        return self.orderbooks.get(symbol)
+
+    # --- Internals ---
+
+    def _subscription_message(self) -> list:
+        codes = sorted(to_upbit_code(symbol) for symbol in self.symbols)
+        message = [{"ticket": str(uuid.uuid4())}]
+        for channel in self.channels:
+            message.append({"type": channel, "codes": codes})
+        return message
+
+    async def _send_subscription(self):
+        await self._ws.send_str(json.dumps(self._subscription_message()))
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while not self._stopping:
+            try:
+                async with self._session.ws_connect(self.url, heartbeat=30) as ws:
+                    self._ws = ws
+                    await self._send_subscription()
+                    self._connected.set()
+                    delay = self.reconnect_delay
+                    async for msg in ws:
+                        if msg.type in (aiohttp.WSMsgType.BINARY, aiohttp.WSMsgType.TEXT):
+                            self._handle_frame(msg.data)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[WARN] 시세 피드 연결 오류: {e}")
+            finally:
+                self._connected.clear()
+                self._ws = None
+
+            if self._stopping:
+                break
+            self.reconnect_count += 1
+            logger.warning(f"[WARN] 시세 피드 연결 끊김. {delay:.1f}초 후 재접속 (누적 {self.reconnect_count}회)")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _handle_frame(self, data):
+        try:
+            frame = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        code = frame.get("code") or frame.get("cd")
+        if not code:
+            return
+        symbol = from_upbit_code(code)
+        frame_type = frame.get("type") or frame.get("ty")
+        if frame_type == "ticker":
+            self._apply_ticker(symbol, frame)
+        elif frame_type == "trade":
+            self._apply_trade(symbol, frame)
+        elif frame_type == "orderbook":
+            self._apply_orderbook(symbol, frame)
+
+    def _notify_price(self, symbol: str, price):
+        if price is None:
+            return
+        for callback in self.price_listeners:
+            try:
+                callback(symbol, price)
+            except Exception as e:
+                logger.warning(f"[WARN] 시세 리스너 오류 ({symbol}): {e}")
+
+    def _apply_ticker(self, symbol: str, frame: dict):
+        self.quotes[symbol] = {
+            "price": frame.get("trade_price"),
+            "volume_24h": frame.get("acc_trade_price_24h"),
+            "timestamp": frame.get("timestamp"),
+            "received_at": time.time(),
+        }
+        self._notify_price(symbol, frame.get("trade_price"))
+
+    def _apply_trade(self, symbol: str, frame: dict):
+        trades = self.trades.get(symbol)
+        if trades is None:
+            trades = self.trades[symbol] = deque(maxlen=self.trade_history)
+        trades.append({
+            "price": frame.get("trade_price"),
+            "volume": frame.get("trade_volume"),
+            "side": "sell" if frame.get("ask_bid") == "ASK" else "buy",
+            "timestamp": frame.get("trade_timestamp", frame.get("timestamp")),
+        })
+        # 체결이 ticker보다 먼저 도착하는 경우에도 최신가 테이블을 갱신
+        quote = self.quotes.get(symbol)
+        if quote is None or (frame.get("timestamp") or 0) >= (quote.get("timestamp") or 0):
+            self.quotes[symbol] = {
+                "price": frame.get("trade_price"),
+                "volume_24h": quote.get("volume_24h") if quote else None,
+                "timestamp": frame.get("timestamp"),
+                "received_at": time.time(),
+            }
+            self._notify_price(symbol, frame.get("trade_price"))
+
+    def _apply_orderbook(self, symbol: str, frame: dict):
+        units = frame.get("orderbook_units") or []
+        self.orderbooks[symbol] = {
+            "bids": [(unit["bid_price"], unit["bid_size"]) for unit in units],
+            "asks": [(unit["ask_price"], unit["ask_size"]) for unit in units],
+            "timestamp": frame.get("timestamp"),
+        }
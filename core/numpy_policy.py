@@ -0,0 +1,269 @@
+"""
+torch 없이 전문가 PPO 에이전트를 실행하는 numpy 추론 런타임입니다.
+
+SB3 모델 zip에서 정책 네트워크(MlpExtractor.policy_net + action_net) 가중치만 뽑아 .npz로 저장하고,
+NumpyPolicy가 같은 MLP forward를 numpy로 계산합니다. 라이브 이미지는 .npz만 있으면
+stable_baselines3/torch를 import하지 않고도 predict(obs, deterministic=True)를 할 수 있습니다.
+.npz에는 원본 zip의 SHA-256을 함께 저장하고, load_policy는 zip과 해시가 같을 때만 .npz를 사용합니다
+(다시 훈련한 zip 옆에 예전 .npz가 남아 있으면 다시 내보내거나 stable_baselines3로 로드).
+
+사용 예:
+    # 내보내기 (torch/stable_baselines3 필요, 빌드 단계에서 실행)
+    python -m core.numpy_policy export specialist_agent_bullish.zip specialist_agent_bearish.zip specialist_agent_sideways.zip
+    # SB3 predict와 행동 일치 검증 (녹화된 관측 .npy가 없으면 합성 관측 사용)
+    python -m core.numpy_policy parity specialist_agent_bullish.zip --observations data/recorded_obs.npy
+    # 시작 시간 / 최대 RSS 비교
+    python -m core.numpy_policy bench specialist_agent_bullish.zip
+"""
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+import types
+
+import numpy as np
+
+_ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0),
+    "Identity": lambda x: x,
+}
+
+
+def npz_path_for(zip_path: str) -> str:
+    """specialist_agent_bullish.zip -> specialist_agent_bullish.npz"""
+    return os.path.splitext(zip_path)[0] + ".npz"
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def npz_matches(zip_path: str, npz_path: str | None = None) -> bool:
+    """.npz가 있고, 저장된 원본 SHA-256이 지금 zip의 해시와 같은지 (해시가 없는 예전 .npz는 False)"""
+    npz_path = npz_path or npz_path_for(zip_path)
+    if not os.path.exists(npz_path):
+        return False
+    with np.load(npz_path) as data:
+        source_sha256 = str(data["source_sha256"]) if "source_sha256" in data.files else None
+    return source_sha256 is not None and source_sha256 == file_sha256(zip_path)
+
+
+def export_sb3_policy(zip_path: str, npz_path: str | None = None) -> str:
+    """
+    SB3 PPO(Discrete 행동, Flatten 특징 추출기, MLP 정책) zip에서 추론에 필요한 가중치만 .npz로 저장합니다.
+    지원하지 않는 정책 구조면 ValueError를 발생시킵니다.
+    """
+    import torch
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.torch_layers import FlattenExtractor
+    from gymnasium import spaces
+
+    npz_path = npz_path or npz_path_for(zip_path)
+    model = PPO.load(zip_path, device="cpu")
+    policy = model.policy
+    if not isinstance(model.action_space, spaces.Discrete):
+        raise ValueError(f"{zip_path}: Discrete 행동 공간만 지원합니다 ({model.action_space}).")
+    if not isinstance(policy.pi_features_extractor, FlattenExtractor):
+        raise ValueError(f"{zip_path}: Flatten 특징 추출기만 지원합니다 ({type(policy.pi_features_extractor).__name__}).")
+
+    arrays = {
+        "source_sha256": np.asarray(file_sha256(zip_path)),
+        "obs_shape": np.asarray(model.observation_space.shape, dtype=np.int64),
+        "n_actions": np.asarray(model.action_space.n, dtype=np.int64),
+    }
+    activations = []
+    layer = 0
+    for module in policy.mlp_extractor.policy_net:
+        if isinstance(module, torch.nn.Linear):
+            arrays[f"w{layer}"] = module.weight.detach().numpy().astype(np.float32)
+            arrays[f"b{layer}"] = module.bias.detach().numpy().astype(np.float32)
+            activations.append("Identity")
+            layer += 1
+        elif type(module).__name__ in _ACTIVATIONS and activations:
+            activations[-1] = type(module).__name__
+        else:
+            raise ValueError(f"{zip_path}: 지원하지 않는 정책 레이어 {type(module).__name__}")
+    arrays["activations"] = np.asarray(activations)
+    arrays["action_w"] = policy.action_net.weight.detach().numpy().astype(np.float32)
+    arrays["action_b"] = policy.action_net.bias.detach().numpy().astype(np.float32)
+
+    np.savez(npz_path, **arrays)
+    print(f"[EXPORT] {zip_path} -> {npz_path} ({os.path.getsize(npz_path) / 1024:.0f}KB, 은닉층 {layer}개)")
+    return npz_path
+
+
+class NumpyPolicy:
+    """
+    export_sb3_policy로 만든 .npz를 읽어 SB3 PPO.predict와 같은 방식으로 행동을 계산합니다.
+    단일 관측(obs_shape)과 배치 관측((N,) + obs_shape)을 모두 받습니다.
+    """
+
+    def __init__(self, npz_path: str):
+        with np.load(npz_path) as data:
+            self.obs_shape = tuple(int(x) for x in data["obs_shape"])
+            self.n_actions = int(data["n_actions"])
+            names = [str(name) for name in data["activations"]]
+            self.layers = [
+                (data[f"w{i}"].T.copy(), data[f"b{i}"], _ACTIVATIONS[name]) for i, name in enumerate(names)
+            ]
+            self.action_w = data["action_w"].T.copy()
+            self.action_b = data["action_b"]
+        self.path = npz_path
+        self.observation_space = types.SimpleNamespace(shape=self.obs_shape)
+        self._rng = np.random.default_rng()
+
+    def logits(self, observations: np.ndarray) -> np.ndarray:
+        """(N,) + obs_shape 관측의 행동 로짓 (N, n_actions)"""
+        x = np.asarray(observations, dtype=np.float32).reshape(len(observations), -1)
+        for weight, bias, activation in self.layers:
+            x = activation(x @ weight + bias)
+        return x @ self.action_w + self.action_b
+
+    def predict(self, observation, state=None, episode_start=None, deterministic: bool = False):
+        """SB3 BasePolicy.predict와 같은 시그니처/반환 형식: (actions, None)"""
+        observation = np.asarray(observation, dtype=np.float32)
+        if observation.shape == self.obs_shape:
+            vectorized = False
+            observation = observation[None]
+        elif observation.shape[1:] == self.obs_shape:
+            vectorized = True
+        else:
+            raise ValueError(
+                f"Error: Unexpected observation shape {observation.shape} for Box environment, "
+                f"please use {self.obs_shape} or (n_env, {', '.join(map(str, self.obs_shape))}) for the observation shape."
+            )
+        logits = self.logits(observation)
+        if deterministic:
+            actions = logits.argmax(axis=1)
+        else:
+            probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs /= probs.sum(axis=1, keepdims=True)
+            actions = np.array([self._rng.choice(self.n_actions, p=p) for p in probs])
+        if not vectorized:
+            return actions[0], None
+        return actions, None
+
+
+def load_policy(zip_path: str):
+    """
+    zip에서 내보낸 .npz가 옆에 있으면 NumpyPolicy를, 없으면 stable_baselines3 PPO를 로드합니다.
+    .npz의 원본 SHA-256이 zip과 다르면(또는 없으면) 다시 내보내고, 내보낼 수 없는 정책 구조면 PPO로 로드합니다.
+    """
+    npz_path = npz_path_for(zip_path)
+    if npz_matches(zip_path, npz_path):
+        return NumpyPolicy(npz_path)
+    if os.path.exists(npz_path):
+        print(f"[WARN] {npz_path}의 원본 해시가 {zip_path}와 다릅니다. 다시 내보냅니다.")
+        try:
+            return NumpyPolicy(export_sb3_policy(zip_path, npz_path))
+        except ImportError as e:
+            raise RuntimeError(f"{npz_path}가 {zip_path}와 맞지 않고, 다시 내보낼 torch/stable_baselines3가 없습니다.") from e
+        except ValueError as e:
+            print(f"[WARN] {e} -> stable_baselines3로 로드합니다.")
+    from stable_baselines3 import PPO
+    return PPO.load(zip_path, device="cpu")
+
+
+def check_parity(zip_path: str, observations: np.ndarray | None = None, samples: int = 5000) -> bool:
+    """SB3 predict와 NumpyPolicy.predict의 결정적 행동이 모든 관측에서 같은지 확인합니다."""
+    from stable_baselines3 import PPO
+
+    npz_path = npz_path_for(zip_path)
+    if not os.path.exists(npz_path):
+        export_sb3_policy(zip_path, npz_path)
+    model = PPO.load(zip_path, device="cpu")
+    policy = NumpyPolicy(npz_path)
+    if observations is None:
+        # 녹화된 관측이 없으면 표준화된 특징(scale 1)과 원시 값에 가까운 큰 값(scale 1e3)을 섞어 사용
+        rng = np.random.default_rng(0)
+        observations = np.concatenate([
+            rng.standard_normal((samples, *policy.obs_shape)).astype(np.float32) * scale for scale in (0.1, 1.0, 1e3)
+        ])
+    observations = np.asarray(observations, dtype=np.float32).reshape(-1, *policy.obs_shape)
+
+    expected, _ = model.predict(observations, deterministic=True)
+    actual, _ = policy.predict(observations, deterministic=True)
+    import torch
+    with torch.no_grad():
+        obs_tensor = torch.as_tensor(observations.reshape(len(observations), -1))
+        latent = model.policy.mlp_extractor.forward_actor(model.policy.pi_features_extractor(obs_tensor))
+        expected_logits = model.policy.action_net(latent).numpy()
+    max_diff = float(np.abs(expected_logits - policy.logits(observations)).max())
+    mismatches = int((np.asarray(expected) != actual).sum())
+    single_ok = all(
+        int(model.predict(obs, deterministic=True)[0]) == int(policy.predict(obs, deterministic=True)[0])
+        for obs in observations[:100]
+    )
+    print(f"[PARITY] {zip_path}: 관측 {len(observations)}개, 행동 불일치 {mismatches}개, "
+          f"최대 로짓 차이 {max_diff:.2e}, 단일 관측 {'일치' if single_ok else '불일치'}")
+    return mismatches == 0 and single_ok
+
+
+_BENCH_SCRIPT = """
+import resource, sys, time
+started = time.perf_counter()
+import numpy as np
+from core.numpy_policy import NumpyPolicy
+if {use_numpy}:
+    policy = NumpyPolicy({npz!r})
+else:
+    from stable_baselines3 import PPO
+    policy = PPO.load({zip!r}, device="cpu")
+policy.predict(np.zeros(policy.observation_space.shape, dtype=np.float32), deterministic=True)
+elapsed = time.perf_counter() - started
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"{{elapsed:.3f}} {{rss_mb:.1f}} {{'torch' in sys.modules}}")
+"""
+
+
+def benchmark_startup(zip_path: str, runs: int = 3):
+    """새 프로세스에서 'import → 모델 로드 → 첫 예측'까지의 시간과 최대 RSS를 런타임별로 측정합니다."""
+    npz_path = npz_path_for(zip_path)
+    if not os.path.exists(npz_path):
+        export_sb3_policy(zip_path, npz_path)
+    env = dict(os.environ, PYTHONPATH=os.getcwd() + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    for name, use_numpy in (("stable_baselines3 + torch", False), ("numpy (.npz)", True)):
+        script = _BENCH_SCRIPT.format(use_numpy=use_numpy, npz=npz_path, zip=zip_path)
+        results = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env, check=True)
+            elapsed, rss_mb, torch_loaded = output.stdout.split()[-3:]
+            results.append((float(elapsed), float(rss_mb), torch_loaded))
+        elapsed = min(r[0] for r in results)
+        rss_mb = min(r[1] for r in results)
+        print(f"  - {name:<26} 첫 예측까지 {elapsed * 1000:7.0f}ms | 최대 RSS {rss_mb:6.0f}MB | torch import: {results[0][2]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Torch-free numpy runtime for SB3 specialist agents.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Export SB3 zip(s) to .npz.")
+    export_parser.add_argument("models", nargs="+")
+    parity_parser = subparsers.add_parser("parity", help="Compare SB3 and numpy actions.")
+    parity_parser.add_argument("models", nargs="+")
+    parity_parser.add_argument("--observations", type=str, help="Recorded observations (.npy, N x obs_shape).")
+    bench_parser = subparsers.add_parser("bench", help="Startup time / RSS benchmark.")
+    bench_parser.add_argument("models", nargs="+")
+    bench_parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        for model_path in args.models:
+            export_sb3_policy(model_path)
+    elif args.command == "parity":
+        recorded = np.load(args.observations) if args.observations else None
+        results = [check_parity(model_path, recorded) for model_path in args.models]
+        if not all(results):
+            print("[FAIL] SB3와 numpy 런타임의 행동이 다릅니다.")
+            sys.exit(1)
+        print("[SUCCESS] 모든 모델의 결정적 행동이 일치합니다.")
+    elif args.command == "bench":
+        for model_path in args.models:
+            print(f"[BENCH] {model_path}")
+            benchmark_startup(model_path, args.runs)
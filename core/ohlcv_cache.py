@@ -0,0 +1,144 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from core.clock import SYSTEM_CLOCK
+from core.rate_limiter import PRIORITY_OHLCV
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+MAX_FETCH_LIMIT = 200  # Upbit 캔들 API 1회 최대 개수
+
+
+class OHLCVRingBuffer:
+    """
+    (심볼, 타임프레임) 하나의 캔들을 고정 크기로 보관하는 numpy 링 버퍼입니다.
+
+    각 캔들을 i와 i + capacity 두 위치에 함께 기록하므로, 최근 N개 구간은 항상 연속된 메모리입니다.
+    따라서 timestamps()/values()/column()은 복사 없이 뷰를 반환합니다.
+    반환된 뷰는 읽기 전용으로 다뤄야 하며, 다음 갱신 때 내용이 바뀔 수 있습니다.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity * 2, dtype=np.int64)  # epoch ms
+        self._values = np.zeros((capacity * 2, len(OHLCV_COLUMNS)), dtype=np.float64)
+        self._next = 0  # 다음 캔들을 쓸 위치 (0 <= _next < capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
+
+    @property
+    def last_timestamp(self):
+        if self._size == 0:
+            return None
+        return int(self._timestamps[self._next - 1 + self.capacity])
+
+    def _write(self, pos: int, row):
+        for offset in (pos, pos + self.capacity):
+            self._timestamps[offset] = row[0]
+            self._values[offset] = row[1:6]
+
+    def extend(self, rows) -> int:
+        """
+        ccxt 형식 캔들([ts, o, h, l, c, v]) 목록을 반영합니다.
+        마지막 캔들과 같은 타임스탬프는 (아직 진행 중인 캔들이므로) 제자리에서 갱신하고,
+        더 오래된 캔들은 무시합니다.
+
+        Returns:
+            int: 새로 추가된 캔들 수.
+        """
+        added = 0
+        for row in rows:
+            last_ts = self.last_timestamp
+            if last_ts is not None and row[0] < last_ts:
+                continue
+            if last_ts is not None and row[0] == last_ts:
+                self._write((self._next - 1) % self.capacity, row)
+                continue
+            self._write(self._next, row)
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            added += 1
+        return added
+
+    def _window(self, limit: int | None):
+        n = self._size if limit is None else min(limit, self._size)
+        end = self._next + self.capacity
+        return end - n, end
+
+    def timestamps(self, limit: int | None = None) -> np.ndarray:
+        start, end = self._window(limit)
+        return self._timestamps[start:end]
+
+    def values(self, limit: int | None = None) -> np.ndarray:
+        """(N, 5) open/high/low/close/volume 뷰"""
+        start, end = self._window(limit)
+        return self._values[start:end]
+
+    def column(self, name: str, limit: int | None = None) -> np.ndarray:
+        start, end = self._window(limit)
+        return self._values[start:end, OHLCV_COLUMNS.index(name)]
+
+    def to_dataframe(self, limit: int | None = None) -> pd.DataFrame:
+        """기존 get_ohlcv와 같은 형태(timestamp 인덱스)의 DataFrame을 새로 만들어 반환합니다."""
+        start, end = self._window(limit)
+        df = pd.DataFrame(self._values[start:end].copy(), columns=list(OHLCV_COLUMNS))
+        df.index = pd.to_datetime(self._timestamps[start:end], unit="ms")
+        df.index.name = "timestamp"
+        return df
+
+
+class OHLCVCache:
+    """
+    UpbitService.get_ohlcv 뒤에서 동작하는 증분 캔들 캐시입니다.
+    처음 한 번만 전체 구간을 받고, 이후에는 마지막 저장 캔들 이후(진행 중 캔들 포함)만 받아 버퍼를 채웁니다.
+    """
+
+    def __init__(self, exchange, capacity: int = 500, request=None, clock=None):
+        self.exchange = exchange
+        self.request = request  # UpbitService.request (레이트 리미터 경유). 없으면 직접 호출
+        self.clock = clock or SYSTEM_CLOCK  # 현재 캔들 위치 계산용 (재생 시 가속 시계)
+        self.capacity = capacity
+        self.buffers = {}
+        self._filled_limits = {}  # 키별 마지막 전체 조회에 사용한 limit (거래소가 더 적게 줘도 재조회하지 않음)
+        self._locks = {}
+
+    async def _fetch(self, symbol: str, **kwargs):
+        if self.request:
+            return await self.request('candles', PRIORITY_OHLCV, self.exchange.fetch_ohlcv, symbol, **kwargs)
+        return await self.exchange.fetch_ohlcv(symbol, **kwargs)
+
+    async def get(self, symbol: str, timeframe: str, limit: int) -> OHLCVRingBuffer:
+        key = (symbol, timeframe)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:  # 같은 키에 대한 동시 갱신 방지
+            buffer = self.buffers.get(key)
+            if buffer is None or buffer.capacity < limit:
+                buffer = self.buffers[key] = OHLCVRingBuffer(max(limit, self.capacity))
+            await self._top_up(key, buffer, limit)
+            return buffer
+
+    async def _top_up(self, key, buffer: OHLCVRingBuffer, limit: int):
+        symbol, timeframe = key
+        timeframe_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        last_ts = buffer.last_timestamp
+        now_ms = int(self.clock.time() * 1000)
+        missing = None if last_ts is None else (now_ms - last_ts) // timeframe_ms + 1
+
+        if missing is None or limit > self._filled_limits.get(key, 0) or missing > MAX_FETCH_LIMIT:
+            # 비어 있거나, 더 긴 구간을 요청했거나, 공백이 너무 크면 전체 구간을 새로 채움
+            ohlcv = await self._fetch(symbol, timeframe=timeframe, limit=limit)
+            buffer.clear()
+            buffer.extend(ohlcv)
+            self._filled_limits[key] = limit
+            return
+
+        # 마지막 저장 캔들(진행 중일 수 있음)부터 현재까지만 조회
+        ohlcv = await self._fetch(symbol, timeframe=timeframe, since=last_ts, limit=int(missing) + 1)
+        buffer.extend(ohlcv)
@@ -0,0 +1,340 @@
+"""
+여러 티커의 과거 OHLCV를 동시에 내려받는 비동기 다운로더입니다 (main.py --mode download).
+
+CCXTDataDownloader는 티커를 하나씩, 200개짜리 페이지를 하나씩 받아 끝날 때까지 메모리에 모은 뒤 저장합니다.
+AsyncOHLCVDownloader는
+  - 티커마다 [시작, 끝) 구간을 겹치지 않는 ranges_per_ticker개 구간으로 나누고,
+  - 모든 티커 x 구간을 동시에 페이징하되 프로세스 공유 UpbitRateLimiter의 'candles' 버킷으로 속도를 맞추며,
+  - 받은 페이지는 곧바로 구간별 스테이징 파일(고정 길이 이진 레코드)에 덧붙이고,
+  - 페이지마다 티커별 체크포인트(JSON, 원자적 교체)에 구간 커서와 기록된 행 수를 남깁니다.
+중단 후 다시 실행하면 체크포인트의 커서부터 이어 받고, 체크포인트보다 길게 쓰인 스테이징 파일 끝(쓰다 만 페이지)은 잘라냅니다.
+체크포인트에는 계획한 [시작, 끝)도 남깁니다. 같은 시작에 끝만 늦어졌으면 늘어난 구간만 추가하고,
+시작이 다르거나 끝이 당겨졌으면 스테이징을 버리고 새로 계획합니다.
+티커의 모든 구간이 끝나면 스테이징 파일을 캔들 저장소(core.candle_store)의 월 파티션 조각으로 추가합니다.
+
+벤치마크 (지연을 주입한 모의 거래소, 티커/페이지 순차 vs 동시):
+    python -m core.ohlcv_downloader bench --tickers 5 --pages 40 --latency 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import ccxt.async_support as ccxt
+import numpy as np
+import pandas as pd
+
+from core.candle_store import CandleStore
+from core.rate_limiter import get_rate_limiter, UpbitRateLimiter, PRIORITY_UNIVERSE
+
+CANDLE_DTYPE = np.dtype([("timestamp", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+                         ("close", "<f8"), ("volume", "<f8")])
+STAGING_DIR_NAME = ".download"
+RETRYABLE_ERRORS = (ccxt.NetworkError, ccxt.ExchangeNotAvailable, ccxt.RequestTimeout)
+
+
+def _file_stem(ticker: str, timeframe: str) -> str:
+    return f"{ticker.replace('/', '_')}_{timeframe}"
+
+
+def split_ranges(start_ms: int, end_ms: int, parts: int, step_ms: int) -> list:
+    """[start_ms, end_ms)를 캔들 경계(step_ms)에 맞춘 겹치지 않는 parts개 구간으로 나눕니다."""
+    total_steps = max(0, -(-(end_ms - start_ms) // step_ms))
+    parts = max(1, min(parts, total_steps))
+    bounds = [start_ms + (total_steps * i // parts) * step_ms for i in range(parts)] + [end_ms]
+    return [(bounds[i], bounds[i + 1]) for i in range(parts) if bounds[i] < bounds[i + 1]]
+
+
+class _TickerJob:
+    """티커 하나의 구간별 진행 상황과 체크포인트/스테이징 파일"""
+
+    def __init__(self, staging_dir: str, ticker: str, timeframe: str):
+        self.ticker = ticker
+        self.timeframe = timeframe
+        self.dir = os.path.join(staging_dir, _file_stem(ticker, timeframe))
+        self.checkpoint_path = os.path.join(self.dir, "checkpoint.json")
+        self.ranges = []  # [{'start', 'end', 'cursor', 'rows', 'done'}]
+        self.start_ms = self.end_ms = None  # 계획한 전체 구간 [start_ms, end_ms)
+        self.pages = 0
+
+    def load_or_plan(self, start_ms: int, end_ms: int, parts: int, step_ms: int) -> bool:
+        """
+        요청 구간과 맞는 체크포인트가 있으면 이어 받을 구간을 복원하고 True, 없으면 새로 나누고 False.
+        체크포인트와 시작이 같고 끝만 늦으면 [기존 끝, end_ms)를 나눈 구간을 뒤에 추가해 이어 받습니다 (True).
+        시작이 다르거나 끝이 당겨졌으면 스테이징 파일을 지우고 새로 나눕니다 (False).
+        """
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            ranges = checkpoint["ranges"]
+            # 계획 구간이 없는 이전 형식의 체크포인트는 구간 목록의 양 끝으로 판단
+            planned_start = checkpoint.get("start", ranges[0]["start"] if ranges else None)
+            planned_end = checkpoint.get("end", ranges[-1]["end"] if ranges else None)
+            if planned_start == start_ms and planned_end is not None and planned_end <= end_ms:
+                self.ranges, self.start_ms, self.end_ms = ranges, start_ms, end_ms
+                for i, state in enumerate(self.ranges):
+                    self._truncate(i, state["rows"])
+                if planned_end < end_ms:
+                    print(f"  - [DOWNLOAD] {self.ticker}: 체크포인트 구간을 {planned_end} -> {end_ms}까지 늘립니다.")
+                    self.ranges += self._plan(planned_end, end_ms, parts, step_ms)
+                    self.save_checkpoint()
+                return True
+            print(f"  - [DOWNLOAD] {self.ticker}: 체크포인트 구간 [{planned_start}, {planned_end})이 요청 "
+                  f"[{start_ms}, {end_ms})과 달라 새로 계획합니다.")
+            self.cleanup()
+        os.makedirs(self.dir, exist_ok=True)
+        self.ranges, self.start_ms, self.end_ms = self._plan(start_ms, end_ms, parts, step_ms), start_ms, end_ms
+        self.save_checkpoint()
+        return False
+
+    @staticmethod
+    def _plan(start_ms: int, end_ms: int, parts: int, step_ms: int) -> list:
+        return [{"start": s, "end": e, "cursor": s, "rows": 0, "done": False}
+                for s, e in split_ranges(start_ms, end_ms, parts, step_ms)]
+
+    def page_path(self, index: int) -> str:
+        return os.path.join(self.dir, f"range_{index:03d}.bin")
+
+    def _truncate(self, index: int, rows: int):
+        path = self.page_path(index)
+        size = rows * CANDLE_DTYPE.itemsize
+        if os.path.exists(path) and os.path.getsize(path) != size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+    def append_page(self, index: int, records: np.ndarray, cursor: int, done: bool):
+        """페이지를 스테이징 파일에 덧붙인 뒤 체크포인트를 갱신합니다 (파일이 체크포인트보다 앞서도록)."""
+        if len(records):
+            with open(self.page_path(index), "ab") as f:
+                records.tofile(f)
+        state = self.ranges[index]
+        state["rows"] += len(records)
+        state["cursor"] = cursor
+        state["done"] = done
+        self.pages += 1
+        self.save_checkpoint()
+
+    def save_checkpoint(self):
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"ticker": self.ticker, "timeframe": self.timeframe, "start": self.start_ms, "end": self.end_ms,
+                       "ranges": self.ranges}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    @property
+    def done(self) -> bool:
+        return all(state["done"] for state in self.ranges)
+
+    @property
+    def rows(self) -> int:
+        return sum(state["rows"] for state in self.ranges)
+
+    def read_records(self) -> np.ndarray:
+        """구간 순서대로 이어 붙인 전체 레코드 (구간이 시간순으로 겹치지 않으므로 정렬되어 있음)"""
+        parts = [np.fromfile(self.page_path(i), dtype=CANDLE_DTYPE) for i in range(len(self.ranges))
+                 if os.path.exists(self.page_path(i))]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=CANDLE_DTYPE)
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+class AsyncOHLCVDownloader:
+    """
+    Args:
+        exchange: ccxt 비동기 거래소 (fetch_ohlcv). 없으면 ccxt.async_support.upbit()를 만듭니다.
+        rate_limiter (UpbitRateLimiter | None): 없으면 프로세스 공유 리미터.
+        data_dir (str): 캔들 저장소(data_dir/candles)와 스테이징 디렉터리를 둘 위치.
+        limit (int): 페이지당 캔들 수 (Upbit 최대 200).
+        ranges_per_ticker (int): 티커당 동시에 받을 구간 수.
+        max_attempts (int): 페이지당 최대 요청 횟수 (네트워크 오류/429 재시도).
+        save (bool): False면 저장소에 추가하지 않고 레코드 배열만 돌려줍니다 (벤치마크용).
+    """
+
+    def __init__(self, exchange=None, rate_limiter: UpbitRateLimiter | None = None, data_dir: str = "data",
+                 limit: int = 200, ranges_per_ticker: int = 4, max_attempts: int = 5, save: bool = True):
+        self.exchange = exchange or ccxt.upbit({'enableRateLimit': False})  # 공유 UpbitRateLimiter가 한도를 관리
+        self._owns_exchange = exchange is None
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self._headers_attached = self.rate_limiter.attach(self.exchange)  # 동시 페이지 응답마다 헤더로 버킷 보정
+        self.data_dir = data_dir
+        self.staging_dir = os.path.join(data_dir, STAGING_DIR_NAME)
+        self.store = CandleStore(os.path.join(data_dir, "candles"))
+        self.limit = limit
+        self.ranges_per_ticker = ranges_per_ticker
+        self.max_attempts = max_attempts
+        self.save = save
+        self.requests = 0
+
+    async def download(self, tickers, timeframe: str, start_date_str: str = "2017-01-01",
+                       end_date_str: str | None = None) -> dict:
+        """
+        모든 티커 x 구간을 동시에 내려받습니다.
+
+        Returns:
+            dict: {ticker: 새로 받은 레코드(np.ndarray, CANDLE_DTYPE)}
+        """
+        if end_date_str is None:
+            end_date_str = datetime.now().strftime("%Y-%m-%d")
+        step_ms = int(ccxt.Exchange.parse_timeframe(timeframe) * 1000)
+        start_ms = ccxt.Exchange.parse8601(start_date_str + "T00:00:00Z")
+        end_ms = ccxt.Exchange.parse8601(end_date_str + "T00:00:00Z")
+
+        started = time.perf_counter()
+        jobs = []
+        for ticker in tickers:
+            job = _TickerJob(self.staging_dir, ticker, timeframe)
+            ticker_start = self._resume_point(ticker, timeframe, start_ms, step_ms)
+            resumed = job.load_or_plan(ticker_start, end_ms, self.ranges_per_ticker, step_ms)
+            pending = sum(not state["done"] for state in job.ranges)
+            print(f"📥 [DOWNLOAD] {ticker} {timeframe}: 구간 {len(job.ranges)}개"
+                  + (f" (체크포인트에서 재개, 남은 구간 {pending}개, 기록된 캔들 {job.rows}개)" if resumed else ""))
+            jobs.append(job)
+
+        try:
+            results = await asyncio.gather(*(self._download_ticker(job, step_ms) for job in jobs))
+        finally:
+            if self._owns_exchange:
+                await self.exchange.close()
+
+        elapsed = time.perf_counter() - started
+        total_rows = sum(len(records) for records in results)
+        total_pages = sum(job.pages for job in jobs)
+        print(f"📥 [DOWNLOAD] 완료: 티커 {len(jobs)}개, 페이지 {total_pages}개, 캔들 {total_rows}개, "
+              f"{elapsed:.1f}s ({total_pages / elapsed if elapsed else 0:.1f} 페이지/초, 요청 {self.requests}회)")
+        return {job.ticker: records for job, records in zip(jobs, results)}
+
+    def _resume_point(self, ticker: str, timeframe: str, start_ms: int, step_ms: int) -> int:
+        """저장소에 캔들이 있으면 마지막 캔들 다음부터 받습니다."""
+        if not self.save:
+            return start_ms
+        self.store.migrate_legacy(ticker, timeframe, self.data_dir)
+        last = self.store.last_timestamp(ticker, timeframe)
+        return start_ms if last is None else max(start_ms, last + step_ms)
+
+    async def _download_ticker(self, job: _TickerJob, step_ms: int) -> np.ndarray:
+        await asyncio.gather(*(
+            self._download_range(job, index, step_ms) for index, state in enumerate(job.ranges) if not state["done"]
+        ))
+        if not job.done:
+            print(f"  - [WARN] {job.ticker}: 일부 구간이 끝나지 않았습니다. 다시 실행하면 체크포인트에서 이어 받습니다.")
+            return np.zeros(0, dtype=CANDLE_DTYPE)
+        records = job.read_records()
+        if self.save:
+            count = self.store.append(job.ticker, job.timeframe, records)
+            print(f"  - {job.ticker}: {count}개 추가 -> {self.store.series_dir(job.ticker, job.timeframe)}")
+        job.cleanup()
+        return records
+
+    async def _download_range(self, job: _TickerJob, index: int, step_ms: int):
+        state = job.ranges[index]
+        cursor, end = state["cursor"], state["end"]
+        while cursor < end:
+            page = await self._fetch_page(job.ticker, job.timeframe, cursor)
+            if page is None:
+                return  # 재시도 소진: 체크포인트에 남은 커서부터 다음 실행에서 이어 받음
+            records = np.array([tuple(candle[:6]) for candle in page if cursor <= candle[0] < end], dtype=CANDLE_DTYPE)
+            if len(records):
+                cursor = int(records["timestamp"][-1]) + step_ms
+            else:
+                cursor += self.limit * step_ms  # 거래가 없던 구간 (상장 전 등): 페이지 폭만큼 건너뜀
+            if page and page[-1][0] >= end:
+                cursor = end
+            job.append_page(index, records, min(cursor, end), cursor >= end)
+
+    async def _fetch_page(self, ticker: str, timeframe: str, since: int):
+        for attempt in range(1, self.max_attempts + 1):
+            await self.rate_limiter.acquire("candles", PRIORITY_UNIVERSE)
+            self.requests += 1
+            try:
+                page = await self.exchange.fetch_ohlcv(ticker, timeframe, since=since, limit=self.limit)
+                if not self._headers_attached:
+                    self.rate_limiter.update_from_headers(getattr(self.exchange, "last_response_headers", None))
+                return page
+            except (ccxt.RateLimitExceeded, ccxt.DDoSProtection):
+                print(f"  - [WARN] {ticker} 요청 한도 초과. 잠시 대기합니다...")
+                self.rate_limiter.penalize("candles")
+            except RETRYABLE_ERRORS as e:
+                print(f"  - [WARN] {ticker} 페이지 요청 실패 ({attempt}/{self.max_attempts}): {e}")
+                await asyncio.sleep(min(5.0, 0.25 * 2 ** (attempt - 1)))
+            except Exception as e:
+                print(f"  - [ERROR] {ticker} 페이지 요청 중단: {e}")
+                return None
+        return None
+
+
+class MockCandleExchange:
+    """요청마다 latency초 지연 후 since부터 limit개의 합성 캔들을 돌려주는 모의 거래소입니다."""
+
+    def __init__(self, latency: float = 0.1, step_ms: int = 60_000):
+        self.latency = latency
+        self.step_ms = step_ms
+        self.last_response_headers = None
+
+    async def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=200):
+        await asyncio.sleep(self.latency)
+        first = -(-since // self.step_ms) * self.step_ms
+        seed = sum(map(ord, symbol))
+        return [[t, 100.0 + seed, 101.0 + seed, 99.0 + seed, 100.0 + seed + (t // self.step_ms) % 7, 1.0]
+                for t in range(first, first + limit * self.step_ms, self.step_ms)]
+
+    async def close(self):
+        pass
+
+
+async def _benchmark(tickers: int, pages: int, latency: float, ranges_per_ticker: int):
+    symbols = [f"C{i}/KRW" for i in range(tickers)]
+    start = datetime(2024, 1, 1)
+    end = start + pd.Timedelta(minutes=200 * pages)
+    start_str, end_str = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+    end_ms = ccxt.Exchange.parse8601(end_str + "T00:00:00Z")
+    pages = -(-(end_ms - ccxt.Exchange.parse8601(start_str + "T00:00:00Z")) // (200 * 60_000))  # 날짜 경계로 올림한 실제 페이지 수
+
+    import tempfile
+    with tempfile.TemporaryDirectory() as data_dir:
+        # 기존 방식: 티커를 하나씩, 페이지를 하나씩 (같은 한도)
+        sequential = AsyncOHLCVDownloader(MockCandleExchange(latency), UpbitRateLimiter(), data_dir,
+                                          ranges_per_ticker=1, save=False)
+        started = time.perf_counter()
+        sequential_rows = 0
+        for symbol in symbols:
+            sequential_rows += len((await sequential.download([symbol], "1m", start_str, end_str))[symbol])
+        sequential_seconds = time.perf_counter() - started
+
+        concurrent = AsyncOHLCVDownloader(MockCandleExchange(latency), UpbitRateLimiter(), data_dir,
+                                          ranges_per_ticker=ranges_per_ticker, save=False)
+        started = time.perf_counter()
+        results = await concurrent.download(symbols, "1m", start_str, end_str)
+        concurrent_seconds = time.perf_counter() - started
+        concurrent_rows = sum(map(len, results.values()))
+
+    total_pages = pages * tickers
+    print(f"\n[BENCH] 티커 {tickers}개 x 페이지 {pages}개 (요청 지연 {latency * 1000:.0f}ms, 'candles' 한도 10회/초)")
+    print(f"  - 순차 (티커/페이지 하나씩): {sequential_seconds:6.1f}s, {total_pages / sequential_seconds:5.1f} 페이지/초, 캔들 {sequential_rows}개")
+    print(f"  - 동시 (티커 x 구간 {ranges_per_ticker}개): {concurrent_seconds:6.1f}s, {total_pages / concurrent_seconds:5.1f} 페이지/초, 캔들 {concurrent_rows}개")
+    assert sequential_rows == concurrent_rows, "두 방식의 캔들 수가 다릅니다."
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent, resumable OHLCV downloader.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    download_parser = subparsers.add_parser("download", help="Download OHLCV for several tickers concurrently.")
+    download_parser.add_argument("--tickers", nargs="+", required=True, help="e.g. BTC/KRW ETH/KRW")
+    download_parser.add_argument("--timeframe", type=str, default="1m")
+    download_parser.add_argument("--start_date", type=str, default="2020-01-01")
+    download_parser.add_argument("--end_date", type=str, default=datetime.now().strftime("%Y-%m-%d"))
+    download_parser.add_argument("--ranges-per-ticker", type=int, default=4)
+    bench_parser = subparsers.add_parser("bench", help="Sequential vs. concurrent paging against a mock exchange.")
+    bench_parser.add_argument("--tickers", type=int, default=5)
+    bench_parser.add_argument("--pages", type=int, default=40, help="Approximate pages per ticker.")
+    bench_parser.add_argument("--latency", type=float, default=0.25, help="Injected per-request latency (seconds).")
+    bench_parser.add_argument("--ranges-per-ticker", type=int, default=4)
+    args = parser.parse_args()
+    if args.command == "download":
+        downloader = AsyncOHLCVDownloader(ranges_per_ticker=args.ranges_per_ticker)
+        asyncio.run(downloader.download(args.tickers, args.timeframe, args.start_date, args.end_date))
+    else:
+        asyncio.run(_benchmark(args.tickers, args.pages, args.latency, args.ranges_per_ticker))
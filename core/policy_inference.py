@@ -0,0 +1,103 @@
+"""
+전문가 에이전트 배치 추론기입니다.
+같은 전문가(시장 체제)가 담당하는 관측들을 하나의 배치로 쌓아 forward를 한 번만 실행하고,
+결과 행동을 다시 심볼(키)별로 돌려줍니다.
+
+벤치마크:
+    python -m core.policy_inference --symbols 10 50 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+FALLBACK_REGIME = "Sideways"
+
+
+class BatchedPolicyInference:
+    """
+    agents: {regime: predict(obs, deterministic=True)를 지원하는 모델} (예: SB3 PPO)
+    담당 에이전트가 없는 체제는 fallback_regime 에이전트로 예측합니다.
+    """
+
+    def __init__(self, agents: dict, fallback_regime: str = FALLBACK_REGIME):
+        self.agents = agents
+        self.fallback_regime = fallback_regime
+        self.batch_count = 0
+        self.observation_count = 0
+
+    def agent_for(self, regime: str):
+        return self.agents.get(regime) or self.agents.get(self.fallback_regime)
+
+    def predict(self, requests: dict) -> dict:
+        """
+        Args:
+            requests (dict): {key: (regime, observation)}. key는 보통 심볼입니다.
+
+        Returns:
+            dict: {key: int action}. 담당 에이전트가 없는 key는 결과에 포함되지 않습니다.
+        """
+        groups = {}
+        for key, (regime, observation) in requests.items():
+            agent = self.agent_for(regime)
+            if agent is None:
+                continue
+            observation = np.asarray(observation, dtype=np.float32)
+            # 같은 에이전트라도 관측 모양이 다르면 한 배치로 쌓을 수 없으므로 나눔
+            group = groups.setdefault((id(agent), observation.shape), (agent, [], []))
+            group[1].append(key)
+            group[2].append(observation)
+
+        actions = {}
+        for agent, keys, observations in groups.values():
+            batch = np.stack(observations)
+            batch_actions, _ = agent.predict(batch, deterministic=True)
+            batch_actions = np.asarray(batch_actions).reshape(len(keys), -1)[:, 0]
+            for key, action in zip(keys, batch_actions):
+                actions[key] = int(action)
+            self.batch_count += 1
+            self.observation_count += len(keys)
+        return actions
+
+
+def benchmark(agent, symbol_counts=(10, 50, 200), repeats: int = 20) -> dict:
+    """심볼별 개별 predict와 배치 predict의 1회 사이클 지연 시간(ms)을 비교합니다."""
+    shape = agent.observation_space.shape
+    inference = BatchedPolicyInference({FALLBACK_REGIME: agent})
+    rng = np.random.default_rng(0)
+    results = {}
+    for count in symbol_counts:
+        observations = {f"SYM{i}/KRW": rng.standard_normal(shape).astype(np.float32) for i in range(count)}
+        requests = {symbol: (FALLBACK_REGIME, obs) for symbol, obs in observations.items()}
+
+        per_symbol_actions = {symbol: int(agent.predict(obs, deterministic=True)[0]) for symbol, obs in observations.items()}
+        assert inference.predict(requests) == per_symbol_actions, "배치 결과가 개별 예측과 다릅니다."
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            for obs in observations.values():
+                agent.predict(obs, deterministic=True)
+        per_symbol_ms = (time.perf_counter() - started) / repeats * 1000
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            inference.predict(requests)
+        batched_ms = (time.perf_counter() - started) / repeats * 1000
+
+        results[count] = {"per_symbol_ms": per_symbol_ms, "batched_ms": batched_ms}
+        print(f"  - {count:>4}개 심볼: 개별 {per_symbol_ms:8.2f}ms | 배치 {batched_ms:7.2f}ms | {per_symbol_ms / batched_ms:5.1f}배")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-symbol vs. batched specialist inference benchmark.")
+    parser.add_argument("--model", type=str, default="specialist_agent_sideways.zip", help="SB3 PPO model zip.")
+    parser.add_argument("--symbols", nargs="+", type=int, default=[10, 50, 200], help="Universe sizes to benchmark.")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    from stable_baselines3 import PPO
+
+    print(f"[BENCH] {args.model} 로드 중...")
+    model = PPO.load(args.model, device="cpu")
+    benchmark(model, args.symbols, args.repeats)
@@ -0,0 +1,234 @@
+import asyncio
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import deque
+
+# 우선순위 레인 (숫자가 작을수록 먼저 처리)
+PRIORITY_ORDER = 0       # 주문 / 주문 전 잔고
+PRIORITY_STOP_LOSS = 1   # 손절매 / 평가용 현재가
+PRIORITY_OHLCV = 2       # 캔들 조회
+PRIORITY_UNIVERSE = 3    # 유니버스 스캔, 과거 데이터 다운로드
+LANE_NAMES = {
+    PRIORITY_ORDER: "order",
+    PRIORITY_STOP_LOSS: "stop_loss",
+    PRIORITY_OHLCV: "ohlcv",
+    PRIORITY_UNIVERSE: "universe",
+}
+
+# Upbit 요청 그룹별 초당 한도 (Remaining-Req 헤더의 group 이름 기준)
+DEFAULT_GROUP_LIMITS = {
+    "order": 8,
+    "default": 30,
+    "market": 10,
+    "candles": 10,
+    "ticker": 10,
+    "orderbook": 10,
+    "trades": 10,
+}
+_REMAINING_REQ_PATTERN = re.compile(r"group=([\w-]+);\s*min=(\d+);\s*sec=(\d+)")
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지는 토큰 버킷입니다. 스레드와 이벤트 루프 양쪽에서 안전하게 쓸 수 있습니다."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> float:
+        """토큰을 하나 가져옵니다. 성공하면 0, 아니면 다음 토큰까지 기다려야 할 시간(초)을 반환합니다."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def sync_remaining(self, remaining: int):
+        """서버가 알려준 이번 초의 남은 요청 수보다 많은 토큰을 갖고 있지 않도록 맞춥니다."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, float(remaining))
+
+    def penalize(self, seconds: float = 1.0):
+        """429 응답 후 seconds 동안 토큰이 생기지 않도록 비웁니다."""
+        with self._lock:
+            self.tokens = -seconds * self.rate
+            self.updated = time.monotonic()
+
+
+class UpbitRateLimiter:
+    """
+    프로세스 전체가 공유하는 Upbit 요청 한도 관리자입니다.
+    - 요청 그룹(order, candles, ticker, ...)마다 토큰 버킷을 두고,
+    - 응답의 Remaining-Req 헤더로 버킷을 서버 상태에 맞추며,
+    - 같은 그룹 안에서는 우선순위 레인(주문 > 손절매 가격 > OHLCV > 유니버스 스캔) 순서로 토큰을 배분하고,
+    - 레인별 대기 시간 지표를 기록합니다.
+    """
+
+    def __init__(self, group_limits: dict = DEFAULT_GROUP_LIMITS, metrics_window: int = 1000):
+        self.group_limits = dict(group_limits)
+        self.buckets = {group: TokenBucket(rate) for group, rate in self.group_limits.items()}
+        self.metrics_window = metrics_window
+        self._wait_samples = {lane: deque(maxlen=metrics_window) for lane in LANE_NAMES}
+        self._wait_counts = {lane: 0 for lane in LANE_NAMES}
+        self._wait_totals = {lane: 0.0 for lane in LANE_NAMES}
+        self._counter = itertools.count()
+        self._waiters = {}
+        self._conditions = {}
+        self._loop = None
+
+    def _bucket(self, group: str) -> TokenBucket:
+        bucket = self.buckets.get(group)
+        if bucket is None:
+            bucket = self.buckets[group] = TokenBucket(self.group_limits.get(group, 10))
+        return bucket
+
+    def _condition(self, group: str) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:  # 새 이벤트 루프에서는 대기열을 새로 만듦
+            self._loop = loop
+            self._conditions = {}
+            self._waiters = {}
+        if group not in self._conditions:
+            self._conditions[group] = asyncio.Condition()
+            self._waiters[group] = []
+        return self._conditions[group]
+
+    async def acquire(self, group: str = "default", priority: int = PRIORITY_OHLCV) -> float:
+        """
+        group의 토큰 하나를 우선순위 순서대로 획득할 때까지 기다립니다.
+
+        Returns:
+            float: 큐에서 기다린 시간(초).
+        """
+        condition = self._condition(group)
+        bucket = self._bucket(group)
+        waiters = self._waiters[group]
+        entry = (priority, next(self._counter))
+        started = time.monotonic()
+        async with condition:
+            heapq.heappush(waiters, entry)
+            condition.notify_all()  # 더 높은 우선순위가 도착했음을 현재 선두에게 알림
+            try:
+                while True:
+                    if waiters[0] == entry:
+                        wait = bucket.try_take()
+                        if wait == 0:
+                            break
+                        timeout = wait
+                    else:
+                        timeout = None
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                waiters.remove(entry)
+                heapq.heapify(waiters)
+                condition.notify_all()
+        waited = time.monotonic() - started
+        self._record_wait(priority, waited)
+        return waited
+
+    def acquire_sync(self, group: str = "default", priority: int = PRIORITY_UNIVERSE) -> float:
+        """동기 코드(ccxt 동기 클라이언트 등)용. 같은 버킷을 공유하지만 우선순위 대기열은 거치지 않습니다."""
+        bucket = self._bucket(group)
+        started = time.monotonic()
+        while True:
+            wait = bucket.try_take()
+            if wait == 0:
+                break
+            time.sleep(wait)
+        waited = time.monotonic() - started
+        self._record_wait(priority, waited)
+        return waited
+
+    def update_from_headers(self, headers) -> str | None:
+        """
+        응답 헤더의 'Remaining-Req: group=candles; min=599; sec=9'를 읽어 버킷을 보정합니다.
+        보정하는 버킷은 요청한 쪽의 그룹이 아니라 헤더에 적힌 group입니다. 보정한 그룹을 반환합니다.
+        """
+        if not headers:
+            return None
+        value = None
+        for key, header_value in headers.items():
+            if key.lower() == "remaining-req":
+                value = header_value
+                break
+        if not value:
+            return None
+        match = _REMAINING_REQ_PATTERN.search(value)
+        if not match:
+            return None
+        self._bucket(match.group(1)).sync_remaining(int(match.group(3)))
+        return match.group(1)
+
+    def attach(self, exchange) -> bool:
+        """
+        ccxt 거래소의 on_rest_response 훅에 연결해, 응답이 도착할 때마다 그 응답의 헤더로 버킷을 보정합니다.
+        last_response_headers는 거래소 인스턴스 하나를 공유하는 동시 요청들이 덮어쓰므로 await 뒤에 읽으면
+        다른 요청의 헤더(또는 실패한 요청 전의 오래된 헤더)를 보게 됩니다.
+
+        Returns:
+            bool: 연결했으면 True. on_rest_response가 없는 거래소(모의 거래소 등)는 False.
+        """
+        on_rest_response = getattr(exchange, "on_rest_response", None)
+        if on_rest_response is None:
+            return False
+        if getattr(on_rest_response, "rate_limiter", None) is self:
+            return True
+
+        def sync_from_response(code, reason, url, method, response_headers, *args):
+            self.update_from_headers(response_headers)
+            return on_rest_response(code, reason, url, method, response_headers, *args)
+
+        sync_from_response.rate_limiter = self
+        exchange.on_rest_response = sync_from_response
+        return True
+
+    def penalize(self, group: str, seconds: float = 1.0):
+        self._bucket(group).penalize(seconds)
+
+    def _record_wait(self, priority: int, waited: float):
+        lane = priority if priority in LANE_NAMES else max(LANE_NAMES)
+        self._wait_samples[lane].append(waited)
+        self._wait_counts[lane] += 1
+        self._wait_totals[lane] += waited
+
+    def get_metrics(self) -> dict:
+        """레인별 요청 수와 큐 대기 시간(ms) 통계를 반환합니다."""
+        metrics = {}
+        for lane, name in LANE_NAMES.items():
+            samples = sorted(self._wait_samples[lane])
+            count = self._wait_counts[lane]
+            metrics[name] = {
+                "count": count,
+                "avg_wait_ms": self._wait_totals[lane] / count * 1000 if count else 0.0,
+                "p95_wait_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000 if samples else 0.0,
+                "max_wait_ms": samples[-1] * 1000 if samples else 0.0,
+            }
+        return metrics
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> UpbitRateLimiter:
+    """프로세스 전역에서 공유되는 UpbitRateLimiter를 반환합니다."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = UpbitRateLimiter()
+        return _shared_limiter
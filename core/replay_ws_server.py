@@ -0,0 +1,203 @@
+"""
+녹화된 Upbit WebSocket 프레임을 재생하는 로컬 대체 서버입니다.
+UpbitMarketFeed를 네트워크 없이 테스트할 때 사용합니다.
+
+사용 예:
+    # 실제 Upbit 시세 60초 녹화
+    python -m core.replay_ws_server --record data/ws_frames.jsonl --symbols BTC/KRW ETH/KRW --duration 60
+    # 녹화본을 10배속으로 재생 (ws://127.0.0.1:8765/websocket/v1)
+    python -m core.replay_ws_server --frames data/ws_frames.jsonl --speed 10
+    # 녹화본이 없으면 data/*.csv 캔들로 합성한 프레임을 재생
+    python -m core.replay_ws_server --from-csv data/BTC_KRW_1m.csv --symbols BTC/KRW
+"""
+import argparse
+import asyncio
+import csv
+import json
+import time
+
+import aiohttp
+from aiohttp import web
+
+from core.market_feed import UPBIT_WS_URL, DEFAULT_CHANNELS, to_upbit_code, from_upbit_code
+
+
+def load_frames(path: str) -> list:
+    """JSON Lines 형식(한 줄에 프레임 하나)의 녹화 파일을 읽습니다."""
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def frames_from_candles(csv_path: str, symbol: str, limit: int | None = None) -> list:
+    """
+    캔들 CSV(timestamp, open, high, low, close, volume)를 ticker/trade 프레임으로 변환합니다.
+    캔들 하나당 시가/고가/저가/종가 순서의 체결 4건과 종가 ticker 1건을 만듭니다.
+    """
+    code = to_upbit_code(symbol)
+    frames = []
+    with open(csv_path, "r") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            if limit is not None and i >= limit:
+                break
+            ts = int(time.mktime(time.strptime(row["timestamp"], "%Y-%m-%d %H:%M:%S")) * 1000)
+            volume = float(row["volume"]) / 4
+            for j, key in enumerate(("open", "high", "low", "close")):
+                frames.append({
+                    "type": "trade", "code": code, "timestamp": ts + j,
+                    "trade_timestamp": ts + j, "trade_price": float(row[key]),
+                    "trade_volume": volume, "ask_bid": "BID" if j % 2 == 0 else "ASK",
+                })
+            frames.append({
+                "type": "ticker", "code": code, "timestamp": ts + 4,
+                "trade_price": float(row["close"]), "acc_trade_price_24h": None,
+            })
+    return frames
+
+
+class ReplayWebSocketServer:
+    """
+    Upbit WebSocket 엔드포인트를 흉내내는 aiohttp 서버입니다.
+    클라이언트의 구독 메시지(type/codes)에 맞는 프레임만 골라 녹화 시각 간격 / speed 로 전송합니다.
+
+    Args:
+        frames (list): 재생할 프레임 목록.
+        speed (float): 재생 배속. 0 이하이면 대기 없이 최대 속도로 전송합니다.
+        drop_after (int | None): 연결당 이 개수만큼 보낸 뒤 연결을 끊습니다 (재접속 테스트용).
+        loop (bool): 프레임을 모두 보낸 뒤 처음부터 반복할지 여부.
+    """
+
+    def __init__(self, frames: list, host: str = "127.0.0.1", port: int = 8765,
+                 speed: float = 1.0, drop_after: int | None = None, loop: bool = False):
+        self.frames = frames
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.drop_after = drop_after
+        self.loop = loop
+        self.connections = 0
+        self.subscriptions = []  # 받은 구독 메시지 기록 (재구독 확인용)
+        self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/websocket/v1"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/websocket/v1", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:  # 임시 포트가 배정된 경우 실제 포트 기록
+            self.port = site._server.sockets[0].getsockname()[1]
+        print(f"✅ 리플레이 WebSocket 서버 시작: {self.url} (프레임 {len(self.frames)}개, {self.speed}배속)")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+
+        msg = await ws.receive()
+        if msg.type != aiohttp.WSMsgType.TEXT:
+            await ws.close()
+            return ws
+        subscription = json.loads(msg.data)
+        self.subscriptions.append(subscription)
+        wanted = {
+            (item["type"], code)
+            for item in subscription if "type" in item
+            for code in item.get("codes", [])
+        }
+
+        sent = 0
+        while not ws.closed:
+            prev_ts = None
+            sent_this_pass = 0
+            for frame in self.frames:
+                if (frame.get("type"), frame.get("code")) not in wanted:
+                    continue
+                ts = frame.get("timestamp")
+                if self.speed > 0 and prev_ts is not None and ts is not None and ts > prev_ts:
+                    await asyncio.sleep((ts - prev_ts) / 1000 / self.speed)
+                prev_ts = ts
+                if ws.closed:
+                    break
+                await ws.send_bytes(json.dumps(frame).encode("utf-8"))  # Upbit은 바이너리 프레임으로 전송
+                sent += 1
+                sent_this_pass += 1
+                if self.drop_after is not None and sent >= self.drop_after:
+                    await ws.close()
+                    return ws
+            if not self.loop or sent_this_pass == 0:
+                # 구독과 맞는 프레임이 없으면 다시 돌아도 보낼 것이 없음 (await 없이 이벤트 루프를 막지 않도록 종료)
+                break
+        await ws.close()
+        return ws
+
+
+async def record_frames(path: str, symbols, duration: float, channels=DEFAULT_CHANNELS, url: str = UPBIT_WS_URL) -> int:
+    """실제 Upbit WebSocket에서 duration초 동안 받은 프레임을 JSON Lines 파일로 녹화합니다."""
+    codes = [to_upbit_code(symbol) for symbol in symbols]
+    subscription = [{"ticket": "replay-recorder"}] + [{"type": ch, "codes": codes} for ch in channels]
+    count = 0
+    deadline = time.monotonic() + duration
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(url) as ws:
+            await ws.send_str(json.dumps(subscription))
+            with open(path, "w") as f:
+                while time.monotonic() < deadline:
+                    try:
+                        msg = await asyncio.wait_for(ws.receive(), deadline - time.monotonic())
+                    except asyncio.TimeoutError:
+                        break
+                    if msg.type not in (aiohttp.WSMsgType.BINARY, aiohttp.WSMsgType.TEXT):
+                        break
+                    frame = json.loads(msg.data)
+                    f.write(json.dumps(frame, ensure_ascii=False) + "\n")
+                    count += 1
+    print(f"[SUCCESS] {count}개 프레임을 {path}에 녹화했습니다. ({[from_upbit_code(c) for c in codes]})")
+    return count
+
+
+async def _serve_forever(server: ReplayWebSocketServer):
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Upbit WebSocket replay server.")
+    parser.add_argument("--frames", type=str, help="Recorded frames (JSON Lines) to replay.")
+    parser.add_argument("--from-csv", type=str, help="Synthesize frames from a candle CSV instead.")
+    parser.add_argument("--record", type=str, help="Record live frames to this path and exit.")
+    parser.add_argument("--symbols", nargs="+", default=["BTC/KRW"], help="Symbols (e.g., BTC/KRW ETH/KRW).")
+    parser.add_argument("--duration", type=float, default=60, help="Recording duration in seconds.")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (<=0: no pacing).")
+    parser.add_argument("--drop-after", type=int, default=None, help="Close each connection after N frames.")
+    parser.add_argument("--loop", action="store_true", help="Replay frames in a loop.")
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record_frames(args.record, args.symbols, args.duration))
+    else:
+        if args.frames:
+            replay_frames = load_frames(args.frames)
+        elif args.from_csv:
+            replay_frames = frames_from_candles(args.from_csv, args.symbols[0])
+        else:
+            parser.error("--frames, --from-csv 또는 --record 중 하나가 필요합니다.")
+        replay_server = ReplayWebSocketServer(
+            replay_frames, host=args.host, port=args.port, speed=args.speed,
+            drop_after=args.drop_after, loop=args.loop,
+        )
+        asyncio.run(_serve_forever(replay_server))
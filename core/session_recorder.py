@@ -0,0 +1,293 @@
+"""
+UpbitService 응답 녹화기와 가속 재생 하네스입니다.
+
+녹화: UpbitService.request를 거치는 모든 거래소 호출(load_markets, fetch_tickers, fetch_ohlcv,
+fetch_balance, 주문 등)의 메서드/인자/응답(또는 예외)을 추가 전용 이진 로그에 남깁니다.
+    UPBIT_RECORD_PATH=data/session.rec python live_trader.py
+
+재생: ReplayUpbitService가 같은 (메서드, 인자) 호출에 녹화된 응답을 녹화 순서대로 돌려주고,
+LiveTrader와 거래소 서비스에 주입한 AcceleratedClock(core.clock 인터페이스)이 대기를 speed배로 당겨
+10분 사이클을 몇 ms로 줄입니다. 프로세스 전역의 asyncio.sleep / time.time은 건드리지 않습니다.
+    python -m core.session_recorder info data/session.rec
+    python -m core.session_recorder replay data/session.rec --speed 10000 --cycles 144
+
+로그 형식: 매직 헤더 뒤에 [uint32 길이][zlib(JSON 레코드)]가 반복됩니다.
+레코드: {"t": 응답 시각(epoch 초), "d": 소요 시간(초), "m": 메서드 이름, "k": 인자 키, "r": 응답 | "e": [예외 클래스, 메시지]}
+"""
+import argparse
+import asyncio
+import collections
+import hashlib
+import json
+import os
+import struct
+import time
+import zlib
+
+import ccxt.async_support as ccxt
+
+from core.clock import SYSTEM_CLOCK
+from core.exchange import UpbitService
+
+SESSION_LOG_MAGIC = b"UPBREC1\n"
+_LENGTH = struct.Struct("<I")
+
+
+def call_key(method_name: str, args, kwargs) -> str:
+    """녹화/재생에서 같은 호출을 찾기 위한 (메서드, 인자) 키"""
+    return json.dumps([method_name, list(args), kwargs or {}], sort_keys=True, default=str, ensure_ascii=False)
+
+
+class SessionRecorder:
+    """
+    UpbitService.recorder로 설정하면 request()가 응답마다 record()를 호출합니다.
+    응답 시각은 clock(core.clock 인터페이스, 보통 서비스와 같은 시계) 기준으로 기록합니다.
+    """
+
+    def __init__(self, path: str, clock=None):
+        self.path = path
+        self.clock = clock or SYSTEM_CLOCK
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab")
+        if new_file:
+            self._file.write(SESSION_LOG_MAGIC)
+        self.record_count = 0
+        print(f"✅ 거래소 응답 녹화 시작: {path}")
+
+    def record(self, method_name: str, args, kwargs, result=None, error: Exception | None = None, duration: float = 0.0):
+        entry = {"t": self.clock.time(), "d": duration, "m": method_name, "k": call_key(method_name, args, kwargs)}
+        if error is not None:
+            entry["e"] = [type(error).__name__, str(error)]
+        else:
+            entry["r"] = result
+        blob = zlib.compress(json.dumps(entry, default=str, ensure_ascii=False).encode("utf-8"))
+        self._file.write(_LENGTH.pack(len(blob)) + blob)
+        self._file.flush()
+        self.record_count += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_session_log(path: str):
+    """녹화 로그의 레코드를 순서대로 돌려줍니다. 마지막 레코드가 잘려 있으면 거기서 멈춥니다."""
+    with open(path, "rb") as f:
+        if f.read(len(SESSION_LOG_MAGIC)) != SESSION_LOG_MAGIC:
+            raise ValueError(f"{path}: 세션 로그 형식이 아닙니다.")
+        while True:
+            header = f.read(_LENGTH.size)
+            if len(header) < _LENGTH.size:
+                return
+            blob = f.read(_LENGTH.unpack(header)[0])
+            try:
+                yield json.loads(zlib.decompress(blob))
+            except zlib.error:
+                return  # 녹화 중 종료되어 잘린 마지막 레코드
+
+
+class ReplayUpbitService(UpbitService):
+    """
+    녹화된 응답으로 동작하는 UpbitService입니다. 네트워크/API 키가 필요 없습니다.
+    같은 키의 호출에는 녹화 순서대로 응답하고, 녹화분을 다 쓰면 마지막 응답을 반복합니다.
+    녹화되지 않은 호출은 ccxt.ExchangeError를 발생시킵니다.
+
+    Args:
+        simulate_latency (bool): 녹화된 응답 소요 시간만큼 (clock 기준으로) 기다립니다.
+        clock: core.clock 인터페이스 (예: AcceleratedClock). 없으면 실제 시계.
+    """
+
+    def __init__(self, path: str, simulate_latency: bool = False, clock=None):
+        super().__init__("replay", "replay", clock=clock)
+        self.path = path
+        self.simulate_latency = simulate_latency
+        self.responses = collections.defaultdict(collections.deque)
+        self.last_response = {}
+        self.started_at = None  # 녹화 세션 시작 시각 (epoch 초)
+        for entry in read_session_log(path):
+            if self.started_at is None:
+                self.started_at = entry["t"] - entry["d"]
+            self.responses[entry["k"]].append(entry)
+        self.served = self.repeated = self.missing = 0
+        print(f"✅ 재생 거래소 준비: {path} (호출 종류 {len(self.responses)}개, 응답 {sum(map(len, self.responses.values()))}개)")
+
+    async def request(self, group: str, priority: int, method, *args, **kwargs):
+        method_name = getattr(method, "__name__", str(method))
+        key = call_key(method_name, args, kwargs)
+        queue = self.responses.get(key)
+        if queue:
+            entry = self.last_response[key] = queue.popleft()
+            self.served += 1
+        elif key in self.last_response:
+            entry = self.last_response[key]
+            self.repeated += 1
+        else:
+            self.missing += 1
+            raise ccxt.ExchangeError(f"replay: 녹화되지 않은 호출 {method_name}{tuple(args)}")
+
+        if self.simulate_latency and entry["d"]:
+            await self.clock.sleep(entry["d"])
+        if "e" in entry:
+            error_class = getattr(ccxt, entry["e"][0], ccxt.ExchangeError)
+            raise error_class(entry["e"][1])
+        if method_name == "load_markets":
+            self.exchange.set_markets(entry["r"])
+        return entry["r"]
+
+    async def connect(self):
+        await self.request('market', 0, self.exchange.load_markets)
+
+    async def start_market_feed(self, symbols, *args, **kwargs):
+        return None  # 재생 중에는 WebSocket 대신 녹화된 REST 응답 사용
+
+
+class AcceleratedClock:
+    """
+    core.clock 인터페이스의 가속 시계입니다. 가상 시각은 sleep으로만 흐릅니다:
+    sleep(d)는 실제로 d / speed초만 기다린 뒤 가상 시각을 (대기 시작 시각 + d)까지 당깁니다.
+    여러 태스크(사이클, 손절 폴링, 잔고 재조정)가 동시에 기다려도 대기 시간이 합산되지 않고
+    가장 늦은 기상 시각까지만 흐르므로, 녹화와 재생에서 사이클 시각이 같게 유지됩니다.
+    """
+
+    def __init__(self, speed: float, start: float | None = None):
+        self.speed = speed
+        self.set_time(time.time() if start is None else start)
+
+    def set_time(self, start: float):
+        self.now = self.started_at = start
+
+    def time(self) -> float:
+        return self.now
+
+    @property
+    def elapsed(self) -> float:
+        """시작 이후 흐른 가상 시간(초)"""
+        return self.now - self.started_at
+
+    async def sleep(self, delay, result=None):
+        if delay <= 0:
+            return await asyncio.sleep(delay, result)
+        wake_at = self.now + delay
+        result = await asyncio.sleep(delay / self.speed, result)
+        self.now = max(self.now, wake_at)
+        return result
+
+
+async def run_live_session(service, clock, cycles: int, capital: float = 1_000_000) -> dict:
+    """
+    주어진 거래소 서비스와 시계로 LiveTrader 전체 파이프라인(유니버스 → 잔고 → 시장 체제 → 지표 → 배치 추론 → 실행)을
+    cycles개 결정 사이클 동안 돌리고 결정 다이제스트를 계산합니다. 녹화(SessionRecorder를 붙인 서비스)와
+    재생(ReplayUpbitService)이 같은 하네스를 쓰므로 두 다이제스트를 그대로 비교할 수 있습니다.
+
+    Returns:
+        dict: 사이클 수, 사이클별 결정 사이클 지연(ms), 결정 수, 결정 다이제스트, 실제/가상 경과 시간(초).
+    """
+    import tempfile
+
+    from core.state_store import StateStore
+    from live_trader import LiveTrader
+
+    decisions = []
+    cycle_ms = []
+    done = asyncio.Event()
+
+    # 실제 운영 상태(저장된 유니버스, 순자산 기록, 상태 저장소)를 읽거나 덮어쓰지 않도록 분리
+    with tempfile.TemporaryDirectory() as state_dir:
+        trader = LiveTrader(capital, upbit_service=service, state_store=StateStore(os.path.join(state_dir, "state.db")),
+                            clock=clock, universe_cache_path=None)
+        trader.portfolio_history.buffer.flush_path = None
+        trader._init_analyzer = lambda: print('\n- 재생 모드: 감성 분석(Gemini 호출)을 사용하지 않습니다.')
+        original_cycle, original_build = trader._run_decision_cycle, trader._build_decision
+
+        async def timed_cycle(market_context):
+            started = time.perf_counter()
+            try:
+                return await original_cycle(market_context)
+            finally:
+                cycle_ms.append((time.perf_counter() - started) * 1000)
+                if len(cycle_ms) >= cycles:
+                    done.set()
+
+        def recorded_build(symbol, action, market_context, sentiment_score=None):
+            decisions.append((trader.cycle_id, symbol, int(action)))
+            return original_build(symbol, action, market_context, sentiment_score)
+
+        trader._run_decision_cycle, trader._build_decision = timed_cycle, recorded_build
+        wall_started = time.perf_counter()
+        await trader.initialize()
+        run_task = asyncio.create_task(trader.run())
+        waiter = asyncio.create_task(done.wait())
+        await asyncio.wait({run_task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        for task in (run_task, waiter):
+            task.cancel()
+        await asyncio.gather(run_task, waiter, return_exceptions=True)
+        await trader.stop_monitor.stop()
+        await service.balance_book.stop()
+        trader.state_store.close()
+        wall = time.perf_counter() - wall_started
+
+    return {
+        "cycles": len(cycle_ms), "cycle_ms": cycle_ms, "decisions": len(decisions),
+        "digest": hashlib.sha256(json.dumps(decisions).encode("utf-8")).hexdigest(),
+        "wall_seconds": wall, "virtual_seconds": clock.elapsed,
+    }
+
+
+async def replay_live_session(path: str, speed: float = 10000.0, cycles: int = 144, capital: float = 1_000_000) -> dict:
+    """
+    녹화 세션을 ReplayUpbitService와 AcceleratedClock으로 가속 재생합니다 (run_live_session 참고).
+
+    Returns:
+        dict: run_live_session 결과 + 재생 통계 (녹화 응답 사용/반복/미녹화 횟수).
+    """
+    clock = AcceleratedClock(speed)
+    service = ReplayUpbitService(path, clock=clock)
+    if service.started_at is not None:
+        clock.set_time(service.started_at)
+    report = await run_live_session(service, clock, cycles, capital)
+    report.update(served=service.served, repeated=service.repeated, missing=service.missing)
+    return report
+
+
+def _print_info(path: str):
+    counts = collections.Counter()
+    sizes = collections.Counter()
+    first = last = None
+    for entry in read_session_log(path):
+        counts[entry["m"]] += 1
+        sizes[entry["m"]] += len(json.dumps(entry.get("r"), default=str))
+        first = first if first is not None else entry["t"]
+        last = entry["t"]
+    print(f"[INFO] {path}: {os.path.getsize(path) / 1024:.0f}KB, 레코드 {sum(counts.values())}개, "
+          f"녹화 구간 {((last or 0) - (first or 0)) / 3600:.2f}시간")
+    for method_name, count in counts.most_common():
+        print(f"  - {method_name:<36} {count:6d}회 (원본 JSON {sizes[method_name] / 1024:9.0f}KB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upbit session recorder / accelerated LiveTrader replay.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    info_parser = subparsers.add_parser("info", help="Summarize a session log.")
+    info_parser.add_argument("log")
+    replay_parser = subparsers.add_parser("replay", help="Replay a session log through LiveTrader.")
+    replay_parser.add_argument("log")
+    replay_parser.add_argument("--speed", type=float, default=10000.0)
+    replay_parser.add_argument("--cycles", type=int, default=144, help="Stop after this many decision cycles.")
+    replay_parser.add_argument("--expect-digest", type=str, help="Fail if the decision digest differs.")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        _print_info(args.log)
+    else:
+        report = asyncio.run(replay_live_session(args.log, args.speed, args.cycles))
+        cycle_ms = sorted(report["cycle_ms"]) or [0.0]
+        print(f"\n[REPLAY] 사이클 {report['cycles']}개, 가상 {report['virtual_seconds'] / 3600:.2f}시간을 "
+              f"{report['wall_seconds']:.1f}초에 재생")
+        print(f"  - 결정 사이클 지연: p50 {cycle_ms[len(cycle_ms) // 2]:.1f}ms, "
+              f"p95 {cycle_ms[min(len(cycle_ms) - 1, int(len(cycle_ms) * 0.95))]:.1f}ms, 최대 {cycle_ms[-1]:.1f}ms")
+        print(f"  - 응답: 녹화 {report['served']}회, 반복 {report['repeated']}회, 미녹화 {report['missing']}회")
+        print(f"  - 결정 {report['decisions']}개, 다이제스트 {report['digest']}")
+        if args.expect_digest and args.expect_digest != report["digest"]:
+            print("[FAIL] 결정 다이제스트가 기대값과 다릅니다.")
+            raise SystemExit(1)
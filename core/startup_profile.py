@@ -0,0 +1,91 @@
+"""
+시작 시간 프로파일러입니다 (main.py --startup-profile).
+
+builtins.__import__를 감싸 처음 로드되는 모듈의 import 시간(하위 import 포함)을 기록하고,
+mark_startup()으로 '첫 거래 결정' 같은 이정표까지의 경과 시간을 남깁니다.
+프로파일링이 꺼져 있으면 mark_startup()은 아무 일도 하지 않습니다.
+"""
+import builtins
+import sys
+import time
+
+# 어떤 --mode에서 로드되었는지 확인할 ML 프레임워크
+ML_FRAMEWORKS = ("torch", "tensorflow", "stable_baselines3", "xgboost", "lightgbm", "sklearn", "gymnasium")
+
+
+class StartupProfiler:
+    def __init__(self, started: float | None = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.imports = {}  # module -> (inclusive seconds, nesting depth)
+        self.marks = []
+        self.reported = False
+        self._depth = 0
+        self._original_import = None
+
+    def install(self):
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        depth = self._depth
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            self.imports.setdefault(name, (time.perf_counter() - started, depth))
+
+    def mark(self, label: str):
+        elapsed = time.perf_counter() - self.started
+        self.marks.append((label, elapsed))
+        print(f"[STARTUP] +{elapsed:.3f}s {label}")
+
+    def report(self, top: int = 15):
+        if self.reported:
+            return
+        self.reported = True
+        print("\n[STARTUP] 모드 모듈별 import 시간 (하위 import 포함, 상위 {}개)".format(top))
+        direct = sorted(
+            ((name, seconds) for name, (seconds, depth) in self.imports.items() if depth == 0),
+            key=lambda item: item[1], reverse=True,
+        )
+        for name, seconds in direct[:top]:
+            print(f"  - {name:<32} {seconds * 1000:8.1f}ms")
+        print("[STARTUP] ML 프레임워크 로드 여부")
+        for name in ML_FRAMEWORKS:
+            if name in sys.modules:
+                seconds = self.imports.get(name, (0.0, 0))[0]
+                print(f"  - {name:<32} 로드됨 ({seconds * 1000:.1f}ms)")
+            else:
+                print(f"  - {name:<32} 로드 안 됨")
+        for label, elapsed in self.marks:
+            print(f"[STARTUP] {label}: {elapsed:.3f}s")
+
+
+_active_profiler = None
+
+
+def start_startup_profile(started: float | None = None) -> StartupProfiler:
+    """프로세스 전역 프로파일러를 켭니다. started는 프로세스 시작 무렵의 time.perf_counter() 값입니다."""
+    global _active_profiler
+    _active_profiler = StartupProfiler(started)
+    _active_profiler.install()
+    return _active_profiler
+
+
+def mark_startup(label: str, report: bool = False):
+    """프로파일링 중이면 이정표를 기록하고, report=True면 (한 번만) 전체 보고서를 출력합니다."""
+    if _active_profiler is None:
+        return
+    _active_profiler.mark(label)
+    if report:
+        _active_profiler.report()
@@ -0,0 +1,371 @@
+"""
+10분 거래 사이클과 분리된 이벤트 기반 손절매 / 트레일링 스탑 감시기입니다.
+
+심볼마다 발동 가격(level)을 정렬 리스트로 유지하므로, 새 시세가 들어오면 bisect로
+가격 이하로 내려온(= 발동 가격을 넘어선) 스탑만 골라냅니다. 트레일링 스탑의 고점은 min-힙으로 관리해
+새 가격이 고점을 넘긴 항목만 끌어올립니다. 발동된 스탑은 매도 큐에 들어가고,
+전용 워커가 곧바로 UpbitExecutionEngine.create_market_sell_order를 호출합니다.
+매도가 실패하면 지수 백오프 뒤에 다시 감시하고, max_sell_attempts번 실패하면 다음 sync()까지 포기합니다.
+
+시세 입력:
+    - UpbitMarketFeed.add_price_listener(monitor.on_price) : WebSocket 체결마다 즉시 평가
+    - poll_interval마다 price_source.get_current_prices(감시 심볼) : 피드가 없거나 끊겼을 때의 일괄 조회
+    - on_prices(PriceSnapshot) : 거래 사이클이 이미 받은 스냅샷 재사용
+
+지연 시간 벤치마크 (리플레이 WebSocket 서버 사용):
+    python -m core.stop_monitor --symbols 20 --positions-per-tick 1000
+"""
+import argparse
+import asyncio
+import bisect
+import heapq
+import itertools
+import time
+import traceback
+
+from core.clock import SYSTEM_CLOCK
+
+
+class StopOrder:
+    """감시 중인 스탑 하나. level은 고정 손절가와 트레일링 가격 중 높은 값입니다."""
+
+    __slots__ = ("key", "symbol", "quantity", "stop_price", "trailing_pct", "high", "level", "seq", "attempts")
+
+    def __init__(self, key, symbol: str, quantity: float, stop_price: float | None, trailing_pct: float | None, high: float, seq: int):
+        self.key = key
+        self.symbol = symbol
+        self.quantity = quantity
+        self.stop_price = stop_price
+        self.trailing_pct = trailing_pct
+        self.high = high
+        self.seq = seq
+        self.level = self._compute_level()
+        self.attempts = 0  # 실패한 매도 제출 횟수
+
+    def _compute_level(self) -> float:
+        level = self.stop_price or 0.0
+        if self.trailing_pct:
+            level = max(level, self.high * (1 - self.trailing_pct))
+        return level
+
+
+class _SymbolStops:
+    """한 심볼의 스탑들: (level, seq, key) 정렬 리스트 + 트레일링 고점 min-힙"""
+
+    def __init__(self):
+        self.levels = []
+        self.orders = {}
+        self.trailing_heap = []  # (high, seq, key). 고점이 바뀐 항목은 지연 삭제
+
+    def add(self, order: StopOrder):
+        self.orders[order.key] = order
+        bisect.insort(self.levels, (order.level, order.seq, order.key))
+        if order.trailing_pct:
+            heapq.heappush(self.trailing_heap, (order.high, order.seq, order.key))
+
+    def remove(self, key):
+        order = self.orders.pop(key, None)
+        if order is not None:
+            index = bisect.bisect_left(self.levels, (order.level, order.seq, key))
+            del self.levels[index]
+        return order
+
+    def raise_trailing(self, price: float):
+        """가격이 트레일링 고점을 넘은 스탑만 고점과 발동 가격을 끌어올립니다."""
+        heap = self.trailing_heap
+        while heap and heap[0][0] < price:
+            high, seq, key = heapq.heappop(heap)
+            order = self.orders.get(key)
+            if order is None or order.seq != seq or order.high != high:
+                continue  # 이미 제거되었거나 갱신된 항목
+            index = bisect.bisect_left(self.levels, (order.level, seq, key))
+            del self.levels[index]
+            order.high = price
+            order.level = order._compute_level()
+            bisect.insort(self.levels, (order.level, seq, key))
+            heapq.heappush(heap, (price, seq, key))
+
+    def pop_crossed(self, price: float) -> list:
+        """발동 가격이 현재가 이상인(가격이 발동 가격까지 내려온) 스탑을 꺼냅니다."""
+        index = bisect.bisect_left(self.levels, (price,))
+        if index == len(self.levels):
+            return []
+        crossed = self.levels[index:]
+        del self.levels[index:]
+        return [self.orders.pop(key) for _, _, key in crossed]
+
+
+class StopMonitor:
+    """
+    Args:
+        execution_engine: create_market_sell_order(symbol, quantity)를 제공하는 실행 엔진.
+        price_source: get_current_prices(symbols) -> PriceSnapshot 을 제공하는 객체 (예: UpbitService). 없으면 폴링 안 함.
+        stop_loss_pct (float): 진입가 대비 기본 손절 비율.
+        trailing_pct (float | None): 고점 대비 트레일링 스탑 비율. None이면 사용 안 함.
+        poll_interval (float): 일괄 시세 폴링 주기(초).
+        clock: core.clock 인터페이스. 없으면 price_source의 시계(없으면 실제 시계)를 사용합니다.
+        max_sell_attempts (int): 스탑 하나당 최대 매도 제출 횟수. 모두 실패하면 다음 sync()까지 다시 감시하지 않습니다.
+        retry_backoff / max_retry_backoff (float): 실패 후 다시 감시하기까지 대기(초) = min(max, base * 2^(실패-1)).
+    """
+
+    def __init__(self, execution_engine, price_source=None, stop_loss_pct: float = 0.05,
+                 trailing_pct: float | None = None, poll_interval: float = 0.5, clock=None,
+                 max_sell_attempts: int = 5, retry_backoff: float = 1.0, max_retry_backoff: float = 30.0):
+        self.execution_engine = execution_engine
+        self.price_source = price_source
+        self.clock = clock or getattr(price_source, "clock", SYSTEM_CLOCK)
+        self.stop_loss_pct = stop_loss_pct
+        self.trailing_pct = trailing_pct
+        self.poll_interval = poll_interval
+        self.max_sell_attempts = max_sell_attempts
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.symbols = {}  # symbol -> _SymbolStops
+        self._symbol_of = {}  # key -> symbol
+        self._seq = itertools.count()
+        self._queue = asyncio.Queue()
+        self._tasks = []
+        self._retrying = {}  # key -> 백오프 대기 중인 StopOrder (unwatch/watch하면 재감시 취소)
+        self._retry_tasks = set()
+        self.fired = []  # (key, symbol, price, 감지→매도 호출 완료 지연 초)
+
+    def __len__(self) -> int:
+        return len(self._symbol_of)
+
+    def __contains__(self, key) -> bool:
+        return key in self._symbol_of
+
+    # --- 스탑 등록 ---
+
+    def watch(self, symbol: str, entry_price: float, quantity: float, key=None,
+              stop_loss_pct: float | None = None, trailing_pct: float | None = None) -> StopOrder:
+        """포지션의 손절/트레일링 스탑을 등록합니다. 같은 key가 있으면 교체합니다 (기본 key는 심볼)."""
+        key = symbol if key is None else key
+        self.unwatch(key)
+        stop_loss_pct = self.stop_loss_pct if stop_loss_pct is None else stop_loss_pct
+        trailing_pct = self.trailing_pct if trailing_pct is None else trailing_pct
+        stop_price = entry_price * (1 - stop_loss_pct) if stop_loss_pct else None
+        order = StopOrder(key, symbol, quantity, stop_price, trailing_pct, entry_price, next(self._seq))
+        self.symbols.setdefault(symbol, _SymbolStops()).add(order)
+        self._symbol_of[key] = symbol
+        return order
+
+    def unwatch(self, key):
+        retrying = self._retrying.pop(key, None)
+        symbol = self._symbol_of.pop(key, None)
+        if symbol is None:
+            return retrying
+        stops = self.symbols[symbol]
+        order = stops.remove(key)
+        if not stops.orders:
+            del self.symbols[symbol]
+        return order
+
+    def sync(self, open_positions: dict):
+        """
+        LiveTrader.open_positions({symbol: {'entry_price', 'quantity'}})와 감시 목록을 맞춥니다.
+        백오프 대기 중인 스탑은 그대로 두고, 재시도를 포기한 스탑은 새로 등록합니다.
+        """
+        for key in [key for key in (*self._symbol_of, *self._retrying) if key not in open_positions]:
+            self.unwatch(key)
+        for symbol, position in open_positions.items():
+            if symbol not in self._symbol_of and symbol not in self._retrying:
+                self.watch(symbol, position['entry_price'], position['quantity'])
+
+    # --- 시세 입력 ---
+
+    def on_price(self, symbol: str, price: float) -> list:
+        """새 시세 하나를 반영하고 발동된 스탑을 매도 큐에 넣습니다. 발동된 StopOrder 목록을 반환합니다."""
+        stops = self.symbols.get(symbol)
+        if stops is None or price is None:
+            return []
+        detected_at = time.perf_counter()
+        stops.raise_trailing(price)
+        crossed = stops.pop_crossed(price)
+        for order in crossed:
+            del self._symbol_of[order.key]
+            print(f"  - [STOP] {symbol} 발동! 현재가 {price} <= 발동가 {order.level:.4f} "
+                  f"({'트레일링' if order.trailing_pct and order.level > (order.stop_price or 0) else '손절'}), {order.quantity}개 매도")
+            self._queue.put_nowait((order, price, detected_at))
+        if not stops.orders:
+            del self.symbols[symbol]
+        return crossed
+
+    def on_prices(self, prices) -> list:
+        """PriceSnapshot 또는 {symbol: price}를 한 번에 반영합니다."""
+        if prices is None:
+            return []
+        prices = getattr(prices, "prices", prices)
+        crossed = []
+        for symbol in list(self.symbols):
+            if symbol in prices:
+                crossed.extend(self.on_price(symbol, prices[symbol]))
+        return crossed
+
+    # --- 실행 ---
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._sell_worker()))
+        if self.price_source is not None and self.poll_interval:
+            self._tasks.append(asyncio.create_task(self._poll_loop()))
+        polling = f"{self.poll_interval}s" if self.price_source is not None and self.poll_interval else "없음"
+        print(f"✅ 손절매 감시기 시작 (손절 {self.stop_loss_pct:.2%}, 트레일링 {self.trailing_pct or 0:.2%}, 폴링 {polling})")
+
+    async def stop(self):
+        tasks = self._tasks + list(self._retry_tasks)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._retry_tasks.clear()
+
+    async def _poll_loop(self):
+        while True:
+            if self.symbols:
+                try:
+                    self.on_prices(await self.price_source.get_current_prices(list(self.symbols)))
+                except Exception as e:
+                    print(f"  - [STOP] 시세 폴링 실패: {e}")
+            await self.clock.sleep(self.poll_interval)
+
+    async def _sell_worker(self):
+        while True:
+            order, price, detected_at = await self._queue.get()
+            positions = getattr(self.execution_engine, "open_positions", None)
+            if positions is not None and order.symbol not in positions:
+                print(f"  - [STOP] {order.symbol} 이미 청산된 포지션입니다. 매도를 건너뜁니다.")
+                self._queue.task_done()
+                continue
+            try:
+                result = await self.execution_engine.create_market_sell_order(order.symbol, order.quantity)
+                if result is None:
+                    raise RuntimeError("매도 주문 결과 없음")
+                latency = time.perf_counter() - detected_at
+                self.fired.append((order.key, order.symbol, price, latency))
+                print(f"  - [STOP] {order.symbol} 매도 완료 (감지 후 {latency * 1000:.1f}ms)")
+            except Exception:
+                order.attempts += 1
+                if order.attempts >= self.max_sell_attempts:
+                    print(f"  - [STOP] {order.symbol} 매도 {order.attempts}회 실패. 다음 동기화까지 감시를 멈춥니다.\n"
+                          f"{traceback.format_exc()}")
+                else:
+                    # 실패한 스탑은 백오프 뒤 다시 등록해 그 이후 시세에서 재시도 (매 틱 재제출 방지)
+                    delay = min(self.max_retry_backoff, self.retry_backoff * 2 ** (order.attempts - 1))
+                    print(f"  - [STOP] {order.symbol} 매도 실패 ({order.attempts}/{self.max_sell_attempts}). "
+                          f"{delay:g}s 뒤 다시 감시합니다.\n{traceback.format_exc()}")
+                    self._schedule_retry(order, delay)
+            finally:
+                self._queue.task_done()
+
+    def _schedule_retry(self, order: StopOrder, delay: float):
+        if order.key in self._symbol_of:
+            return  # 그 사이 같은 key로 새 스탑이 등록됨
+        self._retrying[order.key] = order
+        task = asyncio.create_task(self._rearm(order, delay))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _rearm(self, order: StopOrder, delay: float):
+        await self.clock.sleep(delay)
+        if self._retrying.get(order.key) is not order:
+            return  # 대기 중에 unwatch/watch됨
+        del self._retrying[order.key]
+        order.seq = next(self._seq)
+        self.symbols.setdefault(order.symbol, _SymbolStops()).add(order)
+        self._symbol_of[order.key] = order.symbol
+
+
+class _RecordingEngine:
+    def __init__(self):
+        self.sold_at = {}
+
+    async def create_market_sell_order(self, symbol: str, quantity: float):
+        self.sold_at.setdefault(symbol, time.time())
+        return {"status": "ok", "symbol": symbol, "quantity": quantity}
+
+
+class _FeedPrices:
+    """폴링 모드용 가격 소스: 피드의 최신가를 PriceSnapshot처럼 돌려줌"""
+
+    def __init__(self, feed):
+        self.feed = feed
+
+    async def get_current_prices(self, symbols):
+        return {symbol: self.feed.get_price(symbol) for symbol in symbols if self.feed.get_price(symbol) is not None}
+
+
+def _crash_frames(symbols, ticks: int = 200, interval_ms: int = 50) -> list:
+    """심볼마다 횡보하다가 중간 지점부터 10% 하락하는 체결 프레임을 만듭니다 (심볼별로 하락 시점이 다름)."""
+    from core.market_feed import to_upbit_code
+    frames = []
+    start = int(time.time() * 1000)
+    for i in range(ticks):
+        for j, symbol in enumerate(symbols):
+            crash_at = ticks // 2 + j % 10
+            price = 100.0 * (1.0 + 0.001 * (i % 5)) if i < crash_at else 90.0
+            frames.append({"type": "trade", "code": to_upbit_code(symbol), "timestamp": start + i * interval_ms,
+                           "trade_timestamp": start + i * interval_ms, "trade_price": price,
+                           "trade_volume": 1.0, "ask_bid": "ASK"})
+    return frames
+
+
+async def _latency_benchmark(symbol_count: int, positions_per_tick: int):
+    from core.market_feed import UpbitMarketFeed
+    from core.replay_ws_server import ReplayWebSocketServer
+
+    symbols = [f"S{i}/KRW" for i in range(symbol_count)]
+    for mode, poll_interval in (("WebSocket 리스너", None), ("일괄 폴링 0.5s", 0.5)):
+        server = ReplayWebSocketServer(_crash_frames(symbols), port=0, speed=1.0)
+        await server.start()
+        feed = UpbitMarketFeed(symbols, channels=("trade",), url=server.url)
+        engine = _RecordingEngine()
+        monitor = StopMonitor(engine, _FeedPrices(feed) if poll_interval else None, stop_loss_pct=0.05, poll_interval=poll_interval)
+        for symbol in symbols:
+            monitor.watch(symbol, 100.0, 1.0)
+        crossed_at = {}
+
+        def record_crossing(symbol, price):
+            if price <= 95.0:
+                crossed_at.setdefault(symbol, time.time())
+
+        feed.add_price_listener(record_crossing)
+        if poll_interval is None:
+            feed.add_price_listener(monitor.on_price)
+        monitor.start()
+        await feed.start()
+        await asyncio.sleep(12)
+        await server.stop()
+        await feed.stop()
+        await monitor.stop()
+
+        latencies = [engine.sold_at[s] - crossed_at[s] for s in symbols if s in engine.sold_at and s in crossed_at]
+        if latencies:
+            print(f"[BENCH] {mode:<16} 발동 {len(latencies)}/{symbol_count} | 가격 돌파→매도 평균 {sum(latencies) / len(latencies) * 1000:7.1f}ms, "
+                  f"최대 {max(latencies) * 1000:7.1f}ms")
+        else:
+            print(f"[BENCH] {mode:<16} 측정 시간(12s) 안에 발동된 스탑 없음")
+    print("[BENCH] 10분 사이클 (기존)     가격 돌파→매도 최대 600s")
+
+    # 한 심볼에 스탑이 많을 때 틱당 평가 비용 (발동 없음 / 트레일링 고점 갱신)
+    monitor = StopMonitor(_RecordingEngine(), trailing_pct=0.03)
+    for i in range(positions_per_tick):
+        monitor.watch("BTC/KRW", 100.0 + i * 0.01, 1.0, key=i)
+    started = time.perf_counter()
+    for i in range(10000):
+        monitor.on_price("BTC/KRW", 200.0 + (i % 2) * 0.001)
+    per_tick_us = (time.perf_counter() - started) / 10000 * 1e6
+    print(f"[BENCH] 스탑 {positions_per_tick}개 심볼의 틱당 평가: {per_tick_us:.1f}µs (전체 스캔 없이 bisect/힙)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stop-loss monitor latency benchmark using the replay WebSocket server.")
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--positions-per-tick", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(_latency_benchmark(args.symbols, args.positions_per_tick))
@@ -0,0 +1,99 @@
+"""
+Gemini generateContent REST API를 흉내내는 로컬 감성 모델 스텁 서버입니다.
+SentimentAnalyzer / AsyncSentimentService를 네트워크와 API 키 없이 테스트할 때 사용합니다.
+
+사용 예:
+    python -m core.stub_sentiment_server --port 8088 --delay 0.5
+    SENTIMENT_MODEL_URL=http://127.0.0.1:8088 python live_trader.py
+"""
+import argparse
+import asyncio
+import hashlib
+import re
+
+from aiohttp import web
+
+
+def stub_index(ticker: str) -> int:
+    """티커마다 항상 같은 공포-탐욕 지수(0~100)를 돌려줍니다."""
+    return int(hashlib.sha256(ticker.encode("utf-8")).hexdigest(), 16) % 101
+
+
+class StubSentimentServer:
+    """
+    POST /v1beta/models/{model}:generateContent 요청의 프롬프트에서 티커(BASE/QUOTE)를 찾아
+    SentimentAnalyzer가 기대하는 형식으로 응답합니다.
+    배치 프롬프트(출력 형식에 '| 지수:'가 있음)에는 '티커 | 지수: N | 핵심 내러티브: ...' 줄들로,
+    단일 프롬프트에는 '지수: N / 핵심 내러티브: ...' 형식으로 답합니다.
+
+    Args:
+        delay (float): 응답 전 대기 시간(초). 타임아웃 테스트용.
+        fail_every (int | None): N번째 요청마다 500 오류를 돌려줍니다.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8088, delay: float = 0.0, fail_every: int | None = None):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.fail_every = fail_every
+        self.requests = []  # 받은 프롬프트 기록
+        self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/v1beta/models/{action}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:  # 임시 포트가 배정된 경우 실제 포트 기록
+            self.port = site._server.sockets[0].getsockname()[1]
+        print(f"✅ 감성 모델 스텁 서버 시작: {self.url} (지연 {self.delay}s)")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request):
+        if not request.match_info["action"].endswith(":generateContent"):
+            raise web.HTTPNotFound()
+        payload = await request.json()
+        prompt = "".join(part.get("text", "") for content in payload.get("contents", []) for part in content.get("parts", []))
+        self.requests.append(prompt)
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+        if self.fail_every and len(self.requests) % self.fail_every == 0:
+            raise web.HTTPInternalServerError(text="stub failure")
+
+        tickers = list(dict.fromkeys(re.findall(r"\b([A-Z0-9]+/[A-Z]+)\b", prompt)))
+        if "| 지수:" in prompt:
+            text = "\n".join(
+                f"{ticker} | 지수: {stub_index(ticker)} | 핵심 내러티브: {ticker} 스텁 내러티브" for ticker in tickers
+            )
+        else:
+            ticker = tickers[0] if tickers else "MARKET"
+            text = f"지수: {stub_index(ticker)}\n핵심 내러티브: {ticker} 스텁 내러티브"
+        return web.json_response({"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]})
+
+
+async def _serve_forever(server: StubSentimentServer):
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Gemini-compatible sentiment stub server.")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--delay", type=float, default=0.0, help="Response delay in seconds.")
+    parser.add_argument("--fail-every", type=int, default=None, help="Return HTTP 500 on every N-th request.")
+    args = parser.parse_args()
+    asyncio.run(_serve_forever(StubSentimentServer(args.host, args.port, args.delay, args.fail_every)))
@@ -6,6 +6,7 @@ from datetime import datetime
 import time
 
 from constants import SCALPING_TARGET_COINS
+from core.rate_limiter import get_rate_limiter, PRIORITY_UNIVERSE
 
 # --- Configuration ---
 DATA_DIR = "data"
@@ -21,6 +22,7 @@ def download_historical_data():
     os.makedirs(DATA_DIR, exist_ok=True)
     
     upbit = ccxt.upbit() # No authentication needed for public data
+    rate_limiter = get_rate_limiter()
     
     for ticker in UNIVERSE:
         try:
@@ -32,14 +34,15 @@ def download_historical_data():
             end_timestamp = upbit.milliseconds()
 
             while since < end_timestamp:
+                rate_limiter.acquire_sync("candles", PRIORITY_UNIVERSE) # Respect API rate limits
                 ohlcv = upbit.fetch_ohlcv(symbol, timeframe=TIMEFRAME, since=since)
+                rate_limiter.update_from_headers(upbit.last_response_headers)
                 if len(ohlcv):
                     since = ohlcv[-1][0] + (upbit.parse_timeframe(TIMEFRAME) * 1000)
                     all_ohlcv.extend(ohlcv)
                     print(f"    Fetched {len(ohlcv)} candles, last timestamp: {upbit.iso8601(since)}")
                 else:
                     break
-                time.sleep(0.2) # Respect API rate limits
 
             if not all_ohlcv:
                 print(f"  - No data found for {ticker}.")
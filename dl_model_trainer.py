@@ -11,18 +11,12 @@ from sklearn.model_selection import train_test_split
 # from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
 from model_trainer import ModelTrainer  # For TARGET_COINS
 from data_pipeline import DataPipeline
+from constants import DL_TARGET_COINS
+from core.arrow_loader import open_mapped
 
 
 class DLModelTrainer:
-    TARGET_COINS = [
-        "BTC/KRW",
-        "ETH/KRW",
-        "XRP/KRW",
-        "SOL/KRW",
-        "DOGE/KRW",
-        "AVAX/KRW",
-        "LINK/KRW",
-    ]
+    TARGET_COINS = DL_TARGET_COINS
 
     def __init__(
         self,
@@ -56,13 +50,7 @@ class DLModelTrainer:
                 continue
 
             try:
-                df = pd.read_feather(filepath_feather)
-                df["timestamp"] = pd.to_datetime(df["timestamp"])
-                df.set_index("timestamp", inplace=True)
-                df = df[
-                    (df.index >= start_dt)
-                    & (df.index <= end_dt + timedelta(days=1, microseconds=-1))
-                ]
+                df = open_mapped(filepath_feather).frame(start_dt, end_dt + timedelta(days=1))
 
                 if not df.empty:
                     all_data[ticker] = df
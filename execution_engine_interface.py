@@ -1,5 +1,7 @@
+import asyncio
 from abc import ABC, abstractmethod
 from core.exchange import UpbitService
+from core.liquidation import FINAL_ORDER_STATUSES
 
 
 class ExecutionEngineInterface(ABC):
@@ -29,61 +31,125 @@ class UpbitExecutionEngine(ExecutionEngineInterface):
     Upbit API를 사용하는 구체적인 주문 실행 엔진 구현체입니다.
     """
 
-    def __init__(self, upbit_service: UpbitService, open_positions: dict):
+    def __init__(self, upbit_service: UpbitService, open_positions: dict, real_orders: bool = False):
         self.upbit_service = upbit_service
         self.open_positions = open_positions # Reference to the LiveTrader's open_positions
-        print("✅ Upbit 주문 실행 엔진 활성화.")
+        self.real_orders = real_orders # False면 주문을 내지 않고 현재가로 체결을 가정 (실계좌 잔고는 건드리지 않음)
+        self.price_snapshot = None # 사이클마다 LiveTrader가 공유하는 현재가 스냅샷 (PriceSnapshot)
+        self.stop_monitor = None # 설정되면 매수 체결 시 손절/트레일링 스탑을 등록하고 매도 시 해제 (StopMonitor)
+        self.state_store = None # 설정되면 체결/포지션/청산 손익을 저널에 기록 (StateStore)
+        print(f"✅ Upbit 주문 실행 엔진 활성화. ({'실주문' if real_orders else '시뮬레이션'})")
+
+    async def _reference_price(self, symbol: str):
+        price = self.price_snapshot.get(symbol) if self.price_snapshot else None # 사이클 스냅샷 우선 사용
+        if price is None:
+            price = await self.upbit_service.get_current_price(symbol) # 현재가로 가정
+        return price
+
+    @staticmethod
+    def _order_outcome(symbol: str, side: str, order) -> str:
+        """
+        UpbitService가 돌려준 실주문 결과를 'filled' | 'unconfirmed' | 'failed'로 분류합니다.
+        최종 상태까지 확인되지 않은 주문은 다시 제출하면 이중 주문이 될 수 있으므로 잔고 재조정에 맡깁니다.
+        """
+        if order is None:
+            return 'failed'
+        if order.get('status') not in FINAL_ORDER_STATUSES:
+            print(f"  - [WARN] {symbol} {side} 주문 {order.get('id')}의 체결을 확인하지 못했습니다. 잔고 재조정으로 확인합니다.")
+            return 'unconfirmed'
+        if not order.get('filled'):
+            print(f"  - [WARN] {symbol} {side} 주문 {order.get('id')}이 체결 없이 종료되었습니다 ({order.get('status')}).")
+            return 'failed'
+        return 'filled'
+
+    @staticmethod
+    def _fill_price(order: dict):
+        filled = order.get('filled') or 0.0
+        return order.get('average') or ((order.get('cost') or 0.0) / filled if filled else None)
 
     async def create_market_buy_order(self, symbol: str, amount_krw: float):
         print(f"  - [EXEC] 시장가 매수 주문 실행 -> {symbol} / {amount_krw:,.0f} KRW")
-        # 실제 주문 로직 (현재는 주석 처리)
-        # order = await self.upbit_service.create_market_buy_order(symbol, amount_krw)
-        # if order and order['status'] == 'closed':
-        #     filled_amount = order['filled']
-        #     price = order['average']
-        #     self.open_positions[symbol] = {'entry_price': price, 'quantity': filled_amount}
-        #     print(f"  - [EXEC] {symbol} 매수 완료. 진입 가격: {price}, 수량: {filled_amount}")
-        #     return order
-        
-        # 시뮬레이션용 반환
-        # 가상의 체결 가격과 수량 계산
-        simulated_price = await self.upbit_service.get_current_price(symbol) # 현재가로 가정
-        if simulated_price is None: simulated_price = 1.0 # Fallback
-        simulated_quantity = amount_krw / simulated_price
-
-        self.open_positions[symbol] = {'entry_price': simulated_price, 'quantity': simulated_quantity}
-        print(f"  - [EXEC] {symbol} 매수 시뮬레이션 완료. 진입 가격: {simulated_price}, 수량: {simulated_quantity}")
+        if self.real_orders:
+            # UpbitService가 fetch_order로 체결을 확인하고, 확인된 수량/금액만 BalanceBook에 반영함
+            order = await self.upbit_service.create_market_buy_order(symbol, amount_krw)
+            outcome = self._order_outcome(symbol, '매수', order)
+            if outcome == 'unconfirmed':
+                return {"status": "unconfirmed", "symbol": symbol, "order_id": order.get('id')}
+            if outcome == 'failed':
+                return None
+            price, quantity = self._fill_price(order), order['filled']
+        else:
+            price = await self._reference_price(symbol)
+            if price is None: price = 1.0 # Fallback
+            quantity = amount_krw / price
+
+        self.open_positions[symbol] = {'entry_price': price, 'quantity': quantity}
+        if self.stop_monitor is not None:
+            self.stop_monitor.watch(symbol, price, quantity)
+        if self.state_store is not None:
+            self.state_store.record_fill(symbol, 'buy', quantity, price)
+            self.state_store.save_position(symbol, self.open_positions[symbol])
+        print(f"  - [EXEC] {symbol} 매수 {'체결' if self.real_orders else '시뮬레이션'} 완료. 진입 가격: {price}, 수량: {quantity}")
         return {
             "status": "ok",
             "symbol": symbol,
             "amount": amount_krw,
-            "price": simulated_price,
-            "quantity": simulated_quantity
+            "price": price,
+            "quantity": quantity
         }
 
+    def _apply_sell(self, symbol: str, quantity: float, price):
+        """매도 체결을 포지션/손절 감시/저널에 반영합니다. 일부만 체결됐으면 남은 수량을 포지션으로 유지합니다."""
+        position = self.open_positions.get(symbol)
+        if position and quantity < position['quantity'] * (1 - 1e-9):
+            position['quantity'] -= quantity
+            if self.state_store is not None:
+                self.state_store.save_position(symbol, position)
+        else:
+            self.open_positions.pop(symbol, None)
+            if self.stop_monitor is not None:
+                self.stop_monitor.unwatch(symbol)
+            if self.state_store is not None:
+                self.state_store.close_position(symbol)
+        if self.state_store is not None:
+            pnl = (price - position['entry_price']) * quantity if position and price else None
+            self.state_store.record_fill(symbol, 'sell', quantity, price or 0.0,
+                                         regime=position.get('regime') if position else None, pnl=pnl)
+
     async def create_market_sell_order(self, symbol: str, quantity: float):
         print(f"  - [EXEC] 시장가 매도 주문 실행 -> {symbol} / {quantity}개")
-        # 실제 주문 로직 (현재는 주석 처리)
-        # order = await self.upbit_service.create_market_sell_order(symbol, quantity)
-        # if order and order['status'] == 'closed':
-        #     if symbol in self.open_positions: del self.open_positions[symbol]
-        #     print(f"  - [EXEC] {symbol} 매도 완료.")
-        #     return order
-
-        # 시뮬레이션용 반환
-        if symbol in self.open_positions: del self.open_positions[symbol]
-        print(f"  - [EXEC] {symbol} 매도 시뮬레이션 완료.")
+        if self.real_orders:
+            # UpbitService가 fetch_order로 체결을 확인하고, 확인된 수량/금액만 BalanceBook에 반영함
+            order = await self.upbit_service.create_market_sell_order(symbol, quantity)
+            outcome = self._order_outcome(symbol, '매도', order)
+            if outcome == 'unconfirmed':
+                return {"status": "unconfirmed", "symbol": symbol, "order_id": order.get('id')}
+            if outcome == 'failed':
+                return None
+            price, quantity = self._fill_price(order), order['filled']
+        else:
+            price = await self._reference_price(symbol)
+
+        self._apply_sell(symbol, quantity, price)
+        print(f"  - [EXEC] {symbol} 매도 {'체결' if self.real_orders else '시뮬레이션'} 완료.")
         return {
             "status": "ok",
             "symbol": symbol,
             "quantity": quantity,
+            "price": price,
         }
 
     async def liquidate_all_positions(self, holdings: dict):
         print("🚨 [EXEC] 모든 포지션 즉시 청산 실행!")
-        results = []
-        for symbol, quantity in holdings.items():
-            if quantity > 0:
-                result = await self.create_market_sell_order(symbol, quantity)
-                results.append(result)
-        return results
+        if self.real_orders:
+            # 병렬 제출 + 재시도 + 체결 확인 (core.liquidation.ParallelLiquidator, BalanceBook 반영 포함)
+            report = await self.upbit_service.liquidate_all_positions(holdings)
+            for leg in report["legs"]:
+                if leg["filled"] > 0:
+                    self._apply_sell(leg["symbol"], leg["filled"], leg["proceeds"] / leg["filled"])
+            return report
+
+        # 시뮬레이션: 모든 매도를 순차 await 대신 동시에 실행
+        return list(await asyncio.gather(*(
+            self.create_market_sell_order(symbol, quantity) for symbol, quantity in holdings.items() if quantity > 0
+        )))
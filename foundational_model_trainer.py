@@ -13,7 +13,6 @@ from constants import MODEL_SAVE_PATH, SCALPING_TARGET_COINS
 
 # --- Constants ---
 LOOKBACK_WINDOW = 50
-DATA_PATH = "cache/preprocessed_data.pkl"
 LOG_DIR = "foundational_rl_tensorboard_logs/"
 STATS_SAVE_PATH = "specialist_stats.json"
 
@@ -24,7 +23,8 @@ def train_foundational_agent(start_date: pd.Timestamp, end_date: pd.Timestamp, t
 
     print('데이터 로딩 및 전처리 시작...')
     preprocessor = DataPreprocessor()
-    all_data_dict = preprocessor.run_and_save_to_pickle(DATA_PATH)
+    preprocessor.materialize()  # 원본 캔들/특징 정의가 그대로면 계산하지 않음
+    all_data_dict = preprocessor.load_features(start_date, end_date)
 
     if not all_data_dict:
         print("오류: 전처리된 데이터가 없습니다. 훈련을 중단합니다.")
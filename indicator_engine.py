@@ -0,0 +1,379 @@
+import math
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+# precompute_all_indicators(pandas_ta 0.4.71b0)가 추가하는 열과 같은 이름, 같은 순서
+INDICATOR_COLUMNS = [
+    "EMA_20", "EMA_50", "RSI_14",
+    "MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9",
+    "BBL_20_2.0_2.0", "BBM_20_2.0_2.0", "BBU_20_2.0_2.0", "BBB_20_2.0_2.0", "BBP_20_2.0_2.0",
+    "ATRr_14",
+    "PPO_12_26_9", "PPOh_12_26_9", "PPOs_12_26_9",
+    "ADX_14", "ADXR_14_2", "DMP_14", "DMN_14",
+    "NATR_14", "SMA_50", "SMA_200",
+]
+OUTPUT_COLUMNS = OHLCV_COLUMNS + INDICATOR_COLUMNS
+
+_EPSILON = sys.float_info.epsilon
+_NAN = float("nan")
+
+
+def _div(a: float, b: float) -> float:
+    """pandas Series 나눗셈과 같은 결과(0으로 나누면 inf, 0/0은 NaN)를 내는 스칼라 나눗셈"""
+    if b == 0.0:
+        if a == 0.0 or a != a:
+            return _NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+def _non_zero(x: float) -> float:
+    """pandas_ta non_zero_range: 차이가 0이면 epsilon을 더함"""
+    return x + _EPSILON if x == 0.0 else x
+
+
+# --- Streaming primitives (상태 O(1), save/restore로 진행 중 캔들 미리보기 지원) ---
+
+class _EWM:
+    """pandas `ewm(alpha=..., adjust=False).mean()`(ignore_na=False)과 같은 재귀식입니다."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self.value = _NAN
+        self.old_wt = 1.0
+
+    def update(self, x: float) -> float:
+        is_obs = x == x
+        if self.value == self.value:
+            self.old_wt *= 1.0 - self.alpha
+            if is_obs:
+                if self.value != x:
+                    self.value = (self.old_wt * self.value + self.alpha * x) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif is_obs:
+            self.value = x
+        return self.value
+
+    def save(self):
+        return self.value, self.old_wt
+
+    def restore(self, state):
+        self.value, self.old_wt = state
+
+
+class _SeededEWM:
+    """
+    pandas_ta의 presma 방식 이동평균(EMA, ATR)입니다.
+    처음 length개 입력의 평균을 length번째 값으로 두고 이후는 _EWM 재귀식을 적용합니다.
+    skip_leading_nan이면 앞쪽 NaN 입력은 세지 않습니다(MACD 신호선처럼 첫 유효값부터 시작하는 경우).
+    """
+
+    def __init__(self, length: int, alpha: float, skip_leading_nan: bool = True):
+        self.length = length
+        self.skip_leading_nan = skip_leading_nan
+        self.ewm = _EWM(alpha)
+        self.reset()
+
+    def reset(self):
+        self.ewm.reset()
+        self.seen = 0
+        self.seed_sum = 0.0
+        self.seed_count = 0
+
+    def update(self, x: float) -> float:
+        if self.seen < self.length:
+            if x != x and self.skip_leading_nan and self.seen == 0:
+                return _NAN
+            self.seen += 1
+            if x == x:
+                self.seed_sum += x
+                self.seed_count += 1
+            if self.seen < self.length:
+                return _NAN
+            seed = self.seed_sum / self.seed_count if self.seed_count else _NAN
+            return self.ewm.update(seed)
+        return self.ewm.update(x)
+
+    def save(self):
+        return self.ewm.save(), self.seen, self.seed_sum, self.seed_count
+
+    def restore(self, state):
+        ewm_state, self.seen, self.seed_sum, self.seed_count = state
+        self.ewm.restore(ewm_state)
+
+
+class _RollingMoments:
+    """
+    고정 길이 창의 평균/표본분산을 창 크기와 무관하게 O(1)로 갱신합니다.
+    평균은 Kahan 보정 합, 분산은 pandas rolling.var와 같은 Welford 가감 방식입니다.
+    """
+
+    def __init__(self, length: int):
+        self.length = length
+        self.window = deque()
+        self.reset()
+
+    def reset(self):
+        self.window.clear()
+        self.total = 0.0
+        self.compensation = 0.0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self._evicted = None
+
+    def _add_sum(self, x: float):
+        y = x - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+
+    def update(self, x: float):
+        self._evicted = None
+        if len(self.window) == self.length:
+            old = self.window.popleft()
+            self._evicted = old
+            self._add_sum(-old)
+            nobs = len(self.window)
+            if nobs:
+                delta = old - self.mean
+                self.mean -= delta / nobs
+                self.ssqdm -= ((nobs + 1) * delta * delta) / nobs
+            else:
+                self.mean = self.ssqdm = 0.0
+        self.window.append(x)
+        self._add_sum(x)
+        nobs = len(self.window)
+        delta = x - self.mean
+        self.mean += delta / nobs
+        self.ssqdm += ((nobs - 1) * delta * delta) / nobs
+
+    @property
+    def full(self) -> bool:
+        return len(self.window) == self.length
+
+    def sma(self) -> float:
+        return self.total / self.length if self.full else _NAN
+
+    def var(self, ddof: int = 1) -> float:
+        if not self.full:
+            return _NAN
+        return max(self.ssqdm, 0.0) / (self.length - ddof)
+
+    def save(self):
+        return self.total, self.compensation, self.mean, self.ssqdm, self._evicted
+
+    def restore(self, state):
+        self.window.pop()
+        if self._evicted is not None:
+            self.window.appendleft(self._evicted)
+        self.total, self.compensation, self.mean, self.ssqdm, self._evicted = state
+
+
+class StreamingIndicatorEngine:
+    """
+    precompute_all_indicators와 같은 열을 새 캔들 하나당 O(1)로 계산하는 스트리밍 지표 엔진입니다.
+
+    - update(): 마감된 캔들 하나를 반영하고 지표 행을 반환합니다.
+    - preview(): 진행 중 캔들의 지표를 상태 변경 없이 계산합니다.
+    - sync(): OHLCVRingBuffer의 새 캔들만 따라잡습니다 (마지막 캔들은 진행 중으로 보고 미리보기만 함).
+    - batch(): DataFrame 전체를 같은 상태 기계로 계산합니다. 결과는 pandas_ta 출력과 같은 열/순서입니다.
+
+    엔진은 처음 본 캔들부터 지표를 이어서 계산하므로, 매번 최근 N개 창으로 다시 계산하는 방식보다
+    EMA 계열의 초기값 영향이 적습니다. 최근 history개 행은 frame()으로 DataFrame을 만들 때 사용합니다.
+    """
+
+    def __init__(self, history: int = 300):
+        self.history = deque(maxlen=history)
+        self.ema20 = _SeededEWM(20, 2 / 21)
+        self.ema50 = _SeededEWM(50, 2 / 51)
+        self.rsi_gain = _EWM(1 / 14)
+        self.rsi_loss = _EWM(1 / 14)
+        self.macd_fast = _SeededEWM(12, 2 / 13)
+        self.macd_slow = _SeededEWM(26, 2 / 27)
+        self.macd_signal = _SeededEWM(9, 2 / 10)
+        self.bb = _RollingMoments(20)
+        self.atr = _SeededEWM(14, 1 / 14, skip_leading_nan=False)
+        self.ppo_fast = _RollingMoments(12)
+        self.ppo_slow = _RollingMoments(26)
+        self.ppo_signal = _EWM(2 / 10)
+        self.adx_atr = _SeededEWM(14, 1 / 14, skip_leading_nan=False)
+        self.adx_pos = _EWM(1 / 14)
+        self.adx_neg = _EWM(1 / 14)
+        self.adx = _EWM(1 / 14)
+        self.sma50 = _RollingMoments(50)
+        self.sma200 = _RollingMoments(200)
+        self._primitives = [
+            self.ema20, self.ema50, self.rsi_gain, self.rsi_loss, self.macd_fast, self.macd_slow,
+            self.macd_signal, self.bb, self.atr, self.ppo_fast, self.ppo_slow, self.ppo_signal,
+            self.adx_atr, self.adx_pos, self.adx_neg, self.adx, self.sma50, self.sma200,
+        ]
+        self.reset()
+
+    def reset(self):
+        for primitive in self._primitives:
+            primitive.reset()
+        self.history.clear()
+        self.count = 0
+        self.prev = None  # 직전 마감 캔들의 (high, low, close)
+        self.adx_prev = deque([_NAN, _NAN], maxlen=2)  # ADXR용 직전 2개 ADX
+        self.last_timestamp = None
+        self.pending = None  # sync()가 남겨둔 진행 중 캔들 (timestamp, row)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _step(self, o: float, h: float, l: float, c: float, v: float) -> tuple:
+        if self.prev is None:
+            prev_high = prev_low = prev_close = _NAN
+        else:
+            prev_high, prev_low, prev_close = self.prev
+
+        ema20 = self.ema20.update(c)
+        ema50 = self.ema50.update(c)
+
+        diff = c - prev_close
+        rsi_gain = self.rsi_gain.update(diff if diff != diff or diff >= 0 else 0.0)
+        rsi_loss = self.rsi_loss.update(diff if diff != diff or diff <= 0 else 0.0)
+        rsi = _div(100 * rsi_gain, rsi_gain + abs(rsi_loss))
+
+        macd = self.macd_fast.update(c) - self.macd_slow.update(c)
+        macd_signal = self.macd_signal.update(macd)
+        macd_hist = macd - macd_signal
+
+        self.bb.update(c)
+        bb_mid = self.bb.sma()
+        bb_std = math.sqrt(self.bb.var()) if self.bb.full else _NAN
+        bb_lower = bb_mid - 2.0 * bb_std
+        bb_upper = bb_mid + 2.0 * bb_std
+        bb_range = _non_zero(bb_upper - bb_lower)
+        bb_width = _div(100 * bb_range, bb_mid)
+        bb_percent = _div(_non_zero(c - bb_lower), bb_range)
+
+        hl_range = _non_zero(h - l)
+        true_range = abs(hl_range) if prev_close != prev_close else max(abs(hl_range), abs(h - prev_close), abs(prev_close - l))
+        atr = self.atr.update(true_range)
+
+        self.ppo_fast.update(c)
+        self.ppo_slow.update(c)
+        ppo_slow = self.ppo_slow.sma()
+        ppo = _div(100 * (self.ppo_fast.sma() - ppo_slow), ppo_slow)
+        ppo_signal = self.ppo_signal.update(ppo)
+        ppo_hist = ppo - ppo_signal
+
+        # ADX: 첫 캔들의 true range는 NaN (pandas_ta prenan=True)
+        adx_atr = self.adx_atr.update(_NAN if prev_close != prev_close else true_range)
+        k = _div(100, adx_atr)
+        up = h - prev_high
+        dn = prev_low - l
+        pos = up * ((up > dn) and (up > 0)) if up == up and dn == dn else _NAN
+        neg = dn * ((dn > up) and (dn > 0)) if up == up and dn == dn else _NAN
+        pos = 0 if abs(pos) < _EPSILON else pos
+        neg = 0 if abs(neg) < _EPSILON else neg
+        dmp = k * self.adx_pos.update(pos)
+        dmn = k * self.adx_neg.update(neg)
+        dx = _div(100 * abs(dmp - dmn), dmp + dmn)
+        adx = self.adx.update(dx)
+        adxr = 0.5 * (adx + self.adx_prev[0])
+        self.adx_prev.append(adx)
+
+        natr = (atr / c) * 100
+
+        self.sma50.update(c)
+        self.sma200.update(c)
+
+        self.prev = (h, l, c)
+        return (
+            o, h, l, c, v,
+            ema20, ema50, rsi,
+            macd, macd_hist, macd_signal,
+            bb_lower, bb_mid, bb_upper, bb_width, bb_percent,
+            atr,
+            ppo, ppo_hist, ppo_signal,
+            adx, adxr, dmp, dmn,
+            natr, self.sma50.sma(), self.sma200.sma(),
+        )
+
+    def update(self, o: float, h: float, l: float, c: float, v: float, timestamp=None) -> tuple:
+        """마감된 캔들 하나를 반영하고 OUTPUT_COLUMNS 순서의 행을 반환합니다."""
+        row = self._step(float(o), float(h), float(l), float(c), float(v))
+        self.count += 1
+        self.last_timestamp = timestamp
+        self.history.append((timestamp, row))
+        return row
+
+    def preview(self, o: float, h: float, l: float, c: float, v: float) -> tuple:
+        """진행 중 캔들의 지표 행을 계산합니다. 엔진 상태는 바뀌지 않습니다."""
+        states = [primitive.save() for primitive in self._primitives]
+        prev, adx_prev = self.prev, tuple(self.adx_prev)
+        try:
+            return self._step(float(o), float(h), float(l), float(c), float(v))
+        finally:
+            for primitive, state in zip(self._primitives, states):
+                primitive.restore(state)
+            self.prev = prev
+            self.adx_prev.extend(adx_prev)
+
+    def sync(self, timestamps: np.ndarray, values: np.ndarray) -> int:
+        """
+        OHLCVRingBuffer.timestamps()/values() 뷰를 따라잡습니다.
+        마지막으로 반영한 캔들 이후의 마감 캔들만 update()하고, 마지막 캔들은 pending으로 남겨 미리보기합니다.
+        반영한 캔들이 버퍼에서 밀려났으면 버퍼 전체로 다시 계산합니다.
+
+        Returns:
+            int: 새로 반영한 마감 캔들 수.
+        """
+        n = len(timestamps)
+        if n == 0:
+            return 0
+        start = 0
+        if self.last_timestamp is not None:
+            idx = int(np.searchsorted(timestamps, self.last_timestamp, side="right"))
+            if idx > 0 and timestamps[idx - 1] == self.last_timestamp:
+                start = idx
+            else:
+                self.reset()
+        for i in range(start, n - 1):
+            self.update(*values[i], timestamp=int(timestamps[i]))
+        self.pending = (int(timestamps[-1]), values[-1].copy())
+        return max(n - 1 - start, 0)
+
+    def frame(self, tail: int | None = None) -> pd.DataFrame:
+        """최근 마감 캔들(+ sync로 남겨둔 진행 중 캔들)의 지표를 timestamp 인덱스 DataFrame으로 반환합니다."""
+        items = list(self.history)
+        if self.pending is not None:
+            timestamp, bar = self.pending
+            items.append((timestamp, self.preview(*bar)))
+        if tail is not None:
+            items = items[-tail:]
+        df = pd.DataFrame([row for _, row in items], columns=OUTPUT_COLUMNS)
+        df.index = pd.to_datetime([timestamp for timestamp, _ in items], unit="ms")
+        df.index.name = "timestamp"
+        return df
+
+    def batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        DataFrame 전체를 처음부터 계산합니다 (precompute_all_indicators와 같은 열).
+        계산이 끝난 뒤 엔진은 df의 마지막 캔들까지 반영된 상태이므로 이후 update()로 이어갈 수 있습니다.
+        캔들마다 파이썬 루프를 돌기 때문에 전체 재계산 자체는 pandas_ta보다 느립니다.
+        이어서 update()/sync()를 쓸 엔진을 준비할 때 사용하세요 (일회성 전체 계산은 precompute_all_indicators).
+        """
+        self.reset()
+        values = df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+        rows = [self.update(*bar) for bar in values]
+        result = df.copy()
+        indicators = pd.DataFrame(rows, columns=OUTPUT_COLUMNS, index=df.index)[INDICATOR_COLUMNS]
+        for column in INDICATOR_COLUMNS:
+            result[column] = indicators[column]
+        return result
+
+
+def compute_indicators_streaming(df: pd.DataFrame) -> pd.DataFrame:
+    """precompute_all_indicators의 스트리밍 엔진 버전입니다. pandas_ta 없이 같은 열을 반환합니다."""
+    return StreamingIndicatorEngine(history=1).batch(df)
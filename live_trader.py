@@ -1,25 +1,27 @@
-import sys, os, asyncio, pandas as pd, numpy as np, traceback, json
-from dotenv import load_dotenv
-from stable_baselines3 import PPO
-from gymnasium.wrappers import FlattenObservation
+import sys, os, asyncio, time, pandas as pd, numpy as np, traceback, json
 
 STOP_LOSS_PCT = 0.05 # 5% 손절매 비율
-
-print("DEBUG: live_trader.py started") # Added for debugging
-
-# --- Load .env file ---
-load_dotenv()
+TRAILING_STOP_PCT = None # 고점 대비 트레일링 스탑 비율 (None이면 사용 안 함)
+MAX_CONCURRENT_REQUESTS = 10 # 동시 시세 요청 상한 (Upbit 시세 조회 API: 초당 10회)
 
 # --- Core Module Imports ---
 try:
     from universe_manager import get_top_10_coins
-    from constants import MODEL_SAVE_PATH, LOOKBACK_WINDOW
-    from trading_env_simple import SimpleTradingEnv
-    from sentiment_analyzer import SentimentAnalyzer
+    from constants import MODEL_SAVE_PATH, LOOKBACK_WINDOW, UNIVERSE_CACHE_PATH
+    from core.clock import SYSTEM_CLOCK
     from core.exchange import UpbitService
-    from market_regime_detector import precompute_all_indicators, get_market_regime, get_market_regime_dataframe
+    from core.market_context import MarketContextProvider
+    from indicator_engine import StreamingIndicatorEngine
+    from core.policy_inference import BatchedPolicyInference
+    from core.numpy_policy import load_policy, npz_matches
     from risk_control_tower import RiskControlTower
     from execution_engine_interface import UpbitExecutionEngine
+    from paper_execution_engine import PaperExecutionEngine
+    from core.startup_profile import mark_startup
+    from core.equity_tracker import StreamingEquityTracker, EQUITY_HISTORY_PATH
+    from core.stop_monitor import StopMonitor
+    from core.latency_metrics import LatencyMetrics, METRICS_PROM_PATH
+    from core.state_store import StateStore, state_db_path
 except ImportError as e:
     print(f'[FATAL] Failed to import core modules: {e}')
     print(traceback.format_exc())
@@ -27,38 +29,88 @@ except ImportError as e:
 
 # --- 1. Load API Keys ---
 class LiveTrader:
-    def __init__(self, capital: float):
-        # --- 1. Load API Keys ---
-        if len(sys.argv) == 3:
-            access_key = sys.argv[1]
-            secret_key = sys.argv[2]
-            print(f'[INFO] API Keys loaded from command-line arguments.')
-        elif os.environ.get('UPBIT_ACCESS_KEY') and os.environ.get('UPBIT_SECRET_KEY'):
-            access_key = os.environ.get('UPBIT_ACCESS_KEY')
-            secret_key = os.environ.get('UPBIT_SECRET_KEY')
-            print(f'[INFO] API Keys loaded from environment variables.')
-        else:
-            print('[FATAL] API Keys were not provided either as command-line arguments or as environment variables.')
-            print('Usage: python live_trader.py <ACCESS_KEY> <SECRET_KEY>')
-            sys.exit(1)
-        print(f'[INFO] API Keys loaded successfully. Access Key starts with: {access_key[:4]}...')
+    def __init__(self, capital: float, upbit_service=None, state_store=None, clock=None,
+                 universe_cache_path: str | None = UNIVERSE_CACHE_PATH):
+        """
+        Args:
+            capital (float): 운용 자본 (KRW).
+            upbit_service (UpbitService | None): 미리 만든 거래소 서비스 (예: 녹화 세션 재생용 ReplayUpbitService).
+                없으면 API 키로 UpbitService를 만듭니다.
+            state_store (StateStore | None): 포지션/체결/순자산/성과 저장소. 없으면 실행 모드별 SQLite 파일을 엽니다.
+            clock: 사이클 대기, 순자산 기록 시각, 캐시 TTL에 쓰는 core.clock 인터페이스 (재생 시 가속 시계).
+                없으면 upbit_service의 시계를 사용합니다.
+            universe_cache_path (str | None): 마지막 유니버스 저장 경로. None이면 디스크에 읽고 쓰지 않습니다.
+        """
+        if upbit_service is None:
+            # --- 1. Load API Keys ---
+            if len(sys.argv) == 3:
+                access_key = sys.argv[1]
+                secret_key = sys.argv[2]
+                print(f'[INFO] API Keys loaded from command-line arguments.')
+            elif os.environ.get('UPBIT_ACCESS_KEY') and os.environ.get('UPBIT_SECRET_KEY'):
+                access_key = os.environ.get('UPBIT_ACCESS_KEY')
+                secret_key = os.environ.get('UPBIT_SECRET_KEY')
+                print(f'[INFO] API Keys loaded from environment variables.')
+            else:
+                print('[FATAL] API Keys were not provided either as command-line arguments or as environment variables.')
+                print('Usage: python live_trader.py <ACCESS_KEY> <SECRET_KEY>')
+                sys.exit(1)
+            print(f'[INFO] API Keys loaded successfully. Access Key starts with: {access_key[:4]}...')
+            upbit_service = UpbitService(access_key, secret_key, clock=clock)
+            if os.environ.get('UPBIT_RECORD_PATH'): # 세션 재생용 거래소 응답 녹화
+                from core.session_recorder import SessionRecorder
+                upbit_service.recorder = SessionRecorder(os.environ['UPBIT_RECORD_PATH'], clock=upbit_service.clock)
 
         self.initial_capital = capital
+        self.clock = clock or getattr(upbit_service, 'clock', SYSTEM_CLOCK)
+        self.universe_cache_path = universe_cache_path
+        self.universe_ranking = {'timestamp': 0.0, 'ranking': []} # 이 트레이더의 유니버스 랭킹 메모리 캐시 (TTL은 self.clock 기준)
         self.agents = {}
-        self.upbit_service = UpbitService(access_key, secret_key)
+        self.policy_inference = BatchedPolicyInference(self.agents) # 전문가별 배치 추론 (self.agents를 공유)
+        self.upbit_service = upbit_service
         self.risk_control_tower = RiskControlTower(mdd_threshold=-0.15)
-        self.portfolio_history = pd.Series(dtype=float)
+        self.portfolio_history = StreamingEquityTracker(chunk_size=36, history_path=EQUITY_HISTORY_PATH) # 낙폭 O(1) 갱신, 기록은 고정 크기 링 버퍼 + 디스크
         self.sentiment_analyzer = None
+        self.sentiment_service = None # 유니버스 일괄 평가 + TTL 캐시 감성 서비스 (이벤트 루프 밖에서 호출)
         self.open_positions = {}
-        self.execution_engine = UpbitExecutionEngine(self.upbit_service, self.open_positions)
+        self.specialist_stats = {}
+        self.request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.execution_mode = os.environ.get('EXECUTION_MODE', 'live').lower() # 'paper'면 호가 기반 모의 체결
+        if self.execution_mode == 'paper':
+            self.execution_engine = PaperExecutionEngine(capital, upbit_service=self.upbit_service, open_positions=self.open_positions,
+                                                         clock=self.clock.time)
+            self.balance_source = self.execution_engine # 모의 계좌 원장의 잔고 사용
+        else:
+            self.execution_engine = UpbitExecutionEngine(self.upbit_service, self.open_positions,
+                                                          real_orders=os.environ.get('UPBIT_REAL_ORDERS', 'false').lower() == 'true')
+            self.balance_source = self.upbit_service
+        # 10분 사이클과 별도로 시세마다 손절/트레일링 스탑을 확인 (WebSocket 리스너 + 0.5초 일괄 폴링)
+        self.stop_monitor = StopMonitor(self.execution_engine, self.upbit_service, STOP_LOSS_PCT, TRAILING_STOP_PCT, clock=self.clock)
+        self.execution_engine.stop_monitor = self.stop_monitor
+        # 재시작 후 거래소 조회 없이 포지션/성과/낙폭을 복구하기 위한 SQLite WAL 저널 (쓰기는 별도 스레드에서 일괄 커밋)
+        self.state_store = state_store or StateStore(os.environ.get('STATE_DB_PATH') or state_db_path(self.execution_mode))
+        self.execution_engine.state_store = self.state_store
+        self.price_snapshot = None # 이번 사이클에서 공유하는 현재가 스냅샷
+        self.context_provider = MarketContextProvider(self.upbit_service, clock=self.clock)
+        self.cycle_id = 0
+        self.indicator_engines = {} # 심볼별 스트리밍 지표 엔진 (새 캔들만 O(1)로 반영)
+        self.use_market_feed = os.environ.get('UPBIT_USE_WEBSOCKET', 'false').lower() == 'true' # 실시간 WebSocket 시세 사용 여부
+        self.latency = LatencyMetrics() # 사이클 단계별 지연 히스토그램 (p50/p95/p99)
+        self.metrics_port = int(os.environ.get('METRICS_PORT') or 0) # 0이면 JSON/Prometheus 엔드포인트 사용 안 함
 
     async def initialize(self):
         print('🚀 AI 퀀트 펀드 시스템 초기화를 시작합니다...')
         await self.upbit_service.connect()
+        self.upbit_service.balance_book.start_reconciler()
         self._load_agents()
         self._init_analyzer()
+        self._restore_state()
         initial_net_worth = await self.get_total_balance()
-        self.portfolio_history[pd.Timestamp.now()] = initial_net_worth
+        self._record_equity(initial_net_worth)
+        self.stop_monitor.sync(self.open_positions)
+        self.stop_monitor.start()
+        if self.metrics_port:
+            await self.latency.start_server(port=self.metrics_port)
         print('✅ 시스템 초기화 완료.')
 
     def _load_agents(self):
@@ -72,19 +124,55 @@ class LiveTrader:
                 print('Docker 빌드 과정(build-time training)이 실패했거나 모델이 훈련되지 않았습니다.')
                 raise Exception(f'{regime} Model file not found: {model_path}')
             
-            print(f'  - [{regime}] {model_path} 로드 시도...')
-            self.agents[regime] = PPO.load(model_path)
+            # 이 zip에서 내보낸 .npz가 있으면 torch 없이 numpy 런타임으로, 없으면 stable_baselines3로 로드
+            runtime = 'numpy' if npz_matches(model_path) else 'stable_baselines3'
+            print(f'  - [{regime}] {model_path} 로드 시도... ({runtime})')
+            self.agents[regime] = load_policy(model_path)
         print(f'  - 모든 전문가 AI 모델({regimes})을 성공적으로 로드했습니다.')
 
 
     def _init_analyzer(self):
         print('\n- Gemini 정보 분석가를 준비합니다...')
         try:
+            from sentiment_analyzer import SentimentAnalyzer, AsyncSentimentService # google.generativeai는 필요할 때만 로드
             self.sentiment_analyzer = SentimentAnalyzer()
+            self.sentiment_service = AsyncSentimentService(self.sentiment_analyzer)
             print('  - 정보 분석가 준비 완료.')
         except Exception as e:
             print(f'  - 경고: {e} (Gemini API 키가 없거나 SentimentAnalyzer 모듈 오류.)')
 
+    def _restore_state(self):
+        """저장소에서 포지션, 전문가 성과, 순자산 기록(낙폭 상태)을 복구합니다. 거래소 호출 없음."""
+        state = self.state_store.load()
+        self.open_positions.update(state['positions']) # 실행 엔진과 공유하는 같은 dict를 채움
+        if not state['stats']:
+            self.state_store.seed_stats(self._load_specialist_stats()) # 첫 실행: 백테스트 성과 파일로 시작
+        self.specialist_stats = self.state_store.stats # 청산 손익이 증분 반영되는 공유 상태
+        if state['equity'] or state['tracker']:
+            self.portfolio_history.restore(state['equity'], **(state['tracker'] or {})) # 고점/MDD는 정리된 기록 밖의 값까지 유지
+        if isinstance(self.execution_engine, PaperExecutionEngine) and (state['snapshot'] or state['fills']):
+            snapshot = state['snapshot'] # 최신 스냅샷 + 그 이후 체결만 재생
+            self.execution_engine.restore(snapshot, self.state_store.fills(after_id=snapshot['fill_id'] if snapshot else 0))
+        if state['positions']:
+            print(f"  - 복구된 포지션: {', '.join(state['positions'])}")
+
+    def _record_equity(self, net_worth: float):
+        timestamp = self.clock.time()
+        self.portfolio_history.update(net_worth, timestamp)
+        tracker = self.portfolio_history
+        self.state_store.record_equity(net_worth, timestamp, tracker.peak, tracker.max_drawdown)
+
+    def _snapshot_state(self):
+        """
+        사이클마다 모의 원장의 현금/보유 스냅샷을 남깁니다. 저장소가 같은 트랜잭션에서 직전 스냅샷에 반영된 체결과
+        오래된 순자산 기록을 정리하므로, 재시작 복원은 전체 체결이 아니라 스냅샷 이후 체결만 재생합니다.
+        """
+        if isinstance(self.execution_engine, PaperExecutionEngine):
+            cash, holdings = self.execution_engine.ledger.snapshot()
+            self.state_store.record_snapshot(cash, holdings, self.clock.time())
+        else:
+            self.state_store.prune()
+
     def _load_specialist_stats(self):
         stats_file = 'specialist_stats.json'
         print(f'\n- 과거 전문가 AI 성과({stats_file})를 로드합니다...')
@@ -104,142 +192,277 @@ class LiveTrader:
             print('  - 기본 성과 데이터 파일 생성 완료.')
             return stats
 
-    async def get_total_balance(self) -> float:
-        krw_balance = await self.upbit_service.get_balance('KRW') or 0
+    async def refresh_price_snapshot(self, symbols) -> None:
+        """보유/포지션 마켓의 현재가를 한 번에 조회하여 이번 사이클의 공유 스냅샷으로 설정합니다."""
+        self.price_snapshot = await self.upbit_service.get_current_prices(symbols)
+        self.execution_engine.price_snapshot = self.price_snapshot
+
+    async def get_total_balance(self, extra_symbols=()) -> float:
+        """
+        KRW와 보유 코인 평가액의 합을 반환합니다.
+        extra_symbols(예: 이번 사이클 유니버스)도 같은 일괄 요청에 포함해 공유 스냅샷에 담습니다.
+        """
+        krw_balance = await self.balance_source.get_balance('KRW') or 0
         total_asset_value = krw_balance
-        all_balances = await self.upbit_service.get_all_balances()
+        all_balances = await self.balance_source.get_all_balances()
         if not all_balances:
+            await self.refresh_price_snapshot(list(self.open_positions) + list(extra_symbols))
             return krw_balance
 
-        for ticker, balance_info in all_balances.items():
-            if ticker == 'KRW': # Skip KRW as it's the base currency
-                continue
-            if balance_info['balance'] > 0:
-                market_ticker = f'{ticker}/KRW' # Changed to BASE/QUOTE format
-                current_price = await self.upbit_service.get_current_price(market_ticker)
-                if current_price:
-                    total_asset_value += balance_info['balance'] * current_price
+        held_amounts = {
+            f'{ticker}/KRW': balance_info['balance'] # Changed to BASE/QUOTE format
+            for ticker, balance_info in all_balances.items()
+            if ticker != 'KRW' and balance_info['balance'] > 0 # Skip KRW as it's the base currency
+        }
+        # 보유 코인과 오픈 포지션의 현재가를 단 한 번의 요청으로 조회
+        await self.refresh_price_snapshot(list(held_amounts) + list(self.open_positions) + list(extra_symbols))
+        if self.price_snapshot is None:
+            print('  - [WARN] 현재가 스냅샷을 가져오지 못해 코인 평가액을 제외합니다.')
+            return krw_balance
+
+        for market_ticker, amount in held_amounts.items():
+            current_price = self.price_snapshot.get(market_ticker)
+            if current_price:
+                total_asset_value += amount * current_price
         return total_asset_value
 
+    async def _run_decision_cycle(self, market_context):
+        """
+        유니버스의 각 심볼 관측을 동시에 준비하고, 같은 전문가가 담당하는 관측을 한 배치로 묶어 한 번에 예측한 뒤,
+        매매 결정은 하나의 실행 큐를 통해 순서대로 집행합니다.
+        분석 단계의 거래소 요청은 request_semaphore로 시세 API 한도 안에 묶이며,
+        주문/잔고 조회는 실행 워커 한 곳에서만 일어나므로 현금 계산이 서로 엇갈리지 않습니다.
+        """
+        universe = market_context.universe
+        execution_queue = asyncio.Queue()
+        worker = asyncio.create_task(self._execution_worker(execution_queue))
+
+        # 3a/3b. 심볼별 관측 준비 (동시 실행)
+        with self.latency.span('prepare'):
+            results = await asyncio.gather(
+                *(self._prepare_observation(symbol, market_context) for symbol in universe), return_exceptions=True
+            )
+        requests = {}
+        for symbol, result in zip(universe, results):
+            if isinstance(result, Exception):
+                print(f'[ERROR] [{symbol}] 분석 중 오류: {result}')
+            elif result is not None:
+                requests[symbol] = result
+
+        # 3b. 전문가별 배치 추론 (전문가 하나당 forward 한 번)
+        try:
+            with self.latency.span('inference'):
+                actions = self.policy_inference.predict(requests)
+        except Exception as e:
+            print(f'[ERROR] 배치 추론 중 오류: {e}')
+            actions = {}
+
+        # 3c. 감성 분석: 매매 신호가 있으면 유니버스 전체를 한 번의 요청으로 평가 (시간 버킷 동안 캐시)
+        sentiment_scores = {}
+        if self.sentiment_service and any(action != 0 for action in actions.values()):
+            with self.latency.span('sentiment'):
+                sentiment_scores = await self.sentiment_service.get_sentiment_scores(universe)
+
+        for symbol, action in actions.items():
+            decision = self._build_decision(symbol, action, market_context, sentiment_scores.get(symbol))
+            if decision is not None:
+                await execution_queue.put(decision)
+
+        await execution_queue.put(None) # 워커 종료 신호
+        await worker
+
+    async def _fetch_ohlcv_buffer(self, symbol, timeframe='1h', limit=300):
+        with self.latency.span('data_fetch'): # 세마포어 대기 포함
+            async with self.request_semaphore:
+                return await self.upbit_service.get_ohlcv_buffer(symbol, timeframe, limit)
+
+    def _compute_indicators(self, symbol, buffer) -> pd.DataFrame:
+        """심볼의 스트리밍 지표 엔진을 캔들 버퍼에 맞춰 갱신하고, 관측에 필요한 최근 구간만 DataFrame으로 반환합니다."""
+        engine = self.indicator_engines.get(symbol)
+        if engine is None:
+            engine = self.indicator_engines[symbol] = StreamingIndicatorEngine(history=LOOKBACK_WINDOW)
+        with self.latency.span('indicators'):
+            engine.sync(buffer.timestamps(), buffer.values())
+            return engine.frame(tail=LOOKBACK_WINDOW)
+
+    async def _prepare_observation(self, symbol, market_context):
+        """한 심볼의 전문가를 정하고 지표를 계산해 (시장 체제, 관측) 쌍을 반환합니다. 예측할 수 없으면 None."""
+        print(f'\n{pd.Timestamp.now()}: [{symbol}] 분석 시작...')
+
+        # 3a. 전문가 AI 선택 (시장 체제는 사이클 공유 컨텍스트에서 읽음)
+        current_regime = market_context.current_regime
+
+        if not self.agents.get(current_regime):
+            print(f'경고: [{symbol}]을(를) 담당할 AI 에이전트가 없습니다. (Sideways 모델로 대체)')
+            if not self.agents.get('Sideways'):
+               print(f'[ERROR] 대체 모델도 없습니다. [{symbol}] 건너뛰기.')
+               return None
+
+        print(f'  - [{symbol}] 시장 진단: {current_regime}, 담당 전문가: [{current_regime}] Agent')
+
+        # 3b. 데이터 준비
+        buffer = await self._fetch_ohlcv_buffer(symbol, '1h', 300) # symbol is already in BASE/QUOTE format from universe_manager
+        if buffer is None or len(buffer) == 0: return None
+
+        if len(buffer) < 50:
+            print(f'  - [{symbol}] 관측 데이터 부족')
+            return None
+
+        obs_df = self._compute_indicators(symbol, buffer)
+        return current_regime, obs_df.to_numpy(dtype=np.float32)
+
+    def _build_decision(self, symbol, action, market_context, sentiment_score=None):
+        """배치 추론 결과와 감성 점수로 매매 결정을 만듭니다. Hold면 None."""
+        current_regime = market_context.current_regime
+        confidence = 1.0
+
+        action_map = {0: 'Hold', 1: 'Buy', 2: 'Sell'}
+        predicted_action = action_map.get(int(action), 'Hold')
+        print(f'  - [{symbol}] AI 예측: {predicted_action} (확신도: {confidence:.2%})')
+        if predicted_action == 'Hold':
+            return None
+
+        if sentiment_score is None:
+            sentiment_score = 0.5 # 기본값
+
+        return {
+            'symbol': symbol,
+            'action': predicted_action,
+            'regime': current_regime,
+            'confidence': confidence,
+            'sentiment_score': sentiment_score,
+            'decided_at': time.perf_counter(), # 결정→체결 지연 측정용
+        }
+
+    async def _execution_worker(self, execution_queue: asyncio.Queue):
+        """실행 큐에서 결정을 하나씩 꺼내 순차적으로 주문합니다. None을 받으면 종료합니다."""
+        while True:
+            decision = await execution_queue.get()
+            if decision is None:
+                break
+            try:
+                await self._execute_decision(decision)
+            except Exception:
+                print(f"[ERROR] [{decision['symbol']}] 주문 실행 중 오류:")
+                print(traceback.format_exc())
+
+    async def _execute_decision(self, decision: dict):
+        symbol = decision['symbol']
+        predicted_action = decision['action']
+        current_regime = decision['regime']
+        confidence = decision['confidence']
+        sentiment_score = decision['sentiment_score']
+        if isinstance(self.execution_engine, PaperExecutionEngine):
+            self.execution_engine.pending_decided_at = decision.get('decided_at')
+
+        # 3d. 위험 관리 위원회(RCT)에 최종 결정 요청
+        if predicted_action == 'Buy':
+            with self.latency.span('sizing'):
+                stats = self.specialist_stats[current_regime]
+                win_rate = stats['wins'] / stats['trades'] if stats['trades'] > 10 else 0.5
+                avg_profit = stats['total_profit'] / stats['wins'] if stats['wins'] > 0 else 1
+                avg_loss = abs(stats['total_loss'] / stats['losses']) if stats['losses'] > 0 else 1
+
+                investment_fraction = self.risk_control_tower.get_position_size_pct(
+                    win_rate, avg_profit / avg_loss if avg_loss > 0 else 1.0
+                )
+
+                # Apply confidence and sentiment
+                investment_fraction *= confidence * ((1 + sentiment_score) / 2)
+
+            if investment_fraction > 0:
+                cash_balance = await self.balance_source.get_balance('KRW') or 0
+                buy_amount_krw = cash_balance * investment_fraction
+                if buy_amount_krw > 5000:
+                    with self.latency.span('execution'):
+                        order = await self.execution_engine.create_market_buy_order(symbol, buy_amount_krw) # symbol is already in BASE/QUOTE format
+                    position = self.open_positions.get(symbol)
+                    if order and position is not None and not position.get('regime'):
+                        position['regime'] = current_regime # 청산 손익을 이 전문가의 성과로 기록
+                        self.state_store.save_position(symbol, position)
+                else:
+                    print(f'  - [EXEC] [{symbol}] 주문 금액이 최소 기준(5,000 KRW) 미만입니다.')
+
+        elif predicted_action == 'Sell':
+            coin_ticker = symbol.split('/')[0] # BTC/KRW -> BTC
+            coin_balance = await self.balance_source.get_balance(coin_ticker)
+            if coin_balance and coin_balance > 0:
+                with self.latency.span('execution'):
+                    await self.execution_engine.create_market_sell_order(symbol, coin_balance) # symbol is already in BASE/QUOTE format
+            else:
+                print(f'  - [EXEC] 매도할 {coin_ticker} 코인이 없습니다.')
+
     async def run(self):
         print('\n-- 🚀 AI 퀀트 펀드 실시간 운영 시작 --')
         while True:
             try:
-                # 1. 포트폴리오 상태 업데이트 및 서킷 브레이커
-                net_worth = await self.get_total_balance()
-                self.portfolio_history[pd.Timestamp.now()] = net_worth
+                self.cycle_id += 1
+                cycle_started = time.perf_counter()
+
+                # 1. 거래 유니버스 결정 (TTL 캐시되어 대부분의 사이클에서 요청 없음)
+                universe = await get_top_10_coins(self.upbit_service, cache_path=self.universe_cache_path,
+                                                  ranking_cache=self.universe_ranking, clock=self.clock)
+                if self.use_market_feed:
+                    feed = await self.upbit_service.start_market_feed(list(universe) + list(self.open_positions))
+                    feed.add_price_listener(self.stop_monitor.on_price)
+
+                # 2. 포트폴리오 상태 업데이트 및 서킷 브레이커 (보유/포지션/유니버스 현재가를 한 번에 조회)
+                with self.latency.span('portfolio'):
+                    net_worth = await self.get_total_balance(extra_symbols=universe)
+                self._record_equity(net_worth)
+                self._snapshot_state()
                 if self.risk_control_tower.check_mdd_circuit_breaker(self.portfolio_history):
-                    all_balances = await self.upbit_service.get_all_balances()
+                    all_balances = await self.balance_source.get_all_balances()
                     holdings_to_liquidate = {f'{ticker}/KRW': info['balance'] for ticker, info in all_balances.items() if info['balance'] > 0 and ticker != 'KRW'}
                     await self.execution_engine.liquidate_all_positions(holdings_to_liquidate)
+                    self.portfolio_history.flush()
                     print('🚨 모든 거래가 중단되었습니다. 시스템을 종료합니다.')
                     break
 
-                # --- Stop-Loss Check ---
-                for symbol, position_info in list(self.open_positions.items()): # Iterate over a copy
-                    current_price = await self.upbit_service.get_current_price(symbol)
-                    if current_price is None:
-                        print(f"  - [STOP-LOSS] {symbol} 현재 가격을 가져올 수 없습니다. 손절매 확인 건너뜀.")
-                        continue
-
-                    if self.risk_control_tower.check_stop_loss(current_price, position_info['entry_price'], STOP_LOSS_PCT):
-                        print(f"  - [STOP-LOSS] {symbol} 손절매 발동! {position_info['quantity']}개 매도.")
-                        await self.execution_engine.create_market_sell_order(symbol, position_info['quantity'])
+                # --- Stop-Loss Check: 상시 감시는 StopMonitor가 담당하고, 사이클 스냅샷으로 한 번 더 확인 ---
+                self.stop_monitor.sync(self.open_positions)
+                self.stop_monitor.on_prices(self.price_snapshot)
                 # --- End Stop-Loss Check ---
 
-                # 2. 거래 유니버스 결정
-                universe = await get_top_10_coins(self.upbit_service)
-                
-                # 3. 각 자산에 대한 거래 결정
-                for symbol in universe:
-                    print(f'\n{pd.Timestamp.now()}: [{symbol}] 분석 시작...')
-                    
-                    # 3a. 시장 분석 및 전문가 AI 선택
-                    btc_df = await self.upbit_service.get_ohlcv('BTC/KRW', '1h', 300) # Changed to BTC/KRW
-                    if btc_df is None: continue
-                    
-                    # Standardized regime detection
-                    btc_df_with_regime = get_market_regime_dataframe(btc_df)
-                    if btc_df_with_regime.empty:
-                        print('  - 시장 진단 데이터 부족')
-                        continue
-                    current_regime = btc_df_with_regime['market_regime'].iloc[-1]
-                    
-                    agent_to_use = self.agents.get(current_regime)
-                    if not agent_to_use:
-                        print(f'경고: [{symbol}]을(를) 담당할 AI 에이전트가 없습니다. (Sideways 모델로 대체)')
-                        agent_to_use = self.agents.get('Sideways') # Fallback
-                        if not agent_to_use:
-                           print(f'[ERROR] 대체 모델도 없습니다. 사이클 건너뛰기.')
-                           continue
-                           
-                    print(f'  - 시장 진단: {current_regime}, 담당 전문가: [{current_regime}] Agent')
-
-                    # 3b. 데이터 준비 및 AI 예측
-                    target_df = await self.upbit_service.get_ohlcv(symbol, '1h', 300) # symbol is already in BASE/QUOTE format from universe_manager
-                    if target_df is None: continue
-                    
-                    processed_df = precompute_all_indicators(target_df)
-                    if len(processed_df) < 50:
-                        print('  - 관측 데이터 부족')
-                        continue
-
-                    obs_df = processed_df.tail(LOOKBACK_WINDOW)
-                    obs = obs_df.to_numpy(dtype=np.float32)
-                    action_tensor, _ = agent_to_use.predict(obs, deterministic=True)
-                    confidence = 1.0
-                    
-                    action_map = {0: 'Hold', 1: 'Buy', 2: 'Sell'}
-                    predicted_action = action_map.get(int(action_tensor), 'Hold')
-                    print(f'  - AI 예측: {predicted_action} (확신도: {confidence:.2%})')
-
-                    # 3c. 감성 분석
-                    sentiment_score = 0.5 # 기본값
-                    if self.sentiment_analyzer:
-                        sentiment_score, _ = self.sentiment_analyzer.get_sentiment_score(symbol)
-                    
-                    # 3d. 위험 관리 위원회(RCT)에 최종 결정 요청
-                    if predicted_action == 'Buy':
-                        stats = self.specialist_stats[current_regime]
-                        win_rate = stats['wins'] / stats['trades'] if stats['trades'] > 10 else 0.5
-                        avg_profit = stats['total_profit'] / stats['wins'] if stats['wins'] > 0 else 1
-                        avg_loss = abs(stats['total_loss'] / stats['losses']) if stats['losses'] > 0 else 1
-                        
-                        investment_fraction = self.risk_control_tower.get_position_size_pct(
-                            win_rate, avg_profit / avg_loss if avg_loss > 0 else 1.0
-                        )
-                        
-                        # Apply confidence and sentiment
-                        investment_fraction *= confidence * ((1 + sentiment_score) / 2)
-                        
-                        if investment_fraction > 0:
-                            cash_balance = await self.upbit_service.get_balance('KRW') or 0
-                            buy_amount_krw = cash_balance * investment_fraction
-                            if buy_amount_krw > 5000:
-                                await self.execution_engine.create_market_buy_order(symbol, buy_amount_krw) # symbol is already in BASE/QUOTE format
-                            else:
-                                print('  - [EXEC] 주문 금액이 최소 기준(5,000 KRW) 미만입니다.')
-
-                    elif predicted_action == 'Sell':
-                        coin_ticker = symbol.split('/')[0] # BTC/KRW -> BTC
-                        coin_balance = await self.upbit_service.get_balance(coin_ticker)
-                        if coin_balance and coin_balance > 0:
-                            await self.execution_engine.create_market_sell_order(symbol, coin_balance) # symbol is already in BASE/QUOTE format
-                        else:
-                            print(f'  - [EXEC] 매도할 {coin_ticker} 코인이 없습니다.')
-                
+                # 사이클 공유 시장 정보 (BTC 1h, 시장 체제, 유니버스, 현재가 스냅샷) - 사이클당 1회 생성
+                with self.latency.span('regime'):
+                    market_context = await self.context_provider.get(self.cycle_id, universe, self.price_snapshot)
+                if market_context is None:
+                    print('  - 시장 진단 데이터 부족. 이번 사이클의 거래 결정을 건너뜁니다.')
+                    await self.clock.sleep(600)
+                    continue
+
+                # 3. 각 자산에 대한 거래 결정 (분석은 병렬, 주문은 단일 실행 큐에서 순차 처리)
+                await self._run_decision_cycle(market_context)
+                self.latency.observe('cycle', time.perf_counter() - cycle_started)
+                self.latency.report()
+                self.latency.write_prometheus(METRICS_PROM_PATH)
+                if isinstance(self.execution_engine, PaperExecutionEngine) and self.execution_engine.decision_latencies:
+                    print(f'  - [PAPER] 결정→체결 지연: {self.execution_engine.latency_summary()}')
+                mark_startup('첫 거래 결정 사이클 완료', report=True)
+
                 print('\n--- 10분 후 다음 유니버스 사이클 시작 ---')
-                await asyncio.sleep(600)
+                await self.clock.sleep(600)
 
             except Exception as e:
                 print('[FATAL] 거래 루프 중 치명적 오류 발생:')
                 print(traceback.format_exc())
-                await asyncio.sleep(60)
+                await self.clock.sleep(60)
 
 async def main_live():
+    from dotenv import load_dotenv
+    load_dotenv()
     trader = LiveTrader(capital=1000000)
-    await trader.initialize()
-    await trader.run()
+    try:
+        await trader.initialize()
+        await trader.run()
+    finally:
+        trader.portfolio_history.flush() # 마지막 청크에 못 미친 순자산 기록 저장
+        trader.latency.write_prometheus(METRICS_PROM_PATH)
+        await trader.latency.stop_server()
+        trader.state_store.close() # 큐에 남은 쓰기를 커밋
+        if trader.upbit_service.recorder: # UPBIT_RECORD_PATH로 켠 녹화 로그 닫기
+            trader.upbit_service.recorder.close()
 
 if __name__ == '__main__':
     try:
@@ -1,20 +1,18 @@
+import time
+_PROCESS_STARTED = time.perf_counter()
+
 import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3' # Suppress TensorFlow logging
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0' # Disable oneDNN custom operations
 
 import argparse
 import asyncio
-import shutil
 from dotenv import load_dotenv
 
 # --- New High-Frequency System Modules --- #
+# 각 --mode에 필요한 모듈은 해당 분기에서만 import합니다 (download/preprocess는 ML 프레임워크를 불러오지 않음).
 from constants import SCALPING_TARGET_COINS
-from ccxt_downloader import CCXTDataDownloader
-from preprocessor import DataPreprocessor
-from model_trainer import ModelTrainer
-from live_trader import LiveTrader
-from advanced_backtester import AdvancedBacktester
-from rl_model_trainer import RLModelTrainer
+from core.startup_profile import start_startup_profile, mark_startup
 
 
 async def main():
@@ -64,9 +62,16 @@ async def main():
         "--model-path", type=str, help="Path to the model file for validation."
     )
     parser.add_argument("--output-path", type=str, help="Path to save the validation results JSON.")
-    parser.add_argument("--clear-cache", action="store_true", help="Clear the cache directory before preprocessing data.")
+    parser.add_argument("--clear-cache", action="store_true", help="Recompute the feature store from scratch instead of only new candles.")
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Report per-module import time, loaded ML frameworks and time-to-first-decision (trade mode).",
+    )
 
     args = parser.parse_args()
+    if args.startup_profile:
+        start_startup_profile(_PROCESS_STARTED)
 
     if args.end_date is None:
         from datetime import datetime
@@ -76,37 +81,35 @@ async def main():
     # --- Mode Execution --- #
     if args.mode == "download":
         print("📥 Downloading 1-minute data...")
-        downloader = CCXTDataDownloader()
+        from core.ohlcv_downloader import AsyncOHLCVDownloader
         if args.tickers is None:
             args.tickers = SCALPING_TARGET_COINS # Use default if not provided
-        for ticker in args.tickers:
-            downloader.download_ohlcv(
-                ticker, "1m", args.start_date, args.end_date
-            )
+        # 티커 x 기간 구간을 공유 레이트 리미터 한도 안에서 동시에 페이징하고, 체크포인트에서 이어 받음
+        downloader = AsyncOHLCVDownloader()
+        await downloader.download(args.tickers, "1m", args.start_date, args.end_date)
 
     elif args.mode == "preprocess":
         print("⚙️ Preprocessing 1-minute data...")
+        from preprocessor import DataPreprocessor
         preprocessor = DataPreprocessor(target_coins=args.tickers)
-        if args.clear_cache:
-            cache_dir = preprocessor.cache_dir
-            if os.path.exists(cache_dir):
-                print(f"기존 캐시 디렉토리 {cache_dir}를 삭제합니다.")
-                shutil.rmtree(cache_dir)
-            os.makedirs(cache_dir, exist_ok=True) # Recreate the cache directory
-        preprocessor.run_and_save_to_pickle(os.path.join(preprocessor.data_dir, "preprocessed_data.pkl"))
+        preprocessor.materialize(force=args.clear_cache)
 
     elif args.mode == "train":
         print("🤖 Training XGBoost model...")
+        from model_trainer import ModelTrainer
         trainer = ModelTrainer(target_coins=args.tickers)
         trainer.train_model()
 
     elif args.mode == "trade":
         print("🚀 Starting high-frequency scalping trader...")
+        from live_trader import LiveTrader
         trader = LiveTrader(capital=args.capital)
+        await trader.initialize()
         await trader.run()
 
     elif args.mode == "backtest":
         print("🔍 Running backtest for high-frequency scalping strategy...")
+        from advanced_backtester import AdvancedBacktester
         backtester = AdvancedBacktester(
             start_date=args.start_date,
             end_date=args.end_date,
@@ -116,6 +119,7 @@ async def main():
 
     elif args.mode == "train-rl":
         print("🤖 Training Reinforcement Learning agent...")
+        from rl_model_trainer import RLModelTrainer
         # Note: The ticker is hardcoded to BTC/KRW as an example.
         # This can be made configurable with another argparse argument if needed.
         rl_trainer = RLModelTrainer()
@@ -143,6 +147,8 @@ async def main():
         )
         commander_sim.run_walk_forward_optimization()
 
+    mark_startup(f"--mode {args.mode} 완료", report=True)
+
 
 if __name__ == "__main__":
     asyncio.run(main())
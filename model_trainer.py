@@ -7,6 +7,7 @@ import joblib
 import os
 
 from constants import SCALPING_TARGET_COINS
+from core.arrow_loader import open_mapped
 
 
 class ModelTrainer:
@@ -46,7 +47,7 @@ class ModelTrainer:
                 self.cache_dir, f"{ticker.replace('/', '_')}_1m.feather"
             )
             if os.path.exists(cache_path):
-                df = pd.read_feather(cache_path)
+                df = open_mapped(cache_path).frame().reset_index()
                 all_data.append(df)
             else:
                 print(
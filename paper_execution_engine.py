@@ -0,0 +1,443 @@
+"""
+호가창 기반 모의 체결(paper trading) 실행 엔진입니다.
+
+UpbitExecutionEngine처럼 ExecutionEngineInterface를 구현하지만, 마지막 가격 한 번으로 체결시키는 대신
+녹화/실시간 호가 스냅샷을 한 단계씩 소진하며 체결가를 계산하고, 수수료와 추가 슬리피지, 부분 체결을 반영합니다.
+포지션과 체결 내역은 numpy 배열 기반 원장(PaperLedger)에 기록합니다.
+
+OrderbookReplay는 녹화된 orderbook 프레임을 가상 시계로 재생하므로 실제 시간보다 빠르게 돌릴 수 있습니다.
+
+벤치마크 (합성 호가 재생, 가상 시간 대비 처리 속도와 결정→체결 지연):
+    python -m paper_execution_engine --orders 5000
+    python -m paper_execution_engine --frames data/ws_frames.jsonl --orders 2000
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from execution_engine_interface import ExecutionEngineInterface
+
+UPBIT_KRW_FEE_RATE = 0.0005  # Upbit 원화 마켓 거래 수수료 0.05%
+MIN_ORDER_KRW = 5000
+FILL_DTYPE = np.dtype([
+    ("timestamp", "<f8"), ("symbol", "<i4"), ("side", "i1"), ("quantity", "<f8"), ("price", "<f8"),
+    ("notional", "<f8"), ("fee", "<f8"), ("slippage_bps", "<f8"), ("latency_ms", "<f8"),
+])
+SIDE_BUY, SIDE_SELL = 1, -1
+
+
+class OrderbookReplay:
+    """
+    녹화된 Upbit orderbook 프레임(core.replay_ws_server 녹화 형식)을 가상 시계로 재생합니다.
+    get_orderbook(symbol)은 현재 가상 시각(now_ms) 이전의 마지막 호가를 반환합니다.
+    """
+
+    def __init__(self, frames: list):
+        from core.market_feed import from_upbit_code
+        self._timestamps = {}
+        self._books = {}
+        for frame in sorted((f for f in frames if (f.get("type") or f.get("ty")) == "orderbook"), key=lambda f: f["timestamp"]):
+            symbol = from_upbit_code(frame.get("code") or frame.get("cd"))
+            units = frame.get("orderbook_units") or []
+            self._timestamps.setdefault(symbol, []).append(frame["timestamp"])
+            self._books.setdefault(symbol, []).append({
+                "bids": [(unit["bid_price"], unit["bid_size"]) for unit in units],
+                "asks": [(unit["ask_price"], unit["ask_size"]) for unit in units],
+                "timestamp": frame["timestamp"],
+            })
+        starts = [timestamps[0] for timestamps in self._timestamps.values()]
+        ends = [timestamps[-1] for timestamps in self._timestamps.values()]
+        self.start_ms = min(starts) if starts else 0
+        self.end_ms = max(ends) if ends else 0
+        self.now_ms = self.start_ms
+
+    @property
+    def symbols(self) -> list:
+        return sorted(self._books)
+
+    def advance(self, milliseconds: float):
+        self.now_ms += milliseconds
+
+    def seek(self, timestamp_ms: float):
+        self.now_ms = timestamp_ms
+
+    def time(self) -> float:
+        """가상 시각 (epoch 초)"""
+        return self.now_ms / 1000
+
+    def orderbook_at(self, symbol: str, timestamp_ms: float):
+        timestamps = self._timestamps.get(symbol)
+        if not timestamps:
+            return None
+        index = bisect.bisect_right(timestamps, timestamp_ms) - 1
+        return self._books[symbol][index] if index >= 0 else None
+
+    def get_orderbook(self, symbol: str):
+        return self.orderbook_at(symbol, self.now_ms)
+
+    def get_price(self, symbol: str, max_age: float | None = None):
+        """최우선 매수/매도 호가의 중간값"""
+        book = self.get_orderbook(symbol)
+        if book is None or not book["bids"] or not book["asks"]:
+            return None
+        return (book["bids"][0][0] + book["asks"][0][0]) / 2
+
+
+def synthetic_orderbook_frames(symbol: str, mid_prices, start_ms: int, interval_ms: int = 1000,
+                               levels: int = 15, spread_bps: float = 2.0, level_notional: float = 3_000_000) -> list:
+    """중간가 시계열로 호가 단위 간격이 일정한 합성 orderbook 프레임을 만듭니다 (벤치마크/테스트용)."""
+    from core.market_feed import to_upbit_code
+    code = to_upbit_code(symbol)
+    frames = []
+    for i, mid in enumerate(mid_prices):
+        step = mid * spread_bps / 10000
+        units = [{
+            "ask_price": mid + step * (j + 0.5), "bid_price": mid - step * (j + 0.5),
+            "ask_size": level_notional / mid * (1 + j * 0.2), "bid_size": level_notional / mid * (1 + j * 0.2),
+        } for j in range(levels)]
+        frames.append({"type": "orderbook", "code": code, "timestamp": start_ms + i * interval_ms, "orderbook_units": units})
+    return frames
+
+
+class PaperLedger:
+    """
+    모의 계좌 원장. 심볼별 수량/평균 단가/실현 손익/수수료는 심볼 인덱스로 접근하는 numpy 배열이고,
+    체결 내역은 미리 할당한 구조화 배열에 쌓다가 가득 차면 두 배로 늘립니다.
+    """
+
+    def __init__(self, cash: float, capacity: int = 64, fill_capacity: int = 4096):
+        self.cash = float(cash)
+        self.symbol_index = {}
+        self.symbols = []
+        self.quantity = np.zeros(capacity)
+        self.avg_price = np.zeros(capacity)
+        self.realized_pnl = np.zeros(capacity)
+        self.fees = np.zeros(capacity)
+        self._fills = np.zeros(fill_capacity, dtype=FILL_DTYPE)
+        self.fill_count = 0
+
+    def _index(self, symbol: str) -> int:
+        index = self.symbol_index.get(symbol)
+        if index is None:
+            index = self.symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            if index >= len(self.quantity):
+                for name in ("quantity", "avg_price", "realized_pnl", "fees"):
+                    setattr(self, name, np.concatenate([getattr(self, name), np.zeros(len(self.quantity))]))
+        return index
+
+    def apply_fill(self, timestamp: float, symbol: str, side: int, quantity: float, price: float,
+                   fee: float, slippage_bps: float, latency_ms: float):
+        i = self._index(symbol)
+        notional = quantity * price
+        if side == SIDE_BUY:
+            total = self.quantity[i] + quantity
+            self.avg_price[i] = (self.avg_price[i] * self.quantity[i] + notional) / total
+            self.quantity[i] = total
+            self.cash -= notional + fee
+        else:
+            self.realized_pnl[i] += (price - self.avg_price[i]) * quantity - fee
+            self.quantity[i] = max(0.0, self.quantity[i] - quantity)
+            if self.quantity[i] <= 1e-12:
+                self.quantity[i] = 0.0
+                self.avg_price[i] = 0.0
+            self.cash += notional - fee
+        self.fees[i] += fee
+
+        if self.fill_count == len(self._fills):
+            self._fills = np.concatenate([self._fills, np.zeros(len(self._fills), dtype=FILL_DTYPE)])
+        self._fills[self.fill_count] = (timestamp, i, side, quantity, price, notional, fee, slippage_bps, latency_ms)
+        self.fill_count += 1
+
+    def snapshot(self) -> tuple:
+        """(현금, {symbol: {'quantity', 'avg_price', 'realized_pnl', 'fees'}}) - StateStore.record_snapshot 인자 형식"""
+        holdings = {
+            symbol: {name: float(getattr(self, name)[index]) for name in ("quantity", "avg_price", "realized_pnl", "fees")}
+            for symbol, index in self.symbol_index.items()
+        }
+        return self.cash, holdings
+
+    def restore_snapshot(self, cash: float, holdings: dict):
+        """snapshot()으로 만든 현금/심볼별 상태로 되돌립니다. 체결 내역 배열은 비운 채로 시작합니다."""
+        self.cash = float(cash)
+        for symbol, values in holdings.items():
+            index = self._index(symbol)
+            for name, value in values.items():
+                getattr(self, name)[index] = value
+
+    def position(self, symbol: str) -> float:
+        index = self.symbol_index.get(symbol)
+        return float(self.quantity[index]) if index is not None else 0.0
+
+    def equity(self, prices) -> float:
+        """현금 + 보유 수량 * 현재가 (가격이 없는 심볼은 평균 단가로 평가)"""
+        total = self.cash
+        for symbol, index in self.symbol_index.items():
+            if self.quantity[index] > 0:
+                total += self.quantity[index] * (prices.get(symbol) or self.avg_price[index])
+        return total
+
+    def fills(self) -> pd.DataFrame:
+        fills = pd.DataFrame(self._fills[:self.fill_count])
+        fills["symbol"] = [self.symbols[i] for i in fills["symbol"]]
+        fills["side"] = np.where(fills["side"] == SIDE_BUY, "buy", "sell")
+        fills.index = pd.to_datetime(fills.pop("timestamp"), unit="s")
+        return fills
+
+
+class PaperExecutionEngine(ExecutionEngineInterface):
+    """
+    Args:
+        initial_cash (float): 모의 계좌 시작 KRW.
+        orderbook_source: get_orderbook(symbol)을 제공하는 호가 소스 (OrderbookReplay 또는 UpbitMarketFeed).
+            없으면 upbit_service의 시세 피드 → REST 호가 → 공유 현재가 스냅샷 순으로 사용합니다.
+        upbit_service (UpbitService | None): 실시간 모의 거래 시 호가 조회용.
+        open_positions (dict | None): LiveTrader와 공유하는 포지션 딕셔너리.
+        fee_rate (float): 체결 금액 대비 수수료율.
+        slippage_bps (float): 호가 소진 후 추가로 불리하게 적용하는 슬리피지 (bp).
+        latency_ms (float): 주문 도달 지연. OrderbookReplay 사용 시 이 시간 뒤의 호가로 체결합니다.
+        clock: 체결 시각 함수 (기본 time.time, 재생 시 OrderbookReplay.time).
+        verbose (bool): False면 주문/체결마다 출력하는 로그를 끕니다 (벤치마크, 대량 재생용).
+    """
+
+    def __init__(self, initial_cash: float, orderbook_source=None, upbit_service=None, open_positions: dict | None = None,
+                 fee_rate: float = UPBIT_KRW_FEE_RATE, slippage_bps: float = 1.0, latency_ms: float = 50.0, clock=None,
+                 verbose: bool = True):
+        self.ledger = PaperLedger(initial_cash)
+        self.orderbook_source = orderbook_source
+        self.upbit_service = upbit_service
+        self.open_positions = open_positions if open_positions is not None else {}
+        self.fee_rate = fee_rate
+        self.slippage_bps = slippage_bps
+        self.latency_ms = latency_ms
+        self.clock = clock or getattr(orderbook_source, "time", None) or time.time
+        self.price_snapshot = None
+        self.stop_monitor = None
+        self.state_store = None  # 설정되면 체결/포지션/청산 손익을 저널에 기록 (StateStore)
+        self.pending_decided_at = None  # LiveTrader가 주문 직전에 설정하는 결정 시각 (perf_counter)
+        self.decision_latencies = []  # 결정 생성 → 체결 기록까지 실제 처리 시간 (ms)
+        self.verbose = verbose
+        self._log(f"✅ 모의 체결 엔진 활성화. 시작 자금 {initial_cash:,.0f} KRW, 수수료 {fee_rate:.3%}, 슬리피지 {slippage_bps}bp, 지연 {latency_ms}ms")
+
+    # --- 잔고 조회 (UpbitService와 같은 형식) ---
+
+    async def get_balance(self, currency: str):
+        if currency == "KRW":
+            return self.ledger.cash
+        return self.ledger.position(f"{currency}/KRW")
+
+    async def get_all_balances(self):
+        balances = {"KRW": {"balance": self.ledger.cash}}
+        for symbol, index in self.ledger.symbol_index.items():
+            if self.ledger.quantity[index] > 0:
+                balances[symbol.split("/")[0]] = {"balance": float(self.ledger.quantity[index])}
+        return balances
+
+    # --- 호가 ---
+
+    async def _orderbook(self, symbol: str):
+        source = self.orderbook_source
+        if source is not None:
+            if hasattr(source, "orderbook_at"):
+                return source.orderbook_at(symbol, source.now_ms + self.latency_ms)
+            return source.get_orderbook(symbol)
+        if self.upbit_service is not None:
+            feed = self.upbit_service.market_feed
+            book = feed.get_orderbook(symbol) if feed else None
+            if book is None:
+                book = await self.upbit_service.get_orderbook(symbol)
+            if book is not None:
+                return book
+        price = self.price_snapshot.get(symbol) if self.price_snapshot else None
+        if price is None:
+            return None
+        return {"bids": [(price, float("inf"))], "asks": [(price, float("inf"))]}  # 깊이 정보가 없으면 현재가 단일 호가
+
+    def _walk(self, levels, quantity: float | None = None, notional: float | None = None):
+        """호가를 순서대로 소진해 (체결 수량, 체결 금액)을 계산합니다."""
+        filled_quantity = filled_notional = 0.0
+        for price, size in levels:
+            if quantity is not None:
+                take = min(size, quantity - filled_quantity)
+            else:
+                take = min(size, (notional - filled_notional) / price)
+            if take <= 0:
+                break
+            filled_quantity += take
+            filled_notional += take * price
+            if (quantity is not None and filled_quantity >= quantity - 1e-12) or (notional is not None and filled_notional >= notional - 1e-6):
+                break
+        return filled_quantity, filled_notional
+
+    def _record(self, symbol: str, side: int, quantity: float, notional: float, reference: float):
+        """
+        호가 소진 결과에 추가 슬리피지와 수수료를 적용해 원장에 기록합니다.
+        매수는 같은 금액으로 받는 수량이 줄고, 매도는 같은 수량으로 받는 금액이 줄어듭니다.
+        """
+        price = notional / quantity * (1 + side * self.slippage_bps / 10000)
+        if side == SIDE_BUY:
+            quantity = notional / price
+        else:
+            notional = price * quantity
+        fee = notional * self.fee_rate
+        slippage_bps = (price / reference - 1) * 10000 * side if reference else 0.0
+        self.ledger.apply_fill(self.clock() + self.latency_ms / 1000, symbol, side, quantity, price, fee, slippage_bps, self.latency_ms)
+        if self.pending_decided_at is not None:
+            self.decision_latencies.append((time.perf_counter() - self.pending_decided_at) * 1000)
+            self.pending_decided_at = None
+        return quantity, price, notional, fee, slippage_bps
+
+    # --- ExecutionEngineInterface ---
+
+    async def create_market_buy_order(self, symbol: str, amount_krw: float):
+        self._log(f"  - [PAPER] 시장가 매수 주문 -> {symbol} / {amount_krw:,.0f} KRW")
+        amount_krw = min(amount_krw, self.ledger.cash / (1 + self.fee_rate))
+        book = await self._orderbook(symbol)
+        if amount_krw < MIN_ORDER_KRW or book is None or not book["asks"]:
+            self._log(f"  - [PAPER] {symbol} 매수 불가 (금액 {amount_krw:,.0f} KRW, 호가 {'없음' if book is None else '있음'})")
+            return None
+        reference = (book["asks"][0][0] + book["bids"][0][0]) / 2 if book["bids"] else book["asks"][0][0]
+        quantity, notional = self._walk(book["asks"], notional=amount_krw)
+        if quantity <= 0:
+            return None
+        quantity, price, notional, fee, slippage_bps = self._record(symbol, SIDE_BUY, quantity, notional, reference)
+        status = "closed" if notional >= amount_krw - 1e-6 else "partial"  # 호가 깊이가 부족하면 부분 체결
+
+        position = self.open_positions.get(symbol)
+        if position:
+            total = position['quantity'] + quantity
+            position['entry_price'] = (position['entry_price'] * position['quantity'] + price * quantity) / total
+            position['quantity'] = total
+        else:
+            self.open_positions[symbol] = {'entry_price': price, 'quantity': quantity}
+        if self.stop_monitor is not None:
+            self.stop_monitor.watch(symbol, self.open_positions[symbol]['entry_price'], self.open_positions[symbol]['quantity'])
+        if self.state_store is not None:
+            self.state_store.record_fill(symbol, 'buy', quantity, price, fee)
+            self.state_store.save_position(symbol, self.open_positions[symbol])
+        self._log(f"  - [PAPER] {symbol} 매수 체결 ({status}): {quantity:.8f}개 @ {price:,.2f} "
+              f"(슬리피지 {slippage_bps:.2f}bp, 수수료 {fee:,.0f} KRW)")
+        return {"status": status, "symbol": symbol, "side": "buy", "amount": notional, "price": price,
+                "quantity": quantity, "filled": quantity, "cost": notional, "fee": fee, "slippage_bps": slippage_bps}
+
+    async def create_market_sell_order(self, symbol: str, quantity: float):
+        self._log(f"  - [PAPER] 시장가 매도 주문 -> {symbol} / {quantity}개")
+        quantity = min(quantity, self.ledger.position(symbol))
+        book = await self._orderbook(symbol)
+        if quantity <= 0 or book is None or not book["bids"]:
+            self._log(f"  - [PAPER] {symbol} 매도 불가 (보유 {quantity}, 호가 {'없음' if book is None else '있음'})")
+            return None
+        reference = (book["asks"][0][0] + book["bids"][0][0]) / 2 if book["asks"] else book["bids"][0][0]
+        filled, notional = self._walk(book["bids"], quantity=quantity)
+        if filled <= 0:
+            return None
+        filled, price, notional, fee, slippage_bps = self._record(symbol, SIDE_SELL, filled, notional, reference)
+        status = "closed" if filled >= quantity - 1e-12 else "partial"
+
+        remaining = self.ledger.position(symbol)
+        position = self.open_positions.get(symbol)
+        if self.state_store is not None:
+            pnl = (price - position['entry_price']) * filled - fee if position else None
+            self.state_store.record_fill(symbol, 'sell', filled, price, fee,
+                                         regime=position.get('regime') if position else None, pnl=pnl)
+        if remaining > 0 and position is not None:
+            position['quantity'] = remaining
+            if self.state_store is not None:
+                self.state_store.save_position(symbol, position)
+        else:
+            self.open_positions.pop(symbol, None)
+            if self.stop_monitor is not None:
+                self.stop_monitor.unwatch(symbol)
+            if self.state_store is not None:
+                self.state_store.close_position(symbol)
+        self._log(f"  - [PAPER] {symbol} 매도 체결 ({status}): {filled:.8f}/{quantity:.8f}개 @ {price:,.2f} "
+              f"(슬리피지 {slippage_bps:.2f}bp, 수수료 {fee:,.0f} KRW)")
+        return {"status": status, "symbol": symbol, "side": "sell", "price": price, "quantity": quantity,
+                "filled": filled, "cost": notional, "fee": fee, "slippage_bps": slippage_bps}
+
+    async def liquidate_all_positions(self, holdings: dict):
+        self._log("🚨 [PAPER] 모든 포지션 즉시 청산 실행!")
+        return list(await asyncio.gather(*(
+            self.create_market_sell_order(symbol, quantity) for symbol, quantity in holdings.items() if quantity > 0
+        )))
+
+    def restore(self, snapshot, fills):
+        """
+        StateStore.load()의 최신 스냅샷(없으면 None)으로 원장을 되돌린 뒤, 그 이후 체결(StateStore.fills(after_id=...))만
+        다시 적용해 재시작 전 현금/보유 수량을 복원합니다.
+        open_positions는 LiveTrader가 저장소의 포지션으로 따로 복원합니다.
+        """
+        if snapshot is not None:
+            self.ledger.restore_snapshot(snapshot['cash'], snapshot['holdings'])
+        for timestamp, symbol, side, quantity, price, fee, regime, pnl in fills:
+            self.ledger.apply_fill(timestamp, symbol, SIDE_BUY if side == 'buy' else SIDE_SELL, quantity, price, fee, 0.0, 0.0)
+        self._log(f"  - [PAPER] 스냅샷 {'있음' if snapshot else '없음'} + 체결 {len(fills)}건으로 모의 원장 복원: "
+                  f"현금 {self.ledger.cash:,.0f} KRW")
+
+    def _log(self, message: str):
+        if self.verbose:
+            print(message)
+
+    # --- 보고 ---
+
+    def latency_summary(self) -> dict:
+        latencies = np.asarray(self.decision_latencies)
+        if latencies.size == 0:
+            return {}
+        return {"count": int(latencies.size), "p50_ms": float(np.percentile(latencies, 50)),
+                "p95_ms": float(np.percentile(latencies, 95)), "max_ms": float(latencies.max())}
+
+
+async def _benchmark(frames: list, orders: int, decision_interval_ms: float):
+    import random
+
+    replay = OrderbookReplay(frames)
+    engine = PaperExecutionEngine(10_000_000, orderbook_source=replay, latency_ms=50.0, verbose=False)
+    rng = random.Random(0)
+    started = time.perf_counter()
+    for _ in range(orders):
+        replay.advance(decision_interval_ms)
+        if replay.now_ms > replay.end_ms:
+            replay.seek(replay.start_ms)
+        symbol = rng.choice(replay.symbols)
+        engine.pending_decided_at = time.perf_counter()
+        if engine.ledger.position(symbol) > 0 and rng.random() < 0.5:
+            await engine.create_market_sell_order(symbol, engine.ledger.position(symbol))
+        else:
+            await engine.create_market_buy_order(symbol, rng.uniform(0.1, 2) * 1_000_000)
+    wall = time.perf_counter() - started
+
+    fills = engine.ledger.fills()
+    prices = {symbol: replay.get_price(symbol) for symbol in replay.symbols}
+    virtual = orders * decision_interval_ms / 1000
+    latency = engine.latency_summary()
+    print(f"\n[BENCH] 주문 {orders}개, 체결 {len(fills)}건 (부분 체결 포함), 가상 시간 {virtual:,.0f}s를 {wall:.2f}s에 처리 ({virtual / wall:,.0f}배속)")
+    print(f"  - 결정→체결 처리 지연: p50 {latency['p50_ms']:.3f}ms, p95 {latency['p95_ms']:.3f}ms, 최대 {latency['max_ms']:.3f}ms "
+          f"(+ 모델링된 주문 도달 지연 {engine.latency_ms:.0f}ms)")
+    print(f"  - 평균 슬리피지: 매수 {fills.loc[fills.side == 'buy', 'slippage_bps'].mean():.2f}bp, "
+          f"매도 {fills.loc[fills.side == 'sell', 'slippage_bps'].mean():.2f}bp | 수수료 합계 {fills.fee.sum():,.0f} KRW")
+    print(f"  - 최종 평가액: {engine.ledger.equity(prices):,.0f} KRW (현금 {engine.ledger.cash:,.0f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paper execution engine replay benchmark.")
+    parser.add_argument("--frames", type=str, help="Recorded WebSocket frames (.jsonl) with orderbook frames.")
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--decision-interval-ms", type=float, default=60_000, help="Virtual time between decisions.")
+    args = parser.parse_args()
+
+    if args.frames:
+        with open(args.frames, "r") as f:
+            replay_frames = [json.loads(line) for line in f if line.strip()]
+    else:
+        walk = np.random.default_rng(0)
+        replay_frames = []
+        for symbol, start_price in (("BTC/KRW", 90_000_000), ("ETH/KRW", 4_000_000), ("XRP/KRW", 800)):
+            mids = start_price * np.cumprod(1 + walk.normal(0, 0.0005, 24 * 3600))
+            replay_frames += synthetic_orderbook_frames(symbol, mids, 1_700_000_000_000)
+    asyncio.run(_benchmark(replay_frames, args.orders, args.decision_interval_ms))
@@ -2,7 +2,6 @@ import pandas as pd
 import numpy as np
 import os
 import json
-import pickle
 from pandas.tseries.offsets import DateOffset
 
 # TF_ENABLE_ONEDNN_OPTS=0 환경 변수 설정으로 mutex.cc 오류 방지
@@ -13,6 +12,9 @@ from trading_env_simple import SimpleTradingEnv
 from dl_model_trainer import DLModelTrainer
 from foundational_model_trainer import train_foundational_agent
 from specialist_trainer import train_specialist_agents
+from core.policy_inference import BatchedPolicyInference
+from core.arrow_loader import open_mapped
+from core.feature_store import FeatureStore
 
 
 class PortfolioBacktester:
@@ -45,12 +47,12 @@ class PortfolioBacktester:
         print("\n[WFO] 훈련된 전문가 AI 에이전트들을 로드합니다...")
 
         try:
-            dummy_df = pd.read_feather(
+            dummy_df = open_mapped(
                 os.path.join(
                     self.cache_dir,
                     f"{self.target_coins[0].replace('/', '_')}_1h.feather",
                 )
-            )
+            ).frame()
             dummy_env = SimpleTradingEnv(dummy_df.select_dtypes(include=np.number))
         except Exception as e:
             print(f"오류: 에이전트 로드를 위한 더미 환경 생성 실패 - {e}")
@@ -104,6 +106,7 @@ class PortfolioBacktester:
         )
 
         timeline = pd.date_range(validation_start, validation_end, freq="h")
+        policy_inference = BatchedPolicyInference(agents)
         period_trade_log = []
         period_portfolio_history = []
 
@@ -111,10 +114,11 @@ class PortfolioBacktester:
             if "BTC/KRW" not in all_data or now not in all_data["BTC/KRW"].index:
                 continue
             current_regime = all_data["BTC/KRW"].loc[now, "regime"]
-            agent_to_use = agents.get(current_regime, agents.get("Sideways"))
-            if agent_to_use is None:
+            if policy_inference.agent_for(current_regime) is None:
                 continue
 
+            # 이 시각의 모든 티커 관측을 모아 전문가 forward 한 번으로 예측
+            requests = {}
             for ticker, df in all_data.items():
                 if now not in df.index:
                     continue
@@ -127,9 +131,11 @@ class PortfolioBacktester:
                     continue
 
                 env_data = observation_df.select_dtypes(include=np.number)
-                action, _ = agent_to_use.predict(env_data, deterministic=True)
-                action = int(action)
+                requests[ticker] = (current_regime, env_data.to_numpy(dtype=np.float32))
+            actions = policy_inference.predict(requests)
 
+            for ticker, action in actions.items():
+                df = all_data[ticker]
                 current_price = df.loc[now, "close"]
                 log_entry = {
                     "timestamp": now,
@@ -197,18 +203,10 @@ class PortfolioBacktester:
         print("\n=== 🤖 워크 포워드 최적화 백테스팅 시작 ===")
         print(f"  - 훈련 기간: {train_months}개월 / 검증 기간: {validation_months}개월")
 
-        # 최적화: 모든 데이터를 처음에 한 번만 로드
-        print("\n- 모든 기간의 데이터를 메모리로 사전 로딩합니다...")
-        preprocessed_data_path = os.path.join("data", "preprocessed_data.pkl")
-        if not os.path.exists(preprocessed_data_path):
-            print(f"오류: 전처리된 데이터 파일을 찾을 수 없습니다: {preprocessed_data_path}")
-            return
-
-        with open(preprocessed_data_path, "rb") as f:
-            full_market_data = pickle.load(f)
-        
-        if not full_market_data:
-            print("오류: 백테스팅에 사용할 데이터가 없습니다.")
+        # 특징 저장소에서 폴드마다 검증 구간만 메모리 맵으로 읽음 (전체 데이터를 한 번에 올리지 않음)
+        feature_store = FeatureStore()
+        if not any(feature_store.entry(ticker) for ticker in self.target_coins):
+            print(f"오류: 특징 저장소({feature_store.root})에 데이터가 없습니다. preprocess 모드를 먼저 실행하세요.")
             return
 
         current_start = self.start_date
@@ -246,9 +244,16 @@ class PortfolioBacktester:
                 continue
 
             # 3. Simulate on the validation (out-of-sample) period
+            # 관측 창(직전 50행)을 위해 검증 시작 하루 전부터 읽음
+            period_market_data = feature_store.load_all(
+                self.target_coins,
+                validation_start - pd.Timedelta(days=1),
+                validation_end,
+                inclusive_end=True,
+            )
             cash, holdings, purchase_info = self._simulate_on_period(
                 current_agents,
-                full_market_data,
+                period_market_data,
                 validation_start,
                 validation_end,
                 cash,
@@ -1,91 +1,134 @@
 import pandas as pd
 import os
-import pickle
+import hashlib
+import importlib.metadata
+import inspect
+import json
+import time
 import numpy as np
 from market_regime_detector import precompute_all_indicators, get_market_regime, get_market_regime_dataframe
 from strategies.trend_follower import generate_v_recovery_signals
 from strategies.mean_reversion_strategy import generate_sideways_signals
 from ccxt_downloader import CCXTDataDownloader
-from dl_model_trainer import DLModelTrainer # Import DLModelTrainer to get TARGET_COINS
+from core.candle_store import load_candles
+from core.feature_store import FeatureStore
+from constants import DL_TARGET_COINS
 import argparse
 
+FEATURE_COLUMNS = [
+    'open', 'high', 'low', 'close', 'volume',
+    'ADX_14', 'NATR_14', 'BBP_20_2.0', 'EMA_20', 'EMA_50',
+    'RSI_14', 'MACDh_12_26_9', 'regime'
+]
+
+
 class DataPreprocessor:
-    def __init__(self, target_coins=None, interval="1m"):
-        self.target_coins = target_coins if target_coins is not None else DLModelTrainer.TARGET_COINS
+    def __init__(self, target_coins=None, interval="1m", feature_store: FeatureStore | None = None):
+        self.target_coins = target_coins if target_coins is not None else DL_TARGET_COINS
         self.interval = interval
         self.data_dir = "data"  # Use the local data directory
         os.makedirs(self.data_dir, exist_ok=True)
+        self.feature_store = feature_store or FeatureStore(timeframe=interval)
 
-    def _preprocess_single_ticker(self, ticker: str) -> pd.DataFrame | None:
-        print(f"[{ticker}] 데이터 로딩...")
-        file_name = f"{ticker.replace('/', '_')}_{self.interval}.feather"
-        file_path = os.path.join(self.data_dir, file_name)
-
-        if not os.path.exists(file_path):
-            print(f"[ERROR] {ticker} 데이터 파일을 찾을 수 없습니다: {file_path}. 이 티커를 건너뜁니다.")
-            return None
-        
+    def _load_candles(self, ticker: str) -> pd.DataFrame | None:
         try:
-            print(f"[{ticker}] 로컬 데이터 파일에서 로드: {file_path}")
-            df = pd.read_feather(file_path)
-            # Ensure timestamp is the index
-            if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                df.set_index("timestamp", inplace=True)
-            else:
-                print(f"[ERROR] {file_path}에 'timestamp' 컬럼이 없습니다.")
-                return None
+            # 캔들 저장소(data/candles, 없으면 기존 {ticker}_{interval}.feather)에서 로드
+            df = load_candles(ticker, self.interval, data_dir=self.data_dir)
         except Exception as e:
-            print(f"[ERROR] {file_path} 파일 읽기 오류: {e}")
+            print(f"[ERROR] {ticker} 캔들 읽기 오류: {e}")
             return None
+        if df is None:
+            print(f"[ERROR] {ticker} {self.interval} 캔들 데이터를 찾을 수 없습니다. 이 티커를 건너뜁니다.")
+        return df
 
-        print(f"[{ticker}] 지표 및 시장 체제 계산...")
+    def compute_features(self, df: pd.DataFrame, regime_map: dict | None = None):
+        """
+        캔들에서 지표/시장 체제 특징을 계산합니다. (특징 DataFrame 또는 None, regime_map)을 반환합니다.
+        regime_map(시장 체제 이름 -> 코드)을 넘기면 기존 코드를 유지하고 새 체제만 뒤에 번호를 붙입니다.
+        """
+        regime_map = dict(regime_map or {})
         if len(df) < 50:
-            print(f"[WARN] {ticker} 데이터 길이가 너무 짧습니다 ({len(df)}). 최소 50개 행이 필요합니다. 이 티커를 건너뜁니다.")
-            return None
-        df_processed = precompute_all_indicators(df)
+            print(f"[WARN] 데이터 길이가 너무 짧습니다 ({len(df)}). 최소 50개 행이 필요합니다.")
+            return None, regime_map
+        df_processed = precompute_all_indicators(df.copy())
         df_processed = generate_v_recovery_signals(df_processed)
         df_processed = generate_sideways_signals(df_processed)
-        
+
         # Standardized regime detection
         df_processed = get_market_regime_dataframe(df_processed)
-        
-        regime_map = {name: i for i, name in enumerate(df_processed['market_regime'].dropna().unique())}
+
+        # pandas_ta 버전에 따라 볼린저 %B 열 이름이 'BBP_20_2.0' 또는 'BBP_20_2.0_2.0'(lower/upper std)이므로 이름을 맞춤
+        bbp_column = next((col for col in df_processed.columns if col.startswith('BBP_20')), None)
+        if bbp_column is not None and bbp_column != 'BBP_20_2.0':
+            df_processed = df_processed.rename(columns={bbp_column: 'BBP_20_2.0'})
+
+        for name in df_processed['market_regime'].dropna().unique():
+            regime_map.setdefault(name, len(regime_map))
         df_processed['regime'] = df_processed['market_regime'].map(regime_map)
-        
-        final_features = [
-            'open', 'high', 'low', 'close', 'volume',
-            'ADX_14', 'NATR_14', 'BBP_20_2.0', 'EMA_20', 'EMA_50',
-            'RSI_14', 'MACDh_12_26_9', 'regime'
-        ]
-        
-        missing_cols = [col for col in final_features if col not in df_processed.columns]
+
+        missing_cols = [col for col in FEATURE_COLUMNS if col not in df_processed.columns]
         if missing_cols:
-            print(f"[WARN] {ticker}에서 누락된 피처: {missing_cols}. 이 티커를 건너뜁니다.")
+            print(f"[WARN] 누락된 피처: {missing_cols}.")
+            return None, regime_map
+
+        return df_processed[FEATURE_COLUMNS].dropna(), regime_map
+
+    def feature_definition_hash(self) -> str:
+        """특징 계산 코드/컬럼/지표 라이브러리 버전의 해시. 바뀌면 특징 저장소가 전체를 다시 계산합니다."""
+        functions = (precompute_all_indicators, generate_v_recovery_signals, generate_sideways_signals,
+                     get_market_regime_dataframe, DataPreprocessor.compute_features)
+        try:
+            pandas_ta_version = importlib.metadata.version("pandas_ta")
+        except importlib.metadata.PackageNotFoundError:
+            pandas_ta_version = None
+        payload = {
+            "interval": self.interval,
+            "columns": FEATURE_COLUMNS,
+            "sources": [inspect.getsource(function) for function in functions],
+            "pandas_ta": pandas_ta_version,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _preprocess_single_ticker(self, ticker: str) -> pd.DataFrame | None:
+        """특징 저장소를 거치지 않고 한 티커의 특징 전체를 계산합니다."""
+        df = self._load_candles(ticker)
+        if df is None:
             return None
-            
-        df_final = df_processed[final_features].dropna()
-        
-        print(f"[{ticker}] 전처리 완료. {len(df_final)}개 데이터 반환.")
+        df_final, _ = self.compute_features(df)
         return df_final
 
-    def run_and_save_to_pickle(self, save_path):
-        print("모든 타겟 코인 데이터 전처리 시작...")
-        all_data = {}
+    def materialize(self, force: bool = False) -> FeatureStore:
+        """
+        타겟 코인의 특징을 특징 저장소에 맞춥니다. 원본 캔들과 특징 정의가 그대로인 티커는 계산하지 않고,
+        새 캔들만 생긴 티커는 새 구간만 계산해 추가합니다.
+        """
+        print("모든 타겟 코인 특징 저장소 갱신 시작...")
+        definition_hash = self.feature_definition_hash()
+        statuses = {}
         for ticker in self.target_coins:
-            df = self._preprocess_single_ticker(ticker)
-            if df is not None and not df.empty:
-                all_data[ticker] = df
-        
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        with open(save_path, "wb") as f:
-            pickle.dump(all_data, f)
-        print(f"모든 코인 데이터가 {save_path}에 저장되었습니다.")
+            df = self._load_candles(ticker)
+            if df is None:
+                continue
+            started = time.perf_counter()
+            status = self.feature_store.materialize(ticker, df, self.compute_features, definition_hash, force=force)
+            statuses[ticker] = status
+            entry = self.feature_store.entry(ticker)
+            rows = entry["rows"] if entry else 0
+            print(f"[{ticker}] {status} ({time.perf_counter() - started:.2f}s, 특징 {rows}행, 원본 캔들 {len(df)}개)")
+        if statuses and all(status == "unchanged" for status in statuses.values()):
+            print("[FEATURES] 원본 캔들과 특징 정의가 바뀌지 않아 전처리를 건너뜁니다.")
+        print(f"특징 저장소: {self.feature_store.root}")
+        return self.feature_store
+
+    def load_features(self, start=None, end=None, columns=None) -> dict:
+        """{ticker: 특징 DataFrame} ([start, end) 구간). 필요한 경우 먼저 materialize()를 호출하세요."""
+        return self.feature_store.load_all(self.target_coins, start, end, columns)
+
+
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Preprocess cryptocurrency data and save to a pickle file.")
-    parser.add_argument("--output_path", type=str, default="preprocessed_data.pkl",
-                        help="Path to save the preprocessed data pickle file.")
+    parser = argparse.ArgumentParser(description="Materialize preprocessed features into the incremental feature store.")
+    parser.add_argument("--force", action="store_true", help="Recompute every ticker from scratch.")
     args = parser.parse_args()
 
     preprocessor = DataPreprocessor()
-    preprocessor.run_and_save_to_pickle(args.output_path)
\ No newline at end of file
+    preprocessor.materialize(force=args.force)
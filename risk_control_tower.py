@@ -19,12 +19,13 @@ class RiskControlTower:
         self.risk_manager = RiskManager(half_kelly=True, max_position_pct=0.25)
         print(f"✅ AI 위험 관리 위원회 활성화. MDD 임계값: {self.mdd_threshold:.2%}")
 
-    def check_mdd_circuit_breaker(self, portfolio_history: pd.Series) -> bool:
+    def check_mdd_circuit_breaker(self, portfolio_history) -> bool:
         """
-        실시간으로 포트폴리오의 최대 낙폭(MDD)을 계산하여 서킷 브레이커 발동 여부를 결정합니다.
+        실시간으로 포트폴리오의 최대 낙폭(MDD)을 확인하여 서킷 브레이커 발동 여부를 결정합니다.
 
         Args:
-            portfolio_history (pd.Series): 포트폴리오 순자산 가치의 시계열 데이터.
+            portfolio_history (StreamingEquityTracker | pd.Series): 순자산 추적기 (최대 낙폭을 O(1)로 조회)
+                또는 포트폴리오 순자산 가치의 시계열 데이터 (전체 구간을 다시 계산).
 
         Returns:
             bool: MDD 임계값을 초과하면 True(서킷 브레이커 발동), 아니면 False를 반환.
@@ -32,9 +33,12 @@ class RiskControlTower:
         if len(portfolio_history) < 2:
             return False
 
-        peak = portfolio_history.cummax()
-        drawdown = (portfolio_history - peak) / peak
-        current_mdd = drawdown.min()
+        if isinstance(portfolio_history, pd.Series):
+            peak = portfolio_history.cummax()
+            drawdown = (portfolio_history - peak) / peak
+            current_mdd = drawdown.min()
+        else:
+            current_mdd = portfolio_history.max_drawdown
 
         if current_mdd < self.mdd_threshold:
             print(
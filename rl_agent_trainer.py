@@ -1,6 +1,5 @@
 import os
 import shutil
-import pandas as pd
 from stable_baselines3 import PPO
 from preprocessor import DataPreprocessor
 from rl_environment import PortfolioTradingEnv
@@ -23,15 +22,9 @@ class RLAgentTrainer:
         """훈련을 위해 모든 타겟 코인의 전처리된 데이터를 불러옵니다."""
         print("모든 타겟 코인의 데이터 로딩 중...")
         
-        # Ensure preprocessed_data.pkl is up-to-date
-        # This will call the run_and_save_to_pickle method of DataPreprocessor, which handles caching
-        data_path = os.path.join(self.preprocessor.cache_dir, "preprocessed_data.pkl")
-        self.preprocessor.run_and_save_to_pickle(data_path)
-        if not os.path.exists(data_path):
-            print(f"오류: 전처리된 데이터 파일 '{data_path}'을 찾을 수 없습니다.")
-            return None
-        
-        all_data = pd.read_pickle(data_path)
+        # 특징 저장소를 최신 캔들에 맞춤 (바뀐 것이 없으면 계산하지 않음)
+        self.preprocessor.materialize()
+        all_data = self.preprocessor.load_features()
 
         if not all_data or len(all_data) < len(self.target_coins):
             print("훈련에 사용할 데이터가 충분하지 않습니다. 프로세스를 중단합니다.")
@@ -5,11 +5,11 @@ from stable_baselines3 import PPO
 from gymnasium.wrappers import FlattenObservation
 
 from rl_environment import PortfolioTradingEnv
+from core.feature_store import FeatureStore
 
 from constants import SCALPING_TARGET_COINS
 
 # --- Constants ---
-DATA_PATH = "cache/preprocessed_data.pkl"
 MODEL_PATH = "foundational_agent.zip"
 SYMBOL = SCALPING_TARGET_COINS[0] # Use the first coin from the global list
 
@@ -24,11 +24,12 @@ def run_rl_backtest():
     
     model = PPO.load(MODEL_PATH)
 
-    print(f"백테스트용 데이터를 로드합니다: {DATA_PATH}")
-    all_data = pd.read_pickle(DATA_PATH)
+    feature_store = FeatureStore()
+    print(f"백테스트용 데이터를 로드합니다: {feature_store.root}")
+    all_data = feature_store.load_all()
     
     if SYMBOL not in all_data:
-        print(f"오류: {SYMBOL}에 대한 데이터가 전처리된 데이터 파일에 없습니다.")
+        print(f"오류: {SYMBOL}에 대한 데이터가 특징 저장소에 없습니다.")
         return
 
     print("거래 환경을 설정합니다...")
@@ -28,6 +28,11 @@ echo "[MLOps] Downloading latest historical data..."
 # Run in a subshell to set DOCKER_BUILD for ccxt_downloader.py
 ( DOCKER_BUILD=true python ccxt_downloader.py )
 
+# Update the feature store: only tickers with new candles are recomputed (new bars + indicator warm-up),
+# and preprocessing is skipped entirely when candles and feature definitions are unchanged
+echo "[MLOps] Updating feature store..."
+python -m core.feature_store build
+
 # Run the specialist trainer to retrain specialist models
 echo "[MLOps] Retraining specialist models..."
 python specialist_trainer.py
@@ -42,11 +42,18 @@ def _find_best_coin(candidates: list) -> tuple | None:
 
 
 async def scan_for_hot_coin(
-    dl_trainer: DLModelTrainer, market_regime: str, upbit_service: UpbitService
+    dl_trainer: DLModelTrainer,
+    market_regime: str | None,
+    upbit_service: UpbitService,
+    market_context=None,
 ) -> str | None:
     """
     실시간으로 여러 코인을 스캔하여 현재 가장 투자 매력도가 높은 코인(핫 코인)을 찾습니다.
+    market_context(MarketContext)가 주어지면 market_regime이 None일 때 사이클 공유 시장 체제를 사용합니다.
     """
+    if market_regime is None and market_context is not None:
+        market_regime = market_context.current_regime
+
     if market_regime == "Bullish":
         threshold = 0.55
     elif market_regime == "Bearish":
@@ -1,22 +1,54 @@
+import asyncio
+import json
 import os
 import re
-import google.generativeai as genai
+import time
+import urllib.request
 from dotenv import load_dotenv
 
+GEMINI_MODEL = "models/gemini-pro-latest"
+SENTIMENT_CACHE_PATH = "data/sentiment_cache.json"
+NEUTRAL_INDEX = 50
+
+
+def index_to_score(index: int) -> float:
+    """공포-탐욕 지수(0~100)를 감성 점수(-1.0~+1.0)로 변환합니다."""
+    return max(-1.0, min(1.0, (index - NEUTRAL_INDEX) / NEUTRAL_INDEX))
+
 
 class SentimentAnalyzer:
     """
     Gemini API를 사용하여 특정 암호화폐에 대한 시장 감성을 분석하고,
     이를 -1.0(극단적 공포)에서 +1.0(극단적 탐욕) 사이의 점수로 계량화합니다.
+
+    SENTIMENT_MODEL_URL이 설정되어 있으면 google SDK 대신 해당 주소의 Gemini REST 호환 엔드포인트
+    (예: python -m core.stub_sentiment_server)를 호출합니다.
     """
 
-    def __init__(self):
+    def __init__(self, base_url: str | None = None, timeout: float = 20.0):
         load_dotenv()
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
+        self.base_url = base_url or os.getenv("SENTIMENT_MODEL_URL")
+        self.timeout = timeout
+        self.api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
+        self.model = None
+        if self.base_url:
+            return
+        if not self.api_key:
             raise ValueError("GOOGLE_API_KEY 환경 변수를 설정해주세요.")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("models/gemini-pro-latest")
+        import google.generativeai as genai
+        genai.configure(api_key=self.api_key)
+        self.model = genai.GenerativeModel(GEMINI_MODEL)
+
+    def _generate(self, prompt: str) -> str:
+        """모델 응답 텍스트를 반환합니다 (블로킹 호출)."""
+        if self.model is not None:
+            return self.model.generate_content(prompt, request_options={"timeout": self.timeout}).text.strip()
+        url = f"{self.base_url.rstrip('/')}/v1beta/{GEMINI_MODEL}:generateContent?key={self.api_key or ''}"
+        body = json.dumps({"contents": [{"parts": [{"text": prompt}]}]}).encode("utf-8")
+        request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = json.loads(response.read())
+        return payload["candidates"][0]["content"]["parts"][0]["text"].strip()
 
     def get_fear_greed_index(self, ticker: str) -> tuple[int, str]:
         """
@@ -34,16 +66,15 @@ class SentimentAnalyzer:
             당신은 최고의 암호화폐 퀀트 분석가입니다.
             현재 '{ticker}'를 포함한 전반적인 암호화폐 시장의 투자 심리를 분석해주세요.
             최신 뉴스, 기술적 지표(RSI, 변동성 등), 온체인 데이터, 소셜 미디어 동향을 종합적으로 고려해야 합니다.
-            
+
             분석 결과를 바탕으로, 현재 시장의 공포-탐욕 지수를 0(극단적 공포)에서 100(극단적 탐욕) 사이의 정수 점수로 평가하고, 현재 시장을 지배하는 핵심 내러티브(키워드)가 무엇인지 1~2문장으로 요약해주세요.
-            
+
             출력 형식은 반드시 아래와 같이 "지수: [숫자]" 와 "핵심 내러티브: [요약]" 형식으로 작성해주세요.
-            
+
             지수: [여기에 0에서 100 사이의 숫자만 삽입]
             핵심 내러티브: [여기에 핵심 내러티브 요약 삽입]
             """
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
+            response_text = self._generate(prompt)
 
             # 점수와 근거를 파싱
             score_match = re.search(r"지수:\s*(\d+)", response_text)
@@ -78,6 +109,136 @@ class SentimentAnalyzer:
             print(f"  - [Sentiment] Gemini API 호출 중 오류: {e}")
             return 50, "API 호출 실패"
 
+    def get_fear_greed_indices(self, tickers: list) -> dict:
+        """
+        여러 티커의 공포-탐욕 지수를 한 번의 요청(프롬프트 하나)으로 평가합니다.
+        응답에서 찾지 못한 티커는 결과에 포함되지 않습니다. 요청 실패 시 예외를 그대로 전달합니다.
+
+        Returns:
+            dict: {ticker: (공포-탐욕 지수, 핵심 내러티브)}
+        """
+        ticker_lines = "\n".join(f"- {ticker}" for ticker in tickers)
+        prompt = f"""
+        당신은 최고의 암호화폐 퀀트 분석가입니다.
+        아래 각 암호화폐 시장의 현재 투자 심리를 최신 뉴스, 기술적 지표, 온체인 데이터, 소셜 미디어 동향을 종합해 분석해주세요.
+        {ticker_lines}
+
+        각 티커마다 공포-탐욕 지수(0=극단적 공포, 100=극단적 탐욕, 정수)와 핵심 내러티브(1문장)를 평가하고,
+        반드시 티커 하나당 한 줄씩 아래 형식으로만 출력해주세요.
+
+        [티커] | 지수: [0~100 숫자] | 핵심 내러티브: [요약]
+        """
+        response_text = self._generate(prompt)
+        wanted = set(tickers)
+        results = {}
+        for match in re.finditer(r"([A-Z0-9]+/[A-Z]+)\s*\|\s*지수:\s*(\d+)\s*\|\s*핵심 내러티브:\s*(.*)", response_text):
+            ticker = match.group(1)
+            if ticker in wanted:
+                results[ticker] = (max(0, min(100, int(match.group(2)))), match.group(3).strip())
+        return results
+
+    def get_sentiment_score(self, ticker: str) -> tuple[float, str]:
+        """(감성 점수 -1.0~+1.0, 핵심 내러티브)"""
+        index, narrative = self.get_fear_greed_index(ticker)
+        return index_to_score(index), narrative
+
+
+class AsyncSentimentService:
+    """
+    이벤트 루프를 막지 않는 감성 점수 서비스입니다.
+
+    - 모델 호출은 스레드에서 실행하고 timeout초가 지나면 포기합니다 (중립 점수 반환, 캐시하지 않음).
+    - 캐시에 없는 티커들은 프롬프트 하나로 한 번에 평가합니다.
+    - 결과는 (티커, 시간 버킷) 키로 캐시합니다. 버킷 길이는 ttl_seconds이므로 버킷이 바뀌면 다시 평가합니다.
+    - 캐시는 cache_path(JSON)에 저장되어 재시작 후에도 같은 버킷이면 재사용됩니다.
+    """
+
+    def __init__(self, analyzer: SentimentAnalyzer, ttl_seconds: float = 1800, timeout: float = 20.0,
+                 cache_path: str | None = SENTIMENT_CACHE_PATH):
+        self.analyzer = analyzer
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self.cache_path = cache_path
+        self.cache = {}  # (ticker, bucket) -> (index, narrative)
+        self.request_count = 0
+        self._lock = asyncio.Lock()
+        self._load()
+
+    def _bucket(self, now: float | None = None) -> int:
+        return int((now if now is not None else time.time()) // self.ttl_seconds)
+
+    def _load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r") as f:
+                persisted = json.load(f)
+            current = self._bucket()
+            for item in persisted.get("entries", []):
+                if item["bucket"] == current and persisted.get("ttl_seconds") == self.ttl_seconds:
+                    self.cache[(item["ticker"], item["bucket"])] = (item["index"], item["narrative"])
+        except Exception as e:
+            print(f"  - [Sentiment] 저장된 감성 캐시({self.cache_path}) 로드 실패: {e}")
+
+    def _persist(self):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            entries = [
+                {"ticker": ticker, "bucket": bucket, "index": index, "narrative": narrative}
+                for (ticker, bucket), (index, narrative) in self.cache.items()
+            ]
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"ttl_seconds": self.ttl_seconds, "entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"  - [Sentiment] 감성 캐시 저장 실패({self.cache_path}): {e}")
+
+    async def get_fear_greed_indices(self, tickers) -> dict:
+        """
+        Returns:
+            dict: {ticker: (공포-탐욕 지수, 핵심 내러티브)}. 평가하지 못한 티커는 (50, 사유)입니다.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        async with self._lock:  # 동시에 들어온 요청은 앞선 요청이 채운 캐시를 재사용
+            bucket = self._bucket()
+            missing = [ticker for ticker in tickers if (ticker, bucket) not in self.cache]
+            failure = None
+            if missing:
+                print(f"  - [Sentiment] {len(missing)}개 티커의 감성을 한 번의 요청으로 평가합니다: {missing}")
+                self.request_count += 1
+                try:
+                    fetched = await asyncio.wait_for(
+                        asyncio.to_thread(self.analyzer.get_fear_greed_indices, missing), self.timeout
+                    )
+                except asyncio.TimeoutError:
+                    fetched, failure = {}, "시간 초과"
+                    print(f"  - [Sentiment] 모델 응답 시간 초과({self.timeout}s). 중립 점수를 사용합니다.")
+                except Exception as e:
+                    fetched, failure = {}, "API 호출 실패"
+                    print(f"  - [Sentiment] 감성 평가 중 오류: {e}")
+                if fetched:
+                    # 지난 버킷 항목은 정리하고 새 결과 저장
+                    self.cache = {key: value for key, value in self.cache.items() if key[1] == bucket}
+                    for ticker, result in fetched.items():
+                        self.cache[(ticker, bucket)] = result
+                    self._persist()
+            return {
+                ticker: self.cache.get((ticker, bucket), (NEUTRAL_INDEX, failure or "지수 파싱 실패"))
+                for ticker in tickers
+            }
+
+    async def get_sentiment_scores(self, tickers) -> dict:
+        """{ticker: 감성 점수(-1.0~+1.0)}"""
+        indices = await self.get_fear_greed_indices(tickers)
+        return {ticker: index_to_score(index) for ticker, (index, _) in indices.items()}
+
+    async def get_sentiment_score(self, ticker: str) -> tuple[float, str]:
+        index, narrative = (await self.get_fear_greed_indices([ticker]))[ticker]
+        return index_to_score(index), narrative
+
 
 if __name__ == "__main__":
     try:
@@ -9,10 +9,10 @@ from gymnasium.wrappers import FlattenObservation
 from preprocessor import DataPreprocessor
 from trading_env_simple import SimpleTradingEnv
 from market_regime_detector import get_market_regime_dataframe
+from core.numpy_policy import export_sb3_policy
 
 # --- Constants ---
 LOOKBACK_WINDOW = 50
-DATA_PATH = "cache/preprocessed_data.pkl"
 LOG_DIR_BASE = "specialist_rl_tensorboard_logs/"
 MODEL_SAVE_PATH_BASE = "specialist_agent_"  # Prefix for specialist models
 STATS_SAVE_PATH = "specialist_stats.json"
@@ -27,8 +27,8 @@ def train_specialist_agents(start_date: pd.Timestamp, end_date: pd.Timestamp, to
     # --- 1. Run Preprocessing ---
     print('데이터 로딩 및 전처리 시작...')
     preprocessor = DataPreprocessor()
-    all_data_dict = preprocessor.run_and_save_to_pickle(DATA_PATH)
-    print(f'전처리된 데이터 {DATA_PATH}에 저장 완료.')
+    preprocessor.materialize()  # 원본 캔들/특징 정의가 그대로면 계산하지 않음
+    all_data_dict = preprocessor.load_features(start_date, end_date)
 
     if not all_data_dict:
         print("오류: 전처리된 데이터가 없습니다. 훈련을 중단합니다.")
@@ -106,6 +106,10 @@ def train_specialist_agents(start_date: pd.Timestamp, end_date: pd.Timestamp, to
             if regime not in specialist_stats:
                  specialist_stats[regime] = {'wins': 0, 'losses': 0, 'total_profit': 0.0, 'total_loss': 0.0, 'trades': 0}
 
+    # --- 4. Export torch-free runtime weights (.npz) for the live image ---
+    for regime in regimes:
+        export_sb3_policy(f"{MODEL_SAVE_PATH_BASE}{regime.lower()}.zip")
+
     # Save initial specialist stats
     with open(STATS_SAVE_PATH, 'w') as f:
         json.dump(specialist_stats, f, indent=4)
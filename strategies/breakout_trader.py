@@ -2,13 +2,16 @@ import asyncio
 import time
 import pandas as pd
 from core.exchange import UpbitService
+from core.market_context import get_fresh_price
 
 
 class BreakoutTrader:
     def __init__(
-        self, upbit_service: UpbitService, ticker: str, allocated_capital: float
+        self, upbit_service: UpbitService, ticker: str, allocated_capital: float,
+        market_context_provider=None,
     ):
         self.upbit_service = upbit_service
+        self.market_context_provider = market_context_provider  # 선택: 사이클 공유 MarketContext (읽기 전용)
         self.ticker = ticker
         self.allocated_capital = allocated_capital
         self.position_held = False
@@ -45,22 +48,18 @@ class BreakoutTrader:
         while True:
             try:
                 # Fetch daily OHLCV to calculate pivot points and breakout values
-                ohlcv_daily_raw = await self.upbit_service.exchange.fetch_ohlcv(
-                    self.ticker, "1d", limit=2
-                )
-                if not ohlcv_daily_raw or len(ohlcv_daily_raw) < 2:
+                df_daily = await self.upbit_service.get_ohlcv(self.ticker, "1d", 2)
+                if df_daily is None or len(df_daily) < 2:
                     print(f"Not enough daily OHLCV data for {self.ticker}. Retrying...")
                     await asyncio.sleep(interval_seconds)
                     continue
 
-                df_daily = pd.DataFrame(
-                    ohlcv_daily_raw,
-                    columns=["timestamp", "open", "high", "low", "close", "volume"],
-                )
-
                 self._calculate_breakout_levels(df_daily)
 
-                current_price = await self.upbit_service.get_current_price(self.ticker)
+                market_context = self.market_context_provider.latest if self.market_context_provider else None
+                current_price = await get_fresh_price(
+                    self.upbit_service, self.ticker, market_context, max_age=interval_seconds
+                )
                 if current_price is None:
                     await asyncio.sleep(interval_seconds)
                     continue
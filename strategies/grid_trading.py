@@ -1,5 +1,6 @@
 import asyncio
 from core.exchange import UpbitService
+from core.market_context import get_fresh_price
 
 
 class GridTrader:
@@ -11,8 +12,10 @@ class GridTrader:
         upper_price: float,
         grid_count: int,
         allocated_capital: float,
+        market_context_provider=None,
     ):
         self.upbit_service = upbit_service
+        self.market_context_provider = market_context_provider  # 선택: 사이클 공유 MarketContext (읽기 전용)
         self.ticker = ticker
         self.lower_price = lower_price
         self.upper_price = upper_price
@@ -94,7 +97,10 @@ class GridTrader:
         print(f"Starting GridTrader for {self.ticker}...")
         while True:
             try:
-                current_price = await self.upbit_service.get_current_price(self.ticker)
+                market_context = self.market_context_provider.latest if self.market_context_provider else None
+                current_price = await get_fresh_price(
+                    self.upbit_service, self.ticker, market_context, max_age=interval_seconds
+                )
                 if current_price is None:
                     print(
                         f"Could not fetch current price for {self.ticker}. Retrying..."
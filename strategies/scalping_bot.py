@@ -1,6 +1,7 @@
 import asyncio
 import pandas as pd
 from core.exchange import UpbitService
+from core.market_context import get_fresh_price
 
 import time
 
@@ -12,8 +13,10 @@ class ScalpingBot:
         ticker: str,
         allocated_capital: float,
         trade_amount: float,
+        market_context_provider=None,
     ):
         self.upbit_service = upbit_service
+        self.market_context_provider = market_context_provider  # 선택: 사이클 공유 MarketContext (읽기 전용)
         self.ticker = ticker
         self.allocated_capital = allocated_capital
         self.trade_amount = trade_amount
@@ -29,21 +32,11 @@ class ScalpingBot:
         )
 
     async def _get_ohlcv(self, timeframe="15m", limit=20):
-        try:
-            ohlcv = await self.upbit_service.exchange.fetch_ohlcv(
-                self.ticker, timeframe, limit=limit
-            )
-            if not ohlcv or len(ohlcv) < limit:
-                return None
-            df = pd.DataFrame(
-                ohlcv, columns=["timestamp", "open", "high", "low", "close", "volume"]
-            )
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-            df.set_index("timestamp", inplace=True)
-            return df
-        except Exception as e:
-            print(f"Error fetching OHLCV for {self.ticker}: {e}")
+        # UpbitService의 증분 캔들 캐시를 사용 (최초 1회 이후에는 최신 캔들만 조회)
+        df = await self.upbit_service.get_ohlcv(self.ticker, timeframe, limit)
+        if df is None or len(df) < limit:
             return None
+        return df
 
     async def run(self, interval_seconds: int = 15):
         print(f"단기 부대(ScalpingBot) 운영 시작: {self.ticker}...")
@@ -62,7 +55,10 @@ class ScalpingBot:
                 prev_ema5 = df["EMA_5"].iloc[-2]
                 prev_ema10 = df["EMA_10"].iloc[-2]
 
-                current_price = await self.upbit_service.get_current_price(self.ticker)
+                market_context = self.market_context_provider.latest if self.market_context_provider else None
+                current_price = await get_fresh_price(
+                    self.upbit_service, self.ticker, market_context, max_age=interval_seconds
+                )
                 if current_price is None:
                     await asyncio.sleep(interval_seconds)
                     continue
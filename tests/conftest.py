@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 저장소 루트의 평면 모듈(live_trader, preprocessor, ...)과 core/ 네임스페이스를 import할 수 있게 함
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
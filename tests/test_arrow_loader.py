@@ -0,0 +1,120 @@
+"""
+MappedFrame: 정렬/미정렬 파일, 압축/변환 파일의 zero_copy 여부, 정수(epoch ms)/문자열/타임존 구간 경계,
+inclusive_end를 확인합니다. 결과는 pandas 마스크로 자른 값과 비교합니다.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pytest
+
+from core.arrow_loader import MappedFrame, convert, write_frame
+
+ROWS = 500
+
+
+def _features(rows: int = ROWS) -> pd.DataFrame:
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=rows, freq="1min"),
+        "close": np.arange(rows, dtype=np.float64),
+        "volume": np.arange(rows, dtype=np.int64) * 10,
+    })
+
+
+def _expected(df: pd.DataFrame, start, end, inclusive_end: bool = False) -> pd.DataFrame:
+    index = df.set_index("timestamp").sort_index()
+    mask = (index.index >= start) & ((index.index <= end) if inclusive_end else (index.index < end))
+    return index[mask]
+
+
+def _assert_frame(mapped: MappedFrame, df: pd.DataFrame, start, end, inclusive_end: bool = False, bounds=None):
+    """bounds(start, end)로 읽은 frame()이 [start, end) 마스크 결과와 같은지 (bounds가 없으면 start/end 그대로)"""
+    frame = mapped.frame(*(bounds or (start, end)), inclusive_end=inclusive_end)
+    expected = _expected(df, start, end, inclusive_end)
+    np.testing.assert_array_equal(frame.index.to_numpy("datetime64[ms]"), expected.index.to_numpy("datetime64[ms]"))
+    np.testing.assert_array_equal(frame["close"].to_numpy(), expected["close"].to_numpy())
+    np.testing.assert_array_equal(frame["volume"].to_numpy(), expected["volume"].to_numpy())
+
+
+START, END = pd.Timestamp("2024-01-01 01:00"), pd.Timestamp("2024-01-01 03:30")
+
+
+def test_converted_file_is_zero_copy(tmp_path):
+    df = _features()
+    path = str(tmp_path / "converted.feather")
+    write_frame(path, df)
+    mapped = MappedFrame(path)
+    assert mapped.zero_copy
+    view = mapped.column("close", START, END)
+    assert not view.flags.writeable and not view.flags.owndata
+    _assert_frame(mapped, df, START, END)
+
+
+def test_compressed_file_is_copied_until_converted(tmp_path):
+    df = _features()
+    path = str(tmp_path / "compressed.feather")
+    df.to_feather(path)  # pandas 기본 lz4 압축
+    mapped = MappedFrame(path)
+    assert not mapped.zero_copy
+    _assert_frame(mapped, df, START, END)
+
+    convert(path)
+    converted = MappedFrame(path)
+    assert converted.zero_copy
+    _assert_frame(converted, df, START, END)
+
+
+def test_unsorted_file_is_sorted_on_open(tmp_path):
+    df = _features()
+    shuffled = df.sample(frac=1.0, random_state=0).reset_index(drop=True)
+    path = str(tmp_path / "unsorted.feather")
+    feather.write_feather(pa.Table.from_pandas(shuffled, preserve_index=False), path, compression="uncompressed")
+    mapped = MappedFrame(path)
+    assert not mapped.zero_copy
+    assert np.all(np.diff(mapped.column("timestamp").view(np.int64)) > 0)
+    _assert_frame(mapped, df, START, END)
+    _assert_frame(mapped, df, df["timestamp"].min(), df["timestamp"].max(), inclusive_end=True)
+
+
+@pytest.mark.parametrize("time_dtype", ["datetime", "epoch_ms"])
+def test_int_str_and_tz_aware_bounds_agree(tmp_path, time_dtype):
+    df = _features()
+    stored = df.copy()
+    if time_dtype == "epoch_ms":
+        stored["timestamp"] = df["timestamp"].to_numpy("datetime64[ms]").astype(np.int64)
+    path = str(tmp_path / f"{time_dtype}.feather")
+    write_frame(path, stored)
+    mapped = MappedFrame(path)
+
+    start_ms = int(START.to_datetime64().astype("datetime64[ms]").astype(np.int64))
+    end_ms = int(END.to_datetime64().astype("datetime64[ms]").astype(np.int64))
+    bounds = [
+        (START, END),
+        (str(START), str(END)),
+        (start_ms, end_ms),
+        (np.int64(start_ms), np.int64(end_ms)),
+        (START.tz_localize("UTC").tz_convert("Asia/Seoul"), END.tz_localize("UTC").tz_convert("Asia/Seoul")),
+        ("2024-01-01 10:00+09:00", "2024-01-01 12:30+09:00"),
+    ]
+    expected = mapped.slice(START, END)
+    assert expected.stop - expected.start == 150
+    for start, end in bounds:
+        assert mapped.slice(start, end) == expected, (start, end)
+    _assert_frame(mapped, df, START, END, bounds=(start_ms, end_ms))
+
+
+def test_inclusive_end(tmp_path):
+    df = _features()
+    path = str(tmp_path / "data.feather")
+    write_frame(path, df)
+    mapped = MappedFrame(path)
+
+    exclusive = mapped.slice(START, END)
+    inclusive = mapped.slice(START, END, inclusive_end=True)
+    assert inclusive.stop == exclusive.stop + 1
+    assert mapped.column("timestamp", START, END, inclusive_end=True)[-1] == END.to_datetime64()
+    _assert_frame(mapped, df, START, END, inclusive_end=True)
+    # 끝 경계가 캔들 사이에 있으면 inclusive_end와 관계없이 같은 범위
+    between = END + pd.Timedelta(seconds=30)
+    assert mapped.slice(START, between) == mapped.slice(START, between, inclusive_end=True)
+    assert mapped.slice(END, START) == slice(exclusive.stop, exclusive.stop)
@@ -0,0 +1,100 @@
+"""
+CandleStore: 중복 타임스탬프는 나중 조각이 이기고, 월 경계에서 파티션이 나뉘며,
+압축 후에도 캔들이 그대로이고, 구간 읽기가 파티션 경계에서 정확히 잘리는지 확인합니다.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.candle_store import CANDLE_COLUMNS, CandleStore
+
+TICKER = "BTC/KRW"
+TIMEFRAME = "1h"
+HOUR_MS = 3_600_000
+
+
+def _ms(value: str) -> int:
+    return int(pd.Timestamp(value).value // 1_000_000)
+
+
+def _candles(start: str, end: str, close: float = 100.0) -> dict:
+    timestamps = np.arange(_ms(start), _ms(end), HOUR_MS, dtype=np.int64)
+    columns = {"timestamp": timestamps}
+    columns.update({name: np.full(len(timestamps), close) for name in CANDLE_COLUMNS})
+    columns["volume"] = np.arange(len(timestamps), dtype=np.float64)
+    return columns
+
+
+def test_duplicate_timestamps_last_fragment_wins(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.append(TICKER, TIMEFRAME, _candles("2024-01-01", "2024-01-03", close=100.0))
+    store.append(TICKER, TIMEFRAME, _candles("2024-01-02", "2024-01-04", close=200.0))  # 1월 2일 하루가 겹침
+
+    columns = store.read_columns(TICKER, TIMEFRAME)
+    np.testing.assert_array_equal(columns["timestamp"], np.arange(_ms("2024-01-01"), _ms("2024-01-04"), HOUR_MS))
+    overlap = columns["timestamp"] >= _ms("2024-01-02")
+    assert np.all(columns["close"][overlap] == 200.0) and np.all(columns["close"][~overlap] == 100.0)
+    assert store.row_count(TICKER, TIMEFRAME) == 24 * 4  # 압축 전 메타데이터 합계는 겹친 만큼 더 셈
+
+
+def test_append_splits_at_month_boundary(tmp_path):
+    store = CandleStore(str(tmp_path))
+    data = _candles("2024-01-30", "2024-03-02")
+    shuffled = np.random.default_rng(0).permutation(len(data["timestamp"]))
+    assert store.append(TICKER, TIMEFRAME, {name: values[shuffled] for name, values in data.items()}) == len(shuffled)
+
+    assert store.months(TICKER, TIMEFRAME) == ["2024-01", "2024-02", "2024-03"]
+    for month, start, end in (("2024-01", "2024-01-30", "2024-02-01"), ("2024-02", "2024-02-01", "2024-03-01"),
+                              ("2024-03", "2024-03-01", "2024-03-02")):
+        (fragment,) = store.fragments(TICKER, TIMEFRAME, month)
+        np.testing.assert_array_equal(CandleStore._read_fragment(fragment)["timestamp"],
+                                      np.arange(_ms(start), _ms(end), HOUR_MS))
+    np.testing.assert_array_equal(store.read_columns(TICKER, TIMEFRAME)["volume"], data["volume"])
+    assert store.last_timestamp(TICKER, TIMEFRAME) == _ms("2024-03-02") - HOUR_MS
+
+
+def test_compaction_preserves_rows(tmp_path):
+    store = CandleStore(str(tmp_path), compact_threshold=100)
+    for day in range(1, 8):  # 하루씩, 이틀치를 겹쳐 추가
+        store.append(TICKER, TIMEFRAME, _candles(f"2024-01-{day:02d}", f"2024-01-{day + 2:02d}", close=float(day)))
+    before = store.read(TICKER, TIMEFRAME)
+    assert len(store.fragments(TICKER, TIMEFRAME, "2024-01")) == 7
+
+    assert store.compact(TICKER, TIMEFRAME) == {"BTC_KRW_1h": 1}
+    assert len(store.fragments(TICKER, TIMEFRAME, "2024-01")) == 1
+    pd.testing.assert_frame_equal(store.read(TICKER, TIMEFRAME), before)
+    assert store.row_count(TICKER, TIMEFRAME) == len(before) == 24 * 8
+
+
+def test_automatic_compaction_at_threshold(tmp_path):
+    store = CandleStore(str(tmp_path), compact_threshold=3)
+    for day in range(1, 4):
+        store.append(TICKER, TIMEFRAME, _candles(f"2024-01-{day:02d}", f"2024-01-{day + 1:02d}"))
+    assert len(store.fragments(TICKER, TIMEFRAME, "2024-01")) == 1
+    assert store.row_count(TICKER, TIMEFRAME) == 24 * 3
+
+
+def test_read_range_edges_and_partition_pruning(tmp_path, monkeypatch):
+    store = CandleStore(str(tmp_path))
+    store.append(TICKER, TIMEFRAME, _candles("2024-01-01", "2024-04-01"))
+
+    opened = []
+    read_fragment = CandleStore._read_fragment
+    monkeypatch.setattr(CandleStore, "_read_fragment", staticmethod(lambda path: opened.append(path) or read_fragment(path)))
+
+    # [2월 1일, 3월 1일): 정확히 2월 파티션 하나만 열고, 끝 경계(3월 1일 0시)는 제외
+    columns = store.read_columns(TICKER, TIMEFRAME, "2024-02-01", "2024-03-01")
+    np.testing.assert_array_equal(columns["timestamp"], np.arange(_ms("2024-02-01"), _ms("2024-03-01"), HOUR_MS))
+    assert [os.path.basename(os.path.dirname(path)) for path in opened] == ["2024-02"]
+
+    # 월 중간에서 시작/끝: 양쪽 파티션을 열고 시작은 포함, 끝은 제외 (epoch ms 정수도 같은 구간)
+    opened.clear()
+    start, end = _ms("2024-01-31 23:00"), _ms("2024-03-01 01:00")
+    columns = store.read_columns(TICKER, TIMEFRAME, start, end)
+    np.testing.assert_array_equal(columns["timestamp"], np.arange(start, end, HOUR_MS))
+    assert [os.path.basename(os.path.dirname(path)) for path in opened] == ["2024-01", "2024-02", "2024-03"]
+
+    assert len(store.read_columns(TICKER, TIMEFRAME, "2024-05-01")["timestamp"]) == 0
+    frame = store.read(TICKER, TIMEFRAME, end="2024-01-01 03:00")
+    assert list(frame.index) == list(pd.date_range("2024-01-01", periods=3, freq="h"))
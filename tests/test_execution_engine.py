@@ -0,0 +1,101 @@
+"""
+UPBIT_REAL_ORDERS 경로: Upbit 주문 제출 응답(status='open', filled=0, cost=None)을 그대로 흉내 내는 거래소로
+체결 확인(fetch_order 폴링) 후에만 포지션/손절 감시/BalanceBook이 갱신되는지 확인합니다.
+"""
+import asyncio
+
+from core.exchange import UpbitService
+from core.stop_monitor import StopMonitor
+from execution_engine_interface import UpbitExecutionEngine
+
+SYMBOL = "BTC/KRW"
+
+
+class SubmitOpenExchange:
+    """제출 응답은 항상 open/0 체결이고, fetch_order는 open_polls번 뒤에 fill대로 체결된 주문을 돌려줍니다."""
+
+    def __init__(self, fill: dict | None, open_polls: int = 2):
+        self.fill = fill  # {'filled', 'cost'}. None이면 끝까지 open
+        self.open_polls = open_polls
+        self.submitted = []
+        self.polls = 0
+
+    def _submit(self, side, symbol, amount):
+        order_id = str(len(self.submitted) + 1)
+        self.submitted.append((side, symbol, amount))
+        return {"id": order_id, "symbol": symbol, "status": "open", "filled": 0.0, "cost": None, "average": None}
+
+    async def create_market_buy_order_with_cost(self, symbol, cost):
+        return self._submit("buy", symbol, cost)
+
+    async def create_market_sell_order(self, symbol, amount):
+        return self._submit("sell", symbol, amount)
+
+    async def fetch_order(self, order_id, symbol=None):
+        self.polls += 1
+        if self.fill is None or self.polls <= self.open_polls:
+            return {"id": order_id, "symbol": symbol, "status": "open", "filled": 0.0, "cost": None, "average": None}
+        return {"id": order_id, "symbol": symbol, "status": "closed", "average": None, **self.fill}
+
+
+def _engine(exchange, free: dict):
+    service = UpbitService("fake", "fake")
+    for name in ("create_market_buy_order_with_cost", "create_market_sell_order", "fetch_order"):
+        setattr(service.exchange, name, getattr(exchange, name))
+    service.fill_timeout, service.fill_poll_interval = 0.2, 0.01
+    service.balance_book.free = dict(free)
+    reconciles = []
+    service.balance_book.request_reconcile = lambda: reconciles.append(True)
+    engine = UpbitExecutionEngine(service, {}, real_orders=True)
+    engine.stop_monitor = StopMonitor(engine, stop_loss_pct=0.05)
+    return engine, service.balance_book, reconciles
+
+
+def test_buy_waits_for_confirmed_fill():
+    exchange = SubmitOpenExchange({"filled": 0.5, "cost": 50_000.0})
+    engine, book, _ = _engine(exchange, {"KRW": 1_000_000.0})
+
+    result = asyncio.run(engine.create_market_buy_order(SYMBOL, 50_000.0))
+
+    assert result["status"] == "ok" and result["quantity"] == 0.5 and result["price"] == 100_000.0
+    assert engine.open_positions[SYMBOL] == {"entry_price": 100_000.0, "quantity": 0.5}
+    assert SYMBOL in engine.stop_monitor
+    assert book.free == {"KRW": 950_000.0, "BTC": 0.5}
+    assert exchange.polls == 3
+
+
+def test_sell_applies_only_confirmed_fill():
+    exchange = SubmitOpenExchange({"filled": 0.5, "cost": 55_000.0})
+    engine, book, _ = _engine(exchange, {"KRW": 950_000.0, "BTC": 0.5})
+    engine.open_positions[SYMBOL] = {"entry_price": 100_000.0, "quantity": 0.5}
+    engine.stop_monitor.watch(SYMBOL, 100_000.0, 0.5)
+
+    result = asyncio.run(engine.create_market_sell_order(SYMBOL, 0.5))
+
+    assert result["status"] == "ok" and result["price"] == 110_000.0
+    assert SYMBOL not in engine.open_positions and SYMBOL not in engine.stop_monitor
+    assert book.free == {"KRW": 1_005_000.0}
+
+
+def test_unconfirmed_order_leaves_balance_and_is_not_resubmitted():
+    exchange = SubmitOpenExchange(None)
+    engine, book, reconciles = _engine(exchange, {"KRW": 950_000.0, "BTC": 0.5})
+    engine.open_positions[SYMBOL] = {"entry_price": 100_000.0, "quantity": 0.5}
+    monitor = engine.stop_monitor
+    monitor.watch(SYMBOL, 100_000.0, 0.5)
+
+    async def trigger_stop():
+        monitor.start()
+        monitor.on_price(SYMBOL, 90_000.0)
+        await asyncio.wait_for(monitor._queue.join(), timeout=5)
+        for _ in range(3):
+            monitor.on_price(SYMBOL, 89_000.0)
+            await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(trigger_stop())
+
+    assert exchange.submitted == [("sell", SYMBOL, 0.5)]  # 체결을 모르는 주문을 다시 내지 않음
+    assert book.free == {"KRW": 950_000.0, "BTC": 0.5}
+    assert reconciles
+    assert engine.open_positions[SYMBOL]["quantity"] == 0.5  # 잔고 재조정 전까지 포지션 유지
@@ -0,0 +1,54 @@
+"""
+특징 저장소 증분 갱신: 새 캔들만 계산해 추가한 결과가 전체 기록으로 다시 계산한 결과와 같은지 확인합니다.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.feature_store import FeatureStore
+from preprocessor import FEATURE_COLUMNS, DataPreprocessor
+
+TICKER = "BTC/KRW"
+
+
+def _candles(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 50_000_000 * np.exp(np.cumsum(rng.normal(0, 0.002, rows)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = close * rng.uniform(0.0005, 0.003, rows)
+    index = pd.DatetimeIndex(pd.date_range("2024-01-01", periods=rows, freq="1min"), name="timestamp")
+    return pd.DataFrame({
+        "open": open_, "high": np.maximum(open_, close) + spread, "low": np.minimum(open_, close) - spread,
+        "close": close, "volume": rng.uniform(0.1, 5.0, rows),
+    }, index=index)
+
+
+@pytest.fixture
+def preprocessor(tmp_path):
+    return DataPreprocessor(target_coins=[TICKER], feature_store=FeatureStore(str(tmp_path / "features")))
+
+
+def test_compute_features_has_all_columns(preprocessor):
+    features, _ = preprocessor.compute_features(_candles(600))
+    assert features is not None and list(features.columns) == FEATURE_COLUMNS
+    assert len(features) > 0
+
+
+def test_incremental_materialize_matches_full_recompute(preprocessor):
+    candles = _candles(4000)
+    store = preprocessor.feature_store
+    definition_hash = preprocessor.feature_definition_hash()
+
+    assert store.materialize(TICKER, candles.iloc[:2500], preprocessor.compute_features, definition_hash) == "full"
+    assert store.materialize(TICKER, candles, preprocessor.compute_features, definition_hash) == "incremental"
+    assert store.materialize(TICKER, candles, preprocessor.compute_features, definition_hash) == "unchanged"
+
+    incremental = store.read(TICKER)
+    full, _ = preprocessor.compute_features(candles, store.entry(TICKER)["regime_map"])
+    full = full.loc[full.index >= incremental.index[0]]
+
+    assert incremental.index.equals(full.index)
+    assert np.array_equal(incremental["regime"].to_numpy(), full["regime"].to_numpy())
+    numeric = [col for col in FEATURE_COLUMNS if col != "regime"]
+    np.testing.assert_allclose(incremental[numeric].to_numpy(dtype=np.float64),
+                               full[numeric].to_numpy(dtype=np.float64), rtol=1e-6, atol=1e-9)
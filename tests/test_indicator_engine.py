@@ -0,0 +1,86 @@
+"""
+StreamingIndicatorEngine이 pandas_ta(precompute_all_indicators)와 같은 지표를 내는지 고정된 합성 캔들로 확인합니다.
+배치 / 캔들별 update / OHLCVRingBuffer 뷰 sync, 그리고 버퍼가 밀려난 뒤의 재동기화까지 비교합니다.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicator_engine import INDICATOR_COLUMNS, OHLCV_COLUMNS, OUTPUT_COLUMNS, StreamingIndicatorEngine
+from market_regime_detector import precompute_all_indicators
+
+HOUR_MS = 3_600_000
+BARS = 600
+
+
+def _candles(bars: int = BARS, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 1000.0 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.005, bars)) * close
+    df = pd.DataFrame({
+        "open": open_, "high": np.maximum(open_, close) + spread, "low": np.minimum(open_, close) - spread,
+        "close": close, "volume": rng.uniform(1, 100, bars),
+    }, index=pd.to_datetime(1_700_000_000_000 + np.arange(bars) * HOUR_MS, unit="ms"))
+    df.index.name = "timestamp"
+    return df
+
+
+def _assert_matches(actual: np.ndarray, expected: np.ndarray, column: str):
+    assert np.array_equal(np.isnan(actual), np.isnan(expected)), f"{column}: NaN 위치 불일치"
+    valid = ~np.isnan(expected)
+    scale = max(np.abs(expected[valid]).max(), 1.0) if valid.any() else 1.0
+    np.testing.assert_allclose(actual[valid], expected[valid], rtol=0, atol=1e-8 * scale, err_msg=column)
+
+
+def _assert_frame_matches(actual: pd.DataFrame, expected: pd.DataFrame):
+    for column in INDICATOR_COLUMNS:
+        _assert_matches(actual[column].to_numpy(np.float64), expected[column].to_numpy(np.float64), column)
+
+
+@pytest.fixture(scope="module")
+def candles():
+    return _candles()
+
+
+@pytest.fixture(scope="module")
+def expected(candles):
+    return precompute_all_indicators(candles.copy())
+
+
+def test_batch_matches_pandas_ta(candles, expected):
+    actual = StreamingIndicatorEngine().batch(candles)
+    assert list(actual.columns) == list(expected.columns)
+    _assert_frame_matches(actual, expected)
+
+
+def test_update_and_preview_match_pandas_ta(candles, expected):
+    engine = StreamingIndicatorEngine()
+    engine.batch(candles.iloc[:-50])
+    rows, previews = [], []
+    for bar in candles[OHLCV_COLUMNS].to_numpy()[-50:]:
+        previews.append(engine.preview(*bar))
+        rows.append(engine.update(*bar))
+    for streamed in (rows, previews):
+        actual = pd.DataFrame(streamed, columns=OUTPUT_COLUMNS)
+        _assert_frame_matches(actual, expected.iloc[-50:])
+
+
+def test_sync_follows_ring_buffer_and_resyncs_after_gap(candles, expected):
+    timestamps = candles.index.as_unit("ms").asi8
+    values = candles[OHLCV_COLUMNS].to_numpy(np.float64)
+    engine = StreamingIndicatorEngine(history=BARS)
+
+    # 버퍼가 자라는 동안: 매번 새 마감 캔들만 반영, 마지막 캔들은 진행 중(pending)으로 미리보기
+    for end in (300, 301, 320, 400):
+        added = engine.sync(timestamps[:end], values[:end])
+        assert len(engine) == end - 1
+        _assert_frame_matches(engine.frame(), expected.iloc[:end])
+    assert added == 80
+
+    # 재동기화: 마지막으로 반영한 캔들이 버퍼에서 밀려난 창 -> 창 전체로 다시 계산 (pandas_ta도 같은 창으로 계산)
+    window = slice(450, BARS)
+    engine.sync(timestamps[window], values[window])
+    assert len(engine) == BARS - 450 - 1
+    window_expected = precompute_all_indicators(candles.iloc[window].copy())
+    _assert_frame_matches(engine.frame(), window_expected)
@@ -0,0 +1,100 @@
+"""
+ParallelLiquidator: 부분 체결, 응답 유실 뒤의 InsufficientFunds, 체결 조회(fetch_order) 실패를
+주문별로 처리하고 보고서를 끝까지 돌려주는지 MockExchange로 확인합니다.
+"""
+import asyncio
+
+import ccxt.async_support as ccxt
+
+from core.liquidation import MockExchange, ParallelLiquidator
+
+HOLDINGS = {"BTC/KRW": 1.0, "ETH/KRW": 2.0, "XRP/KRW": 3.0}
+
+
+class PartialFillExchange(MockExchange):
+    """첫 주문은 60%만 체결된 채 취소(최종 상태)되고, 이후 주문은 전량 체결됩니다."""
+
+    async def fetch_order(self, order_id, symbol=None):
+        order = await super().fetch_order(order_id, symbol)
+        first = min(i for i, o in self.orders.items() if o["symbol"] == order["symbol"])
+        if order["status"] == "closed" and order_id == first:
+            order.update(status="canceled", filled=order["filled"] * 0.6, cost=order["cost"] * 0.6)
+        return order
+
+
+class LostResponseExchange(MockExchange):
+    """lost_symbol의 첫 매도는 접수되지만 응답이 유실되고, 재제출은 잔고 부족으로 거절됩니다."""
+
+    def __init__(self, lost_symbol: str, **kwargs):
+        super().__init__(**kwargs)
+        self.lost_symbol = lost_symbol
+        self.sold = set()
+
+    async def create_market_sell_order(self, symbol, amount):
+        if symbol == self.lost_symbol:
+            if symbol in self.sold:
+                raise ccxt.InsufficientFunds("mock: insufficient funds")
+            self.sold.add(symbol)
+            await super().create_market_sell_order(symbol, amount)
+            raise ccxt.NetworkError("mock: response lost")
+        return await super().create_market_sell_order(symbol, amount)
+
+
+class FetchFailExchange(MockExchange):
+    """failing_symbol의 체결 조회는 재시도로 해결되지 않는 오류를 냅니다."""
+
+    def __init__(self, failing_symbol: str, **kwargs):
+        super().__init__(**kwargs)
+        self.failing_symbol = failing_symbol
+
+    async def fetch_order(self, order_id, symbol=None):
+        if symbol == self.failing_symbol:
+            raise ccxt.OrderNotFound("mock: order not found")
+        return await super().fetch_order(order_id, symbol)
+
+
+def _liquidate(exchange) -> dict:
+    liquidator = ParallelLiquidator(exchange, base_backoff=0.01, max_backoff=0.02,
+                                    fill_timeout=1.0, fill_poll_interval=0.01)
+    return asyncio.run(liquidator.liquidate(HOLDINGS))
+
+
+def _legs(report: dict) -> dict:
+    return {leg["symbol"]: leg for leg in report["legs"]}
+
+
+def test_partial_fill_resubmits_remaining_quantity():
+    exchange = PartialFillExchange(latency=0.0, fill_delay=0.0)
+    report = _liquidate(exchange)
+
+    assert report["flat"]
+    for symbol, quantity in HOLDINGS.items():
+        leg = _legs(report)[symbol]
+        assert leg["status"] == "flat" and leg["attempts"] == 2
+        assert abs(leg["filled"] - quantity) < 1e-9
+        assert abs(leg["proceeds"] - quantity * 1000.0) < 1e-6
+    resubmitted = [o["amount"] for o in exchange.orders.values() if o["symbol"] == "BTC/KRW"]
+    assert abs(resubmitted[1] - 0.4) < 1e-9
+
+
+def test_insufficient_funds_after_lost_response_is_unconfirmed():
+    exchange = LostResponseExchange("ETH/KRW", latency=0.0, fill_delay=0.0)
+    report = _liquidate(exchange)
+
+    legs = _legs(report)
+    assert not report["flat"]
+    assert legs["ETH/KRW"]["status"] == "unconfirmed"
+    assert legs["ETH/KRW"]["error"].startswith("InsufficientFunds")
+    assert legs["BTC/KRW"]["status"] == legs["XRP/KRW"]["status"] == "flat"
+
+
+def test_fetch_order_failure_marks_only_that_leg():
+    exchange = FetchFailExchange("XRP/KRW", latency=0.0, fill_delay=0.0)
+    report = _liquidate(exchange)
+
+    legs = _legs(report)
+    assert not report["flat"]
+    assert legs["XRP/KRW"]["status"] == "unconfirmed"
+    assert legs["XRP/KRW"]["error"].startswith("OrderNotFound")
+    assert legs["XRP/KRW"]["attempts"] == 1  # 체결 여부를 모르는 주문은 다시 내지 않음
+    assert legs["BTC/KRW"]["status"] == legs["ETH/KRW"]["status"] == "flat"
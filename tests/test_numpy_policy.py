@@ -0,0 +1,66 @@
+"""
+load_policy: zip에서 내보낸 .npz만 numpy 런타임으로 쓰고, 다른 zip(다시 훈련한 모델)의 .npz나
+해시가 없는 예전 .npz는 다시 내보내는지 확인합니다.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("stable_baselines3")
+gymnasium = pytest.importorskip("gymnasium")
+
+from stable_baselines3 import PPO  # noqa: E402
+
+from core.numpy_policy import NumpyPolicy, export_sb3_policy, file_sha256, load_policy, npz_matches  # noqa: E402
+
+
+class _Env(gymnasium.Env):
+    observation_space = gymnasium.spaces.Box(-1.0, 1.0, shape=(6,), dtype=np.float32)
+    action_space = gymnasium.spaces.Discrete(3)
+
+    def reset(self, *, seed=None, options=None):
+        return np.zeros(6, dtype=np.float32), {}
+
+    def step(self, action):
+        return np.zeros(6, dtype=np.float32), 0.0, True, False, {}
+
+
+def _save_model(path: str, seed: int):
+    PPO("MlpPolicy", _Env(), seed=seed, device="cpu").save(path)
+    return PPO.load(path, device="cpu")
+
+
+def _assert_same_actions(policy, model):
+    observations = np.random.default_rng(0).uniform(-1, 1, (256, 6)).astype(np.float32)
+    np.testing.assert_array_equal(policy.predict(observations, deterministic=True)[0],
+                                  model.predict(observations, deterministic=True)[0])
+
+
+def test_load_policy_uses_npz_only_for_its_source_zip(tmp_path):
+    zip_path = str(tmp_path / "specialist_agent_bullish.zip")
+    _save_model(zip_path, seed=1)
+    npz_path = export_sb3_policy(zip_path)
+    assert npz_matches(zip_path)
+    assert isinstance(load_policy(zip_path), NumpyPolicy)
+
+    retrained = _save_model(zip_path, seed=2)  # 같은 경로에 다시 훈련한 모델, 예전 .npz는 그대로
+    assert not npz_matches(zip_path)
+    policy = load_policy(zip_path)
+    assert isinstance(policy, NumpyPolicy)
+    assert npz_matches(zip_path)  # 다시 내보냄
+    with np.load(npz_path) as data:
+        assert str(data["source_sha256"]) == file_sha256(zip_path)
+    _assert_same_actions(policy, retrained)
+
+
+def test_npz_without_source_hash_is_reexported(tmp_path):
+    zip_path = str(tmp_path / "specialist_agent_bearish.zip")
+    model = _save_model(zip_path, seed=3)
+    npz_path = export_sb3_policy(zip_path)
+    with np.load(npz_path) as data:
+        legacy = {name: data[name] for name in data.files if name != "source_sha256"}
+    np.savez(npz_path, **legacy)
+
+    assert not npz_matches(zip_path)
+    policy = load_policy(zip_path)
+    assert npz_matches(zip_path)
+    _assert_same_actions(policy, model)
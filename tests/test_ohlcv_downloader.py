@@ -0,0 +1,106 @@
+"""
+AsyncOHLCVDownloader 체크포인트: 중단 후 재개, 끝 날짜 연장, 시작 날짜 변경을 MockCandleExchange로 확인합니다.
+저장소의 캔들이 요청 구간을 빠짐없이, 중복 없이 덮는지와 이미 받은 페이지를 다시 요청하지 않는지 봅니다.
+"""
+import asyncio
+import json
+import os
+
+import ccxt.async_support as ccxt
+import numpy as np
+
+from core.ohlcv_downloader import AsyncOHLCVDownloader, MockCandleExchange, _TickerJob
+from core.rate_limiter import UpbitRateLimiter
+
+TICKER = "BTC/KRW"
+TIMEFRAME = "1h"
+STEP_MS = 3_600_000
+
+
+def _ms(date: str) -> int:
+    return ccxt.Exchange.parse8601(date + "T00:00:00Z")
+
+
+class RecordingExchange(MockCandleExchange):
+    """요청한 since를 기록하고, fail_after번 응답한 뒤부터는 재시도로 해결되지 않는 오류를 냅니다."""
+
+    def __init__(self, fail_after: int | None = None):
+        super().__init__(latency=0.0, step_ms=STEP_MS)
+        self.fail_after = fail_after
+        self.served = []
+
+    async def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=200):
+        if self.fail_after is not None and len(self.served) >= self.fail_after:
+            raise ccxt.ExchangeError("mock: connection dropped")
+        page = await super().fetch_ohlcv(symbol, timeframe, since, limit)
+        self.served.append(since)
+        return page
+
+
+def _download(data_dir, exchange, start: str, end: str) -> dict:
+    downloader = AsyncOHLCVDownloader(exchange, UpbitRateLimiter({"candles": 1000}), str(data_dir),
+                                      limit=50, ranges_per_ticker=3)
+    return asyncio.run(downloader.download([TICKER], TIMEFRAME, start, end))
+
+
+def _stored(data_dir) -> np.ndarray:
+    downloader = AsyncOHLCVDownloader(MockCandleExchange(), data_dir=str(data_dir))
+    return downloader.store.read_columns(TICKER, TIMEFRAME)["timestamp"]
+
+
+def _checkpoint(data_dir) -> _TickerJob:
+    job = _TickerJob(os.path.join(str(data_dir), ".download"), TICKER, TIMEFRAME)
+    assert os.path.exists(job.checkpoint_path)
+    return job
+
+
+def _interrupt(data_dir, start: str, end: str, fail_after: int = 8) -> RecordingExchange:
+    exchange = RecordingExchange(fail_after)
+    assert len(_download(data_dir, exchange, start, end)[TICKER]) == 0  # 끝나지 않은 티커는 저장하지 않음
+    assert len(_stored(data_dir)) == 0
+    return exchange
+
+
+def test_resume_after_interrupt_has_no_gaps_or_duplicates(tmp_path):
+    first = _interrupt(tmp_path, "2024-01-01", "2024-02-01")
+    job = _checkpoint(tmp_path)
+    # 체크포인트 뒤에 쓰다 만 페이지(반쪽 레코드)가 남은 상황
+    with open(job.page_path(0), "ab") as f:
+        f.write(b"\x00" * 20)
+
+    second = RecordingExchange()
+    records = _download(tmp_path, second, "2024-01-01", "2024-02-01")[TICKER]
+
+    expected = np.arange(_ms("2024-01-01"), _ms("2024-02-01"), STEP_MS)
+    np.testing.assert_array_equal(records["timestamp"], expected)
+    np.testing.assert_array_equal(_stored(tmp_path), expected)
+    assert not set(first.served) & set(second.served)  # 받은 페이지를 다시 요청하지 않음
+    assert not os.path.exists(job.dir)  # 저장 후 스테이징 정리
+
+
+def test_extending_end_fetches_only_new_span(tmp_path):
+    first = _interrupt(tmp_path, "2024-01-01", "2024-02-01")
+    second = RecordingExchange()
+    _download(tmp_path, second, "2024-01-01", "2024-02-15")  # 중단된 체크포인트의 끝을 늘림
+    assert not set(first.served) & set(second.served)
+    np.testing.assert_array_equal(_stored(tmp_path), np.arange(_ms("2024-01-01"), _ms("2024-02-15"), STEP_MS))
+
+    third = RecordingExchange()
+    records = _download(tmp_path, third, "2024-01-01", "2024-03-01")  # 끝난 뒤 다시 늘림: 저장소 마지막 캔들 다음부터
+    assert min(third.served) == _ms("2024-02-15")
+    np.testing.assert_array_equal(records[TICKER]["timestamp"], np.arange(_ms("2024-02-15"), _ms("2024-03-01"), STEP_MS))
+    np.testing.assert_array_equal(_stored(tmp_path), np.arange(_ms("2024-01-01"), _ms("2024-03-01"), STEP_MS))
+
+
+def test_changing_start_discards_staging(tmp_path):
+    _interrupt(tmp_path, "2024-01-01", "2024-02-01")
+    with open(_checkpoint(tmp_path).checkpoint_path) as f:
+        checkpoint = json.load(f)
+    assert checkpoint["start"] == _ms("2024-01-01") and sum(state["rows"] for state in checkpoint["ranges"]) > 0
+
+    second = RecordingExchange()
+    _download(tmp_path, second, "2024-01-10", "2024-02-01")
+
+    assert min(second.served) == _ms("2024-01-10")
+    # 1월 1일부터 받아 둔 스테이징 캔들이 섞이지 않음
+    np.testing.assert_array_equal(_stored(tmp_path), np.arange(_ms("2024-01-10"), _ms("2024-02-01"), STEP_MS))
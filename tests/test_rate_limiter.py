@@ -0,0 +1,73 @@
+"""
+Remaining-Req 헤더 보정: 동시 요청이 거래소 인스턴스를 공유해도 각 응답의 헤더가 도착 즉시,
+헤더에 적힌 group의 버킷에 한 번씩만 반영되는지 확인합니다.
+"""
+import asyncio
+
+import ccxt.async_support as ccxt
+
+from core.exchange import UpbitService
+from core.rate_limiter import PRIORITY_OHLCV, PRIORITY_ORDER, UpbitRateLimiter
+
+
+class RecordingLimiter(UpbitRateLimiter):
+    def __init__(self):
+        super().__init__()
+        self.synced = []
+
+    def update_from_headers(self, headers):
+        group = super().update_from_headers(headers)
+        if group is not None:
+            self.synced.append((group, self.buckets[group].tokens))
+        return group
+
+
+def _respond(exchange, group: str, sec: int):
+    """ccxt fetch()가 응답마다 하는 일: on_rest_response 호출 후 공유 속성 last_response_headers를 덮어씀"""
+    headers = {"Remaining-Req": f"group={group}; min=1800; sec={sec}"}
+    exchange.on_rest_response(200, "OK", "https://api.upbit.com", "GET", headers, "{}", {}, None)
+    exchange.last_response_headers = headers
+
+
+def test_update_from_headers_uses_header_group():
+    limiter = UpbitRateLimiter()
+    assert limiter.update_from_headers({"remaining-req": "group=order; min=480; sec=2"}) == "order"
+    assert limiter.buckets["order"].tokens <= 2
+    assert limiter.buckets["default"].tokens == limiter.buckets["default"].capacity
+    assert limiter.update_from_headers({"Content-Type": "application/json"}) is None
+
+
+def test_concurrent_responses_sync_their_own_group_once():
+    limiter = RecordingLimiter()
+    service = UpbitService("fake", "fake", rate_limiter=limiter)
+    exchange = service.exchange
+    candles_answered = asyncio.Event()
+
+    async def fetch_balance():
+        _respond(exchange, "default", 0)
+        await candles_answered.wait()  # 응답 처리 중에 다른 요청의 응답이 도착해 last_response_headers를 덮어씀
+        return {"free": {}}
+
+    async def fetch_ohlcv():
+        await asyncio.sleep(0)
+        _respond(exchange, "candles", 7)
+        candles_answered.set()
+        return []
+
+    async def fetch_order():
+        raise ccxt.NetworkError("mock: connection reset")  # 응답 없음: 이전 헤더를 다시 반영하면 안 됨
+
+    async def main():
+        await asyncio.gather(service.request("default", PRIORITY_ORDER, fetch_balance),
+                             service.request("candles", PRIORITY_OHLCV, fetch_ohlcv))
+        try:
+            await service.request("order", PRIORITY_ORDER, fetch_order)
+        except ccxt.NetworkError:
+            pass
+
+    asyncio.run(main())
+    assert [group for group, _ in limiter.synced] == ["default", "candles"]
+    assert limiter.synced[0][1] <= 0.0 and limiter.synced[1][1] <= 7
+    assert limiter.attach(exchange)  # 같은 리미터를 다시 연결해도 훅이 겹치지 않음
+    _respond(exchange, "order", 3)
+    assert [group for group, _ in limiter.synced] == ["default", "candles", "order"]
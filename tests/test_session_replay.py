@@ -0,0 +1,99 @@
+"""
+가짜 거래소로 LiveTrader 세션을 녹화한 뒤, 녹화 로그를 재생해 결정 다이제스트가 같은지 확인합니다.
+"""
+import asyncio
+import math
+
+import numpy as np
+import pytest
+
+import live_trader
+from core.exchange import UpbitService
+from core.session_recorder import AcceleratedClock, SessionRecorder, replay_live_session, run_live_session
+
+SYMBOLS = ["BTC/KRW", "ETH/KRW", "XRP/KRW"]
+HOUR_MS = 3_600_000
+SESSION_START = 1_700_000_000  # 시봉 경계에서 800초 떨어진 시각 (10분 사이클이 경계와 겹치지 않음)
+CYCLES = 4
+
+
+def _price(symbol: str, timestamp_ms: int) -> float:
+    index = SYMBOLS.index(symbol)
+    return 1000.0 * (index + 1) * (1 + 0.05 * math.sin(timestamp_ms / HOUR_MS / 7 + index))
+
+
+class FakeUpbitService(UpbitService):
+    """결정적인 시세/캔들/잔고를 돌려주는 거래소. 응답은 시계(clock.time) 기준으로 만들어집니다."""
+
+    def __init__(self, clock):
+        super().__init__("fake", "fake", clock=clock)
+        exchange = self.exchange
+        markets = {
+            symbol: {"id": f"KRW-{symbol.split('/')[0]}", "symbol": symbol, "base": symbol.split("/")[0], "quote": "KRW",
+                     "baseId": symbol.split("/")[0], "quoteId": "KRW", "active": True, "spot": True, "type": "spot",
+                     "contract": False, "linear": None, "inverse": None, "precision": {}, "limits": {}}
+            for symbol in SYMBOLS
+        }
+
+        async def load_markets(*args, **kwargs):
+            exchange.set_markets(markets)
+            return markets
+
+        async def fetch_balance(*args, **kwargs):
+            return {"free": {"KRW": 1_000_000.0}, "used": {}}
+
+        async def fetch_tickers(symbols=None, *args, **kwargs):
+            now_ms = int(clock.time() * 1000)
+            return {symbol: {"last": _price(symbol, now_ms), "quoteVolume": 1e9 / (rank + 1)}
+                    for rank, symbol in enumerate(symbols or SYMBOLS)}
+
+        async def fetch_ohlcv(symbol, timeframe="1h", since=None, limit=300, *args, **kwargs):
+            now_ms = int(clock.time() * 1000) // HOUR_MS * HOUR_MS
+            timestamp = since if since is not None else now_ms - (limit - 1) * HOUR_MS
+            rows = []
+            while timestamp <= now_ms and len(rows) < limit:
+                open_price, close_price = _price(symbol, timestamp), _price(symbol, timestamp + HOUR_MS)
+                rows.append([timestamp, open_price, max(open_price, close_price) * 1.01,
+                             min(open_price, close_price) * 0.99, close_price, 10.0 + timestamp % 7])
+                timestamp += HOUR_MS
+            return rows
+
+        for method in (load_markets, fetch_balance, fetch_tickers, fetch_ohlcv):
+            setattr(exchange, method.__name__, method)
+
+
+class FakePolicy:
+    """관측 평균으로 행동을 정하는 결정적 정책 (모델 파일 없이 배치 추론 경로를 그대로 탑니다)."""
+
+    def predict(self, batch, deterministic=True):
+        means = np.asarray(batch, dtype=np.float64).reshape(len(batch), -1).mean(axis=1)
+        return (np.floor(np.abs(means) * 1000) % 3).astype(np.int64), None
+
+
+@pytest.fixture
+def trader_env(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # 지표/순자산 파일이 임시 디렉터리에 쓰이도록
+    for regime in ("bullish", "bearish", "sideways"):
+        (tmp_path / f"specialist_agent_{regime}.zip").touch()
+    monkeypatch.setattr(live_trader, "load_policy", lambda model_path: FakePolicy())
+    monkeypatch.setenv("EXECUTION_MODE", "live")
+    monkeypatch.setenv("UPBIT_REAL_ORDERS", "false")
+    return tmp_path
+
+
+def test_replay_reproduces_recorded_decisions(trader_env):
+    log_path = str(trader_env / "session.rec")
+    clock = AcceleratedClock(10000.0, SESSION_START)
+    service = FakeUpbitService(clock)
+    service.recorder = SessionRecorder(log_path, clock=clock)
+    try:
+        recorded = asyncio.run(run_live_session(service, clock, CYCLES))
+    finally:
+        service.recorder.close()
+
+    replayed = asyncio.run(replay_live_session(log_path, speed=10000.0, cycles=CYCLES))
+
+    assert recorded["cycles"] == replayed["cycles"] == CYCLES
+    assert recorded["decisions"] > 0
+    assert replayed["missing"] == 0
+    assert replayed["digest"] == recorded["digest"]
@@ -0,0 +1,100 @@
+"""
+StateStore 스냅샷 복구: 최신 스냅샷 + 이후 체결로 복원한 모의 원장이 전체 체결을 재생한 원장과 같은지 확인합니다.
+"""
+import numpy as np
+import pytest
+
+from core.equity_tracker import StreamingEquityTracker
+from core.state_store import StateStore
+from paper_execution_engine import PaperExecutionEngine, PaperLedger, SIDE_BUY, SIDE_SELL
+
+SYMBOLS = ("BTC/KRW", "ETH/KRW", "XRP/KRW")
+
+
+def _trade(ledger: PaperLedger, store: StateStore, rng, count: int):
+    for _ in range(count):
+        symbol = SYMBOLS[rng.integers(len(SYMBOLS))]
+        price = float(rng.uniform(900, 1100))
+        held = ledger.position(symbol)
+        if held > 0 and rng.random() < 0.4:
+            side, quantity = SIDE_SELL, held * float(rng.uniform(0.2, 1.0))
+        else:
+            side, quantity = SIDE_BUY, float(rng.uniform(0.1, 2.0))
+        fee = quantity * price * 0.0005
+        ledger.apply_fill(0.0, symbol, side, quantity, price, fee, 0.0, 0.0)
+        store.record_fill(symbol, 'buy' if side == SIDE_BUY else 'sell', quantity, price, fee)
+
+
+def _restored_engine(path: str):
+    store = StateStore(path)
+    state = store.load()
+    engine = PaperExecutionEngine(10_000_000, verbose=False)  # 스냅샷이 없으면 시작 자금부터 재생
+    snapshot = state['snapshot']
+    engine.restore(snapshot, store.fills(after_id=snapshot['fill_id'] if snapshot else 0))
+    store.close()
+    return engine, state
+
+
+@pytest.mark.parametrize("snapshots", [0, 1, 3])
+def test_snapshot_restore_matches_full_replay(tmp_path, snapshots):
+    path = str(tmp_path / "state.db")
+    rng = np.random.default_rng(7)
+    ledger = PaperLedger(10_000_000)
+    store = StateStore(path, equity_restore_limit=5)
+    for step in range(snapshots):
+        _trade(ledger, store, rng, 50)
+        for i in range(10):
+            store.record_equity(1_000_000 + i, 1.7e9 + step * 10 + i)
+        store.record_snapshot(*ledger.snapshot(), timestamp=1.7e9 + step)
+    _trade(ledger, store, rng, 50)
+    store.close()
+
+    engine, state = _restored_engine(path)
+    restored = engine.ledger
+    assert state['fills'] == 50  # 최신 스냅샷 이후 체결만 재생
+    assert restored.cash == pytest.approx(ledger.cash, rel=1e-12)
+    for symbol in SYMBOLS:
+        i, j = ledger.symbol_index[symbol], restored.symbol_index[symbol]
+        for name in ("quantity", "avg_price", "realized_pnl", "fees"):
+            assert getattr(restored, name)[j] == pytest.approx(getattr(ledger, name)[i], rel=1e-9, abs=1e-9)
+
+
+def test_snapshot_prunes_covered_fills_and_old_equity(tmp_path):
+    path = str(tmp_path / "state.db")
+    rng = np.random.default_rng(1)
+    ledger = PaperLedger(10_000_000)
+    store = StateStore(path, equity_restore_limit=5)
+    for step in range(3):
+        _trade(ledger, store, rng, 20)
+        for i in range(10):
+            store.record_equity(1_000_000 + i)
+        store.record_snapshot(*ledger.snapshot())
+    store.flush()
+    conn = store._conn
+    # 직전 스냅샷 이후 체결(마지막 20건)과 최신/직전 스냅샷 두 개만 남음
+    assert conn.execute("SELECT COUNT(*) FROM fills").fetchone()[0] == 20
+    assert conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM equity").fetchone()[0] == 5
+    store.close()
+
+
+def test_tracker_peak_survives_equity_pruning(tmp_path):
+    path = str(tmp_path / "state.db")
+    curve = [1_000_000, 1_500_000, 900_000] + [1_000_000 + i * 1000 for i in range(20)]
+    live = StreamingEquityTracker()
+    store = StateStore(path, equity_restore_limit=5)
+    for i, equity in enumerate(curve):
+        live.update(equity, 1.7e9 + i)
+        store.record_equity(equity, 1.7e9 + i, live.peak, live.max_drawdown)
+        store.prune()
+    store.close()
+
+    store = StateStore(path, equity_restore_limit=5)
+    state = store.load()
+    store.close()
+    restored = StreamingEquityTracker()
+    restored.restore(state['equity'], **state['tracker'])
+    assert len(state['equity']) == 5  # 고점(1,500,000)이 있던 기록은 지워짐
+    assert restored.peak == live.peak == 1_500_000
+    assert restored.max_drawdown == pytest.approx(live.max_drawdown)
+    assert restored.drawdown == pytest.approx(live.drawdown)
@@ -0,0 +1,121 @@
+"""
+StopMonitor: on_price/on_prices로 손절·트레일링 스탑이 발동되고, 발동마다 매도가 한 번만 나가며,
+unwatch와 실패한 매도의 재시도 횟수/백오프가 지켜지는지 가짜 실행 엔진으로 확인합니다.
+"""
+import asyncio
+
+from core.stop_monitor import StopMonitor
+
+SYMBOL = "BTC/KRW"
+
+
+class FakeEngine:
+    """매도 호출을 기록합니다. fail이면 매번 예외를 내고, 성공하면 포지션을 닫습니다."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.sells = []
+        self.open_positions = {SYMBOL: {"entry_price": 100.0, "quantity": 1.0}}
+
+    async def create_market_sell_order(self, symbol, quantity):
+        self.sells.append((symbol, quantity))
+        if self.fail:
+            raise RuntimeError("mock: order rejected")
+        self.open_positions.pop(symbol, None)
+        return {"status": "ok", "symbol": symbol, "quantity": quantity}
+
+
+def _run(monitor: StopMonitor, scenario):
+    async def main():
+        monitor.start()
+        try:
+            await scenario()
+            await asyncio.wait_for(monitor._queue.join(), timeout=5)
+        finally:
+            await monitor.stop()
+    asyncio.run(main())
+
+
+async def _feed(monitor: StopMonitor, price: float, ticks: int, interval: float = 0.005):
+    for _ in range(ticks):
+        monitor.on_price(SYMBOL, price)
+        await asyncio.sleep(interval)
+
+
+def test_stop_loss_fires_once():
+    engine = FakeEngine()
+    monitor = StopMonitor(engine, stop_loss_pct=0.05)
+    monitor.watch(SYMBOL, 100.0, 1.0)
+
+    async def scenario():
+        assert monitor.on_price(SYMBOL, 95.5) == []
+        assert [order.key for order in monitor.on_price(SYMBOL, 95.0)] == [SYMBOL]
+        await _feed(monitor, 90.0, 10)
+
+    _run(monitor, scenario)
+    assert engine.sells == [(SYMBOL, 1.0)]
+    assert SYMBOL not in monitor and [fired[0] for fired in monitor.fired] == [SYMBOL]
+
+
+def test_trailing_stop_follows_high():
+    engine = FakeEngine()
+    monitor = StopMonitor(engine, stop_loss_pct=0.05, trailing_pct=0.10)
+    monitor.watch(SYMBOL, 100.0, 1.0)
+
+    async def scenario():
+        assert monitor.on_prices({SYMBOL: 120.0, "ETH/KRW": 1.0}) == []
+        assert monitor.on_price(SYMBOL, 108.5) == []  # 발동가 = 120 * 0.9 = 108
+        assert len(monitor.on_prices({SYMBOL: 108.0})) == 1
+        await _feed(monitor, 100.0, 5)
+
+    _run(monitor, scenario)
+    assert engine.sells == [(SYMBOL, 1.0)]
+
+
+def test_unwatch_prevents_sell():
+    engine = FakeEngine()
+    monitor = StopMonitor(engine, stop_loss_pct=0.05)
+    monitor.watch(SYMBOL, 100.0, 1.0)
+
+    async def scenario():
+        assert monitor.unwatch(SYMBOL).key == SYMBOL
+        await _feed(monitor, 50.0, 5)
+
+    _run(monitor, scenario)
+    assert engine.sells == [] and len(monitor) == 0
+
+
+def test_failing_sell_is_retried_with_backoff_and_bounded():
+    engine = FakeEngine(fail=True)
+    monitor = StopMonitor(engine, stop_loss_pct=0.05, max_sell_attempts=3, retry_backoff=0.02, max_retry_backoff=0.05)
+    monitor.watch(SYMBOL, 100.0, 1.0)
+
+    async def scenario():
+        await _feed(monitor, 90.0, 20)  # 0.1초: 백오프(0.02s) 뒤 재시도 1번 이상, 매 틱 재제출은 아님
+        assert 2 <= len(engine.sells) < 20
+        await _feed(monitor, 90.0, 40)
+
+    _run(monitor, scenario)
+    assert len(engine.sells) == 3  # max_sell_attempts에서 포기
+    assert SYMBOL not in monitor
+
+    # 다음 동기화에서 포지션이 아직 열려 있으면 새 스탑으로 다시 감시
+    monitor.sync(engine.open_positions)
+    assert SYMBOL in monitor
+
+
+def test_unwatch_during_backoff_cancels_retry():
+    engine = FakeEngine(fail=True)
+    monitor = StopMonitor(engine, stop_loss_pct=0.05, retry_backoff=0.05)
+    monitor.watch(SYMBOL, 100.0, 1.0)
+
+    async def scenario():
+        monitor.on_price(SYMBOL, 90.0)
+        await asyncio.wait_for(monitor._queue.join(), timeout=5)
+        assert len(engine.sells) == 1
+        monitor.unwatch(SYMBOL)
+        await _feed(monitor, 90.0, 30)
+
+    _run(monitor, scenario)
+    assert len(engine.sells) == 1
+    assert SYMBOL not in monitor
@@ -1,56 +1,136 @@
-import pandas as pd
+import json
+import os
+from core.clock import SYSTEM_CLOCK
 from core.exchange import UpbitService # Import UpbitService
+from core.rate_limiter import PRIORITY_UNIVERSE
+from constants import UNIVERSE_CACHE_TTL, UNIVERSE_CACHE_PATH
 
-async def get_top_10_coins(upbit_service: UpbitService):
+FALLBACK_UNIVERSE = [
+    "BTC/KRW", "ETH/KRW", "XRP/KRW", "SOL/KRW", "DOGE/KRW",
+    "AVAX/KRW", "ADA/KRW", "LINK/KRW", "ETC/KRW", "TRX/KRW"
+]
+
+# 프로세스 내 랭킹 캐시: 전체 KRW 마켓을 거래대금 내림차순으로 보관하므로 top_n이 달라도 재사용됩니다.
+_ranking_cache = {'timestamp': 0.0, 'ranking': []}
+
+
+def _load_persisted_ranking(cache_path: str) -> dict | None:
+    """디스크에 저장된 마지막 유니버스 랭킹을 읽습니다. 없거나 손상되었으면 None."""
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, 'r') as f:
+            persisted = json.load(f)
+        if persisted.get('ranking'):
+            return persisted
+    except Exception as e:
+        print(f"[WARN] 저장된 유니버스({cache_path}) 로드 실패: {e}")
+    return None
+
+
+def _persist_ranking(cache_path: str, ranking: list, timestamp: float):
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'timestamp': timestamp, 'ranking': ranking}, f)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"[WARN] 유니버스 저장 실패({cache_path}): {e}")
+
+
+async def _fetch_volume_ranking(upbit_service: UpbitService) -> list:
+    """모든 KRW 마켓의 24시간 거래대금을 단 한 번의 fetch_tickers 요청으로 조회하여 내림차순 정렬합니다."""
+    exchange = upbit_service.exchange
+    markets = exchange.markets or await upbit_service.request('market', PRIORITY_UNIVERSE, exchange.load_markets)
+    krw_symbols = [
+        symbol for symbol, market in markets.items()
+        if market.get('quote') == 'KRW' and market.get('active') is not False
+    ]
+    if not krw_symbols:
+        return []
+
+    tickers = await upbit_service.request('ticker', PRIORITY_UNIVERSE, exchange.fetch_tickers, krw_symbols)
+    volume_data = [
+        (symbol, ticker_detail['quoteVolume'])
+        for symbol, ticker_detail in (tickers or {}).items()
+        if ticker_detail and ticker_detail.get('quoteVolume') is not None
+    ]
+    volume_data.sort(key=lambda item: item[1], reverse=True) # 거래량 기준으로 내림차순 정렬
+    return [symbol for symbol, _ in volume_data]
+
+
+async def get_top_coins(
+    upbit_service: UpbitService,
+    top_n: int = 10,
+    ttl_seconds: float = UNIVERSE_CACHE_TTL,
+    cache_path: str | None = UNIVERSE_CACHE_PATH,
+    ranking_cache: dict | None = None,
+    clock=None,
+) -> list:
     """
-    UpbitService를 사용하여 24시간 거래대금 기준으로 상위 10개 코인을 동적으로 선정하여 반환합니다.
+    24시간 거래대금 기준 상위 top_n개 KRW 마켓을 반환합니다.
+
+    랭킹은 fetch_tickers 한 번으로 만들고, ttl_seconds 동안 메모리에 캐시합니다.
+    콜드 스타트 시에는 디스크에 저장된 마지막 유니버스가 TTL 이내이면 그대로 사용하며,
+    조회가 실패하면 저장된 유니버스(없으면 고정 유니버스)로 대체합니다.
+
+    Args:
+        upbit_service (UpbitService): 연결된 Upbit 서비스.
+        top_n (int): 반환할 코인 수 (예: 10, 50, 100).
+        ttl_seconds (float): 랭킹 캐시 유효 시간(초). 0이면 항상 새로 조회합니다.
+        cache_path (str | None): 마지막 유니버스를 저장하는 JSON 파일 경로. None이면 디스크에 읽고 쓰지 않습니다.
+        ranking_cache (dict | None): {'timestamp', 'ranking'} 메모리 캐시. 없으면 프로세스 공유 캐시를 사용합니다.
+        clock: core.clock 인터페이스 (TTL 판단 기준). 없으면 upbit_service의 시계를 사용합니다.
     """
-    print("[INFO] 동적 유니버스 선정을 시작합니다 (24시간 거래대금 기준 상위 10개).")
-    
-    try:
-        all_markets = await upbit_service.exchange.fetch_markets()
-        if not all_markets:
-            print("[WARN] Upbit에서 티커 정보를 가져오지 못했습니다. 고정 유니버스를 반환합니다.")
-            return [
-                "BTC/KRW", "ETH/KRW", "XRP/KRW", "SOL/KRW", "DOGE/KRW",
-                "AVAX/KRW", "ADA/KRW", "LINK/KRW", "ETC/KRW", "TRX/KRW"
-            ]
-
-        volume_data = []
-        for market in all_markets:
-            symbol = market['symbol']
-            if market['quote'] == 'KRW': # KRW 마켓만 고려
-                try:
-                    ticker_detail = await upbit_service.exchange.fetch_ticker(symbol)
-                    if ticker_detail and 'quoteVolume' in ticker_detail:
-                        volume_data.append({'symbol': symbol, 'volume': ticker_detail['quoteVolume']})
-                except Exception:
-                    # fetch_ticker에서 오류가 발생하는 일부 마켓(예: BCH-BTC)은 건너뜁니다.
-                    continue
-        
-        # 거래량 기준으로 내림차순 정렬
-        volume_df = pd.DataFrame(volume_data)
-        if volume_df.empty:
-            print("[WARN] 거래량 데이터를 가져오지 못했습니다. 고정 유니버스를 반환합니다.")
-            return [
-                "BTC/KRW", "ETH/KRW", "XRP/KRW", "SOL/KRW", "DOGE/KRW",
-                "AVAX/KRW", "ADA/KRW", "LINK/KRW", "ETC/KRW", "TRX/KRW"
-            ]
-
-        top_10_coins = volume_df.nlargest(10, 'volume')['symbol'].tolist()
-        
-        print(f"[SUCCESS] 동적 선정 유니버스 (상위 10개): {top_10_coins}")
-        return top_10_coins
+    if ranking_cache is None:
+        ranking_cache = _ranking_cache
+    now = (clock or getattr(upbit_service, 'clock', SYSTEM_CLOCK)).time()
+    if ranking_cache['ranking'] and now - ranking_cache['timestamp'] < ttl_seconds:
+        return ranking_cache['ranking'][:top_n]
 
+    persisted = None
+    if not ranking_cache['ranking'] and cache_path:
+        persisted = _load_persisted_ranking(cache_path)
+        if persisted and now - persisted['timestamp'] < ttl_seconds:
+            ranking_cache.update(persisted)
+            print(f"[INFO] 저장된 유니버스를 사용합니다 ({cache_path}, {now - persisted['timestamp']:.0f}초 전).")
+            return persisted['ranking'][:top_n]
+
+    print(f"[INFO] 동적 유니버스 선정을 시작합니다 (24시간 거래대금 기준 상위 {top_n}개).")
+    try:
+        ranking = await _fetch_volume_ranking(upbit_service)
     except Exception as e:
-        print(f"[ERROR] 동적 유니버스 선정 중 오류 발생: {e}. 고정 유니버스를 반환합니다.")
-        return [
-            "BTC/KRW", "ETH/KRW", "XRP/KRW", "SOL/KRW", "DOGE/KRW",
-            "AVAX/KRW", "ADA/KRW", "LINK/KRW", "ETC/KRW", "TRX/KRW"
-        ]
+        print(f"[ERROR] 동적 유니버스 선정 중 오류 발생: {e}.")
+        ranking = []
+
+    if not ranking:
+        stale = ranking_cache['ranking'] or (persisted or (cache_path and _load_persisted_ranking(cache_path)) or {}).get('ranking')
+        if stale:
+            print("[WARN] 거래량 데이터를 가져오지 못했습니다. 마지막으로 알려진 유니버스를 반환합니다.")
+            return stale[:top_n]
+        print("[WARN] 거래량 데이터를 가져오지 못했습니다. 고정 유니버스를 반환합니다.")
+        return FALLBACK_UNIVERSE[:top_n]
+
+    ranking_cache['timestamp'] = now
+    ranking_cache['ranking'] = ranking
+    if cache_path:
+        _persist_ranking(cache_path, ranking, now)
+
+    top_coins = ranking[:top_n]
+    print(f"[SUCCESS] 동적 선정 유니버스 (상위 {top_n}개): {top_coins}")
+    return top_coins
+
+
+async def get_top_10_coins(upbit_service: UpbitService, **kwargs):
+    """
+    UpbitService를 사용하여 24시간 거래대금 기준으로 상위 10개 코인을 동적으로 선정하여 반환합니다.
+    kwargs(cache_path, ranking_cache, clock)는 get_top_coins로 그대로 전달됩니다.
+    """
+    return await get_top_coins(upbit_service, top_n=10, **kwargs)
 
 if __name__ == '__main__':
     # 이 부분은 UpbitService 인스턴스가 필요하므로 직접 실행하려면 비동기 환경 설정이 필요합니다.
     # 예시를 위해 임시 UpbitService 객체를 생성하거나, 비동기 함수 내에서 호출해야 합니다.
     print("universe_manager.py는 직접 실행 시 UpbitService 인스턴스가 필요합니다.")
-    print("LiveTrader 내에서 호출될 때 정상 작동합니다.")
\ No newline at end of file
+    print("LiveTrader 내에서 호출될 때 정상 작동합니다.")